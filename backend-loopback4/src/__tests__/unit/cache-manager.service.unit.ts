@@ -0,0 +1,143 @@
+import {expect, sinon} from '@loopback/testlab';
+import {CacheManager} from '../../services/cache-manager.service';
+
+describe('CacheManager (unit)', () => {
+  let cache: CacheManager;
+
+  beforeEach(() => {
+    // A private instance per test, without Redis
+    cache = new (CacheManager as any)();
+  });
+
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  describe('getOrSet', () => {
+    it('shares one load between concurrent misses', async () => {
+      const factory = sinon.stub().resolves({id: 'p1'});
+
+      const results = await Promise.all([
+        cache.getOrSet('payment:p1', factory),
+        cache.getOrSet('payment:p1', factory),
+        cache.getOrSet('payment:p1', factory),
+      ]);
+
+      sinon.assert.calledOnce(factory);
+      expect(results).to.eql([{id: 'p1'}, {id: 'p1'}, {id: 'p1'}]);
+      expect(await cache.getOrSet('payment:p1', factory)).to.eql({id: 'p1'});
+      sinon.assert.calledOnce(factory);
+    });
+
+    it('does not cache a missing row', async () => {
+      const factory = sinon.stub();
+      factory.onFirstCall().resolves(null);
+      factory.onSecondCall().resolves({id: 'p1'});
+
+      expect(await cache.getOrSet('payment:p1', factory)).to.be.null();
+      expect(await cache.getOrSet('payment:p1', factory)).to.eql({id: 'p1'});
+      sinon.assert.calledTwice(factory);
+    });
+
+    it('lets the next caller reload after a failed load', async () => {
+      const factory = sinon.stub();
+      factory.onFirstCall().rejects(new Error('db down'));
+      factory.onSecondCall().resolves('ok');
+
+      await expect(cache.getOrSet('stats:x', factory)).to.be.rejectedWith('db down');
+      expect(await cache.getOrSet('stats:x', factory)).to.equal('ok');
+    });
+  });
+
+  describe('invalidateTags', () => {
+    it('drops entries carrying the tag and keeps the rest', async () => {
+      await cache.set('payment:p1', 'one', {tags: [CacheManager.tags.payment('p1')]});
+      await cache.set('payment:p2', 'two', {tags: [CacheManager.tags.payment('p2')]});
+
+      await cache.invalidateTags([CacheManager.tags.payment('p1')]);
+
+      expect(await cache.get('payment:p1')).to.be.null();
+      expect(await cache.get('payment:p2')).to.equal('two');
+    });
+
+    it('indexes tags computed from the loaded value', async () => {
+      await cache.getOrSet('payment:detail:p1', async () => ({booking: {id: 'b1'}}), {
+        tags: row => [CacheManager.tags.booking(row.booking.id)],
+      });
+
+      await cache.invalidateTags([CacheManager.tags.booking('b1')]);
+
+      expect(await cache.get('payment:detail:p1')).to.be.null();
+    });
+
+    it('only discards loads in flight for the invalidated tags', async () => {
+      const first = deferred<string>();
+      const second = deferred<string>();
+      const loadOne = cache.getOrSet('payment:p1', () => first.promise, {tags: ['payment:p1']});
+      const loadTwo = cache.getOrSet('payment:p2', () => second.promise, {tags: ['payment:p2']});
+
+      await cache.invalidateTags(['payment:p1']);
+
+      // A caller after the invalidation starts its own load of p1 ...
+      const reload = sinon.stub().resolves('one (new)');
+      const loadOneAgain = cache.getOrSet('payment:p1', reload, {tags: ['payment:p1']});
+      // ... but still joins the unaffected load of p2
+      const joinTwo = sinon.stub().resolves('unused');
+      const loadTwoAgain = cache.getOrSet('payment:p2', joinTwo, {tags: ['payment:p2']});
+
+      first.resolve('one (old)');
+      second.resolve('two');
+
+      expect(await loadOne).to.equal('one (old)');
+      expect(await loadOneAgain).to.equal('one (new)');
+      expect(await loadTwo).to.equal('two');
+      expect(await loadTwoAgain).to.equal('two');
+      sinon.assert.notCalled(joinTwo);
+      expect(await cache.get('payment:p1')).to.equal('one (new)');
+      expect(await cache.get('payment:p2')).to.equal('two');
+    });
+
+    it('does not cache a load whose key was deleted while it ran', async () => {
+      const load = deferred<string>();
+      const pending = cache.getOrSet('config:x', () => load.promise);
+
+      await cache.delete('config:x');
+      load.resolve('stale');
+
+      expect(await pending).to.equal('stale');
+      expect(await cache.get('config:x')).to.be.null();
+    });
+  });
+
+  describe('invalidatePayment', () => {
+    it('invalidates the payment and its booking', async () => {
+      const invalidateTags = sinon.stub(CacheManager.getInstance(), 'invalidateTags').resolves();
+
+      await CacheManager.invalidatePayment('p1', 42);
+      await CacheManager.invalidatePayment('p2', null);
+
+      sinon.assert.calledWith(invalidateTags.firstCall, ['payment:p1', 'booking:42']);
+      sinon.assert.calledWith(invalidateTags.secondCall, ['payment:p2']);
+    });
+  });
+
+  describe('invalidateBooking', () => {
+    it('invalidates the booking and its session', async () => {
+      const invalidateTags = sinon.stub(CacheManager.getInstance(), 'invalidateTags').resolves();
+
+      await CacheManager.invalidateBooking('b1', 's1');
+      await CacheManager.invalidateBooking('b2');
+
+      sinon.assert.calledWith(invalidateTags.firstCall, ['booking:b1', 'session:s1']);
+      sinon.assert.calledWith(invalidateTags.secondCall, ['booking:b2']);
+    });
+  });
+
+  function deferred<T>() {
+    let resolve!: (value: T) => void;
+    const promise = new Promise<T>(r => {
+      resolve = r;
+    });
+    return {promise, resolve};
+  }
+});
@@ -0,0 +1,136 @@
+import {
+  createStubInstance,
+  expect,
+  sinon,
+  StubbedInstanceWithSinonAccessor,
+} from '@loopback/testlab';
+import {db} from '../../config/database.config';
+import {
+  BookingRepository,
+  CourseRepository,
+  CourseSessionRepository,
+  LocationRepository,
+} from '../../repositories';
+import {BookingService} from '../../services/booking/booking.service';
+import {CourseSessionCapacityService} from '../../services/course-session-capacity.service';
+
+describe('CourseSessionCapacityService (unit)', () => {
+  let sessionRepository: StubbedInstanceWithSinonAccessor<CourseSessionRepository>;
+  let bookingRepository: StubbedInstanceWithSinonAccessor<BookingRepository>;
+  let courseRepository: StubbedInstanceWithSinonAccessor<CourseRepository>;
+  let locationRepository: StubbedInstanceWithSinonAccessor<LocationRepository>;
+  let service: CourseSessionCapacityService;
+
+  beforeEach(() => {
+    sessionRepository = createStubInstance(CourseSessionRepository);
+    bookingRepository = createStubInstance(BookingRepository);
+    courseRepository = createStubInstance(CourseRepository);
+    locationRepository = createStubInstance(LocationRepository);
+    service = new CourseSessionCapacityService(
+      sessionRepository,
+      bookingRepository,
+      courseRepository,
+      locationRepository,
+    );
+  });
+
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  describe('getAvailableSessions', () => {
+    it('counts bookings for every session with one grouped query', async () => {
+      sessionRepository.stubs.find.resolves([
+        givenSession('s1', 12),
+        givenSession('s2', 12),
+        givenSession('s3', 8),
+      ]);
+      bookingRepository.stubs.countActiveBySession.resolves(new Map([
+        ['s1', 12],
+        ['s2', 10],
+      ]));
+
+      const sessions = await service.getAvailableSessions({});
+
+      sinon.assert.calledOnce(bookingRepository.stubs.countActiveBySession);
+      sinon.assert.calledWith(bookingRepository.stubs.countActiveBySession, ['s1', 's2', 's3']);
+      expect(sessions.map(session => [session.sessionId, session.availableSpots, session.status])).to.eql([
+        ['s1', 0, 'FULL'],
+        ['s2', 2, 'ALMOST_FULL'],
+        ['s3', 8, 'AVAILABLE'],
+      ]);
+    });
+
+    it('drops full sessions when only available ones are requested', async () => {
+      sessionRepository.stubs.find.resolves([givenSession('s1', 12), givenSession('s2', 12)]);
+      bookingRepository.stubs.countActiveBySession.resolves(new Map([['s1', 12]]));
+
+      const sessions = await service.getAvailableSessions({showOnlyAvailable: true});
+
+      expect(sessions.map(session => session.sessionId)).to.eql(['s2']);
+    });
+
+    it('filters on course ids resolved from the course type', async () => {
+      courseRepository.stubs.find.resolves([{id: 'c1'} as any, {id: 'c2'} as any]);
+      sessionRepository.stubs.find.resolves([]);
+      bookingRepository.stubs.countActiveBySession.resolves(new Map());
+
+      await service.getAvailableSessions({courseType: 'First Aid at Work'});
+
+      const filter = sessionRepository.stubs.find.firstCall.args[0]!;
+      expect(filter.where).to.containDeep({courseId: {inq: ['c1', 'c2']}});
+    });
+
+    it('returns nothing without querying sessions when no course matches', async () => {
+      courseRepository.stubs.find.resolves([]);
+
+      const sessions = await service.getAvailableSessions({courseType: 'Unknown'});
+
+      expect(sessions).to.eql([]);
+      sinon.assert.notCalled(sessionRepository.stubs.find);
+      sinon.assert.notCalled(bookingRepository.stubs.countActiveBySession);
+    });
+  });
+
+  describe('checkAvailability', () => {
+    it('serves cached availability until a booking changes the session', async () => {
+      // The cache is process-wide, so keep this session id to this test
+      const sessionId = `s-${Date.now()}-${Math.random()}`;
+      sessionRepository.stubs.findById.resolves(givenSession(sessionId, 12));
+      bookingRepository.stubs.count.onFirstCall().resolves({count: 11});
+      bookingRepository.stubs.count.onSecondCall().resolves({count: 12});
+      sinon.stub(db, 'transaction').resolves({id: 'b1', sessionId} as any);
+
+      expect(await service.checkAvailability(sessionId)).to.eql({
+        available: true, currentCount: 11, remainingSpots: 1,
+      });
+      await service.checkAvailability(sessionId);
+      sinon.assert.calledOnce(bookingRepository.stubs.count);
+
+      await BookingService.createBooking({
+        userId: 'u1',
+        sessionId,
+        attendees: [{name: 'Ada Lovelace', email: 'ada@example.com'}],
+        termsAccepted: true,
+      });
+
+      expect(await service.checkAvailability(sessionId)).to.eql({
+        available: false, currentCount: 12, remainingSpots: 0,
+      });
+      sinon.assert.calledTwice(bookingRepository.stubs.count);
+    });
+  });
+
+  function givenSession(id: string, maxParticipants: number): any {
+    return {
+      id,
+      startDate: new Date('2025-03-03T09:00:00Z'),
+      endDate: new Date('2025-03-03T15:00:00Z'),
+      startTime: '09:00',
+      endTime: '15:00',
+      maxParticipants,
+      course: {name: 'First Aid at Work'},
+      location: {name: 'Leeds'},
+    };
+  }
+});
@@ -0,0 +1,79 @@
+import {expect, sinon} from '@loopback/testlab';
+import {SQL} from 'drizzle-orm';
+import {PgDialect} from 'drizzle-orm/pg-core';
+import {db} from '../../config/database.config';
+import {DashboardRollupService} from '../../services/dashboard-rollup.service';
+
+describe('DashboardRollupService (unit)', () => {
+  const dialect = new PgDialect();
+  let execute: sinon.SinonStub;
+
+  beforeEach(() => {
+    execute = sinon.stub(db, 'execute');
+  });
+
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  describe('getTotals', () => {
+    it('bounds the period by UTC day', async () => {
+      execute.resolves({rows: [{count: '3', revenue: '225.00', attendees: '4'}]});
+
+      // Half past midnight in London summer time is still the previous UTC day
+      const totals = await DashboardRollupService.getTotals(
+        new Date('2025-07-01T00:30:00+01:00'),
+        new Date('2025-07-08T00:00:00Z'),
+      );
+
+      const query = dialect.sqlToQuery(execute.firstCall.args[0] as SQL);
+      expect(query.params).to.eql(['2025-06-30', '2025-07-08']);
+      expect(totals).to.eql({count: 3, revenue: 225, attendees: 4});
+    });
+
+    it('reports zeros for a period without bookings', async () => {
+      execute.resolves({rows: []});
+
+      const totals = await DashboardRollupService.getTotals(new Date('2025-07-01T00:00:00Z'));
+
+      expect(totals).to.eql({count: 0, revenue: 0, attendees: 0});
+    });
+  });
+
+  describe('verify', () => {
+    it('returns nothing when the rollups match bookings', async () => {
+      const totals = {booked: '12', completed: '3', cancelled: '2', attendees: '20', revenue: '1500.00', refunded: '75.00'};
+      execute.resolves({rows: [{rollup: totals, live: {...totals, booked: 12, revenue: 1500}}]});
+
+      expect(await DashboardRollupService.verify()).to.eql([]);
+    });
+
+    it('lists the fields that drifted from bookings', async () => {
+      execute.resolves({
+        rows: [{
+          rollup: {booked: '10', completed: '3', cancelled: '2', attendees: '18', revenue: '1425.00', refunded: '0'},
+          live: {booked: '12', completed: '3', cancelled: '2', attendees: '20', revenue: '1575.00', refunded: '0'},
+        }],
+      });
+
+      expect(await DashboardRollupService.verify()).to.eql([
+        {field: 'booked', rollup: 10, live: 12},
+        {field: 'attendees', rollup: 18, live: 20},
+        {field: 'revenue', rollup: 1425, live: 1575},
+      ]);
+    });
+  });
+
+  describe('rebuild', () => {
+    it('recomputes the rollups in one transaction', async () => {
+      const txExecute = sinon.stub().resolves({rows: [{rows: 42}]});
+      sinon.stub(db, 'transaction').callsFake((run: any) => run({execute: txExecute}));
+
+      const result = await DashboardRollupService.rebuild();
+
+      expect(result).to.eql({rows: 42});
+      const query = dialect.sqlToQuery(txExecute.firstCall.args[0] as SQL);
+      expect(query.sql).to.match(/rebuild_booking_daily_rollups\(\)/);
+    });
+  });
+});
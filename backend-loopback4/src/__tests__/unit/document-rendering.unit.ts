@@ -0,0 +1,177 @@
+import {RestApplication} from '@loopback/rest';
+import {
+  Client,
+  createRestAppClient,
+  expect,
+  givenHttpServerConfig,
+} from '@loopback/testlab';
+import * as fs from 'fs';
+import * as os from 'os';
+import * as path from 'path';
+import {sendPdfFile} from '../../services/pdf/pdf-download';
+import {runDocumentBatch} from '../../services/pdf/render-batch';
+import {DocumentRenderPool} from '../../services/pdf/render-pool';
+
+describe('document rendering (unit)', () => {
+  describe('runDocumentBatch', () => {
+    it('keeps at most `concurrency` documents in flight', async () => {
+      let inFlight = 0;
+      let maxInFlight = 0;
+
+      const result = await runDocumentBatch([1, 2, 3, 4, 5, 6, 7], async item => {
+        inFlight++;
+        maxInFlight = Math.max(maxInFlight, inFlight);
+        await new Promise(resolve => setTimeout(resolve, 5));
+        inFlight--;
+        return item;
+      }, {concurrency: 3});
+
+      expect(maxInFlight).to.equal(3);
+      expect(result).to.containDeep({total: 7, succeeded: 7, failed: 0});
+    });
+
+    it('carries on past a failed document and reports each outcome', async () => {
+      const outcomes: Array<[string, string | undefined, string | undefined]> = [];
+
+      const result = await runDocumentBatch(['a', 'b', 'c'], async item => {
+        if (item === 'b') {
+          throw new Error('render failed');
+        }
+        return item.toUpperCase();
+      }, {
+        concurrency: 1,
+        onResult: (item, rendered, error) => outcomes.push([item, rendered, error?.message]),
+      });
+
+      expect(result).to.containDeep({total: 3, succeeded: 2, failed: 1});
+      expect(outcomes).to.eql([
+        ['a', 'A', undefined],
+        ['b', undefined, 'render failed'],
+        ['c', 'C', undefined],
+      ]);
+    });
+
+    it('finishes an empty batch without calling the handler', async () => {
+      const result = await runDocumentBatch([], async () => {
+        throw new Error('unexpected call');
+      }, {concurrency: 4});
+
+      expect(result).to.containDeep({total: 0, succeeded: 0, failed: 0});
+    });
+  });
+
+  describe('DocumentRenderPool', () => {
+    it('renders on the calling thread when the pool size is 0', async () => {
+      const pool = new DocumentRenderPool(0);
+
+      await expect(pool.render('unknown' as any, {})).to.be.rejectedWith(
+        'Unknown document template: unknown',
+      );
+      expect(pool.getStats()).to.eql({workers: 0, busy: 0, queued: 0, rendered: 0, failed: 0});
+    });
+
+    it('renders on a worker thread and keeps the worker after a failed document', async () => {
+      const pool = new DocumentRenderPool(1);
+      try {
+        await expect(pool.render('unknown' as any, {})).to.be.rejectedWith(
+          'Unknown document template: unknown',
+        );
+
+        const pdf = await pool.render('certificate', {
+          certificateName: 'Ada Lovelace',
+          courseName: 'Emergency First Aid at Work',
+          courseDate: '2025-03-03',
+          location: 'Leeds',
+          certificateNumber: 'RFT-EFAW-2025-0001',
+          issueDate: '2025-03-03',
+          expiryDate: '2028-03-03',
+          trainerName: 'Lex Hughes',
+        });
+
+        expect(pdf.subarray(0, 5).toString()).to.equal('%PDF-');
+        expect(pool.getStats()).to.eql({workers: 1, busy: 0, queued: 0, rendered: 1, failed: 1});
+      } finally {
+        await pool.close();
+      }
+    });
+
+    it('rejects renders once closed', async () => {
+      const pool = new DocumentRenderPool(2);
+      await pool.close();
+
+      await expect(pool.render('invoice', {})).to.be.rejectedWith('Document render pool is closed');
+      expect(pool.getStats().workers).to.equal(0);
+    });
+  });
+
+  describe('sendPdfFile', () => {
+    const CONTENT = '%PDF-1.4\n% stored document used by the download tests\n%%EOF\n';
+    let app: RestApplication;
+    let client: Client;
+    let filePath: string;
+
+    before(async () => {
+      filePath = path.join(fs.mkdtempSync(path.join(os.tmpdir(), 'pdf-download-')), 'invoice.pdf');
+      fs.writeFileSync(filePath, CONTENT);
+
+      app = new RestApplication({rest: givenHttpServerConfig()});
+      app.handler(({response}) => sendPdfFile(response, filePath, 'INV-0001.pdf'));
+      await app.start();
+      client = createRestAppClient(app);
+    });
+
+    after(async () => {
+      await app.stop();
+      fs.rmSync(path.dirname(filePath), {recursive: true, force: true});
+    });
+
+    it('sends the file as an attachment with a validator', async () => {
+      const response = await client.get('/invoices/1/download').expect(200);
+
+      expect(response.headers).to.containDeep({
+        'content-type': 'application/pdf',
+        'content-disposition': 'attachment; filename="INV-0001.pdf"',
+        'content-length': String(CONTENT.length),
+        'accept-ranges': 'bytes',
+        'cache-control': 'private, no-cache',
+      });
+      expect(response.headers.etag).to.be.a.String();
+    });
+
+    it('answers a request carrying the current ETag with 304', async () => {
+      const {headers} = await client.get('/invoices/1/download').expect(200);
+
+      const response = await client
+        .get('/invoices/1/download')
+        .set('If-None-Match', headers.etag)
+        .expect(304);
+
+      expect(response.headers['content-length']).to.be.undefined();
+    });
+
+    it('serves a byte range with 206', async () => {
+      const response = await client
+        .get('/invoices/1/download')
+        .set('Range', 'bytes=0-7')
+        .expect(206);
+
+      expect(response.headers['content-range']).to.equal(`bytes 0-7/${CONTENT.length}`);
+      expect(response.headers['content-length']).to.equal('8');
+    });
+
+    it('reports a missing file as 404', async () => {
+      const missing = new RestApplication({rest: givenHttpServerConfig()});
+      missing.handler(async ({response}) => {
+        await sendPdfFile(response, `${filePath}.missing`, 'gone.pdf').catch(error => {
+          response.status(error.statusCode).end();
+        });
+      });
+      await missing.start();
+      try {
+        await createRestAppClient(missing).get('/invoices/2/download').expect(404);
+      } finally {
+        await missing.stop();
+      }
+    });
+  });
+});
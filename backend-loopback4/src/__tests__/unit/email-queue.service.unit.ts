@@ -0,0 +1,126 @@
+import {expect, sinon} from '@loopback/testlab';
+import EmailService = require('../../services/email.service');
+
+describe('EmailService queue (unit)', () => {
+  let db: {query: sinon.SinonStub};
+  let service: any;
+  let sendMail: sinon.SinonStub;
+
+  beforeEach(() => {
+    db = {query: sinon.stub().resolves({rows: [], rowCount: 0})};
+    service = new EmailService({pool: false});
+    sendMail = sinon.stub(service.transporter, 'sendMail');
+    sinon.stub(console, 'log');
+    sinon.stub(console, 'warn');
+    sinon.stub(console, 'error');
+  });
+
+  afterEach(() => {
+    sinon.restore();
+    service.close();
+  });
+
+  describe('claimEmailBatch', () => {
+    it('claims due rows with SKIP LOCKED and returns them by priority', async () => {
+      db.query.resolves({
+        rows: [
+          givenEmail({id: 1, priority: 5, scheduled_for: '2025-03-01T10:00:00Z'}),
+          givenEmail({id: 2, priority: 9, scheduled_for: '2025-03-01T11:00:00Z'}),
+          givenEmail({id: 3, priority: 5, scheduled_for: '2025-03-01T09:00:00Z'}),
+        ],
+      });
+
+      const claimed = await service.claimEmailBatch(db, 50, 'worker-1');
+
+      const [query, params] = db.query.firstCall.args;
+      expect(query).to.match(/SET status = 'sending'/);
+      expect(query).to.match(/FOR UPDATE SKIP LOCKED/);
+      expect(params).to.eql([50, 'worker-1']);
+      expect(claimed.map((email: any) => email.id)).to.eql([2, 3, 1]);
+    });
+  });
+
+  describe('deliverClaimedEmail', () => {
+    it('marks a delivered email sent and clears the claim', async () => {
+      sendMail.resolves({messageId: 'm1'});
+
+      const sent = await service.deliverClaimedEmail(db, givenEmail({attempts: 1}));
+
+      expect(sent).to.be.true();
+      const [query, params] = db.query.firstCall.args;
+      expect(query).to.match(/locked_by = NULL/);
+      expect(params).to.eql(['sent', 7]);
+      expect(service.getMetrics()).to.containDeep({sent: 1, failed: 0, retried: 0});
+    });
+
+    it('returns a failed email to pending with backoff while attempts remain', async () => {
+      sendMail.rejects(new Error('421 try again later'));
+      // Priority 5 allows 4 attempts from a 60s base
+      const email = givenEmail({priority: 5, attempts: 2});
+
+      const sent = await service.deliverClaimedEmail(db, email);
+
+      expect(sent).to.be.false();
+      const [query, [lastError, delayMs, id]] = db.query.firstCall.args;
+      expect(query).to.match(/SET status = 'pending'/);
+      expect(lastError).to.equal('421 try again later');
+      expect(id).to.equal(7);
+      expect(delayMs).to.be.within(120000, 180000);
+      expect(service.getMetrics()).to.containDeep({sent: 0, failed: 0, retried: 1});
+    });
+
+    it('dead-letters an email once its priority runs out of attempts', async () => {
+      sendMail.rejects(new Error('550 mailbox unavailable'));
+
+      const sent = await service.deliverClaimedEmail(db, givenEmail({priority: 5, attempts: 4}));
+
+      expect(sent).to.be.false();
+      const [, params] = db.query.firstCall.args;
+      expect(params).to.eql(['failed', '550 mailbox unavailable', 7]);
+      expect(service.getMetrics()).to.containDeep({sent: 0, failed: 1, retried: 0});
+    });
+  });
+
+  describe('processEmailQueue', () => {
+    it('sends the claimed batch and counts the outcomes', async () => {
+      db.query.onFirstCall().resolves({rows: [givenEmail({id: 1}), givenEmail({id: 2})]});
+      sendMail.onFirstCall().resolves({messageId: 'm1'});
+      sendMail.onSecondCall().rejects(new Error('timeout'));
+
+      const result = await service.processEmailQueue(db, {batchSize: 2, concurrency: 2, workerId: 'worker-1'});
+
+      expect(result).to.eql({processed: 2, success: 1, failed: 1});
+    });
+  });
+
+  describe('retry policy', () => {
+    it('gives higher priorities more attempts and shorter delays', () => {
+      expect(EmailService.getRetryPolicy(9)).to.containDeep({maxAttempts: 5, baseDelayMs: 30000});
+      expect(EmailService.getRetryPolicy(undefined)).to.containDeep({maxAttempts: 4, baseDelayMs: 60000});
+      expect(EmailService.getRetryPolicy(1)).to.containDeep({maxAttempts: 3, baseDelayMs: 300000});
+    });
+
+    it('caps the backoff at one hour', () => {
+      const policy = EmailService.getRetryPolicy(1);
+
+      expect(EmailService.getRetryDelay(policy, 10)).to.equal(60 * 60 * 1000);
+    });
+  });
+
+  function givenEmail(overrides: Record<string, any> = {}) {
+    return {
+      id: 7,
+      to_email: 'client@example.com',
+      from_email: 'bookings@example.com',
+      from_name: 'React Fast Training',
+      subject: 'Booking confirmed',
+      body_html: '<p>Confirmed</p>',
+      body_text: 'Confirmed',
+      template_id: null,
+      priority: 5,
+      attempts: 1,
+      scheduled_for: '2025-03-01T10:00:00Z',
+      ...overrides,
+    };
+  }
+});
@@ -0,0 +1,200 @@
+import {expect, sinon} from '@loopback/testlab';
+import {BookingAggregate, BookingStatus} from '../../domain/aggregates/booking-aggregate';
+import {DomainEvent, EventStore} from '../../services/event-sourcing/event-store';
+
+describe('EventStore (unit)', () => {
+  const BOOKING_ID = '7f6c1f0e-2d4b-4c55-9d7a-0b1e6c2a9f10';
+
+  let dataSource: {execute: sinon.SinonStub; beginTransaction: sinon.SinonStub};
+  let trx: {execute: sinon.SinonStub; commit: sinon.SinonStub; rollback: sinon.SinonStub};
+  let monitoring: {recordMetric: sinon.SinonStub};
+  let store: EventStore;
+  let currentVersion: number;
+
+  beforeEach(() => {
+    currentVersion = 0;
+    trx = {
+      execute: sinon.stub().callsFake(async (query: string) =>
+        /MAX\(sequence_number\)/.test(query) ? [{version: currentVersion}] : []),
+      commit: sinon.stub().resolves(),
+      rollback: sinon.stub().resolves(),
+    };
+    dataSource = {
+      execute: sinon.stub().resolves([]),
+      beginTransaction: sinon.stub().resolves(trx),
+    };
+    monitoring = {recordMetric: sinon.stub()};
+    store = new EventStore(dataSource as any, monitoring);
+  });
+
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  describe('appendEvents', () => {
+    it('writes every event with one multi-row insert', async () => {
+      currentVersion = 4;
+
+      const appended = await store.appendEvents(BOOKING_ID, 'Booking', [
+        givenEvent('BookingConfirmed'),
+        givenEvent('PaymentReceived'),
+        givenEvent('AttendeeAdded'),
+      ], 4);
+
+      const inserts = trx.execute.getCalls().filter(call => /INSERT INTO event_store/.test(call.args[0]));
+      expect(inserts).to.have.length(1);
+      expect(inserts[0].args[1]).to.have.length(30);
+      expect(appended.map(event => event.sequenceNumber)).to.eql([5, 6, 7]);
+      sinon.assert.calledOnce(trx.commit);
+    });
+
+    it('rolls back on a concurrent change', async () => {
+      currentVersion = 5;
+
+      await expect(
+        store.appendEvents(BOOKING_ID, 'Booking', [givenEvent('BookingCancelled')], 4),
+      ).to.be.rejectedWith(/Concurrency conflict/);
+
+      sinon.assert.calledOnce(trx.rollback);
+      sinon.assert.notCalled(trx.commit);
+    });
+
+    it('snapshots when an append crosses the snapshot frequency', async () => {
+      currentVersion = store.snapshotFrequency - 2;
+      const state = {id: BOOKING_ID, status: BookingStatus.PAID};
+
+      await store.appendEvents(BOOKING_ID, 'Booking', [
+        givenEvent('PaymentReceived'),
+        givenEvent('AttendeeAdded'),
+        givenEvent('AttendeeAdded'),
+      ], currentVersion, {snapshotState: () => state});
+
+      const snapshot = dataSource.execute.getCalls().find(call => /INSERT INTO event_snapshots/.test(call.args[0]));
+      expect(snapshot).to.not.be.undefined();
+      expect(snapshot!.args[1].slice(0, 4)).to.eql([
+        BOOKING_ID, 'Booking', store.snapshotFrequency + 1, JSON.stringify(state),
+      ]);
+    });
+
+    it('still reports a committed append when the snapshot state throws', async () => {
+      sinon.stub(console, 'error');
+      currentVersion = store.snapshotFrequency - 1;
+
+      const appended = await store.appendEvents(BOOKING_ID, 'Booking', [givenEvent('AttendeeAdded')], currentVersion, {
+        snapshotState: () => {
+          throw new Error('state unavailable');
+        },
+      });
+
+      expect(appended).to.have.length(1);
+      sinon.assert.calledOnce(trx.commit);
+      sinon.assert.notCalled(trx.rollback);
+      sinon.assert.neverCalledWithMatch(dataSource.execute, /INSERT INTO event_snapshots/);
+    });
+
+    it('does not snapshot between boundaries', async () => {
+      currentVersion = 1;
+
+      await store.appendEvents(BOOKING_ID, 'Booking', [givenEvent('AttendeeAdded')], 1, {
+        snapshotState: () => ({}),
+      });
+
+      expect(store.crossesSnapshotBoundary(1, 2)).to.be.false();
+      sinon.assert.neverCalledWithMatch(dataSource.execute, /INSERT INTO event_snapshots/);
+    });
+  });
+
+  describe('handler dispatch', () => {
+    it('returns before handlers finish and handles one aggregate in sequence order', async () => {
+      const handled: number[] = [];
+      store.subscribe('*', async event => {
+        // Earlier events take longer, so only the queue keeps them in order
+        await new Promise(resolve => setTimeout(resolve, 10 - event.sequenceNumber));
+        handled.push(event.sequenceNumber);
+      });
+
+      await store.appendEvents(BOOKING_ID, 'Booking', [givenEvent('BookingConfirmed'), givenEvent('PaymentReceived')]);
+      currentVersion = 2;
+      await store.appendEvents(BOOKING_ID, 'Booking', [givenEvent('AttendeeAdded')]);
+
+      expect(handled).to.eql([]);
+      await store.drainHandlers();
+      expect(handled).to.eql([1, 2, 3]);
+    });
+  });
+
+  describe('snapshot replay', () => {
+    it('reads only the events after the latest snapshot', async () => {
+      const snapshotState = {
+        id: BOOKING_ID,
+        version: 50,
+        status: BookingStatus.CONFIRMED,
+        totalAmount: 150,
+        attendees: [],
+        paidAmount: 0,
+        refundedAmount: 0,
+        confirmedAt: '2025-03-01T10:00:00.000Z',
+      };
+      dataSource.execute.withArgs(sinon.match(/FROM event_snapshots/)).resolves([{
+        aggregate_id: BOOKING_ID,
+        aggregate_type: 'Booking',
+        version: 50,
+        state: snapshotState,
+        timestamp: new Date(),
+      }]);
+      dataSource.execute.withArgs(sinon.match(/FROM event_store/)).resolves([
+        givenRow(51, 'PaymentReceived', {paymentId: 'pay_1', amount: 150, paidAt: new Date('2025-03-02T09:00:00Z')}),
+      ]);
+
+      const stream = await store.getEventStream(BOOKING_ID, true);
+      const booking = BookingAggregate.loadFromHistory(stream.events, stream.snapshot?.state);
+
+      const eventsQuery = dataSource.execute.getCalls().find(call => /FROM event_store/.test(call.args[0]))!;
+      expect(eventsQuery.args[1]).to.eql([BOOKING_ID, 51]);
+      expect(stream.version).to.equal(51);
+      expect(booking.version).to.equal(51);
+      expect(booking.status).to.equal(BookingStatus.PAID);
+      expect(booking.paidAmount).to.equal(150);
+      expect(booking.confirmedAt).to.eql(new Date('2025-03-01T10:00:00.000Z'));
+    });
+
+    it('replays the full history when there is no snapshot', async () => {
+      dataSource.execute.withArgs(sinon.match(/FROM event_store/)).resolves([
+        givenRow(1, 'BookingConfirmed', {confirmedAt: new Date('2025-03-01T10:00:00Z')}),
+      ]);
+
+      const stream = await store.getEventStream(BOOKING_ID, true);
+
+      expect(stream.snapshot).to.be.undefined();
+      const eventsQuery = dataSource.execute.getCalls().find(call => /FROM event_store/.test(call.args[0]))!;
+      expect(eventsQuery.args[1]).to.eql([BOOKING_ID]);
+      expect(BookingAggregate.loadFromHistory(stream.events).version).to.equal(1);
+    });
+  });
+
+  function givenEvent(eventType: string): Omit<DomainEvent, 'eventId' | 'sequenceNumber' | 'timestamp'> {
+    return {
+      eventType,
+      eventVersion: 1,
+      aggregateId: BOOKING_ID,
+      aggregateType: 'Booking',
+      userId: 'user-1',
+      payload: {},
+    };
+  }
+
+  function givenRow(sequenceNumber: number, eventType: string, payload: object) {
+    return {
+      event_id: `event-${sequenceNumber}`,
+      event_type: eventType,
+      event_version: 1,
+      aggregate_id: BOOKING_ID,
+      aggregate_type: 'Booking',
+      sequence_number: sequenceNumber,
+      timestamp: new Date(),
+      user_id: 'user-1',
+      payload,
+      metadata: null,
+    };
+  }
+});
@@ -0,0 +1,189 @@
+import {expect, sinon} from '@loopback/testlab';
+import {
+  IngestionBuffer,
+  IngestionBufferOptions,
+} from '../../services/ingestion/ingestion-buffer';
+import trackingEvents = require('../../services/ingestion/tracking-events');
+
+interface Counter {
+  key: string;
+  count: number;
+}
+
+describe('IngestionBuffer (unit)', () => {
+  const open: IngestionBuffer<any>[] = [];
+
+  afterEach(async () => {
+    sinon.restore();
+    // Closing clears any retry timer left behind
+    await Promise.all(open.splice(0).map(buffer => buffer.close()));
+  });
+
+  describe('aggregation', () => {
+    it('merges records that share a key while they wait', async () => {
+      const write = sinon.stub().resolves();
+      const buffer = givenCounterBuffer({write});
+
+      buffer.push({key: 'a', count: 1});
+      buffer.push({key: 'b', count: 1});
+      buffer.push({key: 'a', count: 2});
+      await buffer.flush();
+
+      sinon.assert.calledOnce(write);
+      expect(write.firstCall.args[0]).to.eql([{key: 'a', count: 3}, {key: 'b', count: 1}]);
+      expect(buffer.getMetrics()).to.containDeep({received: 3, accepted: 3, merged: 1, written: 2});
+    });
+
+    it('merges a failed batch with records pushed since and retries it', async () => {
+      sinon.stub(console, 'error');
+      const write = sinon.stub();
+      write.onFirstCall().rejects(new Error('db down'));
+      write.onSecondCall().resolves();
+      const buffer = givenCounterBuffer({write});
+
+      buffer.push({key: 'a', count: 1});
+      buffer.push({key: 'b', count: 1});
+      await buffer.flush();
+      buffer.push({key: 'a', count: 5});
+      await buffer.flush();
+
+      expect(write.secondCall.args[0]).to.eql([{key: 'a', count: 6}, {key: 'b', count: 1}]);
+      expect(buffer.getMetrics()).to.containDeep({failedBatches: 1, written: 2, lost: 0});
+    });
+
+    it('drops the oldest key when full under drop-oldest', async () => {
+      const write = sinon.stub().resolves();
+      const buffer = givenCounterBuffer({write, maxBuffered: 2, dropPolicy: 'drop-oldest'});
+
+      buffer.push({key: 'a', count: 1});
+      buffer.push({key: 'b', count: 1});
+      // An existing key still merges at capacity
+      expect(buffer.push({key: 'b', count: 1})).to.be.true();
+      expect(buffer.push({key: 'c', count: 1})).to.be.true();
+      await buffer.flush();
+
+      expect(write.firstCall.args[0]).to.eql([{key: 'b', count: 2}, {key: 'c', count: 1}]);
+      expect(buffer.getMetrics()).to.containDeep({dropped: 1, merged: 1});
+    });
+  });
+
+  describe('drop policy', () => {
+    it('rejects the incoming record when full under drop-newest', async () => {
+      const write = sinon.stub().resolves();
+      const buffer = givenBuffer<number>({write, maxBuffered: 2, dropPolicy: 'drop-newest'});
+
+      expect([1, 2, 3].map(n => buffer.push(n))).to.eql([true, true, false]);
+      await buffer.flush();
+
+      expect(write.firstCall.args[0]).to.eql([1, 2]);
+      expect(buffer.getMetrics()).to.containDeep({received: 3, accepted: 2, dropped: 1});
+    });
+
+    it('discards the oldest record when full under drop-oldest', async () => {
+      const write = sinon.stub().resolves();
+      const buffer = givenBuffer<number>({write, maxBuffered: 2, dropPolicy: 'drop-oldest'});
+
+      [1, 2, 3, 4].forEach(n => buffer.push(n));
+      await buffer.flush();
+
+      expect(write.firstCall.args[0]).to.eql([3, 4]);
+      expect(buffer.getMetrics().dropped).to.equal(2);
+    });
+
+    it('keeps failed records ahead of newer ones and counts what no longer fits as lost', async () => {
+      sinon.stub(console, 'error');
+      let failWrite!: (error: Error) => void;
+      const write = sinon.stub();
+      write.onFirstCall().returns(new Promise((resolve, reject) => {
+        failWrite = reject;
+      }));
+      write.onSecondCall().resolves();
+      const buffer = givenBuffer<number>({write, maxBuffered: 3});
+
+      [1, 2, 3].forEach(n => buffer.push(n));
+      const flushing = buffer.flush();
+      // Arrive while the first write is in flight
+      buffer.push(4);
+      buffer.push(5);
+      failWrite(new Error('db down'));
+      await flushing;
+      await buffer.flush();
+
+      // Requeued 1-3 were put back ahead of 4 and 5, then trimmed to capacity
+      expect(write.secondCall.args[0]).to.eql([3, 4, 5]);
+      expect(buffer.getMetrics()).to.containDeep({lost: 2, written: 3});
+    });
+
+    it('writes full batches separately and requeues from the failed one', async () => {
+      sinon.stub(console, 'error');
+      const write = sinon.stub();
+      write.onFirstCall().resolves();
+      write.onSecondCall().rejects(new Error('db down'));
+      const buffer = givenBuffer<number>({write, maxBatchSize: 2});
+
+      [1, 2, 3, 4, 5].forEach(n => buffer.push(n));
+      await buffer.flush();
+
+      expect(write.firstCall.args[0]).to.eql([1, 2]);
+      expect(write.secondCall.args[0]).to.eql([3, 4]);
+      expect(buffer.size).to.equal(3);
+    });
+  });
+
+  describe('close', () => {
+    it('counts records it could not write as lost and refuses new ones', async () => {
+      sinon.stub(console, 'error');
+      const buffer = new IngestionBuffer<number>({
+        write: sinon.stub().rejects(new Error('db down')),
+        flushIntervalMs: 60000,
+      });
+
+      buffer.push(1);
+      buffer.push(2);
+      await buffer.close();
+
+      expect(buffer.push(3)).to.be.false();
+      expect(buffer.getMetrics()).to.containDeep({lost: 2, dropped: 1, buffered: 0});
+    });
+  });
+
+  describe('tracking events', () => {
+    it('buckets by the time the server received the event', () => {
+      const receivedAt = new Date('2025-06-01T10:59:30.000Z');
+
+      const counter = trackingEvents.toCounter({
+        event: 'page_view',
+        page: '/courses',
+        timestamp: '2020-01-01T00:00:00.000Z',
+        deviceType: 'mobile',
+      }, receivedAt);
+
+      expect(counter).to.eql({
+        bucketStart: '2025-06-01T10:00:00.000Z',
+        event: 'page_view',
+        page: '/courses',
+        deviceType: 'mobile',
+        count: 1,
+        firstSeenAt: '2025-06-01T10:59:30.000Z',
+        lastSeenAt: '2025-06-01T10:59:30.000Z',
+      });
+    });
+  });
+
+  function givenBuffer<T>(options: IngestionBufferOptions<T>) {
+    // Long enough that only explicit flushes write
+    const buffer = new IngestionBuffer<T>({flushIntervalMs: 60000, ...options});
+    open.push(buffer);
+    return buffer;
+  }
+
+  function givenCounterBuffer(options: Omit<IngestionBufferOptions<Counter>, 'aggregate'>) {
+    return givenBuffer<Counter>({
+      ...options,
+      aggregate: {
+        key: counter => counter.key,
+        merge: (existing, counter) => ({...existing, count: existing.count + counter.count}),
+      },
+    });
+  }
+});
@@ -0,0 +1,143 @@
+import {expect, sinon} from '@loopback/testlab';
+import {createRateLimiter} from '../../middleware/rate-limit.middleware';
+import {
+  getRateLimiter,
+  MemoryRateLimitStore,
+  RateLimiter,
+} from '../../services/rate-limit/rate-limiter';
+import {RateLimitService} from '../../services/rate-limit.service';
+
+describe('sliding-window rate limiter (unit)', () => {
+  const WINDOW = 60000;
+  // Aligned to a window boundary
+  const T0 = WINDOW * 1000;
+
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  describe('MemoryRateLimitStore', () => {
+    it('allows up to the limit within a window', () => {
+      const store = new MemoryRateLimitStore();
+
+      const results = [1, 2, 3, 4].map(() => store.consume('ip', 3, WINDOW, 1, false, T0 + 1000));
+
+      expect(results.map(result => result.allowed)).to.eql([true, true, true, false]);
+      expect(results[3]).to.containDeep({count: 3, remaining: 0, retryAfterMs: 59000});
+    });
+
+    it('weights the previous window by how much of it is still in range', () => {
+      const store = new MemoryRateLimitStore();
+      for (let i = 0; i < 3; i++) {
+        store.consume('ip', 3, WINDOW, 1, false, T0 + 1000);
+      }
+
+      // Halfway through the next window, 3 * 0.5 of the old hits still count
+      const halfway = T0 + WINDOW + WINDOW / 2;
+      const next = store.consume('ip', 3, WINDOW, 1, false, halfway);
+      const after = store.consume('ip', 3, WINDOW, 1, false, halfway);
+
+      expect(next).to.containDeep({allowed: true, count: 2.5});
+      expect(after.allowed).to.be.false();
+      // One more hit fits once a third of the previous window has slid out
+      expect(after.retryAfterMs).to.equal(10000);
+    });
+
+    it('forgets hits older than the previous window', () => {
+      const store = new MemoryRateLimitStore();
+      for (let i = 0; i < 3; i++) {
+        store.consume('ip', 3, WINDOW, 1, false, T0);
+      }
+
+      const result = store.consume('ip', 3, WINDOW, 1, false, T0 + 2 * WINDOW);
+
+      expect(result).to.containDeep({allowed: true, count: 1});
+    });
+
+    it('peeks without recording and forces hits past the limit', () => {
+      const store = new MemoryRateLimitStore();
+
+      store.consume('login', 2, WINDOW, 0, false, T0);
+      expect(store.consume('login', 2, WINDOW, 0, false, T0).count).to.equal(0);
+
+      for (let i = 0; i < 3; i++) {
+        store.consume('login', 2, WINDOW, 1, true, T0);
+      }
+      expect(store.consume('login', 2, WINDOW, 0, false, T0)).to.containDeep({allowed: false, count: 3});
+    });
+
+    it('evicts the least recently checked key at capacity', () => {
+      const store = new MemoryRateLimitStore({maxKeys: 2});
+
+      store.consume('a', 1, WINDOW, 1, false, T0);
+      store.consume('b', 1, WINDOW, 1, false, T0);
+      store.consume('a', 1, WINDOW, 0, false, T0);
+      store.consume('c', 1, WINDOW, 1, false, T0);
+
+      expect(store.size).to.equal(2);
+      expect(store.evictions).to.equal(1);
+      // 'b' was evicted, so it starts again from zero; 'a' kept its hit
+      expect(store.consume('b', 1, WINDOW, 0, false, T0).allowed).to.be.true();
+      expect(store.consume('a', 1, WINDOW, 0, false, T0).allowed).to.be.false();
+    });
+  });
+
+  describe('RateLimiter', () => {
+    it('falls back to in-process limits when the store fails', async () => {
+      sinon.stub(console, 'error');
+      const limiter = new RateLimiter({
+        store: {
+          consume: sinon.stub().rejects(new Error('ECONNREFUSED')),
+          reset: sinon.stub().resolves(),
+        } as any,
+      });
+
+      const first = await limiter.consume('ip', {limit: 1, windowMs: WINDOW});
+      const second = await limiter.consume('ip', {limit: 1, windowMs: WINDOW});
+
+      expect([first.allowed, second.allowed]).to.eql([true, false]);
+    });
+  });
+
+  describe('createRateLimiter', () => {
+    it('keeps limiters with different windows apart for the same client', async () => {
+      const consume = sinon.spy(getRateLimiter(), 'consume');
+      const req = {ip: `10.0.0.${Math.floor(Math.random() * 250)}-${Date.now()}`, socket: {}} as any;
+      const res = {setHeader: sinon.stub()} as any;
+      const hourly = createRateLimiter({name: 'hourly', windowMs: 60 * 60 * 1000, maxRequests: 1});
+      const perSecond = createRateLimiter({windowMs: 1000, maxRequests: 5});
+
+      const first = sinon.stub();
+      await hourly(req, res, first);
+      await perSecond(req, res, sinon.stub());
+      const second = sinon.stub();
+      await hourly(req, res, second);
+
+      expect(consume.getCalls().map(call => call.args[0])).to.eql([
+        `mw:hourly:${req.ip}`,
+        `mw:5per1000:${req.ip}`,
+        `mw:hourly:${req.ip}`,
+      ]);
+      sinon.assert.calledWithExactly(first);
+      // The per-second limiter did not reset the hourly window
+      expect(second.firstCall.args[0].statusCode).to.equal(429);
+    });
+  });
+
+  describe('RateLimitService', () => {
+    it('counts failed attempts without recording checks', async () => {
+      const service = new RateLimitService();
+      const key = `test:${Date.now()}:${Math.random()}`;
+
+      await service.increment(key, WINDOW);
+      await service.increment(key, WINDOW);
+
+      expect(await service.getCount(key, WINDOW)).to.equal(2);
+      expect(await service.getCount(key, WINDOW)).to.equal(2);
+      expect(await service.checkLimit(key, 2, WINDOW)).to.equal(2);
+
+      await service.reset(key);
+      expect(await service.getCount(key, WINDOW)).to.equal(0);
+    });
+  });
+});
@@ -0,0 +1,139 @@
+import {expect, sinon} from '@loopback/testlab';
+import {SQL} from 'drizzle-orm';
+import {PgDialect} from 'drizzle-orm/pg-core';
+import {db} from '../../config/database.config';
+import {payments} from '../../db/schema';
+import {BookingService} from '../../services/booking/booking.service';
+import {
+  afterCreatedAtCursor,
+  CreatedAtCursor,
+  DEFAULT_EXPORT_PAGE_SIZE,
+  paginateByKeyset,
+} from '../../services/export/streaming-export';
+
+describe('streaming export (unit)', () => {
+  const dialect = new PgDialect();
+
+  // Same millisecond, different microseconds: a Date cursor cannot tell these apart
+  const SHARED = '2025-03-01 10:00:00.123456';
+  const LATER_MICROS = '2025-03-01 10:00:00.123789';
+
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  describe('paginateByKeyset', () => {
+    it('exports rows sharing one timestamp across a page boundary exactly once', async () => {
+      const table = [
+        {createdAt: LATER_MICROS, id: 'f'},
+        {createdAt: SHARED, id: 'e'},
+        {createdAt: SHARED, id: 'd'},
+        {createdAt: SHARED, id: 'c'},
+        {createdAt: SHARED, id: 'b'},
+        {createdAt: '2025-03-01 09:59:59.999999', id: 'a'},
+      ];
+      const cursors: Array<CreatedAtCursor | null> = [];
+
+      const rows = paginateByKeyset<string>(async (after, limit) => {
+        cursors.push(after);
+        return table
+          .filter(row => !after || row.createdAt < after.createdAt ||
+            (row.createdAt === after.createdAt && row.id < after.id))
+          .slice(0, limit)
+          .map(row => ({row: row.id, cursor: row}));
+      }, 2);
+
+      const exported: string[] = [];
+      for await (const id of rows) {
+        exported.push(id);
+      }
+
+      expect(exported).to.eql(['f', 'e', 'd', 'c', 'b', 'a']);
+      expect(cursors).to.eql([
+        null,
+        {createdAt: SHARED, id: 'e'},
+        {createdAt: SHARED, id: 'c'},
+        {createdAt: '2025-03-01 09:59:59.999999', id: 'a'},
+      ]);
+    });
+
+    it('stops after a short page without another query', async () => {
+      const fetchPage = sinon.stub().resolves([{row: 1, cursor: {createdAt: SHARED, id: 'a'}}]);
+
+      const exported: number[] = [];
+      for await (const row of paginateByKeyset<number>(fetchPage, 2)) {
+        exported.push(row);
+      }
+
+      expect(exported).to.eql([1]);
+      sinon.assert.calledOnce(fetchPage);
+    });
+  });
+
+  describe('afterCreatedAtCursor', () => {
+    it('compares the text timestamp and id as one row value', () => {
+      const query = dialect.sqlToQuery(
+        afterCreatedAtCursor(payments.createdAt, payments.id, {createdAt: SHARED, id: 'p1'}),
+      );
+
+      expect(query.sql).to.equal('("payments"."created_at", "payments"."id") < ($1, $2)');
+      expect(query.params).to.eql([SHARED, 'p1']);
+    });
+  });
+
+  describe('BookingService.iterateBookingsForExport', () => {
+    it('filters in SQL and resumes from the exact cursor of the last row', async () => {
+      const firstPage = Array.from({length: DEFAULT_EXPORT_PAGE_SIZE}, (_, i) =>
+        givenBookingRow(`b${String(1000 - i)}`, SHARED));
+      const pages = [firstPage, [givenBookingRow('b0001', SHARED)]];
+      const wheres: SQL[] = [];
+
+      sinon.stub(db, 'select').callsFake((() => {
+        const builder: any = {
+          from: () => builder,
+          leftJoin: () => builder,
+          where: (where: SQL) => {
+            wheres.push(where);
+            return builder;
+          },
+          orderBy: () => builder,
+          limit: () => Promise.resolve(pages.shift() ?? []),
+        };
+        return builder;
+      }) as any);
+
+      const exported = [];
+      for await (const row of BookingService.iterateBookingsForExport({search: 'smith', courseType: 'EFAW'})) {
+        exported.push(row);
+      }
+
+      expect(exported).to.have.length(DEFAULT_EXPORT_PAGE_SIZE + 1);
+      expect(exported[0]).to.not.have.property('cursorCreatedAt');
+
+      const first = dialect.sqlToQuery(wheres[0]);
+      expect(first.sql).to.match(/ilike/);
+      expect(first.params).to.containDeep(['EFAW', '%smith%']);
+
+      const second = dialect.sqlToQuery(wheres[1]);
+      expect(second.sql).to.match(/\("bookings"\."created_at", "bookings"\."id"\) < \(\$\d+, \$\d+\)/);
+      expect(second.params.slice(-2)).to.eql([SHARED, 'b501']);
+    });
+  });
+
+  function givenBookingRow(id: string, cursorCreatedAt: string) {
+    return {
+      id,
+      bookingReference: `REF${id}`,
+      status: 'confirmed',
+      numberOfAttendees: 1,
+      totalAmount: '75.00',
+      createdAt: new Date('2025-03-01T10:00:00.123Z'),
+      clientName: 'Jo Smith',
+      clientEmail: 'jo@example.com',
+      courseType: 'EFAW',
+      sessionDate: '2025-03-10',
+      paymentStatus: 'succeeded',
+      cursorCreatedAt,
+    };
+  }
+});
@@ -0,0 +1,182 @@
+import {expect, sinon} from '@loopback/testlab';
+import {
+  KeyedDispatcher,
+  nextRetry,
+  orderingKeyFor,
+  retryDelayMs,
+} from '../../services/webhooks/webhook-dispatcher';
+
+describe('webhook dispatcher (unit)', () => {
+  afterEach(() => {
+    sinon.restore();
+  });
+
+  describe('KeyedDispatcher', () => {
+    it('runs events for one key one at a time in sequence order', async () => {
+      const dispatcher = new KeyedDispatcher({concurrency: 4});
+      const handled: string[] = [];
+      const first = deferred();
+
+      dispatcher.dispatch({id: 'evt_1', key: 'pi:1', sequence: 5, run: async () => {
+        await first.promise;
+        handled.push('evt_1');
+      }});
+      // Delivered out of order while evt_1 is still running
+      for (const [id, sequence] of [['evt_4', 30], ['evt_2', 10], ['evt_3', 20]] as const) {
+        dispatcher.dispatch({id, key: 'pi:1', sequence, run: async () => {
+          handled.push(id);
+        }});
+      }
+
+      expect(dispatcher.getMetrics()).to.containDeep({active: 1, queued: 3});
+      first.resolve();
+      await dispatcher.onIdle();
+
+      expect(handled).to.eql(['evt_1', 'evt_2', 'evt_3', 'evt_4']);
+    });
+
+    it('runs different keys concurrently up to the limit', async () => {
+      const dispatcher = new KeyedDispatcher({concurrency: 2});
+      let inFlight = 0;
+      let maxInFlight = 0;
+
+      for (let i = 0; i < 6; i++) {
+        dispatcher.dispatch({id: `evt_${i}`, key: `pi:${i}`, run: async () => {
+          inFlight++;
+          maxInFlight = Math.max(maxInFlight, inFlight);
+          await new Promise(resolve => setTimeout(resolve, 5));
+          inFlight--;
+        }});
+      }
+      await dispatcher.onIdle();
+
+      expect(maxInFlight).to.equal(2);
+      expect(dispatcher.getMetrics().completed).to.equal(6);
+    });
+
+    it('lets other keys take a turn between events of a busy key', async () => {
+      const dispatcher = new KeyedDispatcher({concurrency: 1});
+      const handled: string[] = [];
+      const record = (id: string) => async () => {
+        handled.push(id);
+      };
+
+      dispatcher.dispatch({id: 'a1', key: 'a', sequence: 1, run: record('a1')});
+      dispatcher.dispatch({id: 'a2', key: 'a', sequence: 2, run: record('a2')});
+      dispatcher.dispatch({id: 'a3', key: 'a', sequence: 3, run: record('a3')});
+      dispatcher.dispatch({id: 'b1', key: 'b', sequence: 1, run: record('b1')});
+      await dispatcher.onIdle();
+
+      expect(handled).to.eql(['a1', 'b1', 'a2', 'a3']);
+    });
+
+    it('ignores an event id already queued or running', async () => {
+      const dispatcher = new KeyedDispatcher();
+      const release = deferred();
+      const run = sinon.stub().callsFake(() => release.promise);
+
+      expect(dispatcher.dispatch({id: 'evt_1', key: 'pi:1', run})).to.be.true();
+      expect(dispatcher.dispatch({id: 'evt_1', key: 'pi:1', run})).to.be.false();
+      release.resolve();
+      await dispatcher.onIdle();
+
+      sinon.assert.calledOnce(run);
+      expect(dispatcher.getMetrics()).to.containDeep({dispatched: 1, duplicates: 1});
+      // Once finished the id may be dispatched again, e.g. by the retry scheduler
+      expect(dispatcher.dispatch({id: 'evt_1', key: 'pi:1', run})).to.be.true();
+      await dispatcher.onIdle();
+      sinon.assert.calledTwice(run);
+    });
+
+    it('reports a failed event and carries on with its key', async () => {
+      const onError = sinon.stub();
+      const dispatcher = new KeyedDispatcher({onError});
+      const next = sinon.stub().resolves();
+
+      dispatcher.dispatch({id: 'evt_1', key: 'pi:1', sequence: 1, run: async () => {
+        throw new Error('handler failed');
+      }});
+      dispatcher.dispatch({id: 'evt_2', key: 'pi:1', sequence: 2, run: next});
+      await dispatcher.onIdle();
+
+      sinon.assert.calledOnce(onError);
+      expect(onError.firstCall.args[0].message).to.equal('handler failed');
+      expect(onError.firstCall.args[1].id).to.equal('evt_1');
+      sinon.assert.calledOnce(next);
+      expect(dispatcher.getMetrics()).to.containDeep({completed: 1, failed: 1});
+    });
+
+    it('rejects events past maxQueued and after close', async () => {
+      const dispatcher = new KeyedDispatcher({concurrency: 1, maxQueued: 2});
+      const release = deferred();
+      const run = () => release.promise;
+
+      const accepted = ['evt_1', 'evt_2', 'evt_3', 'evt_4'].map(id =>
+        dispatcher.dispatch({id, key: 'pi:1', run}));
+      const closing = dispatcher.close();
+      const afterClose = dispatcher.dispatch({id: 'evt_5', key: 'pi:2', run});
+      release.resolve();
+
+      // evt_1 is running, so two more fit in the queue
+      expect(accepted).to.eql([true, true, true, false]);
+      expect(afterClose).to.be.false();
+      // Queued events are handed back for the retry scheduler
+      expect(await closing).to.eql(['evt_2', 'evt_3']);
+      expect(dispatcher.getMetrics()).to.containDeep({rejected: 2, completed: 1, queued: 0});
+    });
+  });
+
+  describe('orderingKeyFor', () => {
+    it('orders charges and refunds with their PaymentIntent', () => {
+      expect(orderingKeyFor(givenEvent('payment_intent.succeeded', {id: 'pi_1'}))).to.equal('pi:pi_1');
+      expect(orderingKeyFor(givenEvent('charge.refunded', {
+        id: 'ch_1', object: 'charge', payment_intent: 'pi_1',
+      }))).to.equal('pi:pi_1');
+      expect(orderingKeyFor(givenEvent('refund.updated', {
+        id: 're_1', object: 'refund', payment_intent: {id: 'pi_1'},
+      }))).to.equal('pi:pi_1');
+    });
+
+    it('falls back to the charge, the customer, then the event', () => {
+      expect(orderingKeyFor(givenEvent('charge.succeeded', {id: 'ch_1', object: 'charge'}))).to.equal('ch:ch_1');
+      expect(orderingKeyFor(givenEvent('refund.created', {id: 're_1', charge: 'ch_1'}))).to.equal('ch:ch_1');
+      expect(orderingKeyFor(givenEvent('customer.updated', {id: 'cus_1'}))).to.equal('cus:cus_1');
+      expect(orderingKeyFor(givenEvent('charge.dispute.created', {id: 'dp_1', object: 'dispute'})))
+        .to.equal('dispute:dp_1');
+      expect(orderingKeyFor({id: 'evt_9', type: 'ping', data: {object: {}}})).to.equal('evt:evt_9');
+    });
+  });
+
+  describe('retries', () => {
+    it('backs off exponentially with jitter up to the cap', () => {
+      const random = sinon.stub(Math, 'random').returns(0);
+
+      expect([1, 2, 3].map(attempt => retryDelayMs(attempt, 1000))).to.eql([1000, 2000, 4000]);
+      expect(retryDelayMs(20, 1000, 60000)).to.equal(60000);
+
+      random.returns(0.5);
+      expect(retryDelayMs(2, 1000)).to.equal(2500);
+    });
+
+    it('dead-letters once the attempts are used up', () => {
+      sinon.stub(Math, 'random').returns(0);
+
+      expect(nextRetry(1, 3, 1000)).to.eql({deadLetter: false, delayMs: 1000});
+      expect(nextRetry(2, 3, 1000)).to.eql({deadLetter: false, delayMs: 2000});
+      expect(nextRetry(3, 3, 1000)).to.eql({deadLetter: true, delayMs: 0});
+      expect(nextRetry(4, 3, 1000).deadLetter).to.be.true();
+    });
+  });
+
+  function givenEvent(type: string, object: object) {
+    return {id: `evt_${type}`, type, data: {object}};
+  }
+
+  function deferred() {
+    let resolve!: () => void;
+    const promise = new Promise<void>(r => {
+      resolve = r;
+    });
+    return {promise, resolve};
+  }
+});
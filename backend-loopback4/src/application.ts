@@ -17,6 +17,9 @@ import {AuthorizationComponent} from '@loopback/authorization';
 import path from 'path';
 import {MySequence} from './sequence';
 import {SECURITY_SCHEME_SPEC} from './utils/security-spec';
+import {closeAllIngestionBuffers} from './services/ingestion/ingestion-buffer';
+import {getRedisClient} from './services/rate-limit/rate-limiter';
+import type {StripeWebhookService} from './services/stripe-webhook.service';
 
 export {ApplicationConfig};
 
@@ -58,6 +61,36 @@ export class ReactFastTrainingApiApplication extends BootMixin(
       require('./services/rate-limit.service').RateLimitService,
     );
 
+    // Redis for services that talk to it directly (DistributedLockService).
+    // This is the rate limiter's client, so the process opens one connection;
+    // nothing is bound when REDIS_URL is not set.
+    const redis = getRedisClient();
+    if (redis) {
+      this.bind('datasources.redis').to(redis);
+    }
+
+    // Write out buffered analytics on graceful shutdown
+    this.onStop(() => closeAllIngestionBuffers());
+
+    // Resume Stripe webhook events left pending or due a retry, and hand
+    // queued ones back to the table on shutdown
+    this.onStart(async () => {
+      try {
+        const webhooks = await this.get<StripeWebhookService>('services.StripeWebhookService');
+        webhooks.startRetryScheduler();
+      } catch (error) {
+        console.error('Stripe webhook retry scheduler not started:', error);
+      }
+    });
+    this.onStop(async () => {
+      try {
+        const webhooks = await this.get<StripeWebhookService>('services.StripeWebhookService');
+        await webhooks.stopRetryScheduler();
+      } catch (error) {
+        console.error('Failed to stop Stripe webhook dispatcher:', error);
+      }
+    });
+
     // Configure JWT
     this.bind(TokenServiceBindings.TOKEN_SECRET).to(
       process.env.JWT_SECRET || 'react-fast-training-secret-key',
@@ -65,7 +65,7 @@ export class AdminAuthController {
   ): Promise<AdminLoginResponse> {
     // Check rate limiting
     const rateLimitKey = `login_${credentials.email}`;
-    const attempts = await this.rateLimitService.checkLimit(rateLimitKey, 5, 900000); // 5 attempts per 15 minutes
+    const attempts = await this.rateLimitService.getCount(rateLimitKey, 900000); // 5 failed attempts per 15 minutes
     
     if (attempts >= 5) {
       throw new HttpErrors.TooManyRequests('Too many login attempts. Please try again later.');
@@ -80,7 +80,7 @@ export class AdminAuthController {
     });
 
     if (!user) {
-      await this.rateLimitService.increment(rateLimitKey);
+      await this.rateLimitService.increment(rateLimitKey, 900000);
       await this.logFailedLogin(credentials.email);
       throw new HttpErrors.Unauthorized('Invalid credentials');
     }
@@ -92,7 +92,7 @@ export class AdminAuthController {
     );
 
     if (!validPassword) {
-      await this.rateLimitService.increment(rateLimitKey);
+      await this.rateLimitService.increment(rateLimitKey, 900000);
       await this.logFailedLogin(credentials.email, user.id);
       throw new HttpErrors.Unauthorized('Invalid credentials');
     }
@@ -8,12 +8,21 @@ import {
   response,
   RestBindings,
   Request,
+  Response,
+  HttpErrors,
 } from '@loopback/rest';
 import { inject } from '@loopback/core';
 import { authenticate } from '@loopback/authentication';
 import { authorize } from '@loopback/authorization';
 import { PaymentManagementService } from '../../services/payment-management.service';
 import { ActivityLogService } from '../../services/activity-log.service';
+import { InvoiceService } from '../../services/invoice.service';
+import { BookingService } from '../../services/booking/booking.service';
+import {
+  ExportFormat,
+  isExportFormat,
+  streamExport,
+} from '../../services/export/streaming-export';
 
 interface PaymentSearchRequest {
   reference?: string;
@@ -366,7 +375,7 @@ export class AdminPaymentsController {
         customer: r.user ? {
           id: r.user.id,
           email: r.user.email,
-          name: `${r.user.firstName} ${r.user.lastName}`.trim(),
+          name: r.user.name,
         } : null,
       }));
     } catch (error) {
@@ -447,75 +456,215 @@ export class AdminPaymentsController {
   }
 
   /**
-   * Export payments to CSV
+   * Export payments to CSV or NDJSON, streamed straight to the response
    */
   @get('/api/admin/payments/export', {
     responses: {
       '200': {
-        description: 'CSV file download',
+        description: 'CSV or NDJSON file download',
         content: {
           'text/csv': {
             schema: { type: 'string' },
           },
+          'application/x-ndjson': {
+            schema: { type: 'string' },
+          },
         },
       },
     },
   })
   async exportPayments(
+    @inject(RestBindings.Http.RESPONSE) response: Response,
     @param.query.string('fromDate') fromDate?: string,
     @param.query.string('toDate') toDate?: string,
-  ): Promise<any> {
+    @param.query.string('status') status?: string,
+    @param.query.string('format') format?: string,
+  ): Promise<Response> {
     try {
+      const exportFormat = this.parseExportFormat(format);
       const searchParams = {
         fromDate: fromDate ? new Date(fromDate) : undefined,
         toDate: toDate ? new Date(toDate) : undefined,
-        page: 1,
-        limit: 10000, // Get all records for export
+        status,
       };
 
-      const result = await this.paymentService.searchPayments(searchParams);
-
-      // Convert to CSV
-      const headers = [
-        'Payment Reference',
-        'Date',
-        'Customer Name',
-        'Customer Email',
-        'Booking Reference',
-        'Amount',
-        'Method',
-        'Status',
-        'Invoice Number',
-      ];
-
-      const rows = result.payments.map(p => [
-        p.paymentReference,
-        new Date(p.paymentDate).toLocaleDateString(),
-        p.customer?.name || '',
-        p.customer?.email || '',
-        p.booking?.bookingReference || '',
-        p.amount,
-        p.paymentMethod,
-        p.status,
-        p.invoiceNumber || '',
-      ]);
-
-      const csv = [
-        headers.join(','),
-        ...rows.map(row => row.map(cell => `"${cell}"`).join(',')),
-      ].join('\n');
+      const count = await streamExport(response, {
+        filename: `payments-${new Date().toISOString().split('T')[0]}`,
+        format: exportFormat,
+        columns: [
+          { header: 'Payment Reference', value: p => p.paymentReference },
+          { header: 'Date', value: p => new Date(p.paymentDate).toLocaleDateString() },
+          { header: 'Customer Name', value: p => p.customer?.name || '' },
+          { header: 'Customer Email', value: p => p.customer?.email || '' },
+          { header: 'Booking Reference', value: p => p.booking?.bookingReference || '' },
+          { header: 'Amount', value: p => p.amount },
+          { header: 'Method', value: p => p.paymentMethod },
+          { header: 'Status', value: p => p.status },
+          { header: 'Invoice Number', value: p => p.invoiceNumber || '' },
+        ],
+        rows: this.paymentService.iteratePaymentsForExport(searchParams),
+      });
 
       // Log activity
       await this.activityLogService.log({
         adminId: (this.request as any).user?.id,
         action: 'export_payments',
         entityType: 'payment',
-        newValues: { fromDate, toDate, count: rows.length },
+        newValues: { fromDate, toDate, status, format: exportFormat, count },
       });
 
-      return csv;
+      return response;
     } catch (error) {
       console.error('Error exporting payments:', error);
+      if (response.headersSent) {
+        // Headers are gone; the truncated download is the only signal left
+        response.destroy(error as Error);
+        return response;
+      }
+      throw error;
+    }
+  }
+
+  /**
+   * Export invoices to CSV or NDJSON, streamed straight to the response
+   */
+  @get('/api/admin/invoices/export', {
+    responses: {
+      '200': {
+        description: 'CSV or NDJSON file download',
+        content: {
+          'text/csv': {
+            schema: { type: 'string' },
+          },
+          'application/x-ndjson': {
+            schema: { type: 'string' },
+          },
+        },
+      },
+    },
+  })
+  async exportInvoices(
+    @inject(RestBindings.Http.RESPONSE) response: Response,
+    @param.query.string('fromDate') fromDate?: string,
+    @param.query.string('toDate') toDate?: string,
+    @param.query.string('status') status?: string,
+    @param.query.string('format') format?: string,
+  ): Promise<Response> {
+    try {
+      const exportFormat = this.parseExportFormat(format);
+
+      const count = await streamExport(response, {
+        filename: `invoices-${new Date().toISOString().split('T')[0]}`,
+        format: exportFormat,
+        columns: [
+          { header: 'Invoice Number', value: i => i.invoiceNumber },
+          { header: 'Issue Date', value: i => new Date(i.issueDate).toLocaleDateString() },
+          { header: 'Customer Name', value: i => i.user?.name ?? '' },
+          { header: 'Customer Email', value: i => i.user?.email || '' },
+          { header: 'Booking Reference', value: i => i.booking?.bookingReference || '' },
+          { header: 'Subtotal', value: i => i.subtotal },
+          { header: 'Tax', value: i => i.taxAmount },
+          { header: 'Total', value: i => i.totalAmount },
+          { header: 'Status', value: i => i.status },
+        ],
+        rows: InvoiceService.iterateInvoicesForExport({
+          status,
+          startDate: fromDate ? new Date(fromDate) : undefined,
+          endDate: toDate ? new Date(toDate) : undefined,
+        }),
+      });
+
+      // Log activity
+      await this.activityLogService.log({
+        adminId: (this.request as any).user?.id,
+        action: 'export_invoices',
+        entityType: 'invoice',
+        newValues: { fromDate, toDate, status, format: exportFormat, count },
+      });
+
+      return response;
+    } catch (error) {
+      console.error('Error exporting invoices:', error);
+      if (response.headersSent) {
+        response.destroy(error as Error);
+        return response;
+      }
+      throw error;
+    }
+  }
+
+  /**
+   * Export bookings to CSV or NDJSON, streamed straight to the response
+   */
+  @get('/api/admin/bookings/export', {
+    responses: {
+      '200': {
+        description: 'CSV or NDJSON file download',
+        content: {
+          'text/csv': {
+            schema: { type: 'string' },
+          },
+          'application/x-ndjson': {
+            schema: { type: 'string' },
+          },
+        },
+      },
+    },
+  })
+  async exportBookings(
+    @inject(RestBindings.Http.RESPONSE) response: Response,
+    @param.query.string('fromDate') fromDate?: string,
+    @param.query.string('toDate') toDate?: string,
+    @param.query.string('status') status?: string,
+    @param.query.string('search') search?: string,
+    @param.query.string('courseType') courseType?: string,
+    @param.query.string('format') format?: string,
+  ): Promise<Response> {
+    try {
+      const exportFormat = this.parseExportFormat(format);
+
+      const count = await streamExport(response, {
+        filename: `bookings-${new Date().toISOString().split('T')[0]}`,
+        format: exportFormat,
+        columns: [
+          { header: 'Booking Reference', value: b => b.bookingReference },
+          { header: 'Client Name', value: b => b.clientName || 'Unknown' },
+          { header: 'Client Email', value: b => b.clientEmail || '' },
+          { header: 'Course Type', value: b => b.courseType || 'Unknown' },
+          {
+            header: 'Session Date',
+            value: b => b.sessionDate ? new Date(b.sessionDate).toLocaleDateString() : ''
+          },
+          { header: 'Attendees', value: b => b.numberOfAttendees },
+          { header: 'Status', value: b => b.status },
+          { header: 'Amount', value: b => `£${Number(b.totalAmount || 0).toFixed(2)}` },
+          { header: 'Payment Status', value: b => b.paymentStatus || 'pending' },
+          { header: 'Created Date', value: b => b.createdAt ? new Date(b.createdAt).toLocaleDateString() : '' },
+        ],
+        rows: BookingService.iterateBookingsForExport({
+          status,
+          search,
+          courseType,
+          dateFrom: fromDate ? new Date(fromDate) : undefined,
+          dateTo: toDate ? new Date(toDate) : undefined,
+        }),
+      });
+
+      // Log activity
+      await this.activityLogService.log({
+        adminId: (this.request as any).user?.id,
+        action: 'export_bookings',
+        entityType: 'booking',
+        newValues: { fromDate, toDate, status, search, courseType, format: exportFormat, count },
+      });
+
+      return response;
+    } catch (error) {
+      console.error('Error exporting bookings:', error);
+      if (response.headersSent) {
+        response.destroy(error as Error);
+        return response;
+      }
       throw error;
     }
   }
@@ -617,4 +766,14 @@ export class AdminPaymentsController {
       throw error;
     }
   }
-}
\ No newline at end of file
+
+  private parseExportFormat(format?: string): ExportFormat {
+    if (format === undefined) {
+      return 'csv';
+    }
+    if (!isExportFormat(format)) {
+      throw new HttpErrors.BadRequest(`Unsupported export format: ${format}`);
+    }
+    return format;
+  }
+}
@@ -0,0 +1,80 @@
+import {repository} from '@loopback/repository';
+import {
+  get,
+  post,
+  param,
+  response,
+  HttpErrors,
+  RestBindings,
+  Response,
+} from '@loopback/rest';
+import {inject} from '@loopback/core';
+import {authenticate} from '@loopback/authentication';
+import {authorize} from '@loopback/authorization';
+import {SecurityBindings, UserProfile} from '@loopback/security';
+import {BookingRepository, CertificateRepository} from '../repositories';
+import {CertificateService} from '../services/certificate.service';
+
+export class CertificateController {
+  constructor(
+    @repository(CertificateRepository)
+    public certificateRepository: CertificateRepository,
+    @repository(BookingRepository)
+    public bookingRepository: BookingRepository,
+    @inject('services.CertificateService')
+    private certificateService: CertificateService,
+  ) {}
+
+  @post('/course-sessions/{id}/certificates')
+  @authenticate('jwt')
+  @authorize({allowedRoles: ['admin', 'trainer']})
+  @response(202, {
+    description: 'Certificate generation job for every attendee of a session',
+  })
+  async generateSessionCertificates(
+    @param.path.number('id') id: number,
+    @inject(SecurityBindings.USER) currentUser: UserProfile,
+  ) {
+    return this.certificateService.startSessionCertificateJob(id, String(currentUser.id));
+  }
+
+  @get('/certificate-jobs/{jobId}')
+  @authenticate('jwt')
+  @authorize({allowedRoles: ['admin', 'trainer']})
+  @response(200, {
+    description: 'Progress of a certificate generation job',
+  })
+  async getCertificateJob(
+    @param.path.string('jobId') jobId: string,
+  ) {
+    const job = this.certificateService.getCertificateJob(jobId);
+    if (!job) {
+      throw new HttpErrors.NotFound('Certificate job not found');
+    }
+    return job;
+  }
+
+  @get('/certificates/{id}/download')
+  @authenticate('jwt')
+  @response(200, {
+    description: 'Certificate PDF',
+    content: {'application/pdf': {schema: {type: 'string', format: 'binary'}}},
+  })
+  async downloadCertificate(
+    @param.path.string('id') id: string,
+    @inject(SecurityBindings.USER) currentUser: UserProfile,
+    @inject(RestBindings.Http.RESPONSE) res: Response,
+  ): Promise<Response> {
+    const certificate = await this.certificateRepository.findById(id);
+
+    if (!['admin', 'trainer'].includes(currentUser.role)) {
+      const booking = await this.bookingRepository.findById(certificate.bookingId);
+      if (booking.contactDetails?.email !== currentUser.email) {
+        throw new HttpErrors.Forbidden('Access denied');
+      }
+    }
+
+    await this.certificateService.downloadCertificate(certificate, res);
+    return res;
+  }
+}
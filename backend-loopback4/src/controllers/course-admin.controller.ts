@@ -16,6 +16,7 @@ import { courses, Course, NewCourse } from '../db/schema/courses';
 import { eq } from 'drizzle-orm';
 import { StripeProductSyncService } from '../services/stripe-product-sync.service';
 import { MonitoringService } from '../services/monitoring.service';
+import { cache, CacheManager } from '../services/cache-manager.service';
 import { z } from 'zod';
 
 // Validation schemas
@@ -78,6 +79,7 @@ export class CourseAdminController {
         .insert(courses)
         .values(courseData as NewCourse)
         .returning();
+      await cache.invalidateTags([CacheManager.tags.courses]);
 
       MonitoringService.info('Course created', {}, {
         courseId: newCourse.id,
@@ -159,6 +161,7 @@ export class CourseAdminController {
       if (!updatedCourse) {
         throw new HttpErrors.NotFound('Course not found');
       }
+      await cache.invalidateTags([CacheManager.tags.courses]);
 
       // Sync with Stripe if price or details changed
       let stripeSync = null;
@@ -222,6 +225,7 @@ export class CourseAdminController {
       if (!deactivatedCourse) {
         throw new HttpErrors.NotFound('Course not found');
       }
+      await cache.invalidateTags([CacheManager.tags.courses]);
 
       // Deactivate in Stripe
       try {
@@ -363,6 +367,7 @@ export class CourseAdminController {
       if (!updatedCourse) {
         throw new HttpErrors.NotFound('Course not found');
       }
+      await cache.invalidateTags([CacheManager.tags.courses]);
 
       // Sync with Stripe to create new price
       const { priceId } = await StripeProductSyncService.syncCourseToStripe(id);
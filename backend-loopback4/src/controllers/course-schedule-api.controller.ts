@@ -19,6 +19,7 @@ import {
 } from '@loopback/rest';
 import {CourseSession} from '../models';
 import {CourseSessionRepository, BookingRepository, CourseRepository} from '../repositories';
+import {cache, CacheManager} from '../services/cache-manager.service';
 
 export class CourseSessionApiController {
   constructor(
@@ -276,20 +277,26 @@ export class CourseSessionApiController {
   })
   async findCourses(): Promise<any[]> {
     try {
-      const courses = await this.courseRepository.find({
-        where: {status: 'active'},
-        order: ['name ASC'],
-      });
+      return await cache.getOrSet(
+        CacheManager.keys.courses('schedule-api'),
+        async () => {
+          const courses = await this.courseRepository.find({
+            where: {status: 'active'},
+            order: ['name ASC'],
+          });
 
-      return courses.map(course => ({
-        id: course.id,
-        name: course.name,
-        type: course.type,
-        duration: course.duration,
-        price: course.price,
-        description: course.description,
-        status: course.status,
-      }));
+          return courses.map(course => ({
+            id: course.id,
+            name: course.name,
+            type: course.type,
+            duration: course.duration,
+            price: course.price,
+            description: course.description,
+            status: course.status,
+          }));
+        },
+        {ttl: 300, staleTtl: 60, tags: [CacheManager.tags.courses]},
+      );
     } catch (error) {
       console.error('Error fetching courses:', error);
       throw new Error(`Failed to fetch courses: ${error.message}`);
@@ -23,6 +23,7 @@ import {authorize} from '@loopback/authorization';
 import {CourseSession, Booking} from '../models';
 import {CourseSessionRepository} from '../repositories';
 import {ScheduleService} from '../services';
+import {cache, CacheManager} from '../services/cache-manager.service';
 
 export class CourseSessionController {
   constructor(
@@ -73,7 +74,10 @@ export class CourseSessionController {
       throw new Error('Location is not available for the selected dates');
     }
     
-    return this.courseSessionRepository.create(courseSession);
+    const created = await this.courseSessionRepository.create(courseSession);
+    // Cached calendar months only know the sessions they were loaded with
+    await cache.invalidateTags([CacheManager.tags.sessions]);
+    return created;
   }
 
   @get('/course-sessions/count')
@@ -183,6 +187,8 @@ export class CourseSessionController {
     courseSession: CourseSession,
   ): Promise<void> {
     await this.courseSessionRepository.updateById(id, {...courseSession, updatedAt: new Date()});
+    // A reschedule can move the session into a month cached without it
+    await cache.invalidateTags([CacheManager.tags.session(id), CacheManager.tags.sessions]);
   }
 
   @post('/course-sessions/{id}/cancel')
@@ -198,6 +204,7 @@ export class CourseSessionController {
       status: 'CANCELLED',
       updatedAt: new Date(),
     });
+    await cache.invalidateTags([CacheManager.tags.session(id), CacheManager.tags.sessions]);
   }
 
   @get('/course-sessions/{id}/bookings')
@@ -311,5 +318,6 @@ export class CourseSessionController {
   })
   async deleteById(@param.path.string('id') id: string): Promise<void> {
     await this.courseSessionRepository.deleteById(id);
+    await cache.invalidateTags([CacheManager.tags.session(id)]);
   }
 }
\ No newline at end of file
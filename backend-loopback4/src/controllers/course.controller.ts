@@ -24,6 +24,14 @@ import {authenticate} from '@loopback/authentication';
 import {authorize} from '@loopback/authorization';
 import {Course, CourseSession} from '../models';
 import {CourseRepository} from '../repositories';
+import {cache, CacheManager, CacheOptions} from '../services/cache-manager.service';
+
+// Course lists change rarely and every write here invalidates them
+const COURSE_LIST_CACHE: CacheOptions = {
+  ttl: 300,
+  staleTtl: 60,
+  tags: [CacheManager.tags.courses],
+};
 
 export class CourseController {
   constructor(
@@ -51,7 +59,9 @@ export class CourseController {
     })
     course: Omit<Course, 'id'>,
   ): Promise<Course> {
-    return this.courseRepository.create(course);
+    const created = await this.courseRepository.create(course);
+    await cache.invalidateTags([CacheManager.tags.courses]);
+    return created;
   }
 
   @get('/courses/count')
@@ -80,7 +90,11 @@ export class CourseController {
   async find(
     @param.filter(Course) filter?: Filter<Course>,
   ): Promise<Course[]> {
-    return this.courseRepository.find(filter);
+    return cache.getOrSet(
+      cache.generateKey(CacheManager.keys.courses('list'), filter ?? {}),
+      () => this.courseRepository.find(filter),
+      COURSE_LIST_CACHE,
+    );
   }
 
   @get('/courses/active')
@@ -96,7 +110,11 @@ export class CourseController {
     },
   })
   async findActive(): Promise<Course[]> {
-    return this.courseRepository.findActiveCourses();
+    return cache.getOrSet(
+      CacheManager.keys.courses('active'),
+      () => this.courseRepository.findActiveCourses(),
+      COURSE_LIST_CACHE,
+    );
   }
 
   @get('/courses/type/{type}')
@@ -114,7 +132,11 @@ export class CourseController {
   async findByType(
     @param.path.string('type') type: string,
   ): Promise<Course[]> {
-    return this.courseRepository.findByType(type);
+    return cache.getOrSet(
+      CacheManager.keys.courses(`type:${type}`),
+      () => this.courseRepository.findByType(type),
+      COURSE_LIST_CACHE,
+    );
   }
 
   @get('/courses/{id}')
@@ -151,6 +173,7 @@ export class CourseController {
     course: Course,
   ): Promise<void> {
     await this.courseRepository.updateById(id, {...course, updatedAt: new Date()});
+    await cache.invalidateTags([CacheManager.tags.courses]);
   }
 
   @del('/courses/{id}')
@@ -161,6 +184,7 @@ export class CourseController {
   })
   async deleteById(@param.path.string('id') id: string): Promise<void> {
     await this.courseRepository.deleteById(id);
+    await cache.invalidateTags([CacheManager.tags.courses]);
   }
 
   @get('/courses/{id}/sessions')
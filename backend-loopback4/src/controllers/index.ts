@@ -5,6 +5,7 @@ export * from './booking-inquiry.controller';
 export * from './course-session.controller';
 export * from './enquiry.controller';
 export * from './ping.controller';
+export * from './certificate.controller';
 export * from './calendar.controller';
 export * from './payment-guest.controller';
 export * from './admin/auth-admin.controller';
@@ -13,6 +13,7 @@ import { inject } from '@loopback/core';
 import { authenticate } from '@loopback/authentication';
 import { authorize } from '@loopback/authorization';
 import { InvoiceService } from '../services/invoice.service';
+import { sendPdfFile } from '../services/pdf/pdf-download';
 import { db } from '../config/database.config';
 import { bookings } from '../db/schema';
 import { eq } from 'drizzle-orm';
@@ -167,7 +168,7 @@ export class InvoiceController {
     @param.path.string('invoiceId') invoiceId: string,
     @inject(RestBindings.Http.REQUEST) request: Request & { user?: any },
     @inject(RestBindings.Http.RESPONSE) response: Response
-  ): Promise<void> {
+  ): Promise<Response> {
     try {
       const invoice = await InvoiceService.getInvoiceWithDetails(invoiceId);
 
@@ -180,14 +181,9 @@ export class InvoiceController {
         throw new HttpErrors.Forbidden('Access denied');
       }
 
-      const pdfBuffer = await InvoiceService.generateInvoicePDF(invoiceId);
-
-      response.contentType('application/pdf');
-      response.header(
-        'Content-Disposition',
-        `attachment; filename="invoice-${invoice.invoiceNumber}.pdf"`
-      );
-      response.send(pdfBuffer);
+      const pdfPath = await InvoiceService.getInvoicePDFPath(invoice);
+      await sendPdfFile(response, pdfPath, `invoice-${invoice.invoiceNumber}.pdf`);
+      return response;
     } catch (error) {
       if (error instanceof HttpErrors.HttpError) {
         throw error;
@@ -3,6 +3,7 @@ import { authorize } from '@loopback/authorization';
 import { get, param, response } from '@loopback/rest';
 import { db } from '../services/database-pool.service';
 import { cache } from '../services/cache-manager.service';
+import { getIngestionMetrics } from '../services/ingestion/ingestion-buffer';
 import { MonitoringService } from '../services/monitoring.service';
 
 interface PaymentStats {
@@ -234,6 +235,7 @@ export class PaymentAnalyticsController {
         return {
           database: dbMetrics,
           cache: cacheMetrics,
+          ingestion: getIngestionMetrics(),
           paymentProcessing: processingTimes.rows[0],
           timestamp: new Date(),
         };
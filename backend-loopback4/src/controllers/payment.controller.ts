@@ -16,6 +16,10 @@ import { BookingService } from '../services/booking.service';
 import { db } from '../config/database.config';
 import { payments, bookings } from '../db/schema';
 import { eq } from 'drizzle-orm';
+import { cache, CacheManager } from '../services/cache-manager.service';
+
+// Payment status changes invalidate by booking tag; the TTL bounds anything missed
+const PAYMENT_CACHE_TTL = 60;
 
 interface CreatePaymentIntentRequest {
   bookingId: string;
@@ -173,14 +177,28 @@ export class PaymentController {
     @param.path.string('paymentId') paymentId: string,
     @inject(RestBindings.Http.REQUEST) request: Request & { user?: any }
   ): Promise<any> {
-    const [payment] = await db
-      .select({
-        payment: payments,
-        booking: bookings,
-      })
-      .from(payments)
-      .innerJoin(bookings, eq(payments.bookingId, bookings.id))
-      .where(eq(payments.id, paymentId));
+    const payment = await cache.getOrSet(
+      CacheManager.keys.paymentDetail(paymentId),
+      async () => {
+        const [row] = await db
+          .select({
+            payment: payments,
+            booking: bookings,
+          })
+          .from(payments)
+          .innerJoin(bookings, eq(payments.bookingId, bookings.id))
+          .where(eq(payments.id, paymentId));
+        return row ?? null;
+      },
+      {
+        ttl: PAYMENT_CACHE_TTL,
+        // Booking writes (cancellation, attendance) change what this returns
+        tags: row => [
+          CacheManager.tags.payment(paymentId),
+          CacheManager.tags.booking(row.booking.id),
+        ],
+      }
+    );
 
     if (!payment) {
       throw new HttpErrors.NotFound('Payment not found');
@@ -222,10 +240,20 @@ export class PaymentController {
     }
 
     // Get payment
-    const [payment] = await db
-      .select()
-      .from(payments)
-      .where(eq(payments.bookingId, bookingId));
+    const payment = await cache.getOrSet(
+      CacheManager.keys.paymentByBooking(bookingId),
+      async () => {
+        const [row] = await db
+          .select()
+          .from(payments)
+          .where(eq(payments.bookingId, bookingId));
+        return row ?? null;
+      },
+      {
+        ttl: PAYMENT_CACHE_TTL,
+        tags: [CacheManager.tags.booking(bookingId)],
+      }
+    );
 
     if (!payment) {
       return { hasPayment: false };
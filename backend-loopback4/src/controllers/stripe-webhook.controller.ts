@@ -1,4 +1,7 @@
 import {
+  get,
+  HttpErrors,
+  param,
   post,
   requestBody,
   Request,
@@ -6,6 +9,8 @@ import {
   RestBindings,
 } from '@loopback/rest';
 import { inject } from '@loopback/core';
+import { authenticate } from '@loopback/authentication';
+import { authorize } from '@loopback/authorization';
 import { StripeWebhookService } from '../services/stripe-webhook.service';
 
 export class StripeWebhookController {
@@ -19,11 +24,12 @@ export class StripeWebhookController {
    * 
    * This endpoint receives webhook events from Stripe for payment processing
    * It handles events like payment confirmation, refunds, disputes, etc.
+   * Events are acknowledged once stored; handlers run in the background.
    */
   @post('/api/webhooks/stripe', {
     responses: {
       '200': {
-        description: 'Webhook processed successfully',
+        description: 'Webhook received and queued for processing',
       },
       '400': {
         description: 'Bad request - invalid webhook signature',
@@ -57,17 +63,18 @@ export class StripeWebhookController {
       // Convert body buffer to string
       const bodyString = body.toString('utf8');
 
-      // Process the webhook
-      await this.stripeWebhookService.handleWebhook(bodyString, signature);
+      // Verify and store the event; processing continues after we respond
+      const receipt = await this.stripeWebhookService.handleWebhook(bodyString, signature);
 
       // Send success response
-      response.status(200).send({ received: true });
+      response.status(200).send({ received: true, duplicate: receipt.duplicate });
     } catch (error: any) {
       console.error('Webhook processing error:', error);
       
       if (error.message.includes('signature verification failed')) {
         response.status(400).send({ error: 'Invalid signature' });
       } else {
+        // Not stored, so let Stripe redeliver
         response.status(500).send({ error: 'Webhook processing failed' });
       }
     }
@@ -78,6 +85,8 @@ export class StripeWebhookController {
    * 
    * This endpoint allows admins to manually trigger a retry of failed webhook events
    */
+  @authenticate('jwt')
+  @authorize({ allowedRoles: ['admin'] })
   @post('/api/admin/webhooks/retry', {
     responses: {
       '200': {
@@ -97,6 +106,9 @@ export class StripeWebhookController {
       '401': {
         description: 'Unauthorized',
       },
+      '403': {
+        description: 'Forbidden',
+      },
       '500': {
         description: 'Internal server error',
       },
@@ -104,19 +116,61 @@ export class StripeWebhookController {
   })
   async retryFailedWebhooks(): Promise<{message: string; processed: number}> {
     try {
-      // TODO: Add authentication/authorization check here
-      
-      await this.stripeWebhookService.retryFailedWebhooks();
+      const processed = await this.stripeWebhookService.retryFailedWebhooks();
       
       return {
         message: 'Failed webhooks retry initiated',
-        processed: 0, // TODO: Return actual count
+        processed,
       };
     } catch (error) {
       console.error('Failed to retry webhooks:', error);
       throw error;
     }
   }
+
+  /**
+   * Webhook pipeline status (admin only)
+   *
+   * Outstanding events by status, dispatcher queue depth and latency, and
+   * intake counters for this process
+   */
+  @authenticate('jwt')
+  @authorize({ allowedRoles: ['admin'] })
+  @get('/api/admin/webhooks/status', {
+    responses: {
+      '200': {
+        description: 'Webhook pipeline status',
+      },
+    },
+  })
+  async getWebhookStatus(): Promise<object> {
+    return this.stripeWebhookService.getPipelineStatus();
+  }
+
+  /**
+   * Replay a dead-lettered webhook event (admin only)
+   */
+  @authenticate('jwt')
+  @authorize({ allowedRoles: ['admin'] })
+  @post('/api/admin/webhooks/dead-letter/{eventId}/replay', {
+    responses: {
+      '200': {
+        description: 'Event queued for another round of attempts',
+      },
+      '404': {
+        description: 'No dead-lettered event with this id',
+      },
+    },
+  })
+  async replayDeadLetter(
+    @param.path.string('eventId') eventId: string,
+  ): Promise<{message: string; eventId: string}> {
+    const replayed = await this.stripeWebhookService.replayDeadLetter(eventId);
+    if (!replayed) {
+      throw new HttpErrors.NotFound(`No dead-lettered webhook event ${eventId}`);
+    }
+    return { message: 'Webhook event queued for replay', eventId };
+  }
 }
 
 // Register raw body parser for Stripe webhooks
@@ -0,0 +1,30 @@
+-- Daily booking rollups for the admin dashboard and analytics
+-- One row per booking date, session date and course, maintained incrementally
+-- by triggers on bookings and refunds (019) and rebuilt with `npm run rollups:rebuild`
+
+CREATE TABLE IF NOT EXISTS booking_daily_rollups (
+  booking_date DATE NOT NULL,
+  session_date DATE NOT NULL,
+  course_id UUID NOT NULL REFERENCES courses(id),
+  course_type VARCHAR(100) NOT NULL,
+  booked_count INTEGER NOT NULL DEFAULT 0,
+  completed_count INTEGER NOT NULL DEFAULT 0,
+  cancelled_count INTEGER NOT NULL DEFAULT 0,
+  attendees INTEGER NOT NULL DEFAULT 0,
+  revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+  refunded_amount DECIMAL(12, 2) NOT NULL DEFAULT 0,
+  fill_ratio_sum DECIMAL(12, 4) NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (booking_date, session_date, course_id)
+);
+
+-- Session-date reads (course popularity, monthly trends)
+CREATE INDEX IF NOT EXISTS idx_booking_daily_rollups_session_date
+ON booking_daily_rollups(session_date, course_id);
+
+-- Add comments
+COMMENT ON TABLE booking_daily_rollups IS 'Booking counts, attendees and revenue per booking day, session day and course';
+COMMENT ON COLUMN booking_daily_rollups.booked_count IS 'Bookings currently confirmed, attended or completed';
+COMMENT ON COLUMN booking_daily_rollups.completed_count IS 'Subset of booked_count that has been attended or completed';
+COMMENT ON COLUMN booking_daily_rollups.cancelled_count IS 'Bookings currently cancelled or refunded';
+COMMENT ON COLUMN booking_daily_rollups.fill_ratio_sum IS 'Sum of attendees / session capacity over booked bookings, for average fill rate';
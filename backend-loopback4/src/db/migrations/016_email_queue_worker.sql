@@ -0,0 +1,39 @@
+-- Support concurrent email workers
+-- Workers claim batches with FOR UPDATE SKIP LOCKED, record who holds each row
+-- and are woken through LISTEN/NOTIFY when new email is queued
+
+-- Track which worker claimed a row and when, so stale claims can be released
+ALTER TABLE email_queue
+ADD COLUMN IF NOT EXISTS locked_by VARCHAR(100);
+
+ALTER TABLE email_queue
+ADD COLUMN IF NOT EXISTS locked_at TIMESTAMP WITH TIME ZONE;
+
+-- Claim query: pending rows in priority order
+CREATE INDEX IF NOT EXISTS idx_email_queue_pending_claim
+ON email_queue(priority DESC, scheduled_for ASC)
+WHERE status = 'pending';
+
+-- Stale claim recovery
+CREATE INDEX IF NOT EXISTS idx_email_queue_sending_locked
+ON email_queue(locked_at)
+WHERE status = 'sending';
+
+-- Wake listening workers once per inserting statement
+CREATE OR REPLACE FUNCTION notify_email_queue()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM pg_notify('email_queue', '');
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS email_queue_notify ON email_queue;
+CREATE TRIGGER email_queue_notify
+AFTER INSERT ON email_queue
+FOR EACH STATEMENT
+EXECUTE FUNCTION notify_email_queue();
+
+-- Add comments
+COMMENT ON COLUMN email_queue.locked_by IS 'Worker that claimed the row for sending';
+COMMENT ON COLUMN email_queue.locked_at IS 'When the row was claimed; stale claims are returned to pending';
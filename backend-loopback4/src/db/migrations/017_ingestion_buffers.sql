@@ -0,0 +1,67 @@
+-- Batched analytics ingestion
+-- Tracking events and visitor analytics are buffered in memory and written as
+-- multi-row upserts, so each target needs a unique key to upsert on
+
+-- Visitor analytics: one row per session per hour. Existing duplicates are
+-- merged into the earliest row of each group the same way the upsert merges
+-- them (flags OR'd, counters take the maximum, latest device type, first
+-- referrer), then the other rows are removed before adding the unique index.
+WITH merged AS (
+  SELECT MIN(id) AS keep_id,
+         BOOL_OR(visited_homepage) AS visited_homepage,
+         BOOL_OR(visited_courses_page) AS visited_courses_page,
+         BOOL_OR(visited_booking_page) AS visited_booking_page,
+         BOOL_OR(started_booking) AS started_booking,
+         BOOL_OR(completed_booking) AS completed_booking,
+         BOOL_OR(cancelled_booking) AS cancelled_booking,
+         MAX(pages_viewed) AS pages_viewed,
+         MAX(time_on_site_seconds) AS time_on_site_seconds,
+         (ARRAY_AGG(device_type ORDER BY id DESC) FILTER (WHERE device_type IS NOT NULL))[1] AS device_type,
+         (ARRAY_AGG(referrer_source ORDER BY id) FILTER (WHERE referrer_source IS NOT NULL))[1] AS referrer_source
+  FROM visitor_analytics
+  GROUP BY session_id, date, hour
+  HAVING COUNT(*) > 1
+)
+UPDATE visitor_analytics va
+SET visited_homepage = merged.visited_homepage,
+    visited_courses_page = merged.visited_courses_page,
+    visited_booking_page = merged.visited_booking_page,
+    started_booking = merged.started_booking,
+    completed_booking = merged.completed_booking,
+    cancelled_booking = merged.cancelled_booking,
+    pages_viewed = merged.pages_viewed,
+    time_on_site_seconds = merged.time_on_site_seconds,
+    device_type = merged.device_type,
+    referrer_source = merged.referrer_source
+FROM merged
+WHERE va.id = merged.keep_id;
+
+DELETE FROM visitor_analytics va
+USING visitor_analytics keep
+WHERE va.session_id = keep.session_id
+  AND va.date = keep.date
+  AND va.hour = keep.hour
+  AND va.id > keep.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_visitor_analytics_session_hour
+ON visitor_analytics(session_id, date, hour);
+
+-- Tracking events pre-aggregated per hour, page and device
+CREATE TABLE IF NOT EXISTS tracking_event_hourly (
+  id SERIAL PRIMARY KEY,
+  bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+  event VARCHAR(50) NOT NULL,
+  page VARCHAR(200) NOT NULL DEFAULT '',
+  device_type VARCHAR(20) NOT NULL DEFAULT 'unknown',
+  event_count INTEGER NOT NULL DEFAULT 0,
+  first_seen_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  last_seen_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  UNIQUE (bucket_start, event, page, device_type)
+);
+
+CREATE INDEX IF NOT EXISTS idx_tracking_event_hourly_event_bucket
+ON tracking_event_hourly(event, bucket_start DESC);
+
+COMMENT ON TABLE tracking_event_hourly IS 'Hourly tracking event counts, flushed in batches from the in-process ingestion buffer';
+COMMENT ON COLUMN tracking_event_hourly.event_count IS 'Events in the hour; upserts add to it';
+COMMENT ON COLUMN tracking_event_hourly.bucket_start IS 'Start of the UTC hour the server received the events in';
@@ -0,0 +1,80 @@
+-- Asynchronous Stripe webhook processing
+-- Events are stored and acknowledged straight away, then handled by an
+-- in-process dispatcher. stripe_webhook_events doubles as the durable queue
+-- the retry scheduler claims from with FOR UPDATE SKIP LOCKED.
+
+ALTER TABLE stripe_webhook_events
+ADD COLUMN IF NOT EXISTS status VARCHAR(20) NOT NULL DEFAULT 'pending';
+
+-- Events for the same PaymentIntent / charge share a key and are applied in
+-- (stripe_created_at, received_at) order
+ALTER TABLE stripe_webhook_events
+ADD COLUMN IF NOT EXISTS ordering_key VARCHAR(255);
+
+ALTER TABLE stripe_webhook_events
+ADD COLUMN IF NOT EXISTS stripe_created_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE stripe_webhook_events
+ADD COLUMN IF NOT EXISTS received_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE stripe_webhook_events
+ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+
+ALTER TABLE stripe_webhook_events
+ADD COLUMN IF NOT EXISTS locked_by VARCHAR(100);
+
+ALTER TABLE stripe_webhook_events
+ADD COLUMN IF NOT EXISTS locked_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE stripe_webhook_events
+ADD COLUMN IF NOT EXISTS dead_lettered_at TIMESTAMP WITH TIME ZONE;
+
+-- Backfill rows written before this migration
+UPDATE stripe_webhook_events
+SET stripe_created_at = to_timestamp((event_data->>'created')::bigint),
+    received_at = created_at,
+    ordering_key = CASE
+      WHEN event_type LIKE 'payment_intent.%' THEN 'pi:' || (event_data->'data'->'object'->>'id')
+      WHEN event_data->'data'->'object'->>'payment_intent' IS NOT NULL
+        THEN 'pi:' || (event_data->'data'->'object'->>'payment_intent')
+      ELSE 'evt:' || stripe_event_id
+    END
+WHERE stripe_created_at IS NULL;
+
+UPDATE stripe_webhook_events
+SET status = 'processed'
+WHERE processed = true AND status = 'pending';
+
+-- The previous retry loop gave up after three attempts
+UPDATE stripe_webhook_events
+SET status = 'dead_letter', dead_lettered_at = CURRENT_TIMESTAMP
+WHERE processed = false AND retry_count >= 3 AND status = 'pending';
+
+ALTER TABLE stripe_webhook_events
+DROP CONSTRAINT IF EXISTS stripe_webhook_events_status_check;
+
+ALTER TABLE stripe_webhook_events
+ADD CONSTRAINT stripe_webhook_events_status_check
+CHECK (status IN ('pending', 'processing', 'processed', 'failed', 'dead_letter'));
+
+-- Retry scheduler: due events
+CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_due
+ON stripe_webhook_events(next_attempt_at)
+WHERE status IN ('pending', 'failed');
+
+-- Ordering check: unfinished events per key
+CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_ordering
+ON stripe_webhook_events(ordering_key, stripe_created_at, received_at)
+WHERE status IN ('pending', 'processing', 'failed');
+
+-- Stale claim recovery
+CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_processing_locked
+ON stripe_webhook_events(locked_at)
+WHERE status = 'processing';
+
+CREATE INDEX IF NOT EXISTS idx_stripe_webhook_events_dead_letter
+ON stripe_webhook_events(dead_lettered_at DESC)
+WHERE status = 'dead_letter';
+
+COMMENT ON COLUMN stripe_webhook_events.status IS 'pending, processing, processed, failed (retry scheduled at next_attempt_at) or dead_letter';
+COMMENT ON COLUMN stripe_webhook_events.ordering_key IS 'Events with the same key (PaymentIntent, charge, customer) are handled one at a time in Stripe order';
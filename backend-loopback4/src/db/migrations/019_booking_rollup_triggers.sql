@@ -0,0 +1,281 @@
+-- Maintain booking_daily_rollups with triggers on bookings and refunds
+-- Booking status is written from many places (booking, payment, webhook,
+-- saga, recovery and calendar services, through Drizzle, LoopBack and raw
+-- SQL), so the rollups are derived in the database, in the same transaction
+-- as every write, instead of by each caller.
+--
+-- Rollup rows are bucketed by the UTC day the booking was made and by the
+-- session's current date and course; a trigger on course_sessions moves a
+-- session's bookings when those (or its capacity) change.
+
+-- Status buckets, shared by the triggers, the rebuild and the drift check
+CREATE OR REPLACE FUNCTION booking_rollup_is_booked(p_status TEXT)
+RETURNS BOOLEAN AS $$
+  SELECT LOWER(p_status) IN ('confirmed', 'paid', 'attended', 'completed');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION booking_rollup_is_completed(p_status TEXT)
+RETURNS BOOLEAN AS $$
+  SELECT LOWER(p_status) IN ('attended', 'completed');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION booking_rollup_is_cancelled(p_status TEXT)
+RETURNS BOOLEAN AS $$
+  SELECT LOWER(p_status) IN ('cancelled', 'refunded');
+$$ LANGUAGE sql IMMUTABLE;
+
+-- created_at is a timestamp without time zone written by NOW() in the
+-- session time zone; convert it to the UTC calendar day
+CREATE OR REPLACE FUNCTION booking_rollup_date(p_created_at TIMESTAMP)
+RETURNS DATE AS $$
+  SELECT ((p_created_at AT TIME ZONE current_setting('TimeZone')) AT TIME ZONE 'UTC')::date;
+$$ LANGUAGE sql STABLE;
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one booking's contribution
+CREATE OR REPLACE FUNCTION apply_booking_rollup_delta(p_booking bookings, p_sign INTEGER)
+RETURNS void AS $$
+DECLARE
+  v_booked INTEGER := CASE WHEN booking_rollup_is_booked(p_booking.status) THEN p_sign ELSE 0 END;
+  v_completed INTEGER := CASE WHEN booking_rollup_is_completed(p_booking.status) THEN p_sign ELSE 0 END;
+  v_cancelled INTEGER := CASE WHEN booking_rollup_is_cancelled(p_booking.status) THEN p_sign ELSE 0 END;
+BEGIN
+  IF v_booked = 0 AND v_completed = 0 AND v_cancelled = 0 THEN
+    RETURN;
+  END IF;
+
+  -- Attendees, revenue and fill ratio follow the booked bucket
+  INSERT INTO booking_daily_rollups (
+    booking_date, session_date, course_id, course_type,
+    booked_count, completed_count, cancelled_count,
+    attendees, revenue, refunded_amount, fill_ratio_sum
+  )
+  SELECT
+    booking_rollup_date(p_booking.created_at),
+    cs.session_date,
+    c.id,
+    c.course_type,
+    v_booked,
+    v_completed,
+    v_cancelled,
+    v_booked * p_booking.number_of_attendees,
+    v_booked * p_booking.total_amount,
+    0,
+    v_booked * COALESCE(p_booking.number_of_attendees::numeric / NULLIF(cs.max_participants, 0), 0)
+  FROM course_sessions cs
+  JOIN courses c ON c.id = cs.course_id
+  WHERE cs.id = p_booking.session_id
+  ON CONFLICT (booking_date, session_date, course_id) DO UPDATE SET
+    booked_count = booking_daily_rollups.booked_count + EXCLUDED.booked_count,
+    completed_count = booking_daily_rollups.completed_count + EXCLUDED.completed_count,
+    cancelled_count = booking_daily_rollups.cancelled_count + EXCLUDED.cancelled_count,
+    attendees = booking_daily_rollups.attendees + EXCLUDED.attendees,
+    revenue = booking_daily_rollups.revenue + EXCLUDED.revenue,
+    fill_ratio_sum = booking_daily_rollups.fill_ratio_sum + EXCLUDED.fill_ratio_sum,
+    updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION apply_refund_rollup_delta(p_booking_id UUID, p_amount NUMERIC)
+RETURNS void AS $$
+BEGIN
+  IF p_amount = 0 THEN
+    RETURN;
+  END IF;
+
+  INSERT INTO booking_daily_rollups (
+    booking_date, session_date, course_id, course_type, refunded_amount
+  )
+  SELECT
+    booking_rollup_date(b.created_at),
+    cs.session_date,
+    c.id,
+    c.course_type,
+    p_amount
+  FROM bookings b
+  JOIN course_sessions cs ON cs.id = b.session_id
+  JOIN courses c ON c.id = cs.course_id
+  WHERE b.id = p_booking_id
+  ON CONFLICT (booking_date, session_date, course_id) DO UPDATE SET
+    refunded_amount = booking_daily_rollups.refunded_amount + EXCLUDED.refunded_amount,
+    updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+-- Add (p_sign = 1) or remove (p_sign = -1) everything one session's bookings
+-- contribute, using the session's date, capacity and course as given rather
+-- than as currently stored, so the old values can be taken out after an update
+CREATE OR REPLACE FUNCTION apply_session_rollup_delta(p_session course_sessions, p_sign INTEGER)
+RETURNS void AS $$
+BEGIN
+  INSERT INTO booking_daily_rollups (
+    booking_date, session_date, course_id, course_type,
+    booked_count, completed_count, cancelled_count,
+    attendees, revenue, refunded_amount, fill_ratio_sum
+  )
+  SELECT
+    booking_rollup_date(b.created_at),
+    p_session.session_date,
+    c.id,
+    c.course_type,
+    p_sign * COUNT(*) FILTER (WHERE booking_rollup_is_booked(b.status)),
+    p_sign * COUNT(*) FILTER (WHERE booking_rollup_is_completed(b.status)),
+    p_sign * COUNT(*) FILTER (WHERE booking_rollup_is_cancelled(b.status)),
+    p_sign * COALESCE(SUM(b.number_of_attendees) FILTER (WHERE booking_rollup_is_booked(b.status)), 0),
+    p_sign * COALESCE(SUM(b.total_amount) FILTER (WHERE booking_rollup_is_booked(b.status)), 0),
+    p_sign * COALESCE(SUM(r.refunded), 0),
+    p_sign * COALESCE(SUM(b.number_of_attendees::numeric / NULLIF(p_session.max_participants, 0))
+      FILTER (WHERE booking_rollup_is_booked(b.status)), 0)
+  FROM bookings b
+  JOIN courses c ON c.id = p_session.course_id
+  LEFT JOIN (
+    SELECT booking_id, SUM(amount) AS refunded
+    FROM refunds
+    WHERE status = 'processed'
+    GROUP BY booking_id
+  ) r ON r.booking_id = b.id
+  WHERE b.session_id = p_session.id
+  GROUP BY booking_rollup_date(b.created_at), c.id, c.course_type
+  -- Bookings in no bucket and without refunds never had a row
+  HAVING COUNT(*) FILTER (WHERE booking_rollup_is_booked(b.status)
+      OR booking_rollup_is_completed(b.status)
+      OR booking_rollup_is_cancelled(b.status)) > 0
+    OR COALESCE(SUM(r.refunded), 0) <> 0
+  ON CONFLICT (booking_date, session_date, course_id) DO UPDATE SET
+    booked_count = booking_daily_rollups.booked_count + EXCLUDED.booked_count,
+    completed_count = booking_daily_rollups.completed_count + EXCLUDED.completed_count,
+    cancelled_count = booking_daily_rollups.cancelled_count + EXCLUDED.cancelled_count,
+    attendees = booking_daily_rollups.attendees + EXCLUDED.attendees,
+    revenue = booking_daily_rollups.revenue + EXCLUDED.revenue,
+    refunded_amount = booking_daily_rollups.refunded_amount + EXCLUDED.refunded_amount,
+    fill_ratio_sum = booking_daily_rollups.fill_ratio_sum + EXCLUDED.fill_ratio_sum,
+    updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION maintain_booking_daily_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM apply_booking_rollup_delta(OLD, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM apply_booking_rollup_delta(NEW, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_booking_daily_rollups ON bookings;
+CREATE TRIGGER trigger_booking_daily_rollups
+AFTER INSERT OR DELETE ON bookings
+FOR EACH ROW
+EXECUTE FUNCTION maintain_booking_daily_rollups();
+
+DROP TRIGGER IF EXISTS trigger_booking_daily_rollups_update ON bookings;
+CREATE TRIGGER trigger_booking_daily_rollups_update
+AFTER UPDATE OF status, session_id, number_of_attendees, total_amount, created_at ON bookings
+FOR EACH ROW
+WHEN (
+  OLD.status IS DISTINCT FROM NEW.status OR
+  OLD.session_id IS DISTINCT FROM NEW.session_id OR
+  OLD.number_of_attendees IS DISTINCT FROM NEW.number_of_attendees OR
+  OLD.total_amount IS DISTINCT FROM NEW.total_amount OR
+  OLD.created_at IS DISTINCT FROM NEW.created_at
+)
+EXECUTE FUNCTION maintain_booking_daily_rollups();
+
+-- Only processed refunds count towards refunded_amount. A booking moved to
+-- another session keeps its refunds in the old row until the next rebuild.
+CREATE OR REPLACE FUNCTION maintain_refund_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'processed' THEN
+    PERFORM apply_refund_rollup_delta(OLD.booking_id, -OLD.amount);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'processed' THEN
+    PERFORM apply_refund_rollup_delta(NEW.booking_id, NEW.amount);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_refund_rollups ON refunds;
+CREATE TRIGGER trigger_refund_rollups
+AFTER INSERT OR UPDATE OF status, amount, booking_id OR DELETE ON refunds
+FOR EACH ROW
+EXECUTE FUNCTION maintain_refund_rollups();
+
+-- Rescheduling, resizing or re-coursing a session moves its bookings to the
+-- new session_date / course row and recomputes their fill ratio
+CREATE OR REPLACE FUNCTION maintain_session_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM apply_session_rollup_delta(OLD, -1);
+  PERFORM apply_session_rollup_delta(NEW, 1);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_session_rollups ON course_sessions;
+CREATE TRIGGER trigger_session_rollups
+AFTER UPDATE OF session_date, max_participants, course_id ON course_sessions
+FOR EACH ROW
+WHEN (
+  OLD.session_date IS DISTINCT FROM NEW.session_date OR
+  OLD.max_participants IS DISTINCT FROM NEW.max_participants OR
+  OLD.course_id IS DISTINCT FROM NEW.course_id
+)
+EXECUTE FUNCTION maintain_session_rollups();
+
+-- Recompute every rollup from bookings and refunds
+CREATE OR REPLACE FUNCTION rebuild_booking_daily_rollups()
+RETURNS INTEGER AS $$
+DECLARE
+  v_rows INTEGER;
+BEGIN
+  -- Hold off trigger writes until the rebuild commits, so a booking changed
+  -- meanwhile is either in the rebuilt rows or applied on top of them
+  LOCK TABLE booking_daily_rollups IN EXCLUSIVE MODE;
+
+  DELETE FROM booking_daily_rollups;
+
+  INSERT INTO booking_daily_rollups (
+    booking_date, session_date, course_id, course_type,
+    booked_count, completed_count, cancelled_count,
+    attendees, revenue, refunded_amount, fill_ratio_sum
+  )
+  SELECT
+    booking_rollup_date(b.created_at),
+    cs.session_date,
+    c.id,
+    c.course_type,
+    COUNT(*) FILTER (WHERE booking_rollup_is_booked(b.status)),
+    COUNT(*) FILTER (WHERE booking_rollup_is_completed(b.status)),
+    COUNT(*) FILTER (WHERE booking_rollup_is_cancelled(b.status)),
+    COALESCE(SUM(b.number_of_attendees) FILTER (WHERE booking_rollup_is_booked(b.status)), 0),
+    COALESCE(SUM(b.total_amount) FILTER (WHERE booking_rollup_is_booked(b.status)), 0),
+    COALESCE(SUM(r.refunded), 0),
+    COALESCE(SUM(b.number_of_attendees::numeric / NULLIF(cs.max_participants, 0))
+      FILTER (WHERE booking_rollup_is_booked(b.status)), 0)
+  FROM bookings b
+  JOIN course_sessions cs ON cs.id = b.session_id
+  JOIN courses c ON c.id = cs.course_id
+  LEFT JOIN (
+    SELECT booking_id, SUM(amount) AS refunded
+    FROM refunds
+    WHERE status = 'processed'
+    GROUP BY booking_id
+  ) r ON r.booking_id = b.id
+  GROUP BY booking_rollup_date(b.created_at), cs.session_date, c.id, c.course_type;
+
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rows written before the triggers missed Stripe-confirmed and paid
+-- bookings and were bucketed by the server's local day
+SELECT rebuild_booking_daily_rollups();
+
+COMMENT ON COLUMN booking_daily_rollups.booking_date IS 'UTC day the booking was made';
+COMMENT ON COLUMN booking_daily_rollups.booked_count IS 'Bookings currently confirmed, paid, attended or completed';
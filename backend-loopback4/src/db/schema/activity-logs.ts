@@ -11,4 +11,7 @@ export const adminActivityLogs = pgTable('admin_activity_logs', {
   newValues: jsonb('new_values'),
   ipAddress: varchar('ip_address', { length: 45 }),
   createdAt: timestamp('created_at').defaultNow(),
-});
\ No newline at end of file
+});
+
+export type AdminActivityLog = typeof adminActivityLogs.$inferSelect;
+export type NewAdminActivityLog = typeof adminActivityLogs.$inferInsert;
@@ -0,0 +1,26 @@
+import { pgTable, uuid, varchar, integer, decimal, timestamp, date, primaryKey, index } from 'drizzle-orm/pg-core';
+import { courses } from './courses';
+
+// Booking rollups - one row per booking date, session date and course
+export const bookingDailyRollups = pgTable('booking_daily_rollups', {
+  bookingDate: date('booking_date').notNull(),
+  sessionDate: date('session_date').notNull(),
+  courseId: uuid('course_id').notNull().references(() => courses.id),
+  courseType: varchar('course_type', { length: 100 }).notNull(),
+  bookedCount: integer('booked_count').default(0).notNull(),
+  completedCount: integer('completed_count').default(0).notNull(),
+  cancelledCount: integer('cancelled_count').default(0).notNull(),
+  attendees: integer('attendees').default(0).notNull(),
+  revenue: decimal('revenue', { precision: 12, scale: 2 }).default('0').notNull(),
+  refundedAmount: decimal('refunded_amount', { precision: 12, scale: 2 }).default('0').notNull(),
+  fillRatioSum: decimal('fill_ratio_sum', { precision: 12, scale: 4 }).default('0').notNull(),
+  updatedAt: timestamp('updated_at').defaultNow(),
+}, (table) => {
+  return {
+    pk: primaryKey({ columns: [table.bookingDate, table.sessionDate, table.courseId] }),
+    sessionDateIdx: index('idx_booking_daily_rollups_session_date').on(table.sessionDate, table.courseId),
+  };
+});
+
+// Type exports
+export type BookingDailyRollup = typeof bookingDailyRollups.$inferSelect;
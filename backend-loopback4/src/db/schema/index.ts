@@ -7,4 +7,5 @@ export * from './bookings';
 export * from './booking-inquiries';
 export * from './payments';
 export * from './activity-logs';
-export * from './admin-alerts';
\ No newline at end of file
+export * from './admin-alerts';
+export * from './dashboard-rollups';
\ No newline at end of file
@@ -121,6 +121,35 @@ export const webhookEvents = pgTable('webhook_events', {
   };
 });
 
+// Stripe webhook events received by StripeWebhookService (migrations 002, 018).
+// Rows are the delivery queue: pending -> processing -> processed, or
+// failed (retried with backoff) -> dead_letter after the last attempt.
+export const stripeWebhookEvents = pgTable('stripe_webhook_events', {
+  id: uuid('id').primaryKey().defaultRandom(),
+  stripeEventId: varchar('stripe_event_id', { length: 255 }).unique().notNull(),
+  eventType: varchar('event_type', { length: 100 }).notNull(),
+  eventData: jsonb('event_data').notNull(),
+  processed: boolean('processed').default(false),
+  processedAt: timestamp('processed_at'),
+  errorMessage: text('error_message'),
+  retryCount: integer('retry_count').default(0),
+  status: varchar('status', { length: 20 }).default('pending').notNull(),
+  orderingKey: varchar('ordering_key', { length: 255 }),
+  stripeCreatedAt: timestamp('stripe_created_at', { withTimezone: true }),
+  receivedAt: timestamp('received_at', { withTimezone: true }).defaultNow(),
+  nextAttemptAt: timestamp('next_attempt_at', { withTimezone: true }).defaultNow(),
+  lockedBy: varchar('locked_by', { length: 100 }),
+  lockedAt: timestamp('locked_at', { withTimezone: true }),
+  deadLetteredAt: timestamp('dead_lettered_at', { withTimezone: true }),
+  createdAt: timestamp('created_at').defaultNow(),
+}, (table) => {
+  return {
+    typeIdx: index('idx_stripe_webhook_events_type').on(table.eventType),
+    processedIdx: index('idx_stripe_webhook_events_processed').on(table.processed),
+    createdIdx: index('idx_stripe_webhook_events_created').on(table.createdAt),
+  };
+});
+
 // Type exports
 export type Payment = typeof payments.$inferSelect;
 export type NewPayment = typeof payments.$inferInsert;
@@ -132,6 +161,7 @@ export type Invoice = typeof invoices.$inferSelect;
 export type NewInvoice = typeof invoices.$inferInsert;
 export type WebhookEvent = typeof webhookEvents.$inferSelect;
 export type NewWebhookEvent = typeof webhookEvents.$inferInsert;
+export type StripeWebhookEventRecord = typeof stripeWebhookEvents.$inferSelect;
 
 // Enum types
 export enum PaymentStatus {
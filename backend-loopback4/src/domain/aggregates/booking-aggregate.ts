@@ -409,10 +409,13 @@ export class BookingAggregate {
   }
 
   /**
-   * Load aggregate from events
+   * Load aggregate from events, optionally on top of a snapshot taken
+   * before the first of them
    */
-  static loadFromHistory(events: DomainEvent[]): BookingAggregate {
-    const booking = new BookingAggregate(events[0]?.aggregateId);
+  static loadFromHistory(events: DomainEvent[], snapshot?: any): BookingAggregate {
+    const booking = snapshot
+      ? BookingAggregate.loadFromSnapshot(snapshot)
+      : new BookingAggregate(events[0]?.aggregateId);
     
     for (const event of events) {
       booking.when(event as BookingDomainEvent);
@@ -509,11 +512,16 @@ export class BookingAggregate {
     booking._paymentId = snapshot.paymentId;
     booking._paidAmount = snapshot.paidAmount;
     booking._refundedAmount = snapshot.refundedAmount;
-    booking._createdAt = snapshot.createdAt;
-    booking._confirmedAt = snapshot.confirmedAt;
-    booking._paidAt = snapshot.paidAt;
-    booking._cancelledAt = snapshot.cancelledAt;
+    // Snapshots read back from JSONB carry dates as strings
+    booking._createdAt = BookingAggregate.toDate(snapshot.createdAt);
+    booking._confirmedAt = BookingAggregate.toDate(snapshot.confirmedAt);
+    booking._paidAt = BookingAggregate.toDate(snapshot.paidAt);
+    booking._cancelledAt = BookingAggregate.toDate(snapshot.cancelledAt);
     
     return booking;
   }
-}
\ No newline at end of file
+
+  private static toDate(value: Date | string | undefined): Date | undefined {
+    return value ? new Date(value) : undefined;
+  }
+}
@@ -7,8 +7,11 @@ import {
   ValueOrPromise,
 } from '@loopback/core';
 import {RestBindings, Request, HttpErrors} from '@loopback/rest';
+import {getRateLimiter, setRateLimitHeaders} from '../services/rate-limit/rate-limiter';
 
 interface RateLimitOptions {
+  /** Rule name, keeps this limiter's counts apart from others */
+  name?: string;
   windowMs: number;
   maxRequests: number;
   message?: string;
@@ -16,28 +19,9 @@ interface RateLimitOptions {
   keyGenerator?: (req: Request) => string;
 }
 
-interface RateLimitStore {
-  [key: string]: {
-    count: number;
-    resetTime: number;
-  };
-}
-
-// In-memory store for rate limiting
-const rateLimitStore: RateLimitStore = {};
-
-// Clean up expired entries
-setInterval(() => {
-  const now = Date.now();
-  Object.keys(rateLimitStore).forEach(key => {
-    if (rateLimitStore[key].resetTime < now) {
-      delete rateLimitStore[key];
-    }
-  });
-}, 60000);
-
 /**
- * Rate limiting interceptor for LoopBack 4
+ * Rate limiting interceptor for LoopBack 4, on the shared sliding-window
+ * limiter
  */
 @injectable({tags: {key: RateLimitInterceptor.BINDING_KEY}})
 export class RateLimitInterceptor implements Provider<Interceptor> {
@@ -54,6 +38,7 @@ export class RateLimitInterceptor implements Provider<Interceptor> {
     next: () => ValueOrPromise<InvocationResult>,
   ): Promise<InvocationResult> {
     const {
+      name,
       windowMs,
       maxRequests,
       message = 'Too many requests, please try again later.',
@@ -64,48 +49,29 @@ export class RateLimitInterceptor implements Provider<Interceptor> {
     const req = await invocationCtx.get(RestBindings.Http.REQUEST);
     const res = await invocationCtx.get(RestBindings.Http.RESPONSE);
     
-    const key = keyGenerator(req);
-    const now = Date.now();
-    
-    // Get or create rate limit entry
-    if (!rateLimitStore[key] || rateLimitStore[key].resetTime < now) {
-      rateLimitStore[key] = {
-        count: 0,
-        resetTime: now + windowMs,
-      };
-    }
-    
-    const rateLimit = rateLimitStore[key];
-    
-    // Check if limit exceeded
-    if (rateLimit.count >= maxRequests) {
-      const retryAfter = Math.ceil((rateLimit.resetTime - now) / 1000);
-      
-      res.setHeader('X-RateLimit-Limit', maxRequests.toString());
-      res.setHeader('X-RateLimit-Remaining', '0');
-      res.setHeader('X-RateLimit-Reset', new Date(rateLimit.resetTime).toISOString());
-      res.setHeader('Retry-After', retryAfter.toString());
-      
+    // Every limiter shares one store, and a key reused with a different
+    // window would reset the other limiter's counts
+    const key = `ic:${name || `${maxRequests}per${windowMs}`}:${keyGenerator(req)}`;
+    const limiter = getRateLimiter();
+    const check = {limit: maxRequests, windowMs};
+
+    // With skipSuccessfulRequests only failures are counted, so just check
+    const rateLimit = skipSuccessfulRequests
+      ? await limiter.peek(key, check)
+      : await limiter.consume(key, check);
+
+    setRateLimitHeaders(res, rateLimit);
+    if (!rateLimit.allowed) {
       throw new HttpErrors.TooManyRequests(message);
     }
-    
-    // Increment counter
-    if (!skipSuccessfulRequests) {
-      rateLimit.count++;
-    }
-    
-    // Set headers
-    res.setHeader('X-RateLimit-Limit', maxRequests.toString());
-    res.setHeader('X-RateLimit-Remaining', (maxRequests - rateLimit.count).toString());
-    res.setHeader('X-RateLimit-Reset', new Date(rateLimit.resetTime).toISOString());
-    
+
     try {
       const result = await next();
       return result;
     } catch (error) {
-      // If skipSuccessfulRequests is true, increment on error
-      if (skipSuccessfulRequests && rateLimit.count < maxRequests) {
-        rateLimit.count++;
+      // If skipSuccessfulRequests is true, count the failed request
+      if (skipSuccessfulRequests) {
+        await limiter.consume(key, {...check, force: true});
       }
       throw error;
     }
@@ -115,6 +81,7 @@ export class RateLimitInterceptor implements Provider<Interceptor> {
 // Factory functions for specific rate limiters
 export function createLoginRateLimiter() {
   return new RateLimitInterceptor({
+    name: 'login',
     windowMs: 15 * 60 * 1000, // 15 minutes
     maxRequests: 5,
     message: 'Too many login attempts. Please try again later.',
@@ -122,29 +89,31 @@ export function createLoginRateLimiter() {
     keyGenerator: (req: Request) => {
       const email = req.body?.email?.toLowerCase() || 'unknown';
       const ip = req.ip || 'unknown';
-      return `login:${ip}:${email}`;
+      return `${ip}:${email}`;
     },
   });
 }
 
 export function createSignupRateLimiter() {
   return new RateLimitInterceptor({
+    name: 'signup',
     windowMs: 60 * 60 * 1000, // 1 hour
     maxRequests: 3,
     message: 'Too many signup attempts. Please try again later.',
-    keyGenerator: (req: Request) => `signup:${req.ip || 'unknown'}`,
+    keyGenerator: (req: Request) => req.ip || 'unknown',
   });
 }
 
 export function createPasswordResetRateLimiter() {
   return new RateLimitInterceptor({
+    name: 'forgot-password',
     windowMs: 60 * 60 * 1000, // 1 hour
     maxRequests: 3,
     message: 'Too many password reset requests. Please try again later.',
     keyGenerator: (req: Request) => {
       const email = req.body?.email?.toLowerCase() || 'unknown';
       const ip = req.ip || 'unknown';
-      return `forgot:${ip}:${email}`;
+      return `${ip}:${email}`;
     },
   });
 }
\ No newline at end of file
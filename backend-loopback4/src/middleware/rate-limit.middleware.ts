@@ -1,7 +1,9 @@
 import { Request, Response, NextFunction } from 'express';
 import { HttpErrors } from '@loopback/rest';
+import { getRateLimiter, setRateLimitHeaders } from '../services/rate-limit/rate-limiter';
 
 interface RateLimitOptions {
+  name?: string; // Rule name, keeps this limiter's counts apart from others
   windowMs: number; // Time window in milliseconds
   maxRequests: number; // Max requests per window
   message?: string; // Custom error message
@@ -9,28 +11,9 @@ interface RateLimitOptions {
   keyGenerator?: (req: Request) => string; // Custom key generator
 }
 
-interface RateLimitStore {
-  [key: string]: {
-    count: number;
-    resetTime: number;
-  };
-}
-
-// In-memory store (replace with Redis in production)
-const rateLimitStore: RateLimitStore = {};
-
-// Clean up expired entries periodically
-setInterval(() => {
-  const now = Date.now();
-  Object.keys(rateLimitStore).forEach(key => {
-    if (rateLimitStore[key].resetTime < now) {
-      delete rateLimitStore[key];
-    }
-  });
-}, 60000); // Clean every minute
-
 export function createRateLimiter(options: RateLimitOptions) {
   const {
+    name,
     windowMs,
     maxRequests,
     message = 'Too many requests, please try again later.',
@@ -41,52 +24,32 @@ export function createRateLimiter(options: RateLimitOptions) {
     },
   } = options;
 
+  const check = { limit: maxRequests, windowMs };
+  // Every limiter shares one store, and a key reused with a different window
+  // would reset the other limiter's counts
+  const prefix = `mw:${name || `${maxRequests}per${windowMs}`}:`;
+
   return async (req: Request, res: Response, next: NextFunction) => {
-    const key = keyGenerator(req);
-    const now = Date.now();
-    
-    // Get or create rate limit entry
-    if (!rateLimitStore[key] || rateLimitStore[key].resetTime < now) {
-      rateLimitStore[key] = {
-        count: 0,
-        resetTime: now + windowMs,
-      };
-    }
-    
-    const rateLimit = rateLimitStore[key];
-    
-    // Check if limit exceeded
-    if (rateLimit.count >= maxRequests) {
-      const retryAfter = Math.ceil((rateLimit.resetTime - now) / 1000);
-      
-      res.setHeader('X-RateLimit-Limit', maxRequests.toString());
-      res.setHeader('X-RateLimit-Remaining', '0');
-      res.setHeader('X-RateLimit-Reset', new Date(rateLimit.resetTime).toISOString());
-      res.setHeader('Retry-After', retryAfter.toString());
-      
-      throw new HttpErrors.TooManyRequests(message);
-    }
-    
-    // Increment counter before processing request
-    if (!skipSuccessfulRequests) {
-      rateLimit.count++;
+    const key = prefix + keyGenerator(req);
+    const limiter = getRateLimiter();
+
+    // With skipSuccessfulRequests only failed responses are counted, so just check
+    const rateLimit = skipSuccessfulRequests
+      ? await limiter.peek(key, check)
+      : await limiter.consume(key, check);
+
+    setRateLimitHeaders(res, rateLimit);
+    if (!rateLimit.allowed) {
+      return next(new HttpErrors.TooManyRequests(message));
     }
-    
-    // Set rate limit headers
-    res.setHeader('X-RateLimit-Limit', maxRequests.toString());
-    res.setHeader('X-RateLimit-Remaining', (maxRequests - rateLimit.count).toString());
-    res.setHeader('X-RateLimit-Reset', new Date(rateLimit.resetTime).toISOString());
-    
-    // Handle skipSuccessfulRequests
+
     if (skipSuccessfulRequests) {
-      const originalSend = res.send;
-      res.send = function(data: any) {
-        // Only increment if response indicates failure
+      res.on('finish', () => {
+        // Only count the request if the response indicates failure
         if (res.statusCode >= 400) {
-          rateLimit.count++;
+          limiter.consume(key, { ...check, force: true }).catch(() => {});
         }
-        return originalSend.call(this, data);
-      };
+      });
     }
     
     next();
@@ -97,6 +60,7 @@ export function createRateLimiter(options: RateLimitOptions) {
 export const authRateLimiters = {
   // Strict limit for login attempts
   login: createRateLimiter({
+    name: 'login',
     windowMs: 15 * 60 * 1000, // 15 minutes
     maxRequests: 5, // 5 attempts per 15 minutes
     message: 'Too many login attempts. Please try again later.',
@@ -105,35 +69,38 @@ export const authRateLimiters = {
       // Rate limit by IP + email combination
       const email = req.body?.email?.toLowerCase() || 'unknown';
       const ip = req.ip || req.socket.remoteAddress || 'unknown';
-      return `login:${ip}:${email}`;
+      return `${ip}:${email}`;
     },
   }),
   
   // Moderate limit for signup
   signup: createRateLimiter({
+    name: 'signup',
     windowMs: 60 * 60 * 1000, // 1 hour
     maxRequests: 3, // 3 signups per hour per IP
     message: 'Too many signup attempts. Please try again later.',
     keyGenerator: (req: Request) => {
       const ip = req.ip || req.socket.remoteAddress || 'unknown';
-      return `signup:${ip}`;
+      return ip;
     },
   }),
   
   // Moderate limit for password reset requests
   forgotPassword: createRateLimiter({
+    name: 'forgot-password',
     windowMs: 60 * 60 * 1000, // 1 hour
     maxRequests: 3, // 3 reset requests per hour
     message: 'Too many password reset requests. Please try again later.',
     keyGenerator: (req: Request) => {
       const email = req.body?.email?.toLowerCase() || 'unknown';
       const ip = req.ip || req.socket.remoteAddress || 'unknown';
-      return `forgot:${ip}:${email}`;
+      return `${ip}:${email}`;
     },
   }),
   
   // General API rate limit
   general: createRateLimiter({
+    name: 'general',
     windowMs: 15 * 60 * 1000, // 15 minutes
     maxRequests: 100, // 100 requests per 15 minutes
     message: 'Too many requests. Please slow down.',
@@ -90,6 +90,31 @@ export class BookingRepository extends DefaultCrudRepository<
     });
   }
 
+  /**
+   * Count active (confirmed or pending) bookings for many sessions in a single
+   * grouped query. Sessions without bookings are absent from the returned map.
+   */
+  async countActiveBySession(sessionIds: string[]): Promise<Map<string, number>> {
+    const counts = new Map<string, number>();
+    if (sessionIds.length === 0) {
+      return counts;
+    }
+
+    const rows = await this.dataSource.execute(
+      `SELECT session_id, COUNT(*)::int AS booking_count
+         FROM bookings
+        WHERE session_id = ANY($1::uuid[])
+          AND status IN ('CONFIRMED', 'PENDING')
+        GROUP BY session_id`,
+      [sessionIds],
+    );
+
+    for (const row of rows) {
+      counts.set(String(row.session_id), Number(row.booking_count));
+    }
+    return counts;
+  }
+
   async calculateTotalWithDiscount(
     sessionId: string,
     numberOfParticipants: number,
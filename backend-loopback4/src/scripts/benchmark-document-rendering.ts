@@ -0,0 +1,142 @@
+import * as fs from 'fs';
+import * as os from 'os';
+import * as path from 'path';
+import { monitorEventLoopDelay } from 'perf_hooks';
+import { PDFService, CertificateDocument } from '../services/pdf.service';
+import { InvoicePDFGenerator } from '../services/pdf/invoice-generator';
+import { documentRenderPool } from '../services/pdf/render-pool';
+import { runDocumentBatch } from '../services/pdf/render-batch';
+
+/**
+ * Benchmarks document rendering for a 12-attendee certificate session and a
+ * 200-invoice month-end run, comparing sequential rendering on the main
+ * thread with batches on the worker pool.
+ *
+ * Only rendering and file writes are measured. The previous certificate path
+ * also launched a Chromium instance per attendee, which is not reproduced
+ * here, so the certificate speed-up is a lower bound.
+ *
+ * Tune the pool with PDF_RENDER_WORKERS.
+ *
+ * Run: npx ts-node src/scripts/benchmark-document-rendering.ts
+ */
+
+const ATTENDEES = 12;
+const INVOICES = 200;
+
+function buildCertificates(): CertificateDocument[] {
+  return Array.from({ length: ATTENDEES }, (_, i) => ({
+    certificateName: `Attendee ${i + 1}`,
+    courseName: 'Emergency First Aid at Work',
+    courseDate: new Date(2026, 9, 12),
+    location: 'Leeds Training Centre',
+    certificateNumber: `RFT-2026-${(i + 1).toString().padStart(4, '0')}`,
+    issueDate: new Date(),
+    expiryDate: new Date(2029, 9, 12),
+    trainerName: 'Lex',
+  }));
+}
+
+function buildInvoices() {
+  return Array.from({ length: INVOICES }, (_, i) => {
+    const attendees = 1 + (i % 6);
+    const total = (attendees * 75).toFixed(2);
+    return {
+      invoiceNumber: `INV-2026-${(i + 1).toString().padStart(5, '0')}`,
+      issueDate: '2026-10-31',
+      subtotal: total,
+      taxAmount: '0.00',
+      totalAmount: total,
+      status: 'paid',
+      booking: { bookingReference: `RFT-${100000 + i}`, numberOfAttendees: attendees },
+      user: { name: `Customer ${i}`, email: `customer${i}@example.com`, phone: '07000 000000' },
+      courseDetails: {
+        courseType: 'Emergency First Aid at Work',
+        sessionDate: '2026-10-12',
+        startTime: '09:00',
+        endTime: '16:00',
+        location: 'Leeds Training Centre',
+        price: 75,
+      },
+      attendees: Array.from({ length: attendees }, (_, a) => ({
+        name: `Attendee ${a + 1}`,
+        email: `attendee${a}@example.com`,
+      })),
+    };
+  });
+}
+
+async function measure(label: string, count: number, fn: () => Promise<void>) {
+  const loopDelay = monitorEventLoopDelay({ resolution: 5 });
+  loopDelay.enable();
+  const start = process.hrtime.bigint();
+  await fn();
+  const elapsedMs = Number(process.hrtime.bigint() - start) / 1e6;
+  loopDelay.disable();
+
+  console.log(
+    `  ${label.padEnd(30)} ${elapsedMs.toFixed(0).padStart(7)} ms  ` +
+      `${(elapsedMs / count).toFixed(1).padStart(6)} ms/doc  ` +
+      `event loop max stall ${(loopDelay.max / 1e6).toFixed(0)} ms`
+  );
+}
+
+async function benchmarkDocumentRendering() {
+  const outputDir = fs.mkdtempSync(path.join(os.tmpdir(), 'rft-documents-'));
+  console.log('📄 Document rendering benchmark');
+  console.log(`   render pool: ${documentRenderPool.poolSize} workers, ${os.cpus().length} CPUs\n`);
+
+  // Warm the workers so thread start-up is not billed to the first batch
+  await Promise.all(
+    Array.from({ length: documentRenderPool.poolSize }, () =>
+      documentRenderPool.render('certificate', buildCertificates()[0])
+    )
+  );
+
+  const certificates = buildCertificates();
+  console.log(`${ATTENDEES}-attendee session certificates`);
+  await measure('sequential, main thread', ATTENDEES, async () => {
+    for (const data of certificates) {
+      const pdf = await PDFService.renderCertificate(data);
+      fs.writeFileSync(path.join(outputDir, `seq_${data.certificateNumber}.pdf`), pdf);
+    }
+  });
+  await measure('batch on render pool', ATTENDEES, async () => {
+    await runDocumentBatch(
+      certificates,
+      async data => {
+        const pdf = await PDFService.generateCertificate(data);
+        await fs.promises.writeFile(path.join(outputDir, `pool_${data.certificateNumber}.pdf`), pdf);
+      },
+      { concurrency: documentRenderPool.poolSize * 2 }
+    );
+  });
+
+  const invoices = buildInvoices();
+  console.log(`\n${INVOICES}-invoice month-end run`);
+  await measure('sequential, main thread', INVOICES, async () => {
+    for (const invoice of invoices) {
+      const pdf = await InvoicePDFGenerator.render(invoice);
+      fs.writeFileSync(path.join(outputDir, `seq_${invoice.invoiceNumber}.pdf`), pdf);
+    }
+  });
+  await measure('batch on render pool', INVOICES, async () => {
+    await runDocumentBatch(
+      invoices,
+      async invoice => {
+        const pdf = await InvoicePDFGenerator.generate(invoice);
+        await fs.promises.writeFile(path.join(outputDir, `pool_${invoice.invoiceNumber}.pdf`), pdf);
+      },
+      { concurrency: documentRenderPool.poolSize * 2 }
+    );
+  });
+
+  console.log(`\n   ${JSON.stringify(documentRenderPool.getStats())}`);
+  await documentRenderPool.close();
+  fs.rmSync(outputDir, { recursive: true, force: true });
+}
+
+benchmarkDocumentRendering().catch(error => {
+  console.error('Benchmark failed:', error);
+  process.exit(1);
+});
@@ -0,0 +1,134 @@
+/**
+ * Benchmark for the write-behind ingestion buffer.
+ *
+ *  - push() throughput and statements issued for tracking events, against
+ *    one INSERT per event
+ *  - throughput and loss when the database is slower than the arrival rate,
+ *    for each drop policy
+ *
+ * The database is simulated: each statement costs a fixed round-trip plus a
+ * small per-row cost, roughly what a multi-row INSERT on a nearby Postgres
+ * takes. Figures are for comparison between strategies, not absolutes.
+ *
+ * Run: node src/scripts/benchmark-ingestion.js
+ */
+
+const { IngestionBuffer } = require('../services/ingestion/ingestion-buffer');
+const {
+  createTrackingEventBuffer,
+  toCounter
+} = require('../services/ingestion/tracking-events');
+
+const EVENTS = 200000;
+const ROUND_TRIP_MS = 2;
+const PER_ROW_MS = 0.005;
+const PAGES = ['/', '/courses', '/booking', '/contact', '/about'];
+const DEVICES = ['mobile', 'tablet', 'desktop'];
+
+function simulatedDatabase() {
+  const db = { statements: 0, rows: 0 };
+  db.query = rows => {
+    db.statements++;
+    db.rows += rows;
+    return new Promise(resolve => setTimeout(resolve, ROUND_TRIP_MS + rows * PER_ROW_MS));
+  };
+  return db;
+}
+
+function trackingEvent(i) {
+  return {
+    event: i % 20 === 0 ? 'booking_start' : 'pageview',
+    page: PAGES[i % PAGES.length],
+    deviceType: DEVICES[i % DEVICES.length],
+    timestamp: new Date().toISOString()
+  };
+}
+
+async function benchmarkPerEventInserts() {
+  const db = simulatedDatabase();
+  const count = 2000;
+  const start = process.hrtime.bigint();
+
+  // What the endpoint would cost writing each event as it arrives, 64 at a time
+  let next = 0;
+  await Promise.all(Array.from({ length: 64 }, async () => {
+    while (next++ < count) {
+      await db.query(1);
+    }
+  }));
+
+  const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+  console.log(
+    `  ${'one INSERT per event'.padEnd(32)} ${Math.round(count / seconds).toLocaleString().padStart(12)} events/s` +
+    `  ${db.statements.toLocaleString()} statements for ${count.toLocaleString()} events`
+  );
+}
+
+async function benchmarkTrackingBuffer() {
+  const db = simulatedDatabase();
+  const buffer = createTrackingEventBuffer({
+    pool: { query: ({ values }) => db.query(values.length / 7) },
+    buffer: { flushIntervalMs: 50 }
+  });
+
+  const start = process.hrtime.bigint();
+  for (let i = 0; i < EVENTS; i++) {
+    buffer.push(toCounter(trackingEvent(i)));
+  }
+  const pushSeconds = Number(process.hrtime.bigint() - start) / 1e9;
+  await buffer.close();
+
+  const metrics = buffer.getMetrics();
+  console.log(
+    `  ${'buffered, hourly counters'.padEnd(32)} ${Math.round(EVENTS / pushSeconds).toLocaleString().padStart(12)} events/s` +
+    `  ${db.statements.toLocaleString()} statements, ${db.rows.toLocaleString()} rows for ${EVENTS.toLocaleString()} events` +
+    ` (${metrics.merged.toLocaleString()} merged)`
+  );
+}
+
+async function benchmarkOverload(dropPolicy) {
+  const db = simulatedDatabase();
+  const buffer = new IngestionBuffer({
+    name: `overload-${dropPolicy}`,
+    // A database that manages ~50 statements/s of 100 rows
+    write: batch => new Promise(resolve => setTimeout(resolve, 20)).then(() => db.query(batch.length)),
+    maxBatchSize: 100,
+    flushIntervalMs: 10,
+    maxBuffered: 2000,
+    dropPolicy
+  });
+
+  // 20,000 records/s for one second
+  for (let tick = 0; tick < 100; tick++) {
+    for (let i = 0; i < 200; i++) {
+      buffer.push({ tick, i });
+    }
+    await new Promise(resolve => setTimeout(resolve, 10));
+  }
+  await buffer.close();
+
+  const metrics = buffer.getMetrics();
+  console.log(
+    `  ${dropPolicy.padEnd(32)} ${metrics.written.toLocaleString().padStart(8)} written` +
+    `  ${metrics.dropped.toLocaleString().padStart(8)} dropped` +
+    `  loss ${(metrics.lossRate * 100).toFixed(1)}%  avg batch ${metrics.avgBatchWriteMs.toFixed(1)} ms`
+  );
+}
+
+async function benchmarkIngestion() {
+  console.log('📥 Ingestion buffer benchmark');
+  console.log(`   simulated database: ${ROUND_TRIP_MS} ms per statement + ${PER_ROW_MS} ms per row`);
+
+  console.log('\nTracking events');
+  await benchmarkPerEventInserts();
+  await benchmarkTrackingBuffer();
+
+  console.log('\nOverload (20,000 records/s offered, ~5,000/s writable, 2,000 buffered)');
+  await benchmarkOverload('drop-newest');
+  await benchmarkOverload('drop-oldest');
+}
+
+benchmarkIngestion().catch(error => {
+  console.error('Benchmark failed:', error);
+  process.exit(1);
+});
@@ -0,0 +1,138 @@
+/**
+ * Microbenchmark for the shared rate limiter.
+ *
+ *  - checks/sec of the in-process store over a hot key set and a key set
+ *    larger than maxKeys (constant eviction)
+ *  - retained heap per 100k keys, memory store vs the previous
+ *    Map-of-objects limiter
+ *  - checks/sec against Redis (one Lua round-trip per check) when REDIS_URL
+ *    is set and ioredis is installed
+ *
+ * Run: node --expose-gc src/scripts/benchmark-rate-limiter.js
+ */
+
+const {
+  MemoryRateLimitStore,
+  RedisRateLimitStore
+} = require('../services/rate-limit/rate-limiter');
+
+const CHECKS = 2000000;
+const KEYS = 100000;
+const WINDOW_MS = 60000;
+const LIMIT = 100;
+const REDIS_CHECKS = 50000;
+const REDIS_CONCURRENCY = 64;
+
+function gc() {
+  if (global.gc) {
+    global.gc();
+    global.gc();
+  }
+}
+
+function heapUsed() {
+  gc();
+  return process.memoryUsage().heapUsed;
+}
+
+function buildKeys(count) {
+  return Array.from({ length: count }, (_, i) => `api:10.${(i >> 16) & 255}.${(i >> 8) & 255}.${i & 255}`);
+}
+
+function benchmarkThroughput(label, store, keys) {
+  const start = process.hrtime.bigint();
+  let denied = 0;
+
+  for (let i = 0; i < CHECKS; i++) {
+    if (!store.consume(keys[i % keys.length], LIMIT, WINDOW_MS).allowed) {
+      denied++;
+    }
+  }
+
+  const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+  console.log(
+    `  ${label.padEnd(36)} ${Math.round(CHECKS / seconds).toLocaleString().padStart(12)} checks/s` +
+    `  (${denied.toLocaleString()} denied, ${store.evictions.toLocaleString()} evictions)`
+  );
+}
+
+function benchmarkMemory(label, create, consume, keys) {
+  const before = heapUsed();
+  const store = create();
+  for (const key of keys) {
+    consume(store, key);
+  }
+  const retained = heapUsed() - before;
+
+  console.log(`  ${label.padEnd(36)} ${(retained / 1024 / 1024).toFixed(1).padStart(8)} MB per ${KEYS.toLocaleString()} keys`);
+  return store;
+}
+
+async function benchmarkRedis(keys) {
+  let Redis;
+  try {
+    Redis = require('ioredis');
+  } catch (error) {
+    console.log('  skipped: ioredis not installed');
+    return;
+  }
+
+  const redis = new Redis(process.env.REDIS_URL);
+  const store = new RedisRateLimitStore(redis, { prefix: 'ratelimit:benchmark:' });
+  let next = 0;
+
+  const start = process.hrtime.bigint();
+  await Promise.all(Array.from({ length: REDIS_CONCURRENCY }, async () => {
+    while (next < REDIS_CHECKS) {
+      await store.consume(keys[next++ % 1000], LIMIT, WINDOW_MS);
+    }
+  }));
+  const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+
+  console.log(
+    `  ${`${REDIS_CONCURRENCY} concurrent clients`.padEnd(36)} ` +
+    `${Math.round(REDIS_CHECKS / seconds).toLocaleString().padStart(12)} checks/s`
+  );
+
+  await Promise.all(keys.slice(0, 1000).map(key => store.reset(key)));
+  redis.disconnect();
+}
+
+async function benchmarkRateLimiter() {
+  const keys = buildKeys(KEYS);
+  console.log('🚦 Rate limiter benchmark');
+  if (!global.gc) {
+    console.log('   (run with --expose-gc for stable memory figures)');
+  }
+
+  console.log('\nIn-process store');
+  benchmarkThroughput('1,000 hot keys', new MemoryRateLimitStore(), keys.slice(0, 1000));
+  benchmarkThroughput('100,000 keys, maxKeys 100,000', new MemoryRateLimitStore({ maxKeys: KEYS }), keys);
+  benchmarkThroughput('100,000 keys, maxKeys 10,000', new MemoryRateLimitStore({ maxKeys: 10000 }), keys);
+
+  console.log('\nMemory');
+  benchmarkMemory(
+    'sliding window store',
+    () => new MemoryRateLimitStore({ maxKeys: KEYS }),
+    (store, key) => store.consume(key, LIMIT, WINDOW_MS),
+    keys
+  );
+  benchmarkMemory(
+    'previous Map of { count, windowStart }',
+    () => new Map(),
+    (store, key) => store.set(key, { count: 1, windowStart: Date.now() }),
+    keys
+  );
+
+  console.log('\nRedis store');
+  if (process.env.REDIS_URL) {
+    await benchmarkRedis(keys);
+  } else {
+    console.log('  skipped: set REDIS_URL to include Redis');
+  }
+}
+
+benchmarkRateLimiter().catch(error => {
+  console.error('Benchmark failed:', error);
+  process.exit(1);
+});
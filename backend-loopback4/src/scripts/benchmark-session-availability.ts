@@ -0,0 +1,176 @@
+import { CourseSessionCapacityService } from '../services/course-session-capacity.service';
+
+/**
+ * Compares the grouped availability query against the previous
+ * one-count-per-session path for 50, 500 and 5,000 sessions.
+ *
+ * Repositories are in-memory and every call counts as one database
+ * round-trip with a fixed latency, funnelled through a pool of the same
+ * size as the Postgres datasource. Tune with:
+ *   BENCH_DB_LATENCY_MS (default 2), BENCH_POOL_SIZE (default 10)
+ *
+ * Run: npx ts-node src/scripts/benchmark-session-availability.ts
+ */
+
+const DB_LATENCY_MS = Number(process.env.BENCH_DB_LATENCY_MS || 2);
+const POOL_SIZE = Number(process.env.BENCH_POOL_SIZE || 10);
+const SESSION_COUNTS = [50, 500, 5000];
+const COURSE_NAMES = ['Emergency First Aid at Work', 'First Aid at Work', 'Paediatric First Aid'];
+const LOCATION_NAMES = ['Leeds Training Centre', 'Sheffield Community Hall'];
+
+class SimulatedDatabase {
+  roundTrips = 0;
+  private active = 0;
+  private waiting: Array<() => void> = [];
+
+  async query<T>(fn: () => T): Promise<T> {
+    if (this.active >= POOL_SIZE) {
+      await new Promise<void>(resolve => this.waiting.push(resolve));
+    }
+    this.active++;
+    this.roundTrips++;
+    try {
+      await new Promise(resolve => setTimeout(resolve, DB_LATENCY_MS));
+      return fn();
+    } finally {
+      this.active--;
+      this.waiting.shift()?.();
+    }
+  }
+}
+
+function buildFixtures(sessionCount: number) {
+  const courses = COURSE_NAMES.map((name, i) => ({ id: `course-${i}`, name }));
+  const locations = LOCATION_NAMES.map((name, i) => ({ id: `location-${i}`, name }));
+  const sessions = [];
+  const bookings = [];
+
+  for (let i = 0; i < sessionCount; i++) {
+    const startDate = new Date(Date.UTC(2026, 0, 1 + (i % 365)));
+    const course = courses[i % courses.length];
+    const location = locations[i % locations.length];
+    sessions.push({
+      id: `session-${i}`,
+      courseId: course.id,
+      locationId: location.id,
+      course,
+      location,
+      startDate,
+      endDate: startDate,
+      startTime: '09:00',
+      endTime: '16:00',
+      maxParticipants: 12,
+      status: 'SCHEDULED',
+    });
+    for (let b = 0; b < i % 13; b++) {
+      bookings.push({ sessionId: `session-${i}`, status: b % 4 === 0 ? 'PENDING' : 'CONFIRMED' });
+    }
+  }
+
+  return { courses, locations, sessions, bookings };
+}
+
+function createRepositories(db: SimulatedDatabase, fixtures: ReturnType<typeof buildFixtures>) {
+  const matchesSession = (session: any, where: any) =>
+    (!where.courseId || where.courseId.inq.includes(session.courseId)) &&
+    (!where.locationId || where.locationId.inq.includes(session.locationId)) &&
+    (!where.or || where.or[0].locationId.inq.includes(session.locationId));
+
+  const courseSessionRepository = {
+    find: (filter: any) =>
+      db.query(() => fixtures.sessions.filter(session => matchesSession(session, filter.where))),
+  };
+  const bookingRepository = {
+    count: (where: any) =>
+      db.query(() => ({
+        count: fixtures.bookings.filter(
+          booking => booking.sessionId === where.sessionId && where.status.inq.includes(booking.status),
+        ).length,
+      })),
+    countActiveBySession: (sessionIds: string[]) =>
+      db.query(() => {
+        const wanted = new Set(sessionIds);
+        const counts = new Map<string, number>();
+        for (const booking of fixtures.bookings) {
+          if (wanted.has(booking.sessionId) && booking.status !== 'CANCELLED') {
+            counts.set(booking.sessionId, (counts.get(booking.sessionId) || 0) + 1);
+          }
+        }
+        return counts;
+      }),
+  };
+  const courseRepository = {
+    find: (filter: any) =>
+      db.query(() => fixtures.courses.filter(course => course.name === filter.where.name)),
+  };
+  const locationRepository = {
+    find: () => db.query(() => fixtures.locations),
+  };
+
+  return { courseSessionRepository, bookingRepository, courseRepository, locationRepository };
+}
+
+/**
+ * The pre-engine implementation: load every session, count bookings per
+ * session, then filter by course type in memory.
+ */
+async function legacyGetAvailableSessions(repositories: any, courseType?: string) {
+  const sessions = await repositories.courseSessionRepository.find({ where: {} });
+  const results = await Promise.all(
+    sessions.map(async (session: any) => {
+      const bookingCount = await repositories.bookingRepository.count({
+        sessionId: session.id,
+        status: { inq: ['CONFIRMED', 'PENDING'] },
+      });
+      if (courseType && session.course?.name !== courseType) {
+        return null;
+      }
+      return { sessionId: session.id, currentBookings: bookingCount.count };
+    }),
+  );
+  return results.filter(result => result !== null);
+}
+
+async function measure(label: string, db: SimulatedDatabase, fn: () => Promise<unknown[]>) {
+  db.roundTrips = 0;
+  const start = process.hrtime.bigint();
+  const rows = await fn();
+  const elapsedMs = Number(process.hrtime.bigint() - start) / 1e6;
+  console.log(
+    `  ${label.padEnd(34)} ${elapsedMs.toFixed(1).padStart(9)} ms  ${String(db.roundTrips).padStart(6)} queries  ${rows.length} rows`,
+  );
+}
+
+async function benchmarkSessionAvailability() {
+  console.log('📊 Session availability benchmark');
+  console.log(`   latency ${DB_LATENCY_MS} ms per query, pool size ${POOL_SIZE}\n`);
+
+  for (const sessionCount of SESSION_COUNTS) {
+    const db = new SimulatedDatabase();
+    const repositories = createRepositories(db, buildFixtures(sessionCount));
+    const service = new CourseSessionCapacityService(
+      repositories.courseSessionRepository as any,
+      repositories.bookingRepository as any,
+      repositories.courseRepository as any,
+      repositories.locationRepository as any,
+    );
+
+    console.log(`${sessionCount} sessions`);
+    await measure('legacy (count per session)', db, () => legacyGetAvailableSessions(repositories));
+    await measure('grouped count', db, () => service.getAvailableSessions({}));
+    await measure('legacy, courseType filter', db, () =>
+      legacyGetAvailableSessions(repositories, COURSE_NAMES[0]),
+    );
+    await measure('grouped, courseType filter', db, () =>
+      service.getAvailableSessions({ courseType: COURSE_NAMES[0] }),
+    );
+    await measure('calendar month (cold)', db, () => service.getCalendarMonth(2026, 3));
+    await measure('calendar month (cached)', db, () => service.getCalendarMonth(2026, 3));
+    console.log('');
+  }
+}
+
+benchmarkSessionAvailability().catch(error => {
+  console.error('Benchmark failed:', error);
+  process.exit(1);
+});
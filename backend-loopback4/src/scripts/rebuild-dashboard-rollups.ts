@@ -0,0 +1,46 @@
+#!/usr/bin/env node
+
+/**
+ * Script to backfill booking_daily_rollups from booking and refund history,
+ * then check the rollup totals against a live query over bookings
+ * Usage: npm run rollups:rebuild
+ *        npm run rollups:verify   (check only)
+ */
+
+import * as dotenv from 'dotenv';
+
+// Load environment variables before the database pool is created
+dotenv.config();
+
+import { DashboardRollupService } from '../services/dashboard-rollup.service';
+
+async function rebuildDashboardRollups() {
+  const verifyOnly = process.argv.includes('--verify-only');
+
+  try {
+    if (!verifyOnly) {
+      console.log('🚀 Rebuilding dashboard rollups...\n');
+      const startTime = Date.now();
+      const { rows } = await DashboardRollupService.rebuild();
+      console.log(`✅ Rebuilt ${rows} rollup rows in ${Date.now() - startTime}ms`);
+    }
+
+    const drift = await DashboardRollupService.verify();
+    if (drift.length > 0) {
+      console.error('❌ Rollups differ from bookings:');
+      drift.forEach(({ field, rollup, live }) => {
+        console.error(`   ${field}: rollups ${rollup}, bookings ${live}`);
+      });
+      process.exit(1);
+    }
+
+    console.log('✅ Rollup totals match bookings');
+    process.exit(0);
+  } catch (error) {
+    console.error('❌ Fatal error:', error);
+    process.exit(1);
+  }
+}
+
+// Run the rebuild
+rebuildDashboardRollups();
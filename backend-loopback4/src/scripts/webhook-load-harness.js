@@ -0,0 +1,386 @@
+/**
+ * Replay / load harness for the Stripe webhook endpoint.
+ *
+ * Expands the recorded events in fixtures/stripe-webhook-events.json (one
+ * payment, charge and refund) into many payments, signs each delivery the
+ * way Stripe does, adds redeliveries and out-of-order arrivals, and fires
+ * them with a fixed number of concurrent connections. Reports
+ * acknowledgement latency and throughput.
+ *
+ * By default it targets a local stub that mimics StripeWebhookService:
+ * signature check, a simulated insert, duplicate drop, then either
+ *  - inline: run the handler before acknowledging (the previous behaviour)
+ *  - queued: acknowledge, then dispatch through the real KeyedDispatcher,
+ *            with retries, backoff and dead-lettering
+ * and also reports processing throughput, retries, dead letters and any
+ * per-payment ordering violations.
+ *
+ * With --target the same deliveries go to a running server instead, e.g.
+ *   STRIPE_WEBHOOK_SECRET=whsec_... node src/scripts/webhook-load-harness.js \
+ *     --target http://localhost:3000/api/webhooks/stripe
+ *
+ * Options: --payments 200 --concurrency 32 --duplicates 0.1
+ *          --handler-ms 40 --failure-rate 0.05 --dispatch-concurrency 16
+ *          --mode both|inline|queued --fixtures <file>
+ */
+
+const crypto = require('crypto');
+const fs = require('fs');
+const http = require('http');
+const path = require('path');
+const {
+  KeyedDispatcher,
+  orderingKeyFor,
+  nextRetry
+} = require('../services/webhooks/webhook-dispatcher');
+
+const args = parseArgs(process.argv.slice(2));
+const SECRET = process.env.STRIPE_WEBHOOK_SECRET || 'whsec_harness';
+const PAYMENTS = parseInt(args.payments || '200');
+const CONCURRENCY = parseInt(args.concurrency || '32');
+const DUPLICATE_RATE = parseFloat(args.duplicates || '0.1');
+const HANDLER_MS = parseFloat(args['handler-ms'] || '40');
+const FAILURE_RATE = parseFloat(args['failure-rate'] || '0.05');
+const DISPATCH_CONCURRENCY = parseInt(args['dispatch-concurrency'] || '16');
+const PERSIST_MS = 2;
+const MAX_ATTEMPTS = 5;
+const RETRY_BASE_MS = 50;
+const FIXTURES = args.fixtures || path.join(__dirname, 'fixtures', 'stripe-webhook-events.json');
+
+function parseArgs(argv) {
+  const parsed = {};
+  for (let i = 0; i < argv.length; i++) {
+    if (argv[i].startsWith('--')) {
+      parsed[argv[i].slice(2)] = argv[i + 1] && !argv[i + 1].startsWith('--') ? argv[++i] : 'true';
+    }
+  }
+  return parsed;
+}
+
+const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+
+/**
+ * Stripe-Signature header: t=<unix seconds>,v1=<HMAC-SHA256 of "t.payload">
+ */
+function sign(payload, secret, timestamp = Math.floor(Date.now() / 1000)) {
+  const signature = crypto.createHmac('sha256', secret).update(`${timestamp}.${payload}`).digest('hex');
+  return `t=${timestamp},v1=${signature}`;
+}
+
+function verify(payload, header, secret, toleranceSeconds = 300) {
+  const parts = Object.fromEntries(String(header || '').split(',').map(part => part.split('=')));
+  if (!parts.t || !parts.v1 || Math.abs(Date.now() / 1000 - Number(parts.t)) > toleranceSeconds) {
+    return false;
+  }
+  const expected = crypto.createHmac('sha256', secret).update(`${parts.t}.${payload}`).digest('hex');
+  return expected.length === parts.v1.length &&
+    crypto.timingSafeEqual(Buffer.from(expected), Buffer.from(parts.v1));
+}
+
+/**
+ * One delivery per fixture per payment, with fresh ids. Payments are
+ * interleaved, neighbouring deliveries are sometimes swapped and a share are
+ * sent twice, as Stripe does under load and on replay.
+ */
+function buildDeliveries(fixtures) {
+  const run = Date.now().toString(36);
+  const template = JSON.stringify(fixtures);
+  const events = [];
+
+  for (let p = 0; p < PAYMENTS; p++) {
+    const suffix = `${run}_${p}`;
+    const offset = p * 7;
+    const copy = JSON.parse(template
+      .replace(/evt_fixture_(\d+)/g, `evt_${suffix}_$1`)
+      .replace(/(pi|ch|re|cus|pm|req)_fixture/g, `$1_${suffix}`));
+    copy.forEach(event => {
+      event.created += offset;
+    });
+    events.push(copy);
+  }
+
+  const deliveries = [];
+  for (let stage = 0; stage < fixtures.length; stage++) {
+    for (const payment of events) {
+      deliveries.push(payment[stage]);
+    }
+  }
+
+  for (let i = 1; i < deliveries.length; i++) {
+    if (Math.random() < 0.2) {
+      [deliveries[i - 1], deliveries[i]] = [deliveries[i], deliveries[i - 1]];
+    }
+  }
+
+  const unique = deliveries.length;
+  for (let i = 0; i < unique * DUPLICATE_RATE; i++) {
+    const source = Math.floor(Math.random() * unique);
+    const at = Math.min(deliveries.length, source + 1 + Math.floor(Math.random() * 50));
+    deliveries.splice(at, 0, deliveries[source]);
+  }
+
+  return { deliveries, unique };
+}
+
+/**
+ * Local stand-in for the webhook endpoint and StripeWebhookService
+ */
+function startStub(mode) {
+  const stats = {
+    acknowledged: 0,
+    duplicates: 0,
+    processed: 0,
+    retries: 0,
+    deadLettered: 0,
+    orderingViolations: 0,
+    doneAt: 0
+  };
+  const stored = new Set();
+  const lastSequence = new Map(); // key -> created of the last event handled
+  const parked = new Map(); // key -> events waiting behind a failed one
+  const dispatcher = new KeyedDispatcher({
+    concurrency: DISPATCH_CONCURRENCY,
+    maxQueued: 100000,
+    onError: () => {}
+  });
+
+  async function handle(event) {
+    await sleep(HANDLER_MS * (0.5 + Math.random()));
+    if (Math.random() < FAILURE_RATE) {
+      throw new Error('Simulated handler failure');
+    }
+  }
+
+  function recordHandled(key, event) {
+    if ((lastSequence.get(key) || 0) > event.created) {
+      stats.orderingViolations++;
+    }
+    lastSequence.set(key, event.created);
+    stats.processed++;
+    stats.doneAt = Date.now();
+  }
+
+  // Queued mode: mirrors processEvent / recordFailure / the ordering gate
+  function enqueue(event, key, attempt = 0, retry = false) {
+    dispatcher.dispatch({
+      id: event.id,
+      key,
+      sequence: event.created,
+      run: async () => {
+        if (!retry && parked.has(key)) {
+          parked.get(key).push(event);
+          return;
+        }
+
+        try {
+          await handle(event);
+          recordHandled(key, event);
+        } catch (error) {
+          const next = nextRetry(attempt + 1, MAX_ATTEMPTS, RETRY_BASE_MS);
+          if (next.deadLetter) {
+            stats.deadLettered++;
+            stats.doneAt = Date.now();
+          } else {
+            stats.retries++;
+            if (!parked.has(key)) {
+              parked.set(key, []);
+            }
+            setTimeout(() => enqueue(event, key, attempt + 1, true), next.delayMs);
+            return;
+          }
+        }
+
+        if (retry) {
+          const waiting = parked.get(key) || [];
+          parked.delete(key);
+          waiting.sort((a, b) => a.created - b.created).forEach(next => enqueue(next, key));
+        }
+      }
+    });
+  }
+
+  const server = http.createServer((req, res) => {
+    const chunks = [];
+    req.on('data', chunk => chunks.push(chunk));
+    req.on('end', async () => {
+      const payload = Buffer.concat(chunks).toString('utf8');
+      if (!verify(payload, req.headers['stripe-signature'], SECRET)) {
+        res.writeHead(400).end(JSON.stringify({ error: 'Invalid signature' }));
+        return;
+      }
+
+      const event = JSON.parse(payload);
+      await sleep(PERSIST_MS);
+
+      if (stored.has(event.id)) {
+        stats.duplicates++;
+      } else if (mode === 'inline') {
+        stored.add(event.id);
+        try {
+          await handle(event);
+        } catch (error) {
+          // Forgotten again so Stripe's redelivery is handled
+          stored.delete(event.id);
+          res.writeHead(500).end(JSON.stringify({ error: 'Webhook processing failed' }));
+          return;
+        }
+        recordHandled(orderingKeyFor(event), event);
+      } else {
+        stored.add(event.id);
+        enqueue(event, orderingKeyFor(event));
+      }
+
+      stats.acknowledged++;
+      res.writeHead(200, { 'Content-Type': 'application/json' }).end('{"received":true}');
+    });
+  });
+
+  return new Promise(resolve => {
+    server.listen(0, '127.0.0.1', () => {
+      resolve({
+        url: `http://127.0.0.1:${server.address().port}/api/webhooks/stripe`,
+        stats,
+        dispatcher,
+        close: () => new Promise(done => server.close(done))
+      });
+    });
+  });
+}
+
+/**
+ * Send every delivery with CONCURRENCY connections. Non-2xx responses are
+ * redelivered, as Stripe would, up to three times.
+ */
+async function fire(url, deliveries) {
+  const agent = new http.Agent({ keepAlive: true, maxSockets: CONCURRENCY });
+  const target = new URL(url);
+  const latencies = [];
+  let next = 0;
+  let redeliveries = 0;
+  let failures = 0;
+
+  function post(payload) {
+    return new Promise((resolve, reject) => {
+      const req = http.request({
+        agent,
+        hostname: target.hostname,
+        port: target.port,
+        path: target.pathname,
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Content-Length': Buffer.byteLength(payload),
+          'Stripe-Signature': sign(payload, SECRET)
+        }
+      }, res => {
+        res.resume();
+        res.on('end', () => resolve(res.statusCode));
+      });
+      req.on('error', reject);
+      req.end(payload);
+    });
+  }
+
+  const start = process.hrtime.bigint();
+  await Promise.all(Array.from({ length: CONCURRENCY }, async () => {
+    while (next < deliveries.length) {
+      const payload = JSON.stringify(deliveries[next++]);
+
+      for (let attempt = 0; attempt < 4; attempt++) {
+        const sent = process.hrtime.bigint();
+        const status = await post(payload).catch(() => 0);
+        latencies.push(Number(process.hrtime.bigint() - sent) / 1e6);
+        if (status >= 200 && status < 300) {
+          break;
+        }
+        if (attempt === 3) {
+          failures++;
+        } else {
+          redeliveries++;
+          await sleep(100);
+        }
+      }
+    }
+  }));
+  const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+  agent.destroy();
+
+  latencies.sort((a, b) => a - b);
+  const percentile = p => latencies[Math.min(latencies.length - 1, Math.floor(latencies.length * p))];
+
+  return {
+    seconds,
+    requests: latencies.length,
+    redeliveries,
+    failures,
+    p50: percentile(0.5),
+    p95: percentile(0.95),
+    p99: percentile(0.99),
+    max: latencies[latencies.length - 1]
+  };
+}
+
+function report(label, result, deliveries) {
+  console.log(`\n${label}`);
+  console.log(`  deliveries          ${deliveries.toLocaleString()} (${result.requests.toLocaleString()} requests, ${result.redeliveries} redelivered, ${result.failures} failed)`);
+  console.log(`  acknowledged        ${Math.round(result.requests / result.seconds).toLocaleString()} req/s`);
+  console.log(
+    `  ack latency (ms)    p50 ${result.p50.toFixed(1)}  p95 ${result.p95.toFixed(1)}` +
+    `  p99 ${result.p99.toFixed(1)}  max ${result.max.toFixed(1)}`
+  );
+}
+
+async function runStub(mode, deliveries, unique) {
+  const stub = await startStub(mode);
+  const started = Date.now();
+  const result = await fire(stub.url, deliveries);
+
+  // Wait for queued work and retries to settle
+  while (mode === 'queued' && stub.stats.processed + stub.stats.deadLettered < unique) {
+    await sleep(20);
+  }
+  await stub.dispatcher.onIdle();
+  await stub.close();
+
+  const { stats } = stub;
+  const processingSeconds = (stats.doneAt - started) / 1000;
+  report(`Stub, ${mode}`, result, deliveries.length);
+  console.log(`  processed           ${stats.processed.toLocaleString()} events in ${processingSeconds.toFixed(2)}s (${Math.round(stats.processed / processingSeconds).toLocaleString()} events/s)`);
+  console.log(`  duplicates dropped  ${stats.duplicates.toLocaleString()}`);
+  console.log(`  retries             ${stats.retries.toLocaleString()}  dead-lettered ${stats.deadLettered}`);
+  console.log(`  ordering violations ${stats.orderingViolations}`);
+}
+
+async function main() {
+  const fixtures = JSON.parse(fs.readFileSync(FIXTURES, 'utf8'));
+  const { deliveries, unique } = buildDeliveries(fixtures);
+
+  console.log('🪝 Stripe webhook load harness');
+  console.log(
+    `   ${PAYMENTS} payments x ${fixtures.length} events = ${unique.toLocaleString()} events, ` +
+    `${deliveries.length - unique} duplicate deliveries, ${CONCURRENCY} connections`
+  );
+
+  if (args.target) {
+    const result = await fire(args.target, deliveries);
+    report(`Target ${args.target}`, result, deliveries.length);
+    return;
+  }
+
+  console.log(
+    `   stub handler ${HANDLER_MS} ms, failure rate ${(FAILURE_RATE * 100).toFixed(0)}%, ` +
+    `dispatch concurrency ${DISPATCH_CONCURRENCY}`
+  );
+  const mode = args.mode || 'both';
+  if (mode === 'both' || mode === 'inline') {
+    await runStub('inline', deliveries, unique);
+  }
+  if (mode === 'both' || mode === 'queued') {
+    await runStub('queued', deliveries, unique);
+  }
+}
+
+main().catch(error => {
+  console.error('Harness failed:', error);
+  process.exit(1);
+});
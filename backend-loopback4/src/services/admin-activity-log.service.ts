@@ -1,3 +1,6 @@
+import { db } from '../config/database.config';
+import { adminActivityLogs } from '../db/schema';
+
 export interface ActivityLogData {
   userId?: number;
   userEmail?: string;
@@ -11,11 +14,24 @@ export interface ActivityLogData {
 
 export class AdminActivityLogService {
   async log(data: ActivityLogData): Promise<void> {
-    // For now, log to console - in production, save to database
-    console.log('[Activity]', {
-      timestamp: new Date().toISOString(),
-      ...data
-    });
+    // Audit entries are written before returning; they are never buffered
+    try {
+      await db.insert(adminActivityLogs).values({
+        adminId: data.userId,
+        action: data.action,
+        entityType: data.resourceType,
+        entityId: data.resourceId !== undefined ? String(data.resourceId) : undefined,
+        newValues: {
+          ...data.details,
+          userEmail: data.userEmail,
+          userAgent: data.userAgent
+        },
+        ipAddress: data.ipAddress
+      });
+    } catch (error) {
+      console.error('Failed to log activity:', error);
+      // Don't throw - logging failures shouldn't break the application
+    }
   }
 
   async getRecentActivity(limit: number = 10): Promise<any[]> {
@@ -9,6 +9,7 @@ import {
   SpecialRequirementRepository
 } from '../repositories';
 import { sql } from '@loopback/repository';
+import { DashboardRollupService } from './dashboard-rollup.service';
 
 interface DashboardStats {
   today: {
@@ -83,78 +84,38 @@ export class AdminDashboardService {
   ) {}
 
   async getDashboardStats(dateRange?: { start: Date; end: Date }): Promise<DashboardStats> {
+    // Rollups are bucketed by UTC day, so periods start at UTC midnight
     const now = new Date();
-    const startOfDay = new Date(now.setHours(0, 0, 0, 0));
-    const startOfWeek = new Date(now);
-    startOfWeek.setDate(now.getDate() - now.getDay());
-    startOfWeek.setHours(0, 0, 0, 0);
-    const startOfMonth = new Date(now.getFullYear(), now.getMonth(), 1);
-
-    // Today's bookings
-    const todayBookings = await this.bookingRepository.find({
-      where: {
-        createdAt: { gte: startOfDay },
-        status: 'confirmed'
-      }
-    });
-
-    const todayStats = {
-      count: todayBookings.length,
-      revenue: todayBookings.reduce((sum, b) => sum + (b.totalAmount || 0), 0)
-    };
-
-    // This week's stats
-    const weekBookings = await this.bookingRepository.find({
-      where: {
-        createdAt: { gte: startOfWeek },
-        status: 'confirmed'
-      },
-      include: ['attendees']
-    });
-
-    const weekAttendees = weekBookings.reduce((sum, b) => 
-      sum + (b.attendees?.length || 0), 0
-    );
-
-    const weekStats = {
-      count: weekBookings.length,
-      revenue: weekBookings.reduce((sum, b) => sum + (b.totalAmount || 0), 0),
-      attendees: weekAttendees
-    };
-
-    // Month stats
-    const monthBookings = await this.bookingRepository.find({
-      where: {
-        createdAt: { gte: startOfMonth },
-        status: 'confirmed'
-      },
-      include: ['attendees']
-    });
-
-    const monthAttendees = monthBookings.reduce((sum, b) => 
-      sum + (b.attendees?.length || 0), 0
-    );
-
-    const monthStats = {
-      count: monthBookings.length,
-      revenue: monthBookings.reduce((sum, b) => sum + (b.totalAmount || 0), 0),
-      attendees: monthAttendees
-    };
-
-    // Upcoming sessions
-    const upcomingSessions = await this.getUpcomingSessions();
-
-    // Pending refunds
-    const pendingRefunds = await this.getPendingRefunds();
-
-    // Recent activity
-    const recentActivity = await this.getRecentActivity();
-
-    // Chart data
-    const chartData = await this.getChartData(dateRange);
+    const startOfDay = new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), now.getUTCDate()));
+    const startOfWeek = new Date(startOfDay);
+    startOfWeek.setUTCDate(startOfDay.getUTCDate() - startOfDay.getUTCDay());
+    const startOfMonth = new Date(Date.UTC(now.getUTCFullYear(), now.getUTCMonth(), 1));
+
+    // Sections are independent, so load them concurrently. Booking totals come
+    // from the daily rollups rather than loading every booking in the period.
+    const [
+      todayTotals,
+      weekStats,
+      monthStats,
+      upcomingSessions,
+      pendingRefunds,
+      recentActivity,
+      chartData
+    ] = await Promise.all([
+      DashboardRollupService.getTotals(startOfDay),
+      DashboardRollupService.getTotals(startOfWeek),
+      DashboardRollupService.getTotals(startOfMonth),
+      this.getUpcomingSessions(),
+      this.getPendingRefunds(),
+      this.getRecentActivity(),
+      this.getChartData(dateRange)
+    ]);
 
     return {
-      today: todayStats,
+      today: {
+        count: todayTotals.count,
+        revenue: todayTotals.revenue
+      },
       week: weekStats,
       month: monthStats,
       upcomingSessions,
@@ -234,7 +195,7 @@ export class AdminDashboardService {
     });
   }
 
-  private async getChartData(dateRange?: { start: Date; end: Date }): Promise<{
+  async getChartData(dateRange?: { start: Date; end: Date }): Promise<{
     dailyStats: DailyStats[];
     coursePopularity: CourseStats[];
   }> {
@@ -242,67 +203,13 @@ export class AdminDashboardService {
     const endDate = dateRange?.end || new Date();
     const startDate = dateRange?.start || new Date(endDate.getTime() - days * 24 * 60 * 60 * 1000);
 
-    // Daily bookings and revenue
-    const bookingsInRange = await this.bookingRepository.find({
-      where: {
-        createdAt: {
-          gte: startDate,
-          lte: endDate
-        },
-        status: 'confirmed'
-      },
-      include: ['attendees', 'session']
-    });
-
-    // Group by date
-    const dailyStatsMap = new Map<string, DailyStats>();
-    
-    bookingsInRange.forEach(booking => {
-      const dateStr = booking.createdAt!.toISOString().split('T')[0];
-      
-      if (!dailyStatsMap.has(dateStr)) {
-        dailyStatsMap.set(dateStr, {
-          date: dateStr,
-          bookings: 0,
-          revenue: 0,
-          attendees: 0
-        });
-      }
-      
-      const stats = dailyStatsMap.get(dateStr)!;
-      stats.bookings += 1;
-      stats.revenue += booking.totalAmount || 0;
-      stats.attendees += booking.attendees?.length || 0;
-    });
-
-    const dailyStats = Array.from(dailyStatsMap.values()).sort((a, b) => 
-      a.date.localeCompare(b.date)
-    );
+    // Rollups are per day with an exclusive upper bound, so include the end day
+    const endExclusive = new Date(Date.UTC(endDate.getUTCFullYear(), endDate.getUTCMonth(), endDate.getUTCDate() + 1));
 
-    // Course popularity
-    const courseStatsMap = new Map<string, CourseStats>();
-    
-    bookingsInRange.forEach(booking => {
-      const courseType = booking.session?.courseType || 'Unknown';
-      
-      if (!courseStatsMap.has(courseType)) {
-        courseStatsMap.set(courseType, {
-          courseType,
-          bookings: 0,
-          attendees: 0,
-          revenue: 0
-        });
-      }
-      
-      const stats = courseStatsMap.get(courseType)!;
-      stats.bookings += 1;
-      stats.attendees += booking.attendees?.length || 0;
-      stats.revenue += booking.totalAmount || 0;
-    });
-
-    const coursePopularity = Array.from(courseStatsMap.values()).sort((a, b) => 
-      b.revenue - a.revenue
-    );
+    const [dailyStats, coursePopularity] = await Promise.all([
+      DashboardRollupService.getDailyStats(startDate, endExclusive),
+      DashboardRollupService.getCourseStats(startDate, endExclusive)
+    ]);
 
     return {
       dailyStats,
@@ -404,6 +311,7 @@ export class AdminDashboardService {
       try {
         switch (action) {
           case 'cancel':
+            // Rollups follow the update through the bookings trigger
             await this.bookingRepository.updateById(bookingId, {
               status: 'cancelled',
               cancelledAt: new Date(),
@@ -431,42 +339,4 @@ export class AdminDashboardService {
 
     return results;
   }
-
-  async exportBookings(filters: any): Promise<string> {
-    const bookings = await this.getDetailedBookingList({ ...filters, limit: 10000 });
-    
-    // Generate CSV
-    const headers = [
-      'Booking Reference',
-      'Client Name',
-      'Client Email',
-      'Course Type',
-      'Session Date',
-      'Attendees',
-      'Status',
-      'Amount',
-      'Payment Status',
-      'Created Date'
-    ];
-
-    const rows = bookings.bookings.map(booking => [
-      booking.bookingReference,
-      booking.userName,
-      booking.userEmail,
-      booking.courseType,
-      booking.sessionDate ? new Date(booking.sessionDate).toLocaleDateString() : '',
-      booking.attendeeCount.toString(),
-      booking.status,
-      `£${booking.totalAmount.toFixed(2)}`,
-      booking.paymentStatus,
-      new Date(booking.createdAt).toLocaleDateString()
-    ]);
-
-    const csvContent = [
-      headers.join(','),
-      ...rows.map(row => row.map(cell => `"${cell}"`).join(','))
-    ].join('\n');
-
-    return csvContent;
-  }
-}
\ No newline at end of file
+}
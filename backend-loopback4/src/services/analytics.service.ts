@@ -1,6 +1,7 @@
 import {injectable, BindingScope} from '@loopback/core';
 import {repository} from '@loopback/repository';
 import {CourseRepository, BookingRepository} from '../repositories';
+import {DashboardRollupService} from './dashboard-rollup.service';
 
 export interface CourseAnalytics {
   courseId: number;
@@ -41,29 +42,7 @@ export class AnalyticsService {
 
   async getCoursePopularity(timeRange: '7days' | '30days' | '90days'): Promise<CourseAnalytics[]> {
     const startDate = this.getStartDate(timeRange);
-    
-    const query = `
-      SELECT 
-        c.id as course_id,
-        c.name as course_name,
-        c.category,
-        COUNT(DISTINCT b.id) as total_bookings,
-        COUNT(DISTINCT CASE WHEN b.status IN ('ATTENDED', 'COMPLETED') THEN b.id END) as completed_bookings,
-        SUM(b.final_amount) as revenue,
-        AVG(b.number_of_participants::float / cs.max_participants::float * 100) as fill_rate,
-        ARRAY_AGG(DISTINCT TO_CHAR(cs.start_datetime, 'Day')) as popular_days,
-        ARRAY_AGG(DISTINCT TO_CHAR(cs.start_datetime, 'Month')) as popular_months
-      FROM courses c
-      LEFT JOIN course_schedules cs ON c.id = cs.course_id
-      LEFT JOIN bookings b ON cs.id = b.session_id
-      WHERE cs.start_datetime >= $1
-        AND b.status NOT IN ('CANCELLED', 'PENDING')
-      GROUP BY c.id, c.name, c.category
-      ORDER BY total_bookings DESC
-    `;
-    
-    const result = await this.courseRepository.dataSource.execute(query, [startDate]);
-    return result;
+    return DashboardRollupService.getCoursePopularity(startDate);
   }
 
   async getRevenueByCoursue(startDate: Date, endDate: Date): Promise<RevenueByPeriod[]> {
@@ -110,24 +89,7 @@ export class AnalyticsService {
   }
 
   async getMonthlyTrends(year: number): Promise<any> {
-    const query = `
-      SELECT 
-        c.name as course_name,
-        EXTRACT(MONTH FROM cs.start_datetime) as month,
-        TO_CHAR(cs.start_datetime, 'Month') as month_name,
-        COUNT(b.id) as bookings,
-        SUM(b.final_amount) as revenue
-      FROM courses c
-      JOIN course_schedules cs ON c.id = cs.course_id
-      JOIN bookings b ON cs.id = b.session_id
-      WHERE EXTRACT(YEAR FROM cs.start_datetime) = $1
-        AND b.payment_status = 'paid'
-      GROUP BY c.name, month, month_name
-      ORDER BY month
-    `;
-    
-    const result = await this.courseRepository.dataSource.execute(query, [year]);
-    return result;
+    return DashboardRollupService.getMonthlyTrends(year);
   }
 
   async getBookingFunnel(dateRange: 'last7days' | 'last30days' | 'last90days'): Promise<BookingFunnel[]> {
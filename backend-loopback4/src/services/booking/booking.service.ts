@@ -1,11 +1,13 @@
 import { db } from '../../config/database.config';
-import { bookings, bookingAttendees, courseSessions, BookingStatus, payments } from '../../db/schema';
-import { eq, and, sql } from 'drizzle-orm';
+import { bookings, bookingAttendees, courseSessions, courses, users, BookingStatus, payments } from '../../db/schema';
+import { eq, and, or, gte, lte, ilike, desc, sql } from 'drizzle-orm';
 import { CourseSessionService } from '../course-session.service';
 import { PaymentService } from '../payment.service';
 import { EmailService } from '../email.service';
 import { SpecialRequirementsService } from '../special-requirements.service';
 import { InvoiceService } from '../invoice.service';
+import { CacheManager } from '../cache-manager.service';
+import { afterCreatedAtCursor, cursorTimestamp, paginateByKeyset } from '../export/streaming-export';
 
 interface CreateBookingData {
   userId: string;
@@ -27,6 +29,27 @@ interface BookingWithDetails {
   courseDetails: any;
 }
 
+export interface BookingExportFilters {
+  search?: string;
+  status?: string;
+  dateFrom?: Date;
+  dateTo?: Date;
+  courseType?: string;
+}
+
+export interface BookingExportRow {
+  bookingReference: string;
+  status: string;
+  numberOfAttendees: number;
+  totalAmount: string;
+  createdAt: Date | null;
+  clientName: string | null;
+  clientEmail: string | null;
+  courseType: string | null;
+  sessionDate: string | null;
+  paymentStatus: string | null;
+}
+
 export class BookingService {
   static generateBookingReference(): string {
     const prefix = 'RFT';
@@ -41,7 +64,7 @@ export class BookingService {
     }
 
     // Use transaction for atomic operations
-    return await db.transaction(async (tx) => {
+    const booking = await db.transaction(async (tx) => {
       // Check availability with row locking
       const [session] = await tx
         .select()
@@ -97,17 +120,23 @@ export class BookingService {
 
       return booking;
     });
+
+    // Seats changed: drop the session's cached availability and calendar month
+    await CacheManager.invalidateBooking(booking.id, data.sessionId);
+    return booking;
   }
 
   static async confirmBooking(bookingId: string, paymentIntentId: string) {
-    await db
+    const [confirmed] = await db
       .update(bookings)
       .set({
         status: BookingStatus.CONFIRMED,
         paymentIntentId,
         updatedAt: new Date(),
       })
-      .where(eq(bookings.id, bookingId));
+      .where(eq(bookings.id, bookingId))
+      .returning({ sessionId: bookings.sessionId });
+    await CacheManager.invalidateBooking(bookingId, confirmed?.sessionId);
 
     // Get payment details for the invoice
     const [payment] = await db
@@ -131,7 +160,7 @@ export class BookingService {
   }
 
   static async cancelBooking(bookingId: string) {
-    return await db.transaction(async (tx) => {
+    const booking = await db.transaction(async (tx) => {
       // Get booking details
       const [booking] = await tx
         .select()
@@ -167,6 +196,9 @@ export class BookingService {
 
       return booking;
     });
+
+    await CacheManager.invalidateBooking(booking.id, booking.sessionId);
+    return booking;
   }
 
   static async getBookingWithDetails(bookingId: string): Promise<BookingWithDetails> {
@@ -272,4 +304,75 @@ export class BookingService {
     
     return 75; // Default EFAW price
   }
-}
\ No newline at end of file
+
+  /**
+   * Iterate every booking matching the admin list filters, newest first, one
+   * keyset page at a time (admin export)
+   */
+  static iterateBookingsForExport(filters: BookingExportFilters = {}): AsyncGenerator<BookingExportRow> {
+    const conditions = [];
+
+    if (filters.status && filters.status !== 'all') {
+      conditions.push(eq(bookings.status, filters.status));
+    }
+    if (filters.dateFrom) {
+      conditions.push(gte(bookings.createdAt, filters.dateFrom));
+    }
+    if (filters.dateTo) {
+      conditions.push(lte(bookings.createdAt, filters.dateTo));
+    }
+    if (filters.courseType) {
+      conditions.push(eq(courses.courseType, filters.courseType));
+    }
+    if (filters.search) {
+      const pattern = `%${filters.search}%`;
+      conditions.push(
+        or(
+          ilike(bookings.bookingReference, pattern),
+          ilike(users.name, pattern),
+          ilike(users.email, pattern)
+        )!
+      );
+    }
+
+    return paginateByKeyset<BookingExportRow>(async (after, limit) => {
+      const pageConditions = [...conditions];
+      if (after) {
+        pageConditions.push(afterCreatedAtCursor(bookings.createdAt, bookings.id, after));
+      }
+
+      const results = await db
+        .select({
+          id: bookings.id,
+          bookingReference: bookings.bookingReference,
+          status: bookings.status,
+          numberOfAttendees: bookings.numberOfAttendees,
+          totalAmount: bookings.totalAmount,
+          createdAt: bookings.createdAt,
+          clientName: users.name,
+          clientEmail: users.email,
+          courseType: courses.courseType,
+          sessionDate: courseSessions.sessionDate,
+          paymentStatus: sql<string | null>`(
+            SELECT ${payments.status} FROM ${payments}
+            WHERE ${payments.bookingId} = ${bookings.id}
+            ORDER BY ${payments.createdAt} DESC
+            LIMIT 1
+          )`,
+          cursorCreatedAt: cursorTimestamp(bookings.createdAt),
+        })
+        .from(bookings)
+        .leftJoin(users, eq(bookings.userId, users.id))
+        .leftJoin(courseSessions, eq(bookings.sessionId, courseSessions.id))
+        .leftJoin(courses, eq(courseSessions.courseId, courses.id))
+        .where(pageConditions.length > 0 ? and(...pageConditions) : undefined)
+        .orderBy(desc(bookings.createdAt), desc(bookings.id))
+        .limit(limit);
+
+      return results.map(({ id, cursorCreatedAt, ...row }) => ({
+        row,
+        cursor: { createdAt: cursorCreatedAt, id },
+      }));
+    });
+  }
+}
@@ -1,10 +1,12 @@
-import * as NodeCache from 'node-cache';
+import { LRUCache } from 'lru-cache';
 import Redis from 'ioredis';
 import { MonitoringService } from './monitoring.service';
 import * as crypto from 'crypto';
 
 export interface CacheOptions {
   ttl?: number; // Time to live in seconds
+  staleTtl?: number; // Seconds a stale value may still be served while it is reloaded
+  tags?: string[] | ((value: any) => string[]); // Invalidation tags, e.g. session:{id}
   refreshOnGet?: boolean; // Refresh TTL on get
   priority?: 'l1' | 'l2' | 'l3'; // Cache priority level
 }
@@ -18,32 +20,94 @@ export interface CacheStats {
   size: number;
 }
 
+export interface NamespaceStats {
+  l1Hits: number;
+  l2Hits: number;
+  misses: number;
+  staleHits: number;
+  coalesced: number;
+  loads: number;
+  loadErrors: number;
+  loadTimeMs: number;
+  l2TimeMs: number;
+  l2Lookups: number;
+}
+
+interface CacheEntry<T = any> {
+  value: T;
+  freshUntil: number;
+  staleUntil: number;
+  tags: string[];
+}
+
+interface InflightLoad<T = any> {
+  promise: Promise<T>;
+  // Set when the key itself is invalidated while loading
+  invalidated: boolean;
+  // Tags invalidated while loading; the result is not cached if it carries one
+  invalidatedTags: Set<string>;
+  // Known up front when the tags are a list rather than derived from the value
+  tags?: string[];
+}
+
+interface InvalidationMessage {
+  origin: string;
+  keys?: string[];
+  tags?: string[];
+  patterns?: string[];
+  flush?: boolean;
+}
+
+/**
+ * Two-level cache: a size-bounded LRU in each process (L1) in front of an
+ * optional Redis shared by every instance (L2).
+ *
+ * - getOrSet coalesces concurrent misses for a key into one load, and serves
+ *   stale values for `staleTtl` seconds while a single background reload runs;
+ *   null and undefined results are returned but not cached
+ * - an invalidation only affects loads in flight for the keys or tags it
+ *   names: their results are not cached and later callers start a new load
+ * - entries can carry tags; invalidateTags drops every entry with that tag
+ *   from both levels
+ * - invalidations are published on Redis so other instances drop their L1
+ * - hit/miss/latency counters are kept per namespace (the key prefix before
+ *   the first ':') and reported through MonitoringService every minute
+ */
 export class CacheManager {
   private static instance: CacheManager;
-  
+
+  private readonly instanceId = crypto.randomUUID();
+  private readonly keyPrefix = 'cache:';
+  private readonly tagPrefix = 'cache:tag:';
+  private readonly invalidationChannel = 'cache:invalidate';
+
   // L1 Cache - In-memory (fastest)
-  private l1Cache: NodeCache;
+  private l1Cache: LRUCache<string, CacheEntry>;
+  private l1Tags = new Map<string, Set<string>>();
   private l1Stats = { hits: 0, misses: 0, sets: 0, deletes: 0 };
-  
+
   // L2 Cache - Redis (distributed)
   private l2Cache?: Redis;
+  private subscriber?: Redis;
   private l2Stats = { hits: 0, misses: 0, sets: 0, deletes: 0 };
-  
-  // L3 Cache - CDN (future implementation)
-  private l3Cache?: any;
-  
+
+  // Loads in progress, shared by concurrent callers
+  private inflight = new Map<string, InflightLoad>();
+
+  private namespaceStats = new Map<string, NamespaceStats>();
+  private reportedStats = new Map<string, NamespaceStats>();
+
   private readonly defaultTTL = 300; // 5 minutes
-  private readonly maxL1Size = 1000; // Maximum items in L1 cache
-  
+  private readonly maxL1Size = parseInt(process.env.CACHE_L1_MAX_ENTRIES || '5000');
+  private readonly tagTTL = 24 * 60 * 60; // Tag sets outlive any entry they index
+
   private constructor() {
     // Initialize L1 cache
-    this.l1Cache = new NodeCache({
-      stdTTL: this.defaultTTL,
-      checkperiod: 60,
-      useClones: false,
-      maxKeys: this.maxL1Size,
+    this.l1Cache = new LRUCache<string, CacheEntry>({
+      max: this.maxL1Size,
+      dispose: (entry, key) => this.unindexTags(key, entry.tags),
     });
-    
+
     // Initialize L2 cache (Redis) if available
     if (process.env.REDIS_URL) {
       try {
@@ -54,250 +118,272 @@ export class CacheManager {
           },
           maxRetriesPerRequest: 3,
         });
-        
+
         this.l2Cache.on('error', (error) => {
           MonitoringService.error('Redis cache error', error);
         });
-        
+
         this.l2Cache.on('connect', () => {
           MonitoringService.info('Redis cache connected');
         });
+
+        this.subscribeToInvalidations();
       } catch (error) {
         MonitoringService.error('Failed to initialize Redis cache', error);
       }
     }
-    
+
     // Start metrics collection
     this.startMetricsCollection();
   }
-  
+
   static getInstance(): CacheManager {
     if (!this.instance) {
       this.instance = new CacheManager();
     }
     return this.instance;
   }
-  
+
+  /**
+   * Get a fresh value, or null if the key is missing or stale
+   */
   async get<T>(key: string, options?: CacheOptions): Promise<T | null> {
-    const startTime = Date.now();
-    
-    try {
-      // L1 Check
-      const l1Value = this.l1Cache.get<T>(key);
-      if (l1Value !== undefined) {
-        this.l1Stats.hits++;
-        
-        if (options?.refreshOnGet) {
-          this.l1Cache.ttl(key, options.ttl || this.defaultTTL);
-        }
-        
-        MonitoringService.debug('Cache L1 hit', { key, latency: Date.now() - startTime });
-        return l1Value;
-      }
-      this.l1Stats.misses++;
-      
-      // L2 Check (Redis)
-      if (this.l2Cache && options?.priority !== 'l1') {
-        try {
-          const l2Value = await this.l2Cache.get(key);
-          if (l2Value) {
-            this.l2Stats.hits++;
-            const parsed = JSON.parse(l2Value) as T;
-            
-            // Promote to L1
-            this.l1Cache.set(key, parsed, options?.ttl || this.defaultTTL);
-            
-            if (options?.refreshOnGet) {
-              await this.l2Cache.expire(key, options.ttl || this.defaultTTL);
-            }
-            
-            MonitoringService.debug('Cache L2 hit', { key, latency: Date.now() - startTime });
-            return parsed;
-          }
-          this.l2Stats.misses++;
-        } catch (error) {
-          MonitoringService.error('L2 cache get error', error, { key });
-        }
-      }
-      
-      // L3 Check (future CDN implementation)
-      // ...
-      
-      MonitoringService.debug('Cache miss', { key, latency: Date.now() - startTime });
-      return null;
-    } catch (error) {
-      MonitoringService.error('Cache get error', error, { key });
+    const entry = await this.lookup<T>(key, options);
+    if (!entry || entry.freshUntil <= Date.now()) {
       return null;
     }
+    return entry.value;
   }
-  
+
   async set<T>(key: string, value: T, options?: CacheOptions): Promise<void> {
-    const startTime = Date.now();
-    const ttl = options?.ttl || this.defaultTTL;
-    
+    const entry = this.createEntry(value, options);
+
     try {
       // Always set in L1 (unless specifically excluded)
       if (options?.priority !== 'l2' && options?.priority !== 'l3') {
-        this.l1Cache.set(key, value, ttl);
-        this.l1Stats.sets++;
+        this.setL1(key, entry);
       }
-      
+
       // Set in L2 (Redis) if available
       if (this.l2Cache && options?.priority !== 'l1') {
         try {
-          const serialized = JSON.stringify(value);
-          await this.l2Cache.setex(key, ttl, serialized);
+          await this.writeL2(this.l2Cache.pipeline(), key, entry).exec();
           this.l2Stats.sets++;
         } catch (error) {
           MonitoringService.error('L2 cache set error', error, { key });
         }
       }
-      
-      // Set in L3 (future CDN implementation)
-      // ...
-      
-      MonitoringService.debug('Cache set', {
-        key,
-        ttl,
-        latency: Date.now() - startTime,
-        size: JSON.stringify(value).length,
-      });
     } catch (error) {
       MonitoringService.error('Cache set error', error, { key });
     }
   }
-  
+
+  /**
+   * Set many entries: L1 directly and L2 in a single pipeline
+   */
+  async setMany(items: Array<{ key: string; value: any; options?: CacheOptions }>): Promise<void> {
+    const pipeline = this.l2Cache?.pipeline();
+
+    for (const item of items) {
+      const entry = this.createEntry(item.value, item.options);
+      if (item.options?.priority !== 'l2' && item.options?.priority !== 'l3') {
+        this.setL1(item.key, entry);
+      }
+      if (pipeline && item.options?.priority !== 'l1') {
+        this.writeL2(pipeline, item.key, entry);
+      }
+    }
+
+    if (pipeline && pipeline.length > 0) {
+      try {
+        await pipeline.exec();
+        this.l2Stats.sets += items.length;
+      } catch (error) {
+        MonitoringService.error('L2 cache set error', error, { count: items.length });
+      }
+    }
+  }
+
   async delete(key: string): Promise<void> {
     try {
-      // Delete from all levels
-      this.l1Cache.del(key);
-      this.l1Stats.deletes++;
-      
+      this.invalidateInflightKey(key);
+      this.deleteL1(key);
+
       if (this.l2Cache) {
-        await this.l2Cache.del(key);
+        await this.l2Cache.del(this.keyPrefix + key);
         this.l2Stats.deletes++;
       }
-      
-      MonitoringService.debug('Cache delete', { key });
+
+      await this.publishInvalidation({ keys: [key] });
     } catch (error) {
       MonitoringService.error('Cache delete error', error, { key });
     }
   }
-  
-  async deletePattern(pattern: string): Promise<void> {
+
+  /**
+   * Drop every entry carrying any of the tags, on every instance
+   */
+  async invalidateTags(tags: string[]): Promise<void> {
+    if (tags.length === 0) {
+      return;
+    }
+
     try {
-      // Delete from L1
-      const l1Keys = this.l1Cache.keys();
-      const regex = new RegExp(pattern.replace(/\*/g, '.*'));
-      l1Keys.forEach(key => {
-        if (regex.test(key)) {
-          this.l1Cache.del(key);
-          this.l1Stats.deletes++;
+      this.invalidateL1Tags(tags);
+
+      if (this.l2Cache) {
+        const tagKeys = tags.map(tag => this.tagPrefix + tag);
+        const members = await this.l2Cache.sunion(...tagKeys);
+        if (members.length > 0) {
+          await this.l2Cache.del(...members);
+          this.l2Stats.deletes += members.length;
         }
-      });
-      
+        await this.l2Cache.del(...tagKeys);
+      }
+
+      await this.publishInvalidation({ tags });
+      MonitoringService.debug('Cache tags invalidated', { tags });
+    } catch (error) {
+      MonitoringService.error('Cache tag invalidation error', error, { tags });
+    }
+  }
+
+  /**
+   * Delete keys matching a glob pattern. Prefer tags: this walks every L1 key
+   * and SCANs Redis.
+   */
+  async deletePattern(pattern: string): Promise<void> {
+    try {
+      this.deleteL1Pattern(pattern);
+
       // Delete from L2
       if (this.l2Cache) {
-        const l2Keys = await this.l2Cache.keys(pattern);
-        if (l2Keys.length > 0) {
-          await this.l2Cache.del(...l2Keys);
-          this.l2Stats.deletes += l2Keys.length;
-        }
+        let cursor = '0';
+        do {
+          const [next, keys] = await this.l2Cache.scan(
+            cursor, 'MATCH', this.keyPrefix + pattern, 'COUNT', 500
+          );
+          cursor = next;
+          if (keys.length > 0) {
+            await this.l2Cache.del(...keys);
+            this.l2Stats.deletes += keys.length;
+          }
+        } while (cursor !== '0');
       }
-      
+
+      await this.publishInvalidation({ patterns: [pattern] });
       MonitoringService.debug('Cache pattern delete', { pattern });
     } catch (error) {
       MonitoringService.error('Cache pattern delete error', error, { pattern });
     }
   }
-  
+
+  /**
+   * Clear all cache entries. Only cache-owned Redis keys are removed, so
+   * other users of the same Redis (locks, rate limits) are untouched.
+   */
   async flush(): Promise<void> {
     try {
-      this.l1Cache.flushAll();
-      
+      this.invalidateAllInflight();
+      this.l1Cache.clear();
+
       if (this.l2Cache) {
-        await this.l2Cache.flushall();
+        let cursor = '0';
+        do {
+          const [next, keys] = await this.l2Cache.scan(cursor, 'MATCH', `${this.keyPrefix}*`, 'COUNT', 500);
+          cursor = next;
+          if (keys.length > 0) {
+            await this.l2Cache.del(...keys);
+          }
+        } while (cursor !== '0');
       }
-      
+
+      await this.publishInvalidation({ flush: true });
       MonitoringService.info('Cache flushed');
     } catch (error) {
       MonitoringService.error('Cache flush error', error);
     }
   }
-  
+
+  /**
+   * Get a value, loading it with `factory` on a miss. Concurrent misses for
+   * the same key share one load; stale values are returned while a single
+   * background reload refreshes them.
+   */
   async getOrSet<T>(
     key: string,
     factory: () => Promise<T>,
     options?: CacheOptions
   ): Promise<T> {
-    // Try to get from cache
-    const cached = await this.get<T>(key, options);
-    if (cached !== null) {
-      return cached;
-    }
-    
-    // Generate value
-    const value = await factory();
-    
-    // Cache the value
-    await this.set(key, value, options);
-    
-    return value;
-  }
-  
-  async warmCache(data: Array<{ key: string; value: any; options?: CacheOptions }>) {
-    const startTime = Date.now();
-    let warmed = 0;
-    
-    for (const item of data) {
-      try {
-        await this.set(item.key, item.value, item.options);
-        warmed++;
-      } catch (error) {
-        MonitoringService.error('Cache warming error', error, { key: item.key });
+    const entry = await this.lookup<T>(key, options);
+
+    if (entry) {
+      if (entry.freshUntil > Date.now()) {
+        return entry.value;
       }
+
+      this.statsFor(key).staleHits++;
+      this.load(key, factory, options).catch(() => {
+        // Already logged; the stale value keeps being served until it expires
+      });
+      return entry.value;
     }
-    
+
+    return this.load(key, factory, options);
+  }
+
+  async warmCache(data: Array<{ key: string; value: any; options?: CacheOptions }>) {
+    const startTime = Date.now();
+
+    await this.setMany(data);
+
     MonitoringService.info('Cache warming completed', {
       total: data.length,
-      warmed,
       duration: Date.now() - startTime,
     });
   }
-  
+
   generateKey(...parts: any[]): string {
-    const keyData = parts.map(part => 
+    const keyData = parts.map(part =>
       typeof part === 'object' ? JSON.stringify(part) : String(part)
     ).join(':');
-    
+
     // For long keys, use hash
     if (keyData.length > 200) {
       const hash = crypto.createHash('sha256').update(keyData).digest('hex');
       return `${parts[0]}:hash:${hash.substring(0, 16)}`;
     }
-    
+
     return keyData;
   }
-  
+
   getStats(): {
     l1: CacheStats;
     l2: CacheStats;
     overall: CacheStats;
+    namespaces: Record<string, NamespaceStats & { hitRate: number }>;
   } {
-    const l1Keys = this.l1Cache.keys();
+    const l1Size = this.l1Cache.size;
     const l1HitRate = this.l1Stats.hits / (this.l1Stats.hits + this.l1Stats.misses) || 0;
-    
+
     const l2HitRate = this.l2Stats.hits / (this.l2Stats.hits + this.l2Stats.misses) || 0;
-    
+
+    // An L2 hit follows an L1 miss, so misses overall are L2 misses (or L1
+    // misses when there is no L2)
     const totalHits = this.l1Stats.hits + this.l2Stats.hits;
-    const totalMisses = this.l1Stats.misses + this.l2Stats.misses;
+    const totalMisses = this.l2Cache ? this.l2Stats.misses : this.l1Stats.misses;
     const overallHitRate = totalHits / (totalHits + totalMisses) || 0;
-    
+
+    const namespaces: Record<string, NamespaceStats & { hitRate: number }> = {};
+    for (const [namespace, stats] of this.namespaceStats) {
+      namespaces[namespace] = { ...stats, hitRate: this.hitRate(stats) };
+    }
+
     return {
       l1: {
         ...this.l1Stats,
         hitRate: Number((l1HitRate * 100).toFixed(2)),
-        size: l1Keys.length,
+        size: l1Size,
       },
       l2: {
         ...this.l2Stats,
@@ -310,43 +396,423 @@ export class CacheManager {
         sets: this.l1Stats.sets + this.l2Stats.sets,
         deletes: this.l1Stats.deletes + this.l2Stats.deletes,
         hitRate: Number((overallHitRate * 100).toFixed(2)),
-        size: l1Keys.length,
+        size: l1Size,
       },
+      namespaces,
+    };
+  }
+
+  /**
+   * Find an entry in L1, then L2 (promoting it to L1). Stale entries are
+   * returned so callers can serve them while reloading.
+   */
+  private async lookup<T>(key: string, options?: CacheOptions): Promise<CacheEntry<T> | null> {
+    const stats = this.statsFor(key);
+    const now = Date.now();
+
+    if (options?.priority !== 'l2' && options?.priority !== 'l3') {
+      const l1Entry = this.l1Cache.get(key);
+      if (l1Entry && l1Entry.staleUntil > now) {
+        this.l1Stats.hits++;
+        stats.l1Hits++;
+        if (options?.refreshOnGet) {
+          this.refreshL1(key, l1Entry, options);
+        }
+        return l1Entry;
+      }
+      this.l1Stats.misses++;
+    }
+
+    if (this.l2Cache && options?.priority !== 'l1') {
+      const startTime = Date.now();
+      try {
+        const raw = await this.l2Cache.get(this.keyPrefix + key);
+        stats.l2Lookups++;
+        stats.l2TimeMs += Date.now() - startTime;
+
+        if (raw) {
+          const l2Entry = JSON.parse(raw) as CacheEntry<T>;
+          this.l2Stats.hits++;
+          stats.l2Hits++;
+
+          // Promote to L1
+          this.setL1(key, l2Entry);
+
+          if (options?.refreshOnGet) {
+            await this.l2Cache.pexpire(this.keyPrefix + key, (options.ttl || this.defaultTTL) * 1000);
+          }
+          return l2Entry;
+        }
+        this.l2Stats.misses++;
+      } catch (error) {
+        MonitoringService.error('L2 cache get error', error, { key });
+      }
+    }
+
+    stats.misses++;
+    return null;
+  }
+
+  /**
+   * Run the factory for a key, sharing one in-flight load between callers
+   */
+  private load<T>(key: string, factory: () => Promise<T>, options?: CacheOptions): Promise<T> {
+    const stats = this.statsFor(key);
+    const existing = this.inflight.get(key);
+    if (existing) {
+      stats.coalesced++;
+      return existing.promise;
+    }
+
+    const startTime = Date.now();
+    const load: InflightLoad<T> = {
+      promise: undefined as any,
+      invalidated: false,
+      invalidatedTags: new Set(),
+      tags: Array.isArray(options?.tags) ? options!.tags : undefined,
     };
+
+    const promise: Promise<T> = Promise.resolve()
+      .then(factory)
+      .then(
+        async value => {
+          stats.loads++;
+          stats.loadTimeMs += Date.now() - startTime;
+
+          // A missing row is not cached, so it is found as soon as it is written
+          if (value === null || value === undefined || load.invalidated) {
+            return value;
+          }
+
+          // Skip caching if one of the entry's tags was invalidated while loading
+          const entry = this.createEntry(value, options);
+          if (!entry.tags.some(tag => load.invalidatedTags.has(tag))) {
+            await this.set(key, value, { ...options, tags: entry.tags });
+          }
+          return value;
+        },
+        error => {
+          stats.loadErrors++;
+          MonitoringService.error('Cache load error', error, { key });
+          throw error;
+        }
+      )
+      .finally(() => {
+        if (this.inflight.get(key) === load) {
+          this.inflight.delete(key);
+        }
+      });
+
+    load.promise = promise;
+    this.inflight.set(key, load);
+    return promise;
+  }
+
+  private createEntry<T>(value: T, options?: CacheOptions): CacheEntry<T> {
+    const now = Date.now();
+    const freshUntil = now + (options?.ttl || this.defaultTTL) * 1000;
+    return {
+      value,
+      freshUntil,
+      staleUntil: freshUntil + (options?.staleTtl || 0) * 1000,
+      tags: typeof options?.tags === 'function' ? options.tags(value) : options?.tags || [],
+    };
+  }
+
+  private setL1(key: string, entry: CacheEntry): void {
+    const ttl = entry.staleUntil - Date.now();
+    if (ttl <= 0) {
+      return;
+    }
+
+    this.l1Cache.set(key, entry, { ttl });
+    this.l1Stats.sets++;
+    for (const tag of entry.tags) {
+      let keys = this.l1Tags.get(tag);
+      if (!keys) {
+        keys = new Set();
+        this.l1Tags.set(tag, keys);
+      }
+      keys.add(key);
+    }
+  }
+
+  private refreshL1(key: string, entry: CacheEntry, options: CacheOptions): void {
+    const extended = this.createEntry(entry.value, { ...options, tags: entry.tags });
+    this.setL1(key, extended);
+  }
+
+  private writeL2(pipeline: ReturnType<Redis['pipeline']>, key: string, entry: CacheEntry) {
+    const ttl = Math.max(1, entry.staleUntil - Date.now());
+    pipeline.set(this.keyPrefix + key, JSON.stringify(entry), 'PX', ttl);
+    for (const tag of entry.tags) {
+      pipeline.sadd(this.tagPrefix + tag, this.keyPrefix + key);
+      pipeline.expire(this.tagPrefix + tag, this.tagTTL);
+    }
+    return pipeline;
+  }
+
+  private deleteL1(key: string): void {
+    if (this.l1Cache.delete(key)) {
+      this.l1Stats.deletes++;
+    }
+  }
+
+  private deleteL1Pattern(pattern: string): void {
+    const regex = new RegExp(pattern.replace(/\*/g, '.*'));
+    for (const key of [...this.inflight.keys()]) {
+      if (regex.test(key)) {
+        this.invalidateInflightKey(key);
+      }
+    }
+    for (const key of [...this.l1Cache.keys()]) {
+      if (regex.test(key)) {
+        this.deleteL1(key);
+      }
+    }
+  }
+
+  private invalidateL1Tags(tags: string[]): void {
+    this.invalidateInflightTags(tags);
+
+    for (const tag of tags) {
+      const keys = this.l1Tags.get(tag);
+      if (keys) {
+        for (const key of [...keys]) {
+          this.deleteL1(key);
+        }
+        this.l1Tags.delete(tag);
+      }
+    }
+  }
+
+  /**
+   * Keep a load in flight for the key from being cached or joined
+   */
+  private invalidateInflightKey(key: string): void {
+    const load = this.inflight.get(key);
+    if (load) {
+      load.invalidated = true;
+      this.inflight.delete(key);
+    }
+  }
+
+  /**
+   * Loads in flight may have read data the tags cover. Those known to carry
+   * one of the tags are detached so the next caller reloads; those whose
+   * tags depend on the value are detached too, since they might. None of
+   * them cache a result carrying an invalidated tag.
+   */
+  private invalidateInflightTags(tags: string[]): void {
+    for (const [key, load] of [...this.inflight]) {
+      for (const tag of tags) {
+        load.invalidatedTags.add(tag);
+      }
+      if (!load.tags || load.tags.some(tag => tags.includes(tag))) {
+        this.inflight.delete(key);
+      }
+    }
+  }
+
+  private invalidateAllInflight(): void {
+    for (const load of this.inflight.values()) {
+      load.invalidated = true;
+    }
+    this.inflight.clear();
   }
-  
+
+  private unindexTags(key: string, tags: string[]): void {
+    for (const tag of tags) {
+      const keys = this.l1Tags.get(tag);
+      if (keys) {
+        keys.delete(key);
+        if (keys.size === 0) {
+          this.l1Tags.delete(tag);
+        }
+      }
+    }
+  }
+
+  private async publishInvalidation(message: Omit<InvalidationMessage, 'origin'>): Promise<void> {
+    if (!this.l2Cache) {
+      return;
+    }
+
+    try {
+      await this.l2Cache.publish(
+        this.invalidationChannel,
+        JSON.stringify({ ...message, origin: this.instanceId })
+      );
+    } catch (error) {
+      MonitoringService.error('Cache invalidation publish error', error);
+    }
+  }
+
+  /**
+   * Drop L1 entries invalidated by other instances
+   */
+  private subscribeToInvalidations(): void {
+    if (!this.l2Cache) {
+      return;
+    }
+
+    this.subscriber = this.l2Cache.duplicate();
+    this.subscriber.on('error', (error) => {
+      MonitoringService.error('Redis cache subscriber error', error);
+    });
+
+    this.subscriber.subscribe(this.invalidationChannel).catch(error => {
+      MonitoringService.error('Cache invalidation subscribe error', error);
+    });
+
+    this.subscriber.on('message', (channel, raw) => {
+      if (channel !== this.invalidationChannel) {
+        return;
+      }
+
+      try {
+        const message = JSON.parse(raw) as InvalidationMessage;
+        if (message.origin === this.instanceId) {
+          return;
+        }
+
+        if (message.flush) {
+          this.invalidateAllInflight();
+          this.l1Cache.clear();
+          return;
+        }
+        if (message.tags) {
+          this.invalidateL1Tags(message.tags);
+        }
+        for (const key of message.keys || []) {
+          this.invalidateInflightKey(key);
+          this.deleteL1(key);
+        }
+        for (const pattern of message.patterns || []) {
+          this.deleteL1Pattern(pattern);
+        }
+      } catch (error) {
+        MonitoringService.error('Cache invalidation message error', error);
+      }
+    });
+  }
+
+  private statsFor(key: string): NamespaceStats {
+    const separator = key.indexOf(':');
+    const namespace = separator === -1 ? key : key.substring(0, separator);
+
+    let stats = this.namespaceStats.get(namespace);
+    if (!stats) {
+      stats = {
+        l1Hits: 0, l2Hits: 0, misses: 0, staleHits: 0, coalesced: 0,
+        loads: 0, loadErrors: 0, loadTimeMs: 0, l2TimeMs: 0, l2Lookups: 0,
+      };
+      this.namespaceStats.set(namespace, stats);
+    }
+    return stats;
+  }
+
+  private hitRate(stats: NamespaceStats): number {
+    const hits = stats.l1Hits + stats.l2Hits;
+    return Number(((hits / (hits + stats.misses) || 0) * 100).toFixed(2));
+  }
+
   private startMetricsCollection() {
-    setInterval(() => {
+    const timer = setInterval(() => {
       const stats = this.getStats();
-      
+
       // Record metrics
       MonitoringService.recordGauge('cache_hit_rate', stats.overall.hitRate, { cache: 'overall' });
       MonitoringService.recordGauge('cache_hit_rate', stats.l1.hitRate, { cache: 'l1' });
       MonitoringService.recordGauge('cache_hit_rate', stats.l2.hitRate, { cache: 'l2' });
-      
+
       MonitoringService.recordGauge('cache_size', stats.l1.size, { cache: 'l1' });
-      
+
+      // Per-namespace figures for the last interval
+      for (const [namespace, current] of this.namespaceStats) {
+        const previous = this.reportedStats.get(namespace);
+        const delta = { ...current };
+        if (previous) {
+          for (const field of Object.keys(delta) as Array<keyof NamespaceStats>) {
+            delta[field] -= previous[field];
+          }
+        }
+        this.reportedStats.set(namespace, { ...current });
+
+        const tags = { namespace };
+        MonitoringService.recordGauge('cache_namespace_hit_rate', this.hitRate(delta), tags);
+        MonitoringService.recordGauge('cache_namespace_l1_hits', delta.l1Hits, tags);
+        MonitoringService.recordGauge('cache_namespace_l2_hits', delta.l2Hits, tags);
+        MonitoringService.recordGauge('cache_namespace_misses', delta.misses, tags);
+        MonitoringService.recordGauge('cache_namespace_stale_hits', delta.staleHits, tags);
+        MonitoringService.recordGauge('cache_namespace_coalesced', delta.coalesced, tags);
+        MonitoringService.recordGauge('cache_namespace_load_errors', delta.loadErrors, tags);
+        if (delta.loads > 0) {
+          MonitoringService.recordHistogram('cache_namespace_load_ms', delta.loadTimeMs / delta.loads, tags);
+        }
+        if (delta.l2Lookups > 0) {
+          MonitoringService.recordHistogram('cache_namespace_l2_ms', delta.l2TimeMs / delta.l2Lookups, tags);
+        }
+      }
+
       // Log stats periodically
       if (Math.random() < 0.1) { // 10% chance to log
         MonitoringService.info('Cache statistics', stats);
       }
     }, 60000); // Every minute
+    timer.unref();
   }
-  
+
   // Cache key patterns for different domains
   static keys = {
     payment: (id: string) => `payment:${id}`,
     paymentByIntent: (intentId: string) => `payment:intent:${intentId}`,
+    paymentDetail: (id: string) => `payment:detail:${id}`,
+    paymentByBooking: (bookingId: string) => `payment:booking:${bookingId}`,
     invoice: (id: string) => `invoice:${id}`,
     invoiceByNumber: (number: string) => `invoice:number:${number}`,
     refund: (id: string) => `refund:${id}`,
     refundByPayment: (paymentId: string) => `refund:payment:${paymentId}`,
     customer: (id: string) => `customer:${id}`,
     session: (id: string) => `session:${id}`,
+    sessionAvailability: (id: string) => `session:availability:${id}`,
+    calendarMonth: (month: string) => `session:calendar:${month}`,
+    courses: (list: string) => `courses:${list}`,
     stats: (type: string, period: string) => `stats:${type}:${period}`,
     config: (key: string) => `config:${key}`,
   };
+
+  // Invalidation tags shared by writers and readers
+  static tags = {
+    courses: 'courses',
+    sessions: 'sessions',
+    session: (id: string) => `session:${id}`,
+    booking: (id: string) => `booking:${id}`,
+    payment: (id: string) => `payment:${id}`,
+  };
+
+  /**
+   * Drop cached lookups of a payment and its booking after a write
+   */
+  static invalidatePayment(paymentId: string | number, bookingId?: string | number | null): Promise<void> {
+    const tags = [CacheManager.tags.payment(String(paymentId))];
+    if (bookingId !== undefined && bookingId !== null) {
+      tags.push(CacheManager.tags.booking(String(bookingId)));
+    }
+    return CacheManager.getInstance().invalidateTags(tags);
+  }
+
+  /**
+   * Drop cached lookups of a booking, and its session's availability, after a write
+   */
+  static invalidateBooking(bookingId: string | number, sessionId?: string | number | null): Promise<void> {
+    const tags = [CacheManager.tags.booking(String(bookingId))];
+    if (sessionId !== undefined && sessionId !== null) {
+      tags.push(CacheManager.tags.session(String(sessionId)));
+    }
+    return CacheManager.getInstance().invalidateTags(tags);
+  }
 }
 
 // Export singleton instance
-export const cache = CacheManager.getInstance();
\ No newline at end of file
+export const cache = CacheManager.getInstance();
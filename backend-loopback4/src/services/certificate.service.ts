@@ -2,10 +2,18 @@ import {injectable, BindingScope, inject} from '@loopback/core';
 import {repository} from '@loopback/repository';
 import {CertificateRepository, BookingRepository, UserRepository} from '../repositories';
 import {Certificate} from '../models';
-import * as puppeteer from 'puppeteer';
+import {Response} from '@loopback/rest';
 import * as fs from 'fs';
 import * as path from 'path';
+import {v4 as uuidv4} from 'uuid';
 import {EmailService} from './email.service';
+import {PDFService} from './pdf.service';
+import {documentRenderPool} from './pdf/render-pool';
+import {runDocumentBatch} from './pdf/render-batch';
+import {sendPdfFile} from './pdf/pdf-download';
+
+const CERTIFICATES_ROOT = path.join(__dirname, '..', '..');
+const FINISHED_JOB_TTL_MS = 60 * 60 * 1000;
 
 export interface CertificateData {
   certificateName: string;
@@ -19,8 +27,24 @@ export interface CertificateData {
   trainerName: string;
 }
 
+export interface CertificateJob {
+  id: string;
+  sessionId: number;
+  status: 'running' | 'completed' | 'failed';
+  total: number;
+  completed: number;
+  failed: number;
+  skipped: number;
+  certificateIds: string[];
+  errors: Array<{bookingId: number | string | null; error: string}>;
+  startedAt: Date;
+  finishedAt?: Date;
+}
+
 @injectable({scope: BindingScope.SINGLETON})
 export class CertificateService {
+  private jobs = new Map<string, CertificateJob>();
+
   constructor(
     @repository(CertificateRepository)
     private certificateRepository: CertificateRepository,
@@ -64,6 +88,15 @@ export class CertificateService {
       throw new Error('Certificate already exists for this booking');
     }
 
+    return this.issueCertificate(booking, markedBy);
+  }
+
+  /**
+   * Render, store and email the certificate for a loaded booking
+   */
+  private async issueCertificate(booking: any, markedBy: string): Promise<Certificate> {
+    const bookingId = booking.id;
+
     // Get participant's certificate name
     const certificateName = booking.participants?.[0]?.certificateName || 
                           `${booking.participants?.[0]?.firstName} ${booking.participants?.[0]?.lastName}`;
@@ -129,291 +162,19 @@ export class CertificateService {
   }
 
   /**
-   * Generate PDF certificate using Puppeteer
+   * Render the certificate on the document render pool and save it
    */
   private async generatePDF(data: CertificateData): Promise<string> {
-    const browser = await puppeteer.launch({
-      headless: true,
-      args: ['--no-sandbox', '--disable-setuid-sandbox']
-    });
+    const pdfBuffer = await PDFService.generateCertificate(data);
 
-    try {
-      const page = await browser.newPage();
-      
-      // Get HTML template
-      const html = this.generateCertificateHTML(data);
-      
-      // Set content
-      await page.setContent(html, {
-        waitUntil: 'networkidle0'
-      });
+    // Save PDF to file system
+    const fileName = `certificate_${data.certificateNumber}.pdf`;
+    const filePath = path.join(CERTIFICATES_ROOT, 'certificates', fileName);
 
-      // Set PDF options
-      const pdfBuffer = await page.pdf({
-        format: 'A4',
-        landscape: true,
-        printBackground: true,
-        margin: {
-          top: '0',
-          right: '0',
-          bottom: '0',
-          left: '0'
-        }
-      });
+    await fs.promises.mkdir(path.dirname(filePath), {recursive: true});
+    await fs.promises.writeFile(filePath, pdfBuffer);
 
-      // Save PDF to file system
-      const fileName = `certificate_${data.certificateNumber}.pdf`;
-      const filePath = path.join(__dirname, '..', '..', 'certificates', fileName);
-      
-      // Ensure directory exists
-      const dir = path.dirname(filePath);
-      if (!fs.existsSync(dir)) {
-        fs.mkdirSync(dir, { recursive: true });
-      }
-
-      fs.writeFileSync(filePath, pdfBuffer);
-
-      return `/certificates/${fileName}`;
-    } finally {
-      await browser.close();
-    }
-  }
-
-  /**
-   * Generate HTML template for certificate
-   */
-  private generateCertificateHTML(data: CertificateData): string {
-    return `
-<!DOCTYPE html>
-<html>
-<head>
-  <meta charset="UTF-8">
-  <style>
-    @page {
-      size: A4 landscape;
-      margin: 0;
-    }
-    
-    body {
-      margin: 0;
-      padding: 0;
-      font-family: 'Arial', sans-serif;
-      width: 297mm;
-      height: 210mm;
-      position: relative;
-      background: white;
-    }
-    
-    .certificate {
-      position: relative;
-      width: 100%;
-      height: 100%;
-      padding: 40mm;
-      box-sizing: border-box;
-      background: linear-gradient(135deg, #f5f5f5 0%, #ffffff 100%);
-      display: flex;
-      flex-direction: column;
-      justify-content: center;
-      align-items: center;
-    }
-    
-    .border {
-      position: absolute;
-      top: 20mm;
-      left: 20mm;
-      right: 20mm;
-      bottom: 20mm;
-      border: 3px solid #0EA5E9;
-      border-radius: 10px;
-    }
-    
-    .inner-border {
-      position: absolute;
-      top: 25mm;
-      left: 25mm;
-      right: 25mm;
-      bottom: 25mm;
-      border: 1px solid #0EA5E9;
-      border-radius: 8px;
-    }
-    
-    .logo {
-      position: absolute;
-      top: 30mm;
-      left: 50%;
-      transform: translateX(-50%);
-      width: 60mm;
-      text-align: center;
-    }
-    
-    .logo h1 {
-      margin: 0;
-      font-size: 24pt;
-      color: #0EA5E9;
-      font-weight: bold;
-    }
-    
-    .logo p {
-      margin: 5px 0 0 0;
-      font-size: 10pt;
-      color: #666;
-    }
-    
-    .content {
-      text-align: center;
-      z-index: 1;
-      margin-top: 20mm;
-    }
-    
-    .title {
-      font-size: 36pt;
-      color: #0369A1;
-      margin-bottom: 10mm;
-      font-weight: bold;
-      text-transform: uppercase;
-      letter-spacing: 2px;
-    }
-    
-    .subtitle {
-      font-size: 14pt;
-      color: #666;
-      margin-bottom: 15mm;
-    }
-    
-    .recipient {
-      font-size: 28pt;
-      color: #0EA5E9;
-      margin: 15mm 0;
-      font-weight: bold;
-      text-decoration: underline;
-      text-underline-offset: 5px;
-    }
-    
-    .course-info {
-      font-size: 16pt;
-      color: #333;
-      line-height: 1.8;
-      margin-bottom: 15mm;
-    }
-    
-    .details {
-      display: flex;
-      justify-content: space-around;
-      width: 100%;
-      margin-top: 20mm;
-    }
-    
-    .detail-item {
-      text-align: center;
-    }
-    
-    .detail-label {
-      font-size: 10pt;
-      color: #666;
-      margin-bottom: 5px;
-    }
-    
-    .detail-value {
-      font-size: 12pt;
-      color: #333;
-      font-weight: bold;
-    }
-    
-    .footer {
-      position: absolute;
-      bottom: 30mm;
-      left: 30mm;
-      right: 30mm;
-      display: flex;
-      justify-content: space-between;
-      align-items: flex-end;
-    }
-    
-    .signature {
-      text-align: center;
-    }
-    
-    .signature-line {
-      width: 60mm;
-      border-bottom: 1px solid #333;
-      margin-bottom: 5px;
-    }
-    
-    .signature-name {
-      font-size: 10pt;
-      color: #333;
-    }
-    
-    .watermark {
-      position: absolute;
-      top: 50%;
-      left: 50%;
-      transform: translate(-50%, -50%) rotate(-45deg);
-      font-size: 120pt;
-      color: rgba(14, 165, 233, 0.05);
-      font-weight: bold;
-      z-index: 0;
-    }
-  </style>
-</head>
-<body>
-  <div class="certificate">
-    <div class="border"></div>
-    <div class="inner-border"></div>
-    <div class="watermark">CERTIFIED</div>
-    
-    <div class="logo">
-      <h1>React Fast Training</h1>
-      <p>Yorkshire's Premier First Aid Training Provider</p>
-    </div>
-    
-    <div class="content">
-      <h2 class="title">Certificate of Completion</h2>
-      <p class="subtitle">This is to certify that</p>
-      
-      <div class="recipient">${data.certificateName}</div>
-      
-      <div class="course-info">
-        has successfully completed the<br>
-        <strong>${data.courseName}</strong><br>
-        course on ${new Date(data.courseDate).toLocaleDateString('en-GB', {
-          day: 'numeric',
-          month: 'long',
-          year: 'numeric'
-        })}<br>
-        at ${data.location}
-      </div>
-      
-      <div class="details">
-        <div class="detail-item">
-          <div class="detail-label">Certificate Number</div>
-          <div class="detail-value">${data.certificateNumber}</div>
-        </div>
-        <div class="detail-item">
-          <div class="detail-label">Issue Date</div>
-          <div class="detail-value">${new Date(data.issueDate).toLocaleDateString('en-GB')}</div>
-        </div>
-        <div class="detail-item">
-          <div class="detail-label">Expiry Date</div>
-          <div class="detail-value">${new Date(data.expiryDate).toLocaleDateString('en-GB')}</div>
-        </div>
-      </div>
-    </div>
-    
-    <div class="footer">
-      <div class="signature">
-        <div class="signature-line"></div>
-        <div class="signature-name">${data.trainerName}<br>Senior First Aid Trainer</div>
-      </div>
-      <div class="signature">
-        <div class="signature-line"></div>
-        <div class="signature-name">Lex<br>Training Director</div>
-      </div>
-    </div>
-  </div>
-</body>
-</html>
-    `;
+    return `/certificates/${fileName}`;
   }
 
   /**
@@ -434,7 +195,7 @@ export class CertificateService {
       },
       attachments: [{
         filename: `Certificate_${data.certificateNumber}.pdf`,
-        path: path.join(__dirname, '..', '..', certificate.certificateUrl),
+        path: path.join(CERTIFICATES_ROOT, certificate.certificateUrl),
       }]
     };
 
@@ -442,47 +203,140 @@ export class CertificateService {
   }
 
   /**
-   * Generate certificates for all attendees marked as present
+   * Generate certificates for all attendees marked as present.
+   *
+   * Bookings and existing certificates are loaded once, then attendees are
+   * processed concurrently so rendering on the worker pool overlaps with
+   * file writes, inserts and emails. Bookings that already have a
+   * certificate are skipped.
    */
-  async generateCertificatesForSession(sessionId: number, markedBy: string): Promise<Certificate[]> {
-    // Get all bookings for the session marked as present
-    const bookings = await this.bookingRepository.find({
-      where: {
-        courseScheduleId: sessionId,
-        status: 'ATTENDED', // Assuming attendance marking updates booking status
-      }
-    });
-
-    const certificates: Certificate[] = [];
+  async generateCertificatesForSession(
+    sessionId: number,
+    markedBy: string,
+    onProgress?: (job: CertificateJob) => void,
+  ): Promise<Certificate[]> {
+    const job = this.createJob(sessionId);
+    await this.runSessionJob(job, markedBy, onProgress);
 
-    for (const booking of bookings) {
-      try {
-        const certificate = await this.generateCertificateForBooking(booking.id, markedBy);
-        certificates.push(certificate);
-      } catch (error) {
-        console.error(`Failed to generate certificate for booking ${booking.id}:`, error);
-      }
+    if (job.status === 'failed') {
+      throw new Error(job.errors[0]?.error || 'Certificate generation failed');
     }
 
-    return certificates;
+    return this.certificateRepository.find({
+      where: {id: {inq: job.certificateIds}},
+    });
   }
 
   /**
-   * Download certificate PDF
+   * Start generating a session's certificates in the background. Poll
+   * getCertificateJob() with the returned id for progress.
    */
-  async downloadCertificate(certificateId: string): Promise<Buffer> {
-    const certificate = await this.certificateRepository.findById(certificateId);
-    
-    if (!certificate) {
-      throw new Error('Certificate not found');
+  startSessionCertificateJob(sessionId: number, markedBy: string): CertificateJob {
+    const job = this.createJob(sessionId);
+
+    this.runSessionJob(job, markedBy).catch(error => {
+      console.error(`Certificate job ${job.id} failed:`, error);
+    });
+
+    return {...job};
+  }
+
+  getCertificateJob(jobId: string): CertificateJob | undefined {
+    const job = this.jobs.get(jobId);
+    return job ? {...job} : undefined;
+  }
+
+  private createJob(sessionId: number): CertificateJob {
+    this.pruneFinishedJobs();
+
+    const job: CertificateJob = {
+      id: uuidv4(),
+      sessionId,
+      status: 'running',
+      total: 0,
+      completed: 0,
+      failed: 0,
+      skipped: 0,
+      certificateIds: [],
+      errors: [],
+      startedAt: new Date(),
+    };
+    this.jobs.set(job.id, job);
+    return job;
+  }
+
+  private async runSessionJob(
+    job: CertificateJob,
+    markedBy: string,
+    onProgress?: (job: CertificateJob) => void,
+  ): Promise<void> {
+    try {
+      // Get all bookings for the session marked as present
+      const bookings = await this.bookingRepository.find({
+        where: {
+          courseScheduleId: job.sessionId,
+          status: 'ATTENDED', // Assuming attendance marking updates booking status
+        },
+        include: ['courseSchedule', 'user'],
+      });
+
+      const existing = bookings.length > 0
+        ? await this.certificateRepository.find({
+            where: {bookingId: {inq: bookings.map(booking => booking.id)}},
+          })
+        : [];
+      const issued = new Set(existing.map(certificate => String(certificate.bookingId)));
+      const pending = bookings.filter(booking => !issued.has(String(booking.id)));
+
+      job.total = bookings.length;
+      job.skipped = bookings.length - pending.length;
+      onProgress?.({...job});
+
+      await runDocumentBatch(
+        pending,
+        booking => this.issueCertificate(booking, markedBy),
+        {
+          concurrency: Math.max(2, documentRenderPool.poolSize * 2),
+          onResult: (booking, certificate, error) => {
+            if (error) {
+              job.failed++;
+              job.errors.push({bookingId: booking.id, error: error.message});
+              console.error(`Failed to generate certificate for booking ${booking.id}:`, error);
+            } else {
+              job.completed++;
+              job.certificateIds.push(certificate!.id);
+            }
+            onProgress?.({...job});
+          },
+        },
+      );
+
+      job.status = 'completed';
+    } catch (error) {
+      job.status = 'failed';
+      job.errors.push({bookingId: null, error: (error as Error).message});
+    } finally {
+      job.finishedAt = new Date();
     }
+  }
 
-    const filePath = path.join(__dirname, '..', '..', certificate.certificateUrl);
-    
-    if (!fs.existsSync(filePath)) {
-      throw new Error('Certificate file not found');
+  private pruneFinishedJobs(): void {
+    const cutoff = Date.now() - FINISHED_JOB_TTL_MS;
+    for (const [id, job] of this.jobs) {
+      if (job.finishedAt && job.finishedAt.getTime() < cutoff) {
+        this.jobs.delete(id);
+      }
     }
+  }
 
-    return fs.readFileSync(filePath);
+  /**
+   * Stream a certificate PDF from disk with ETag and Range support
+   */
+  async downloadCertificate(certificate: Certificate, response: Response): Promise<void> {
+    await sendPdfFile(
+      response,
+      path.join(CERTIFICATES_ROOT, certificate.certificateUrl),
+      `Certificate_${certificate.certificateNumber}.pdf`,
+    );
   }
-}
\ No newline at end of file
+}
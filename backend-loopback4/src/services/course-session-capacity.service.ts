@@ -1,10 +1,16 @@
 import {bind, BindingScope, inject} from '@loopback/core';
 import {repository, Transaction} from '@loopback/repository';
-import {CourseSessionRepository, BookingRepository} from '../repositories';
+import {
+  CourseSessionRepository,
+  BookingRepository,
+  CourseRepository,
+  LocationRepository,
+} from '../repositories';
 import {CourseSession, SessionStatus} from '../models';
 import {HttpErrors} from '@loopback/rest';
 import {websocketService} from './websocket.service';
 import {BaseService} from './base.service';
+import {cache, CacheManager} from './cache-manager.service';
 
 export interface SessionAvailability {
   sessionId: string;
@@ -27,6 +33,11 @@ export interface SessionFilters {
   showOnlyAvailable?: boolean;
 }
 
+interface SessionAvailabilityEntry {
+  endDate: Date;
+  availability: SessionAvailability;
+}
+
 export interface BookingCapacityResult {
   success: boolean;
   sessionId: string;
@@ -39,12 +50,20 @@ export interface BookingCapacityResult {
 @bind({scope: BindingScope.SINGLETON})
 export class CourseSessionCapacityService extends BaseService {
   private readonly MAX_CAPACITY_LIMIT = 12;
+  private readonly CALENDAR_CACHE_TTL = 60; // seconds
+  private readonly CALENDAR_CACHE_STALE_TTL = 30;
+  private readonly AVAILABILITY_CACHE_TTL = 30;
+  private readonly CALENDAR_CACHE_MAX_SPAN_MONTHS = 6;
 
   constructor(
     @repository(CourseSessionRepository)
     private courseSessionRepository: CourseSessionRepository,
     @repository(BookingRepository)
     private bookingRepository: BookingRepository,
+    @repository(CourseRepository)
+    private courseRepository: CourseRepository,
+    @repository(LocationRepository)
+    private locationRepository: LocationRepository,
   ) {
     super('CourseSessionCapacityService');
   }
@@ -59,79 +78,34 @@ export class CourseSessionCapacityService extends BaseService {
         this.validateDateRange(filters.startDate, filters.endDate);
       }
 
-      const whereClause: any = {
-        status: SessionStatus.SCHEDULED,
-      };
-
-      if (filters.startDate) {
-        whereClause.startDate = {gte: filters.startDate};
-      }
-      if (filters.endDate) {
-        whereClause.endDate = {lte: filters.endDate};
+      const whereClause = await this.buildSessionWhere(filters);
+      if (!whereClause) {
+        return [];
       }
 
-      const sessions = await this.courseSessionRepository.find({
-        where: whereClause,
-        include: ['course', 'location'],
-      });
-
-      const sessionAvailability: SessionAvailability[] = [];
-
-      // Process sessions in parallel for better performance
-      const processingPromises = sessions.map(async (session) => {
-        try {
-          const bookingCount = await this.bookingRepository.count({
-            sessionId: session.id,
-            status: {inq: ['CONFIRMED', 'PENDING']},
-          });
-
-          const currentBookings = bookingCount.count;
-          const maxCapacity = Math.min(session.maxParticipants, this.MAX_CAPACITY_LIMIT);
-          const availableSpots = maxCapacity - currentBookings;
-
-          // Apply course type filter
-          if (filters.courseType && session.course?.name !== filters.courseType) {
-            return null;
-          }
-
-          // Apply location filter (simplified to A/B)
-          const simplifiedLocation = this.getSimplifiedLocation(session.location?.name || '');
-          if (filters.location && simplifiedLocation !== filters.location) {
-            return null;
-          }
-
-          // Apply availability filter
-          if (filters.showOnlyAvailable && availableSpots <= 0) {
-            return null;
-          }
-
-          return {
-            sessionId: session.id,
-            courseType: session.course?.name || '',
-            sessionDate: session.startDate,
-            startTime: session.startTime,
-            endTime: session.endTime,
-            location: simplifiedLocation,
-            currentBookings,
-            maxCapacity,
-            availableSpots,
-            status: this.getAvailabilityStatus(availableSpots, maxCapacity),
-          };
-        } catch (error) {
-          console.error(`Error processing session ${session.id}:`, error);
-          return null;
-        }
-      });
+      const entries = await this.loadSessionAvailability(whereClause, filters.showOnlyAvailable);
+      return entries.map(entry => entry.availability);
+    });
+  }
 
-      const results = await Promise.all(processingPromises);
-      
-      // Filter out null results and sort by date
-      return results
-        .filter((result): result is SessionAvailability => result !== null)
-        .sort((a, b) => a.sessionDate.getTime() - b.sessionDate.getTime());
+  /**
+   * Get a calendar month of sessions, served from the shared cache and
+   * invalidated whenever a session in that month changes capacity
+   */
+  async getCalendarMonth(year: number, month: number): Promise<any[]> {
+    return this.executeWithErrorHandling('getCalendarMonth', async () => {
+      const entries = await this.getCalendarMonthEntries(year, month);
+      return entries.map(entry => this.toCalendarEvent(entry.availability));
     });
   }
 
+  /**
+   * Drop every cached view of a session: its availability and its calendar month
+   */
+  async invalidateSession(sessionId: string): Promise<void> {
+    await cache.invalidateTags([CacheManager.tags.session(sessionId)]);
+  }
+
   /**
    * Increment booking count with atomic operation
    */
@@ -204,6 +178,7 @@ export class CourseSessionCapacityService extends BaseService {
 
         // Emit WebSocket event after successful commit
         this.emitCapacityUpdate(sessionId, newCount, maxCapacity - newCount);
+        await this.invalidateSession(sessionId);
 
         // Log for audit
         await this.logOperation('incrementBooking', 'system', {
@@ -276,6 +251,7 @@ export class CourseSessionCapacityService extends BaseService {
 
         // Emit WebSocket event
         this.emitCapacityUpdate(sessionId, newCount, maxCapacity - newCount);
+        await this.invalidateSession(sessionId);
 
         // Log for audit
         await this.logOperation('decrementBooking', 'system', {
@@ -306,6 +282,21 @@ export class CourseSessionCapacityService extends BaseService {
     available: boolean;
     currentCount: number;
     remainingSpots: number;
+  }> {
+    return cache.getOrSet(
+      CacheManager.keys.sessionAvailability(sessionId),
+      () => this.loadAvailability(sessionId),
+      {
+        ttl: this.AVAILABILITY_CACHE_TTL,
+        tags: [CacheManager.tags.session(sessionId), CacheManager.tags.sessions],
+      },
+    );
+  }
+
+  private async loadAvailability(sessionId: string): Promise<{
+    available: boolean;
+    currentCount: number;
+    remainingSpots: number;
   }> {
     const session = await this.courseSessionRepository.findById(sessionId);
     
@@ -332,12 +323,193 @@ export class CourseSessionCapacityService extends BaseService {
    * Get sessions for calendar display
    */
   async getCalendarSessions(startDate: Date, endDate: Date): Promise<any[]> {
-    const sessions = await this.getAvailableSessions({
-      startDate,
-      endDate,
+    return this.executeWithErrorHandling('getCalendarSessions', async () => {
+      this.validateDateRange(startDate, endDate);
+
+      const months = this.getMonthsBetween(startDate, endDate);
+      let entries: SessionAvailabilityEntry[];
+
+      if (months.length > this.CALENDAR_CACHE_MAX_SPAN_MONTHS) {
+        // Long ranges are rare and would only churn the month cache
+        const whereClause = await this.buildSessionWhere({startDate, endDate});
+        entries = whereClause ? await this.loadSessionAvailability(whereClause) : [];
+      } else {
+        const monthEntries = await Promise.all(
+          months.map(({year, month}) => this.getCalendarMonthEntries(year, month)),
+        );
+        entries = monthEntries
+          .flat()
+          .filter(entry =>
+            entry.availability.sessionDate >= startDate && entry.endDate <= endDate,
+          );
+      }
+
+      return entries.map(entry => this.toCalendarEvent(entry.availability));
     });
+  }
+
+  /**
+   * Build the session query with course type and location filters pushed down
+   * into the database. Returns null when a filter cannot match any session.
+   */
+  private async buildSessionWhere(filters: SessionFilters): Promise<any | null> {
+    const whereClause: any = {
+      status: SessionStatus.SCHEDULED,
+    };
+
+    if (filters.startDate) {
+      whereClause.startDate = {gte: filters.startDate};
+    }
+    if (filters.endDate) {
+      whereClause.endDate = {lte: filters.endDate};
+    }
 
-    return sessions.map(session => ({
+    if (filters.courseType) {
+      const courses = await this.courseRepository.find({
+        where: {name: filters.courseType},
+        fields: {id: true},
+      });
+      if (courses.length === 0) {
+        return null;
+      }
+      whereClause.courseId = {inq: courses.map(course => course.id)};
+    }
+
+    if (filters.location) {
+      const locations = await this.locationRepository.find({
+        fields: {id: true, name: true},
+      });
+      const locationIds = locations
+        .filter(location => this.getSimplifiedLocation(location.name) === filters.location)
+        .map(location => location.id);
+
+      if (filters.location === this.getSimplifiedLocation('')) {
+        // Sessions without a location are reported under the default location
+        whereClause.or = [{locationId: {inq: locationIds}}, {locationId: null}];
+      } else if (locationIds.length === 0) {
+        return null;
+      } else {
+        whereClause.locationId = {inq: locationIds};
+      }
+    }
+
+    return whereClause;
+  }
+
+  /**
+   * Load sessions matching the where clause together with their booking counts,
+   * using one grouped count query for the whole set instead of one per session
+   */
+  private async loadSessionAvailability(
+    whereClause: any,
+    showOnlyAvailable?: boolean,
+  ): Promise<SessionAvailabilityEntry[]> {
+    const sessions = await this.courseSessionRepository.find({
+      where: whereClause,
+      include: ['course', 'location'],
+      order: ['startDate ASC'],
+    });
+
+    const bookingCounts = await this.bookingRepository.countActiveBySession(
+      sessions.map(session => session.id),
+    );
+
+    const entries: SessionAvailabilityEntry[] = [];
+    for (const session of sessions) {
+      const currentBookings = bookingCounts.get(session.id) ?? 0;
+      const maxCapacity = Math.min(session.maxParticipants, this.MAX_CAPACITY_LIMIT);
+      const availableSpots = maxCapacity - currentBookings;
+
+      // Apply availability filter
+      if (showOnlyAvailable && availableSpots <= 0) {
+        continue;
+      }
+
+      entries.push({
+        endDate: session.endDate,
+        availability: {
+          sessionId: session.id,
+          courseType: session.course?.name || '',
+          sessionDate: session.startDate,
+          startTime: session.startTime,
+          endTime: session.endTime,
+          location: this.getSimplifiedLocation(session.location?.name || ''),
+          currentBookings,
+          maxCapacity,
+          availableSpots,
+          status: this.getAvailabilityStatus(availableSpots, maxCapacity),
+        },
+      });
+    }
+
+    return entries;
+  }
+
+  /**
+   * Get the sessions starting in a calendar month through the shared cache,
+   * which coalesces concurrent loads. Entries are tagged with every session
+   * in the month so a booking change on any of them drops the month.
+   */
+  private async getCalendarMonthEntries(year: number, month: number): Promise<SessionAvailabilityEntry[]> {
+    const monthStart = new Date(Date.UTC(year, month - 1, 1));
+    const nextMonthStart = new Date(Date.UTC(year, month, 1));
+
+    const entries = await cache.getOrSet(
+      CacheManager.keys.calendarMonth(this.getMonthKey(year, month)),
+      () => this.loadSessionAvailability({
+        status: SessionStatus.SCHEDULED,
+        startDate: {gte: monthStart, lt: nextMonthStart},
+      }),
+      {
+        ttl: this.CALENDAR_CACHE_TTL,
+        staleTtl: this.CALENDAR_CACHE_STALE_TTL,
+        tags: (loaded: SessionAvailabilityEntry[]) => [
+          CacheManager.tags.sessions,
+          ...loaded.map(entry => CacheManager.tags.session(entry.availability.sessionId)),
+        ],
+      },
+    );
+
+    // Dates come back as strings when the month was read from Redis
+    return entries.map(entry => ({
+      endDate: new Date(entry.endDate),
+      availability: {
+        ...entry.availability,
+        sessionDate: new Date(entry.availability.sessionDate),
+      },
+    }));
+  }
+
+  /**
+   * List the calendar months (1-based) touched by a date range
+   */
+  private getMonthsBetween(startDate: Date, endDate: Date): Array<{year: number; month: number}> {
+    const months: Array<{year: number; month: number}> = [];
+    let year = startDate.getUTCFullYear();
+    let month = startDate.getUTCMonth() + 1;
+    const lastYear = endDate.getUTCFullYear();
+    const lastMonth = endDate.getUTCMonth() + 1;
+
+    while (year < lastYear || (year === lastYear && month <= lastMonth)) {
+      months.push({year, month});
+      month++;
+      if (month > 12) {
+        month = 1;
+        year++;
+      }
+    }
+    return months;
+  }
+
+  private getMonthKey(year: number, month: number): string {
+    return `${year}-${month.toString().padStart(2, '0')}`;
+  }
+
+  /**
+   * Map session availability to a calendar event
+   */
+  private toCalendarEvent(session: SessionAvailability): any {
+    return {
       id: session.sessionId,
       title: session.courseType,
       date: session.sessionDate,
@@ -352,7 +524,7 @@ export class CourseSessionCapacityService extends BaseService {
         percentFull: Math.round((session.currentBookings / session.maxCapacity) * 100),
         status: session.status,
       },
-    }));
+    };
   }
 
   /**
@@ -0,0 +1,229 @@
+import { db } from '../config/database.config';
+import { sql, SQL } from 'drizzle-orm';
+
+export interface RollupTotals {
+  count: number;
+  revenue: number;
+  attendees: number;
+}
+
+export interface RollupDailyStats {
+  date: string;
+  bookings: number;
+  revenue: number;
+  attendees: number;
+}
+
+export interface RollupCourseStats {
+  courseType: string;
+  bookings: number;
+  attendees: number;
+  revenue: number;
+}
+
+export interface RollupDrift {
+  field: string;
+  rollup: number;
+  live: number;
+}
+
+const VERIFIED_FIELDS = ['booked', 'completed', 'cancelled', 'attendees', 'revenue', 'refunded'];
+
+/**
+ * Reads booking_daily_rollups so the admin dashboard and analytics scan a
+ * handful of pre-aggregated rows instead of every booking in the period.
+ *
+ * Rows are keyed by the UTC day the booking was made, session date and
+ * course. They are kept current by triggers on bookings and refunds
+ * (migration 019), so every status write is counted whichever service makes
+ * it; rebuild() recomputes everything from history.
+ */
+export class DashboardRollupService {
+  /**
+   * Recompute all rollups from bookings and refunds
+   */
+  static async rebuild(): Promise<{ rows: number }> {
+    return await db.transaction(async (tx) => {
+      const result = await tx.execute(sql`SELECT rebuild_booking_daily_rollups() AS rows`);
+      return { rows: Number(result.rows[0]?.rows || 0) };
+    });
+  }
+
+  /**
+   * Compare rollup totals with the same totals computed from bookings and
+   * refunds. Returns the fields that differ; empty when the rollups are exact.
+   */
+  static async verify(): Promise<RollupDrift[]> {
+    const result = await db.execute(sql`
+      WITH rollup AS (
+        SELECT
+          COALESCE(SUM(booked_count), 0) AS booked,
+          COALESCE(SUM(completed_count), 0) AS completed,
+          COALESCE(SUM(cancelled_count), 0) AS cancelled,
+          COALESCE(SUM(attendees), 0) AS attendees,
+          COALESCE(SUM(revenue), 0) AS revenue,
+          COALESCE(SUM(refunded_amount), 0) AS refunded
+        FROM booking_daily_rollups
+      ),
+      live AS (
+        SELECT
+          COUNT(*) FILTER (WHERE booking_rollup_is_booked(b.status)) AS booked,
+          COUNT(*) FILTER (WHERE booking_rollup_is_completed(b.status)) AS completed,
+          COUNT(*) FILTER (WHERE booking_rollup_is_cancelled(b.status)) AS cancelled,
+          COALESCE(SUM(b.number_of_attendees) FILTER (WHERE booking_rollup_is_booked(b.status)), 0) AS attendees,
+          COALESCE(SUM(b.total_amount) FILTER (WHERE booking_rollup_is_booked(b.status)), 0) AS revenue,
+          COALESCE(SUM(r.refunded), 0) AS refunded
+        FROM bookings b
+        JOIN course_sessions cs ON cs.id = b.session_id
+        JOIN courses c ON c.id = cs.course_id
+        LEFT JOIN (
+          SELECT booking_id, SUM(amount) AS refunded
+          FROM refunds
+          WHERE status = 'processed'
+          GROUP BY booking_id
+        ) r ON r.booking_id = b.id
+      )
+      SELECT row_to_json(rollup) AS rollup, row_to_json(live) AS live
+      FROM rollup, live
+    `);
+
+    const row: any = result.rows[0] || {};
+    return VERIFIED_FIELDS
+      .map(field => ({
+        field,
+        rollup: Number(row.rollup?.[field] || 0),
+        live: Number(row.live?.[field] || 0),
+      }))
+      .filter(({ rollup, live }) => Math.abs(rollup - live) > 0.005);
+  }
+
+  /**
+   * Booked count, revenue and attendees for bookings made in [from, to)
+   */
+  static async getTotals(from: Date, to?: Date): Promise<RollupTotals> {
+    const result = await db.execute(sql`
+      SELECT
+        COALESCE(SUM(booked_count), 0) AS count,
+        COALESCE(SUM(revenue), 0) AS revenue,
+        COALESCE(SUM(attendees), 0) AS attendees
+      FROM booking_daily_rollups
+      WHERE ${this.bookingDateRange(from, to)}
+    `);
+
+    const row = result.rows[0] || {};
+    return {
+      count: Number(row.count || 0),
+      revenue: Number(row.revenue || 0),
+      attendees: Number(row.attendees || 0),
+    };
+  }
+
+  /**
+   * Per-day stats for bookings made in [from, to)
+   */
+  static async getDailyStats(from: Date, to?: Date): Promise<RollupDailyStats[]> {
+    const result = await db.execute(sql`
+      SELECT
+        TO_CHAR(booking_date, 'YYYY-MM-DD') AS date,
+        SUM(booked_count) AS bookings,
+        SUM(revenue) AS revenue,
+        SUM(attendees) AS attendees
+      FROM booking_daily_rollups
+      WHERE ${this.bookingDateRange(from, to)}
+      GROUP BY booking_date
+      HAVING SUM(booked_count) > 0
+      ORDER BY booking_date
+    `);
+
+    return result.rows.map(row => ({
+      date: String(row.date),
+      bookings: Number(row.bookings),
+      revenue: Number(row.revenue),
+      attendees: Number(row.attendees),
+    }));
+  }
+
+  /**
+   * Per-course stats for bookings made in [from, to), highest revenue first
+   */
+  static async getCourseStats(from: Date, to?: Date): Promise<RollupCourseStats[]> {
+    const result = await db.execute(sql`
+      SELECT
+        course_type,
+        SUM(booked_count) AS bookings,
+        SUM(attendees) AS attendees,
+        SUM(revenue) AS revenue
+      FROM booking_daily_rollups
+      WHERE ${this.bookingDateRange(from, to)}
+      GROUP BY course_type
+      HAVING SUM(booked_count) > 0
+      ORDER BY revenue DESC
+    `);
+
+    return result.rows.map(row => ({
+      courseType: String(row.course_type),
+      bookings: Number(row.bookings),
+      attendees: Number(row.attendees),
+      revenue: Number(row.revenue),
+    }));
+  }
+
+  /**
+   * Course popularity for sessions running on or after a date
+   */
+  static async getCoursePopularity(sessionsFrom: Date): Promise<any[]> {
+    const result = await db.execute(sql`
+      SELECT
+        c.id AS course_id,
+        c.name AS course_name,
+        r.course_type AS category,
+        SUM(r.booked_count) AS total_bookings,
+        SUM(r.completed_count) AS completed_bookings,
+        SUM(r.revenue) AS revenue,
+        SUM(r.fill_ratio_sum) / NULLIF(SUM(r.booked_count), 0) * 100 AS fill_rate,
+        ARRAY_AGG(DISTINCT TO_CHAR(r.session_date, 'Day')) AS popular_days,
+        ARRAY_AGG(DISTINCT TO_CHAR(r.session_date, 'Month')) AS popular_months
+      FROM booking_daily_rollups r
+      JOIN courses c ON c.id = r.course_id
+      WHERE r.session_date >= ${this.toDateString(sessionsFrom)}::date
+        AND r.booked_count > 0
+      GROUP BY c.id, c.name, r.course_type
+      ORDER BY total_bookings DESC
+    `);
+
+    return result.rows;
+  }
+
+  /**
+   * Bookings and revenue per course per session month for a year
+   */
+  static async getMonthlyTrends(year: number): Promise<any[]> {
+    const result = await db.execute(sql`
+      SELECT
+        c.name AS course_name,
+        EXTRACT(MONTH FROM r.session_date) AS month,
+        TO_CHAR(r.session_date, 'Month') AS month_name,
+        SUM(r.booked_count) AS bookings,
+        SUM(r.revenue) AS revenue
+      FROM booking_daily_rollups r
+      JOIN courses c ON c.id = r.course_id
+      WHERE r.session_date >= make_date(${year}, 1, 1)
+        AND r.session_date < make_date(${year + 1}, 1, 1)
+        AND r.booked_count > 0
+      GROUP BY c.name, month, month_name
+      ORDER BY month
+    `);
+
+    return result.rows;
+  }
+
+  private static bookingDateRange(from: Date, to?: Date): SQL {
+    const lower = sql`booking_date >= ${this.toDateString(from)}::date`;
+    return to ? sql`${lower} AND booking_date < ${this.toDateString(to)}::date` : lower;
+  }
+
+  // Rollup rows are bucketed by UTC day
+  private static toDateString(date: Date): string {
+    return date.toISOString().slice(0, 10);
+  }
+}
@@ -1,19 +1,42 @@
 const nodemailer = require('nodemailer');
 const handlebars = require('handlebars');
 
+// Retry policy per priority band: higher priority mail retries sooner and more often
+const RETRY_POLICIES = [
+  { minPriority: 8, maxAttempts: 5, baseDelayMs: 30 * 1000 },
+  { minPriority: 5, maxAttempts: 4, baseDelayMs: 60 * 1000 },
+  { minPriority: 1, maxAttempts: 3, baseDelayMs: 5 * 60 * 1000 }
+];
+const MAX_RETRY_DELAY_MS = 60 * 60 * 1000;
+const LATENCY_SAMPLE_SIZE = 500;
+
 class EmailService {
-  constructor() {
-    // Initialize transporter with environment variables
+  constructor(options = {}) {
+    const user = process.env.SMTP_USER || process.env.EMAIL_USER;
+
+    // Initialize transporter with environment variables. Pooled connections are
+    // reused across messages instead of a new SMTP handshake per email.
     this.transporter = nodemailer.createTransport({
-      host: process.env.SMTP_HOST || process.env.EMAIL_HOST || 'smtp.gmail.com',
-      port: process.env.SMTP_PORT || process.env.EMAIL_PORT || 587,
+      host: options.host || process.env.SMTP_HOST || process.env.EMAIL_HOST || 'smtp.gmail.com',
+      port: options.port || process.env.SMTP_PORT || process.env.EMAIL_PORT || 587,
       secure: false, // true for 465, false for other ports
-      auth: {
-        user: process.env.SMTP_USER || process.env.EMAIL_USER,
+      pool: options.pool !== undefined ? options.pool : true,
+      maxConnections: options.maxConnections || parseInt(process.env.EMAIL_POOL_SIZE || '5'),
+      maxMessages: 100,
+      ignoreTLS: options.ignoreTLS || false,
+      auth: user ? {
+        user,
         pass: process.env.SMTP_PASS || process.env.EMAIL_PASS
-      }
+      } : undefined
     });
 
+    this.metrics = {
+      sent: 0,
+      failed: 0,
+      retried: 0,
+      latencies: []
+    };
+
     // Register Handlebars helpers
     handlebars.registerHelper('formatDate', (date) => {
       return new Date(date).toLocaleDateString('en-GB', {
@@ -38,26 +61,28 @@ class EmailService {
 
   /**
    * Process email queue
+   *
+   * Claims up to `batchSize` due rows with FOR UPDATE SKIP LOCKED, so several
+   * workers (or the API process) can drain the queue without sending the same
+   * email twice, then sends them with bounded concurrency.
    */
-  async processEmailQueue(db) {
+  async processEmailQueue(db, options = {}) {
+    const batchSize = options.batchSize || 10;
+    const concurrency = options.concurrency || 5;
+    const workerId = options.workerId || `pid-${process.pid}`;
+
     try {
-      // Get pending emails
-      const pendingEmails = await db.query(`
-        SELECT * FROM email_queue 
-        WHERE status = 'pending' 
-        AND scheduled_for <= CURRENT_TIMESTAMP
-        AND attempts < 3
-        ORDER BY priority DESC, scheduled_for ASC
-        LIMIT 10
-      `);
+      const claimed = await this.claimEmailBatch(db, batchSize, workerId);
+      const templates = await this.loadTemplates(db, claimed);
 
-      for (const email of pendingEmails.rows) {
-        await this.sendQueuedEmail(db, email);
-      }
+      const results = await EmailService.mapWithConcurrency(claimed, concurrency, email =>
+        this.deliverClaimedEmail(db, email, templates)
+      );
 
       return {
-        processed: pendingEmails.rows.length,
-        success: pendingEmails.rows.filter(e => e.status === 'sent').length
+        processed: claimed.length,
+        success: results.filter(sent => sent).length,
+        failed: results.filter(sent => !sent).length
       };
     } catch (error) {
       console.error('Error processing email queue:', error);
@@ -65,34 +90,124 @@ class EmailService {
     }
   }
 
+  /**
+   * Atomically claim a batch of due emails for this worker
+   */
+  async claimEmailBatch(db, batchSize, workerId) {
+    const result = await db.query(`
+      UPDATE email_queue
+      SET status = 'sending',
+          attempts = attempts + 1,
+          locked_by = $2,
+          locked_at = CURRENT_TIMESTAMP
+      WHERE id IN (
+        SELECT id FROM email_queue
+        WHERE status = 'pending'
+        AND scheduled_for <= CURRENT_TIMESTAMP
+        ORDER BY priority DESC, scheduled_for ASC
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+      )
+      RETURNING *
+    `, [batchSize, workerId]);
+
+    // UPDATE ... RETURNING does not preserve the subquery order
+    return result.rows.sort((a, b) =>
+      b.priority - a.priority || new Date(a.scheduled_for) - new Date(b.scheduled_for)
+    );
+  }
+
+  /**
+   * Return rows left in 'sending' by a worker that died mid-batch
+   */
+  async releaseStaleClaims(db, staleAfterMs = 10 * 60 * 1000) {
+    const result = await db.query(`
+      UPDATE email_queue
+      SET status = 'pending', locked_by = NULL, locked_at = NULL
+      WHERE status = 'sending'
+      AND locked_at < CURRENT_TIMESTAMP - ($1::text || ' milliseconds')::interval
+    `, [staleAfterMs]);
+
+    return result.rowCount;
+  }
+
+  /**
+   * Count queued emails by status
+   */
+  async getQueueDepth(db) {
+    const result = await db.query(`
+      SELECT
+        COUNT(*) FILTER (WHERE status = 'pending' AND scheduled_for <= CURRENT_TIMESTAMP) AS due,
+        COUNT(*) FILTER (WHERE status = 'pending' AND scheduled_for > CURRENT_TIMESTAMP) AS scheduled,
+        COUNT(*) FILTER (WHERE status = 'sending') AS sending,
+        MIN(scheduled_for) FILTER (WHERE status = 'pending') AS next_scheduled_for
+      FROM email_queue
+      WHERE status IN ('pending', 'sending')
+    `);
+
+    const row = result.rows[0];
+    return {
+      due: parseInt(row.due),
+      scheduled: parseInt(row.scheduled),
+      sending: parseInt(row.sending),
+      nextScheduledFor: row.next_scheduled_for
+    };
+  }
+
+  /**
+   * Send counters and latency percentiles since the service was created
+   */
+  getMetrics() {
+    const latencies = [...this.metrics.latencies].sort((a, b) => a - b);
+    const percentile = p => latencies.length
+      ? latencies[Math.min(latencies.length - 1, Math.floor(latencies.length * p))]
+      : 0;
+
+    return {
+      sent: this.metrics.sent,
+      failed: this.metrics.failed,
+      retried: this.metrics.retried,
+      latencyMs: {
+        p50: percentile(0.5),
+        p95: percentile(0.95),
+        max: latencies.length ? latencies[latencies.length - 1] : 0
+      }
+    };
+  }
+
   /**
    * Send a queued email
    */
   async sendQueuedEmail(db, email) {
-    try {
-      // Update status to sending
-      await db.query(
-        'UPDATE email_queue SET status = $1, attempts = attempts + 1 WHERE id = $2',
-        ['sending', email.id]
-      );
+    // Update status to sending
+    await db.query(
+      'UPDATE email_queue SET status = $1, attempts = attempts + 1 WHERE id = $2',
+      ['sending', email.id]
+    );
+
+    const templates = await this.loadTemplates(db, [email]);
+    const sent = await this.deliverClaimedEmail(db, { ...email, attempts: email.attempts + 1 }, templates);
+    if (!sent) {
+      throw new Error(`Failed to send email ${email.id}`);
+    }
+  }
+
+  /**
+   * Send an email that this worker has already claimed. Failures are
+   * rescheduled with exponential backoff until the priority's attempt limit.
+   */
+  async deliverClaimedEmail(db, email, templates = new Map()) {
+    const startTime = Date.now();
 
+    try {
       let htmlContent = email.body_html;
       let textContent = email.body_text;
 
       // If template is used, compile it
-      if (email.template_id) {
-        const template = await db.query(
-          'SELECT * FROM email_templates WHERE id = $1',
-          [email.template_id]
-        );
-
-        if (template.rows[0]) {
-          const htmlTemplate = handlebars.compile(template.rows[0].body_html);
-          const textTemplate = handlebars.compile(template.rows[0].body_text);
-          
-          htmlContent = htmlTemplate(email.variables);
-          textContent = textTemplate(email.variables);
-        }
+      const template = email.template_id ? templates.get(email.template_id) : null;
+      if (template) {
+        htmlContent = template.html(email.variables);
+        textContent = template.text(email.variables);
       }
 
       // Send email
@@ -104,26 +219,118 @@ class EmailService {
         html: htmlContent
       });
 
+      this.recordLatency(Date.now() - startTime);
+      this.metrics.sent++;
+
       // Update status to sent
       await db.query(
-        'UPDATE email_queue SET status = $1, sent_at = CURRENT_TIMESTAMP WHERE id = $2',
+        `UPDATE email_queue
+         SET status = $1, sent_at = CURRENT_TIMESTAMP, locked_by = NULL, locked_at = NULL
+         WHERE id = $2`,
         ['sent', email.id]
       );
 
       console.log(`Email sent successfully: ${info.messageId}`);
-      return info;
+      return true;
     } catch (error) {
-      // Update status to failed
-      await db.query(
-        'UPDATE email_queue SET status = $1, last_error = $2 WHERE id = $3',
-        ['failed', error.message, email.id]
-      );
-      
-      console.error(`Failed to send email ${email.id}:`, error);
-      throw error;
+      const policy = EmailService.getRetryPolicy(email.priority);
+
+      if (email.attempts < policy.maxAttempts) {
+        const delayMs = EmailService.getRetryDelay(policy, email.attempts);
+        this.metrics.retried++;
+
+        await db.query(
+          `UPDATE email_queue
+           SET status = 'pending', last_error = $1, locked_by = NULL, locked_at = NULL,
+               scheduled_for = CURRENT_TIMESTAMP + ($2::text || ' milliseconds')::interval
+           WHERE id = $3`,
+          [error.message, delayMs, email.id]
+        );
+        console.warn(`Email ${email.id} failed (attempt ${email.attempts}), retrying in ${Math.round(delayMs / 1000)}s:`, error.message);
+      } else {
+        this.metrics.failed++;
+
+        // Update status to failed
+        await db.query(
+          'UPDATE email_queue SET status = $1, last_error = $2, locked_by = NULL, locked_at = NULL WHERE id = $3',
+          ['failed', error.message, email.id]
+        );
+        console.error(`Failed to send email ${email.id}:`, error);
+      }
+
+      return false;
+    }
+  }
+
+  /**
+   * Load and compile every template referenced by a batch in one query
+   */
+  async loadTemplates(db, emails) {
+    const templateIds = [...new Set(emails.map(e => e.template_id).filter(Boolean))];
+    const templates = new Map();
+
+    if (templateIds.length === 0) {
+      return templates;
+    }
+
+    const result = await db.query(
+      'SELECT * FROM email_templates WHERE id = ANY($1::int[])',
+      [templateIds]
+    );
+
+    for (const row of result.rows) {
+      templates.set(row.id, {
+        html: handlebars.compile(row.body_html),
+        text: handlebars.compile(row.body_text || '')
+      });
+    }
+
+    return templates;
+  }
+
+  recordLatency(ms) {
+    this.metrics.latencies.push(ms);
+    if (this.metrics.latencies.length > LATENCY_SAMPLE_SIZE) {
+      this.metrics.latencies.shift();
     }
   }
 
+  /**
+   * Close pooled SMTP connections
+   */
+  close() {
+    this.transporter.close();
+  }
+
+  static getRetryPolicy(priority) {
+    return RETRY_POLICIES.find(policy => (priority || 5) >= policy.minPriority)
+      || RETRY_POLICIES[RETRY_POLICIES.length - 1];
+  }
+
+  static getRetryDelay(policy, attempts) {
+    const exponential = policy.baseDelayMs * Math.pow(2, Math.max(0, attempts - 1));
+    const jitter = Math.random() * policy.baseDelayMs;
+    return Math.min(MAX_RETRY_DELAY_MS, Math.round(exponential + jitter));
+  }
+
+  /**
+   * Run `fn` over items with at most `limit` calls in flight
+   */
+  static async mapWithConcurrency(items, limit, fn) {
+    const results = new Array(items.length);
+    let next = 0;
+
+    const runners = Array.from({ length: Math.min(limit, items.length) }, async () => {
+      while (next < items.length) {
+        const index = next++;
+        results[index] = await fn(items[index], index);
+      }
+    });
+
+    await Promise.all(runners);
+    return results;
+  }
+
   /**
    * Queue a booking confirmation email
    */
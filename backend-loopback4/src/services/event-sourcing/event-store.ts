@@ -20,6 +20,8 @@ export interface EventStream {
   aggregateType: string;
   version: number;
   events: DomainEvent[];
+  /** Snapshot the events follow on from, when the stream was read from one */
+  snapshot?: Snapshot;
 }
 
 export interface Snapshot {
@@ -30,10 +32,33 @@ export interface Snapshot {
   timestamp: Date;
 }
 
+export interface AppendOptions {
+  /**
+   * Aggregate state after the appended events. Called when the append
+   * crosses a snapshot boundary (every `snapshotFrequency` events); streams
+   * appended without it are never snapshotted.
+   */
+  snapshotState?: () => any;
+}
+
+export interface EventStreamOptions {
+  fromTimestamp?: Date;
+  eventTypes?: string[];
+  batchSize?: number;
+}
+
+// Ten parameters per event; stay well below Postgres' 65535 parameter limit
+const MAX_EVENTS_PER_INSERT = 500;
+const DEFAULT_REPLAY_BATCH_SIZE = 500;
+
 @injectable()
 export class EventStore {
   private eventHandlers: Map<string, ((event: DomainEvent) => Promise<void>)[]> = new Map();
   private projections: Map<string, any> = new Map();
+  // Tail of the handler queue per aggregate: events of one aggregate are
+  // handled in sequence order, different aggregates are handled concurrently
+  private dispatchQueues: Map<string, Promise<void>> = new Map();
+  readonly snapshotFrequency = parseInt(process.env.EVENT_STORE_SNAPSHOT_EVERY || '50', 10);
   
   constructor(
     @inject('datasources.postgres')
@@ -92,19 +117,25 @@ export class EventStore {
   }
 
   /**
-   * Append events to the event store
+   * Append events to the event store.
+   *
+   * All events are written with one multi-row INSERT. Handlers are dispatched
+   * after commit without blocking the caller; see drainHandlers().
    */
   async appendEvents(
     aggregateId: string,
     aggregateType: string,
     events: Omit<DomainEvent, 'eventId' | 'sequenceNumber' | 'timestamp'>[],
-    expectedVersion?: number
+    expectedVersion?: number,
+    options: AppendOptions = {}
   ): Promise<DomainEvent[]> {
     const trx = await this.dataSource.beginTransaction();
-    
+    let currentVersion: number;
+    let appendedEvents: DomainEvent[];
+
     try {
       // Get current version
-      const currentVersion = await this.getAggregateVersion(aggregateId, trx);
+      currentVersion = await this.getAggregateVersion(aggregateId, trx);
       
       // Check expected version for optimistic concurrency
       if (expectedVersion !== undefined && currentVersion !== expectedVersion) {
@@ -113,67 +144,73 @@ export class EventStore {
         );
       }
 
-      const appendedEvents: DomainEvent[] = [];
-      let sequenceNumber = currentVersion + 1;
-
-      for (const event of events) {
-        const domainEvent: DomainEvent = {
-          ...event,
-          eventId: uuid(),
-          aggregateId,
-          aggregateType,
-          sequenceNumber,
-          timestamp: new Date(),
-        };
-
-        // Insert event
-        await trx.execute(
-          `INSERT INTO event_store (
-            event_id, event_type, event_version, aggregate_id, 
-            aggregate_type, sequence_number, timestamp, user_id, 
-            payload, metadata
-          ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)`,
-          [
-            domainEvent.eventId,
-            domainEvent.eventType,
-            domainEvent.eventVersion,
-            domainEvent.aggregateId,
-            domainEvent.aggregateType,
-            domainEvent.sequenceNumber,
-            domainEvent.timestamp,
-            domainEvent.userId,
-            JSON.stringify(domainEvent.payload),
-            domainEvent.metadata ? JSON.stringify(domainEvent.metadata) : null,
-          ]
-        );
-
-        appendedEvents.push(domainEvent);
-        sequenceNumber++;
+      const timestamp = new Date();
+      appendedEvents = events.map((event, index) => ({
+        ...event,
+        eventId: uuid(),
+        aggregateId,
+        aggregateType,
+        sequenceNumber: currentVersion + index + 1,
+        timestamp,
+      }));
+
+      for (let i = 0; i < appendedEvents.length; i += MAX_EVENTS_PER_INSERT) {
+        await this.insertEvents(appendedEvents.slice(i, i + MAX_EVENTS_PER_INSERT), trx);
       }
 
       // Update stream metadata
-      await this.updateStreamMetadata(aggregateId, sequenceNumber - 1, trx);
+      await this.updateStreamMetadata(aggregateId, currentVersion + appendedEvents.length, trx);
 
       await trx.commit();
+    } catch (error) {
+      await trx.rollback();
+      throw error;
+    }
 
-      // Publish events to handlers
-      for (const event of appendedEvents) {
-        await this.publishEvent(event);
-      }
+    // The events are committed from here on: nothing below may roll back or
+    // report the append as failed, or the caller would append them again
+    const newVersion = currentVersion + appendedEvents.length;
+
+    // Publish events to handlers
+    this.dispatchEvents(aggregateId, appendedEvents);
 
-      // Record metrics
+    if (options.snapshotState && this.crossesSnapshotBoundary(currentVersion, newVersion)) {
+      this.snapshotAfterAppend(aggregateId, aggregateType, newVersion, options.snapshotState);
+    }
+
+    // Record metrics
+    try {
       this.monitoring.recordMetric({
         name: 'event_store.events_appended',
         value: appendedEvents.length,
         unit: 'count',
         tags: { aggregate_type: aggregateType },
       });
-
-      return appendedEvents;
     } catch (error) {
-      await trx.rollback();
-      throw error;
+      console.error('Failed to record event_store.events_appended:', error);
+    }
+
+    return appendedEvents;
+  }
+
+  /**
+   * Wait until every dispatched event has been handled
+   */
+  async drainHandlers(): Promise<void> {
+    while (this.dispatchQueues.size > 0) {
+      await Promise.all(this.dispatchQueues.values());
+    }
+  }
+
+  /**
+   * Whether appending from one version to another passes a multiple of the
+   * snapshot frequency
+   */
+  crossesSnapshotBoundary(fromVersion: number, toVersion: number): boolean {
+    if (this.snapshotFrequency <= 0) {
+      return false;
     }
+    return Math.floor(toVersion / this.snapshotFrequency) > Math.floor(fromVersion / this.snapshotFrequency);
   }
 
   /**
@@ -204,18 +241,7 @@ export class EventStore {
 
     const result = await this.dataSource.execute(query, params);
     
-    return result.map((row: any) => ({
-      eventId: row.event_id,
-      eventType: row.event_type,
-      eventVersion: row.event_version,
-      aggregateId: row.aggregate_id,
-      aggregateType: row.aggregate_type,
-      sequenceNumber: row.sequence_number,
-      timestamp: row.timestamp,
-      userId: row.user_id,
-      payload: row.payload,
-      metadata: row.metadata,
-    }));
+    return result.map((row: any) => this.mapEvent(row));
   }
 
   /**
@@ -228,9 +254,10 @@ export class EventStore {
     let events: DomainEvent[];
     let version = 0;
     let aggregateType = '';
+    let snapshot: Snapshot | null = null;
 
     if (fromSnapshot) {
-      const snapshot = await this.getLatestSnapshot(aggregateId);
+      snapshot = await this.getLatestSnapshot(aggregateId);
       if (snapshot) {
         version = snapshot.version;
         aggregateType = snapshot.aggregateType;
@@ -252,6 +279,7 @@ export class EventStore {
       aggregateType,
       version,
       events,
+      ...(snapshot ? { snapshot } : {}),
     };
   }
 
@@ -333,6 +361,40 @@ export class EventStore {
     };
   }
 
+  /**
+   * Insert events with a single multi-row INSERT
+   */
+  private async insertEvents(events: DomainEvent[], trx: any): Promise<void> {
+    const values: string[] = [];
+    const params: any[] = [];
+
+    for (const event of events) {
+      const offset = params.length;
+      values.push(`(${Array.from({ length: 10 }, (_, i) => `$${offset + i + 1}`).join(', ')})`);
+      params.push(
+        event.eventId,
+        event.eventType,
+        event.eventVersion,
+        event.aggregateId,
+        event.aggregateType,
+        event.sequenceNumber,
+        event.timestamp,
+        event.userId,
+        JSON.stringify(event.payload),
+        event.metadata ? JSON.stringify(event.metadata) : null,
+      );
+    }
+
+    await trx.execute(
+      `INSERT INTO event_store (
+        event_id, event_type, event_version, aggregate_id, 
+        aggregate_type, sequence_number, timestamp, user_id, 
+        payload, metadata
+      ) VALUES ${values.join(', ')}`,
+      params
+    );
+  }
+
   /**
    * Get aggregate version
    */
@@ -369,6 +431,62 @@ export class EventStore {
     );
   }
 
+  /**
+   * Queue events for their handlers behind any earlier events of the same
+   * aggregate
+   */
+  /**
+   * Snapshot after a committed append without ever failing it: errors from
+   * the caller's state thunk or the snapshot write are only logged
+   */
+  private snapshotAfterAppend(
+    aggregateId: string,
+    aggregateType: string,
+    version: number,
+    snapshotState: () => any
+  ): void {
+    const logFailure = (error: unknown) => {
+      console.error(`Failed to snapshot ${aggregateType} ${aggregateId}:`, error);
+    };
+
+    // Read the state now, while it still matches `version`
+    let state: any;
+    try {
+      state = snapshotState();
+    } catch (error) {
+      logFailure(error);
+      return;
+    }
+
+    this.saveSnapshot({
+      aggregateId,
+      aggregateType,
+      version,
+      state,
+      timestamp: new Date(),
+    }).catch(logFailure);
+  }
+
+  private dispatchEvents(aggregateId: string, events: DomainEvent[]): void {
+    const previous = this.dispatchQueues.get(aggregateId) || Promise.resolve();
+    const tail = previous
+      .then(async () => {
+        for (const event of events) {
+          await this.publishEvent(event);
+        }
+      })
+      .catch(error => {
+        console.error(`Error dispatching events for ${aggregateId}:`, error);
+      });
+
+    this.dispatchQueues.set(aggregateId, tail);
+    tail.finally(() => {
+      if (this.dispatchQueues.get(aggregateId) === tail) {
+        this.dispatchQueues.delete(aggregateId);
+      }
+    });
+  }
+
   /**
    * Publish event to handlers
    */
@@ -410,63 +528,99 @@ export class EventStore {
       [eventType, startTime, endTime, limit]
     );
 
-    return result.map((row: any) => ({
-      eventId: row.event_id,
-      eventType: row.event_type,
-      eventVersion: row.event_version,
-      aggregateId: row.aggregate_id,
-      aggregateType: row.aggregate_type,
-      sequenceNumber: row.sequence_number,
-      timestamp: row.timestamp,
-      userId: row.user_id,
-      payload: row.payload,
-      metadata: row.metadata,
-    }));
+    return result.map((row: any) => this.mapEvent(row));
   }
 
   /**
-   * Replay events from a specific point
+   * Stream events in commit order through a server-side cursor, one batch at
+   * a time, so projections can rebuild from the full history without loading
+   * it into memory. The cursor runs in a read-only transaction and sees a
+   * consistent snapshot; it is closed when the consumer stops iterating.
    */
-  async replayEvents(
-    fromTimestamp: Date,
-    eventTypes?: string[]
-  ): Promise<void> {
-    let query = `
-      SELECT * FROM event_store 
-      WHERE timestamp >= $1
-    `;
-    const params: any[] = [fromTimestamp];
+  async *streamEvents(options: EventStreamOptions = {}): AsyncGenerator<DomainEvent> {
+    const batchSize = options.batchSize || DEFAULT_REPLAY_BATCH_SIZE;
+    const conditions: string[] = [];
+    const params: any[] = [];
+
+    if (options.fromTimestamp) {
+      params.push(options.fromTimestamp);
+      conditions.push(`timestamp >= $${params.length}`);
+    }
 
-    if (eventTypes && eventTypes.length > 0) {
-      query += ` AND event_type = ANY($${params.length + 1})`;
-      params.push(eventTypes);
+    if (options.eventTypes && options.eventTypes.length > 0) {
+      params.push(options.eventTypes);
+      conditions.push(`event_type = ANY($${params.length})`);
     }
 
-    query += ' ORDER BY timestamp ASC';
+    const trx = await this.dataSource.beginTransaction();
 
-    const events = await this.dataSource.execute(query, params);
+    try {
+      await trx.execute('SET TRANSACTION READ ONLY');
+      await trx.execute(
+        `DECLARE event_replay NO SCROLL CURSOR FOR
+         SELECT * FROM event_store
+         ${conditions.length > 0 ? `WHERE ${conditions.join(' AND ')}` : ''}
+         ORDER BY timestamp ASC, aggregate_id ASC, sequence_number ASC`,
+        params
+      );
 
-    for (const row of events) {
-      const event: DomainEvent = {
-        eventId: row.event_id,
-        eventType: row.event_type,
-        eventVersion: row.event_version,
-        aggregateId: row.aggregate_id,
-        aggregateType: row.aggregate_type,
-        sequenceNumber: row.sequence_number,
-        timestamp: row.timestamp,
-        userId: row.user_id,
-        payload: row.payload,
-        metadata: row.metadata,
-      };
+      while (true) {
+        const rows = await trx.execute(`FETCH ${batchSize} FROM event_replay`);
+        for (const row of rows) {
+          yield this.mapEvent(row);
+        }
 
+        if (rows.length < batchSize) {
+          break;
+        }
+      }
+
+      await trx.execute('CLOSE event_replay');
+      await trx.commit();
+    } catch (error) {
+      await trx.rollback();
+      throw error;
+    } finally {
+      // Consumer stopped early: the generator is returned without an error
+      if (trx.isActive?.()) {
+        await trx.rollback();
+      }
+    }
+  }
+
+  /**
+   * Replay events from a specific point
+   */
+  async replayEvents(
+    fromTimestamp: Date,
+    eventTypes?: string[]
+  ): Promise<void> {
+    let replayed = 0;
+
+    for await (const event of this.streamEvents({ fromTimestamp, eventTypes })) {
       await this.publishEvent(event);
+      replayed++;
     }
 
     this.monitoring.recordMetric({
       name: 'event_store.events_replayed',
-      value: events.length,
+      value: replayed,
       unit: 'count',
     });
   }
-}
\ No newline at end of file
+
+  private mapEvent(row: any): DomainEvent {
+    return {
+      eventId: row.event_id,
+      eventType: row.event_type,
+      eventVersion: row.event_version,
+      aggregateId: row.aggregate_id,
+      aggregateType: row.aggregate_type,
+      sequenceNumber: row.sequence_number,
+      timestamp: row.timestamp,
+      userId: row.user_id,
+      payload: row.payload,
+      metadata: row.metadata,
+    };
+  }
+}
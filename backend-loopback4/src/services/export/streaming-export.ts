@@ -0,0 +1,162 @@
+import { Response } from '@loopback/rest';
+import { AnyColumn, SQL, sql } from 'drizzle-orm';
+
+export type ExportFormat = 'csv' | 'ndjson';
+
+export interface ExportColumn<T> {
+  header: string;
+  value: (row: T) => unknown;
+}
+
+export interface StreamExportOptions<T> {
+  filename: string;
+  format?: ExportFormat;
+  columns: ExportColumn<T>[];
+  rows: AsyncIterable<T>;
+}
+
+const CONTENT_TYPES: Record<ExportFormat, string> = {
+  csv: 'text/csv; charset=utf-8',
+  ndjson: 'application/x-ndjson; charset=utf-8',
+};
+
+export const DEFAULT_EXPORT_PAGE_SIZE = 500;
+
+/**
+ * Keyset position of an exported row. created_at is carried as Postgres text:
+ * a JS Date keeps milliseconds but the columns store microseconds, so a Date
+ * cursor would skip rows sharing the boundary millisecond.
+ */
+export interface CreatedAtCursor {
+  createdAt: string;
+  id: string;
+}
+
+export interface KeysetRow<T, C> {
+  row: T;
+  cursor: C;
+}
+
+/**
+ * Page through a result set with keyset pagination. `fetchPage` receives the
+ * cursor of the last row of the previous page (null for the first page) and
+ * must return rows strictly after it in a stable order, each with its own
+ * cursor, so pages never overlap or skip rows.
+ */
+export async function* paginateByKeyset<T, C = CreatedAtCursor>(
+  fetchPage: (after: C | null, limit: number) => Promise<KeysetRow<T, C>[]>,
+  pageSize = DEFAULT_EXPORT_PAGE_SIZE
+): AsyncGenerator<T> {
+  let after: C | null = null;
+
+  while (true) {
+    const page = await fetchPage(after, pageSize);
+    for (const { row } of page) {
+      yield row;
+    }
+
+    if (page.length < pageSize) {
+      return;
+    }
+    after = page[page.length - 1].cursor;
+  }
+}
+
+/**
+ * Exact text form of a timestamp column, to select as the row's cursor
+ */
+export function cursorTimestamp(createdAt: AnyColumn): SQL<string> {
+  return sql<string>`${createdAt}::text`;
+}
+
+/**
+ * Rows after `after` when ordered by created_at DESC, id DESC. The row
+ * comparison types the cursor values from the columns, so the text
+ * timestamp is compared at full precision.
+ */
+export function afterCreatedAtCursor(
+  createdAt: AnyColumn,
+  id: AnyColumn,
+  after: CreatedAtCursor
+): SQL {
+  return sql`(${createdAt}, ${id}) < (${after.createdAt}, ${after.id})`;
+}
+
+export function isExportFormat(format: string | undefined): format is ExportFormat {
+  return format === 'csv' || format === 'ndjson';
+}
+
+/**
+ * Write rows to the HTTP response as they are produced, waiting for the socket
+ * to drain when its buffer is full. Memory use is bounded by one page of rows
+ * regardless of how many rows are exported. Resolves with the number of rows
+ * written; stops early if the client disconnects.
+ */
+export async function streamExport<T>(
+  response: Response,
+  options: StreamExportOptions<T>
+): Promise<number> {
+  const format = options.format || 'csv';
+  const extension = format === 'csv' ? 'csv' : 'ndjson';
+
+  let clientClosed = false;
+  response.on('close', () => {
+    clientClosed = true;
+  });
+
+  response.status(200);
+  response.setHeader('Content-Type', CONTENT_TYPES[format]);
+  response.setHeader(
+    'Content-Disposition',
+    `attachment; filename="${options.filename}.${extension}"`
+  );
+  response.setHeader('Cache-Control', 'no-store');
+
+  if (format === 'csv') {
+    await write(response, options.columns.map(column => escapeCsv(column.header)).join(',') + '\n');
+  }
+
+  let count = 0;
+  for await (const row of options.rows) {
+    if (clientClosed) {
+      break;
+    }
+
+    const line = format === 'csv'
+      ? options.columns.map(column => escapeCsv(column.value(row))).join(',')
+      : JSON.stringify(
+          Object.fromEntries(options.columns.map(column => [column.header, column.value(row)]))
+        );
+
+    await write(response, line + '\n');
+    count++;
+  }
+
+  response.end();
+  return count;
+}
+
+function write(response: Response, chunk: string): Promise<void> {
+  if (response.write(chunk)) {
+    return Promise.resolve();
+  }
+
+  return new Promise(resolve => {
+    const done = () => {
+      response.off('drain', done);
+      response.off('close', done);
+      resolve();
+    };
+    response.on('drain', done);
+    response.on('close', done);
+  });
+}
+
+function escapeCsv(value: unknown): string {
+  if (value === null || value === undefined) {
+    return '';
+  }
+
+  const text = value instanceof Date ? value.toISOString() : String(value);
+  return /[",\r\n]/.test(text) ? `"${text.replace(/"/g, '""')}"` : text;
+}
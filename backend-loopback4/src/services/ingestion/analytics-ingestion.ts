@@ -0,0 +1,131 @@
+import { sql } from 'drizzle-orm';
+import { db } from '../../config/database.config';
+import { MonitoringService } from '../monitoring.service';
+import {
+  IngestionBuffer,
+  IngestionMetrics,
+  getIngestionMetrics,
+} from './ingestion-buffer';
+
+/**
+ * Buffered writer for visitor analytics.
+ *
+ * Rows are written off the request path: callers push a row and return, and
+ * rows are inserted in multi-row statements every couple of seconds. They are
+ * keyed by (session, date, hour) and merged while they wait, so a session
+ * browsing several pages in a flush interval costs one upsert row.
+ *
+ * Admin activity logs are an audit trail and are not buffered: the activity
+ * log services insert them directly.
+ */
+
+export interface VisitorAnalyticsRow {
+  sessionId: string;
+  date: string;
+  hour: number;
+  visitedHomepage: boolean;
+  visitedCoursesPage: boolean;
+  visitedBookingPage: boolean;
+  startedBooking: boolean;
+  completedBooking: boolean;
+  cancelledBooking: boolean;
+  pagesViewed: number;
+  timeOnSiteSeconds: number;
+  deviceType: string;
+}
+
+const METRICS_REPORT_INTERVAL = 60000;
+
+async function writeVisitorAnalytics(batch: VisitorAnalyticsRow[]): Promise<void> {
+  const rows = batch.map(row => sql`(
+    ${row.sessionId}, ${row.date}, ${row.hour},
+    ${row.visitedHomepage}, ${row.visitedCoursesPage}, ${row.visitedBookingPage},
+    ${row.startedBooking}, ${row.completedBooking}, ${row.cancelledBooking},
+    ${row.pagesViewed}, ${row.timeOnSiteSeconds}, ${row.deviceType}
+  )`);
+
+  // Journey flags only ever turn on and counters only grow, so merging with
+  // OR / GREATEST is safe whichever instance or batch lands first
+  await db.execute(sql`
+    INSERT INTO visitor_analytics (
+      session_id, date, hour,
+      visited_homepage, visited_courses_page, visited_booking_page,
+      started_booking, completed_booking, cancelled_booking,
+      pages_viewed, time_on_site_seconds, device_type
+    ) VALUES ${sql.join(rows, sql`, `)}
+    ON CONFLICT (session_id, date, hour)
+    DO UPDATE SET
+      visited_homepage = visitor_analytics.visited_homepage OR EXCLUDED.visited_homepage,
+      visited_courses_page = visitor_analytics.visited_courses_page OR EXCLUDED.visited_courses_page,
+      visited_booking_page = visitor_analytics.visited_booking_page OR EXCLUDED.visited_booking_page,
+      started_booking = visitor_analytics.started_booking OR EXCLUDED.started_booking,
+      completed_booking = visitor_analytics.completed_booking OR EXCLUDED.completed_booking,
+      cancelled_booking = visitor_analytics.cancelled_booking OR EXCLUDED.cancelled_booking,
+      pages_viewed = GREATEST(visitor_analytics.pages_viewed, EXCLUDED.pages_viewed),
+      time_on_site_seconds = GREATEST(visitor_analytics.time_on_site_seconds, EXCLUDED.time_on_site_seconds),
+      device_type = EXCLUDED.device_type
+  `);
+}
+
+function mergeVisitorAnalytics(existing: VisitorAnalyticsRow, row: VisitorAnalyticsRow): VisitorAnalyticsRow {
+  return {
+    ...row,
+    visitedHomepage: existing.visitedHomepage || row.visitedHomepage,
+    visitedCoursesPage: existing.visitedCoursesPage || row.visitedCoursesPage,
+    visitedBookingPage: existing.visitedBookingPage || row.visitedBookingPage,
+    startedBooking: existing.startedBooking || row.startedBooking,
+    completedBooking: existing.completedBooking || row.completedBooking,
+    cancelledBooking: existing.cancelledBooking || row.cancelledBooking,
+    pagesViewed: Math.max(existing.pagesViewed, row.pagesViewed),
+    timeOnSiteSeconds: Math.max(existing.timeOnSiteSeconds, row.timeOnSiteSeconds),
+  };
+}
+
+const logWriteError = (name: string) => (error: Error, batch: unknown[]) => {
+  MonitoringService.error('Ingestion batch write failed', error, {
+    metadata: { buffer: name, records: batch.length },
+  });
+};
+
+export const visitorAnalyticsIngestion = new IngestionBuffer<VisitorAnalyticsRow>({
+  name: 'visitor-analytics',
+  write: writeVisitorAnalytics,
+  aggregate: {
+    key: row => `${row.sessionId}|${row.date}|${row.hour}`,
+    merge: mergeVisitorAnalytics,
+  },
+  maxBatchSize: parseInt(process.env.VISITOR_ANALYTICS_BATCH_SIZE || '500'),
+  flushIntervalMs: parseInt(process.env.VISITOR_ANALYTICS_FLUSH_INTERVAL_MS || '2000'),
+  maxBuffered: parseInt(process.env.VISITOR_ANALYTICS_MAX_BUFFERED || '20000'),
+  dropPolicy: 'drop-oldest',
+  onError: logWriteError('visitor-analytics'),
+});
+
+// Throughput and loss per buffer for the last interval
+const reported = new Map<string, IngestionMetrics>();
+
+setInterval(() => {
+  for (const current of getIngestionMetrics()) {
+    const previous = reported.get(current.name);
+    const delta = (field: 'accepted' | 'merged' | 'dropped' | 'written' | 'lost' | 'batches' | 'writeTimeMs') =>
+      current[field] - (previous ? previous[field] : 0);
+    const tags = { buffer: current.name };
+
+    MonitoringService.recordGauge('ingestion_buffered', current.buffered, tags);
+    MonitoringService.recordGauge('ingestion_accepted', delta('accepted'), tags);
+    MonitoringService.recordGauge('ingestion_merged', delta('merged'), tags);
+    MonitoringService.recordGauge('ingestion_written', delta('written'), tags);
+    MonitoringService.recordGauge('ingestion_dropped', delta('dropped'), tags);
+    MonitoringService.recordGauge('ingestion_lost', delta('lost'), tags);
+    if (delta('batches') > 0) {
+      MonitoringService.recordHistogram('ingestion_batch_write_ms', delta('writeTimeMs') / delta('batches'), tags);
+    }
+    if (delta('dropped') > 0 || delta('lost') > 0) {
+      MonitoringService.warn('Ingestion buffer shedding records', {
+        metadata: { buffer: current.name, dropped: delta('dropped'), lost: delta('lost') },
+      });
+    }
+
+    reported.set(current.name, current);
+  }
+}, METRICS_REPORT_INTERVAL).unref();
@@ -0,0 +1,74 @@
+export type DropPolicy = 'drop-newest' | 'drop-oldest';
+
+export interface IngestionAggregate<T> {
+  /** Records with the same key are merged while buffered */
+  key(record: T): string;
+  /** Combine two records (raw or already merged) sharing a key */
+  merge(existing: T, record: T): T;
+}
+
+export interface IngestionBufferOptions<T> {
+  name?: string;
+  write(batch: T[]): Promise<unknown>;
+  /** Records per write call, and the pending count that triggers a flush */
+  maxBatchSize?: number;
+  /** Longest a record waits before being written */
+  flushIntervalMs?: number;
+  /** Pending records kept before the drop policy applies */
+  maxBuffered?: number;
+  dropPolicy?: DropPolicy;
+  aggregate?: IngestionAggregate<T>;
+  onError?(error: Error, batch: T[]): void;
+  /** Called once the final flush on close() has finished */
+  onClose?(): Promise<unknown> | void;
+}
+
+export interface IngestionMetrics {
+  name: string;
+  received: number;
+  accepted: number;
+  /** Pushes folded into a record already pending */
+  merged: number;
+  /** Records discarded by the drop policy or pushed after close */
+  dropped: number;
+  written: number;
+  /** Records discarded after a failed write */
+  lost: number;
+  batches: number;
+  failedBatches: number;
+  writeTimeMs: number;
+  buffered: number;
+  capacity: number;
+  dropPolicy: DropPolicy;
+  acceptedPerSecond: number;
+  writtenPerSecond: number;
+  lossRate: number;
+  avgBatchWriteMs: number;
+  consecutiveFailures: number;
+  lastFlushAt: string | null;
+}
+
+export class IngestionBuffer<T = unknown> {
+  readonly name: string;
+  readonly maxBatchSize: number;
+  readonly maxBuffered: number;
+  readonly size: number;
+  constructor(options: IngestionBufferOptions<T>);
+  push(record: T): boolean;
+  flush(): Promise<void>;
+  close(): Promise<void>;
+  getMetrics(): IngestionMetrics;
+}
+
+export function buildMultiRowInsert(
+  table: string,
+  columns: string[],
+  rows: unknown[][],
+  suffix?: string,
+): {text: string; values: unknown[]};
+
+export function hourBucket(timestamp: string | Date): string;
+
+export function getIngestionMetrics(): IngestionMetrics[];
+
+export function closeAllIngestionBuffers(): Promise<void>;
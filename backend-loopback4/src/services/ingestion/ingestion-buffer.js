@@ -0,0 +1,388 @@
+/**
+ * Write-behind ingestion buffer for high-volume, loss-tolerant records:
+ * tracking events and visitor analytics. Nothing that must not be lost
+ * (audit logs, payments) belongs here.
+ *
+ * `push()` never waits on the database. Records are held in memory and handed
+ * to `write(batch)` when `maxBatchSize` records are pending or
+ * `flushIntervalMs` after the first pending record, whichever comes first, so
+ * the writer can turn them into one multi-row INSERT.
+ *
+ * With `aggregate` set, records that share `aggregate.key(record)` are
+ * combined with `aggregate.merge(a, b)` while they wait (e.g. one counter row
+ * per event per hour), so a burst of N events costs one row rather than N.
+ * `merge` must also accept two already-merged records, since a failed batch
+ * is merged back into whatever arrived after it.
+ *
+ * The buffer is bounded by `maxBuffered`. When full, `dropPolicy` decides
+ * whether the incoming record ('drop-newest') or the oldest pending one
+ * ('drop-oldest') is discarded. A failed batch is put back while there is
+ * room and retried with exponential backoff; anything that cannot be kept is
+ * counted as lost. Every buffer registers itself so `closeAllIngestionBuffers()`
+ * can flush them on shutdown.
+ *
+ * Plain CommonJS so server.js can require it without a build step.
+ */
+
+const DEFAULT_MAX_BATCH_SIZE = 500;
+const DEFAULT_FLUSH_INTERVAL_MS = 1000;
+const DEFAULT_MAX_BUFFERED = 10000;
+const MAX_RETRY_DELAY_MS = 30000;
+// Postgres accepts at most 65535 bind parameters per statement
+const MAX_BIND_PARAMETERS = 65535;
+
+const buffers = new Set();
+
+class IngestionBuffer {
+  constructor(options) {
+    if (!options || typeof options.write !== 'function') {
+      throw new Error('IngestionBuffer requires a write(batch) function');
+    }
+
+    this.name = options.name || 'ingestion';
+    this.write = options.write;
+    this.maxBatchSize = options.maxBatchSize || DEFAULT_MAX_BATCH_SIZE;
+    this.flushIntervalMs = options.flushIntervalMs || DEFAULT_FLUSH_INTERVAL_MS;
+    this.maxBuffered = options.maxBuffered || DEFAULT_MAX_BUFFERED;
+    this.dropPolicy = options.dropPolicy || 'drop-newest';
+    this.aggregate = options.aggregate || null;
+    this.onClose = options.onClose || null;
+    this.onError = options.onError || ((error, batch) => {
+      console.error(`Ingestion buffer "${this.name}" failed to write ${batch.length} records:`, error.message);
+    });
+
+    // Pending records: keyed when aggregating, otherwise an array whose
+    // leading `offset` slots have been dropped
+    this.pending = this.aggregate ? new Map() : [];
+    this.offset = 0;
+
+    this.timer = null;
+    this.timerIsImmediate = false;
+    this.flushing = null;
+    this.closed = false;
+    this.consecutiveFailures = 0;
+
+    this.startedAt = Date.now();
+    this.counters = {
+      received: 0,
+      accepted: 0,
+      merged: 0,
+      dropped: 0,
+      written: 0,
+      lost: 0,
+      batches: 0,
+      failedBatches: 0,
+      writeTimeMs: 0
+    };
+    this.lastFlushAt = null;
+
+    buffers.add(this);
+  }
+
+  /**
+   * Records waiting to be written (after aggregation)
+   */
+  get size() {
+    return this.aggregate ? this.pending.size : this.pending.length - this.offset;
+  }
+
+  /**
+   * Queue a record. Returns false if it was dropped because the buffer is
+   * full or closed.
+   */
+  push(record) {
+    this.counters.received++;
+    if (this.closed) {
+      this.counters.dropped++;
+      return false;
+    }
+
+    if (this.aggregate) {
+      const key = this.aggregate.key(record);
+      const existing = this.pending.get(key);
+
+      if (existing !== undefined) {
+        this.pending.set(key, this.aggregate.merge(existing, record));
+        this.counters.accepted++;
+        this.counters.merged++;
+        return true;
+      }
+
+      if (!this.makeRoom()) {
+        return false;
+      }
+      this.pending.set(key, record);
+    } else {
+      if (!this.makeRoom()) {
+        return false;
+      }
+      this.pending.push(record);
+    }
+
+    this.counters.accepted++;
+    this.scheduleFlush();
+    return true;
+  }
+
+  /**
+   * Write everything pending. Concurrent calls share the flush in progress.
+   */
+  flush() {
+    if (this.flushing) {
+      return this.flushing.then(() => (this.size > 0 ? this.flush() : undefined));
+    }
+
+    if (this.size === 0) {
+      return Promise.resolve();
+    }
+
+    this.clearTimer();
+    this.flushing = this.drain().finally(() => {
+      this.flushing = null;
+      if (this.size > 0 && !this.closed) {
+        this.scheduleFlush();
+      }
+    });
+    return this.flushing;
+  }
+
+  /**
+   * Stop accepting records and flush what is pending. Records that still
+   * cannot be written are counted as lost.
+   */
+  async close() {
+    this.closed = true;
+    this.clearTimer();
+    await this.flush();
+
+    if (this.size > 0) {
+      this.counters.lost += this.size;
+      this.pending = this.aggregate ? new Map() : [];
+      this.offset = 0;
+    }
+    buffers.delete(this);
+
+    if (this.onClose) {
+      await this.onClose();
+    }
+  }
+
+  getMetrics() {
+    const uptimeSeconds = Math.max((Date.now() - this.startedAt) / 1000, 1);
+    const { received, accepted, dropped, lost, batches, writeTimeMs } = this.counters;
+
+    return {
+      name: this.name,
+      ...this.counters,
+      buffered: this.size,
+      capacity: this.maxBuffered,
+      dropPolicy: this.dropPolicy,
+      acceptedPerSecond: accepted / uptimeSeconds,
+      writtenPerSecond: this.counters.written / uptimeSeconds,
+      lossRate: received > 0 ? (dropped + lost) / received : 0,
+      avgBatchWriteMs: batches > 0 ? writeTimeMs / batches : 0,
+      consecutiveFailures: this.consecutiveFailures,
+      lastFlushAt: this.lastFlushAt
+    };
+  }
+
+  /**
+   * Apply the drop policy if the buffer is full. Returns false when the
+   * incoming record should be discarded.
+   */
+  makeRoom() {
+    if (this.size < this.maxBuffered) {
+      return true;
+    }
+
+    this.counters.dropped++;
+    if (this.dropPolicy !== 'drop-oldest') {
+      return false;
+    }
+
+    if (this.aggregate) {
+      this.pending.delete(this.pending.keys().next().value);
+    } else {
+      this.pending[this.offset++] = undefined;
+      if (this.offset >= this.maxBuffered) {
+        this.pending = this.pending.slice(this.offset);
+        this.offset = 0;
+      }
+    }
+    return true;
+  }
+
+  scheduleFlush() {
+    if (this.flushing || this.closed || (this.timer && this.timerIsImmediate)) {
+      return;
+    }
+
+    if (this.size >= this.maxBatchSize && this.consecutiveFailures === 0) {
+      // Backpressure: a full batch is written straight away
+      this.clearTimer();
+      this.timerIsImmediate = true;
+      this.timer = setImmediate(() => {
+        this.timer = null;
+        this.flush();
+      });
+      return;
+    }
+
+    if (!this.timer) {
+      const delay = this.consecutiveFailures > 0
+        ? Math.min(this.flushIntervalMs * 2 ** this.consecutiveFailures, MAX_RETRY_DELAY_MS)
+        : this.flushIntervalMs;
+      this.timerIsImmediate = false;
+      this.timer = setTimeout(() => {
+        this.timer = null;
+        this.flush();
+      }, delay);
+      // Pending records alone should not keep the process alive
+      this.timer.unref();
+    }
+  }
+
+  clearTimer() {
+    if (!this.timer) {
+      return;
+    }
+    if (this.timerIsImmediate) {
+      clearImmediate(this.timer);
+    } else {
+      clearTimeout(this.timer);
+    }
+    this.timer = null;
+  }
+
+  takePending() {
+    let records;
+    if (this.aggregate) {
+      records = Array.from(this.pending.values());
+      this.pending = new Map();
+    } else {
+      records = this.offset > 0 ? this.pending.slice(this.offset) : this.pending;
+      this.pending = [];
+      this.offset = 0;
+    }
+    return records;
+  }
+
+  async drain() {
+    const records = this.takePending();
+
+    for (let start = 0; start < records.length; start += this.maxBatchSize) {
+      const batch = records.slice(start, start + this.maxBatchSize);
+      const began = Date.now();
+
+      try {
+        await this.write(batch);
+        this.counters.written += batch.length;
+        this.counters.batches++;
+        this.counters.writeTimeMs += Date.now() - began;
+        this.consecutiveFailures = 0;
+      } catch (error) {
+        this.counters.failedBatches++;
+        this.consecutiveFailures++;
+        this.onError(error, batch);
+        // Keep this and every later batch for the next attempt
+        this.requeue(records.slice(start));
+        break;
+      }
+    }
+
+    this.lastFlushAt = new Date().toISOString();
+  }
+
+  /**
+   * Put unwritten records back ahead of anything pushed since, keeping as
+   * many as capacity allows
+   */
+  requeue(records) {
+    if (this.closed) {
+      this.counters.lost += records.length;
+      return;
+    }
+
+    if (this.aggregate) {
+      const merged = new Map();
+      for (const record of records) {
+        merged.set(this.aggregate.key(record), record);
+      }
+      for (const [key, record] of this.pending) {
+        const existing = merged.get(key);
+        merged.set(key, existing === undefined ? record : this.aggregate.merge(existing, record));
+      }
+
+      let excess = merged.size - this.maxBuffered;
+      for (const key of merged.keys()) {
+        if (excess-- <= 0) {
+          break;
+        }
+        merged.delete(key);
+        this.counters.lost++;
+      }
+      this.pending = merged;
+    } else {
+      const newer = this.offset > 0 ? this.pending.slice(this.offset) : this.pending;
+      const room = Math.max(this.maxBuffered - newer.length, 0);
+      const kept = records.length > room ? records.slice(records.length - room) : records;
+
+      this.counters.lost += records.length - kept.length;
+      this.pending = kept.concat(newer);
+      this.offset = 0;
+    }
+  }
+}
+
+/**
+ * Parameterised multi-row INSERT for the pg driver. `columns` are SQL column
+ * names, `rows` arrays of values in the same order; `suffix` is appended
+ * as-is (typically an ON CONFLICT clause).
+ */
+function buildMultiRowInsert(table, columns, rows, suffix = '') {
+  if (rows.length * columns.length > MAX_BIND_PARAMETERS) {
+    throw new Error(`Too many values for one INSERT into ${table}: ${rows.length} rows`);
+  }
+
+  const values = [];
+  const tuples = rows.map(row => {
+    const placeholders = row.map(value => {
+      values.push(value);
+      return `$${values.length}`;
+    });
+    return `(${placeholders.join(', ')})`;
+  });
+
+  return {
+    text: `INSERT INTO ${table} (${columns.join(', ')}) VALUES ${tuples.join(', ')} ${suffix}`.trim(),
+    values
+  };
+}
+
+/**
+ * Start of the UTC hour a timestamp falls in, as an ISO string
+ */
+function hourBucket(timestamp) {
+  const time = timestamp instanceof Date ? timestamp.getTime() : Date.parse(timestamp);
+  const valid = Number.isFinite(time) ? time : Date.now();
+  return new Date(valid - (valid % 3600000)).toISOString();
+}
+
+function getIngestionMetrics() {
+  return Array.from(buffers, buffer => buffer.getMetrics());
+}
+
+/**
+ * Flush and close every open buffer, e.g. from a SIGTERM handler
+ */
+async function closeAllIngestionBuffers() {
+  await Promise.all(Array.from(buffers, buffer => buffer.close()));
+}
+
+module.exports = {
+  IngestionBuffer,
+  buildMultiRowInsert,
+  hourBucket,
+  getIngestionMetrics,
+  closeAllIngestionBuffers
+};
@@ -0,0 +1,122 @@
+/**
+ * Buffered ingestion for the public /api/tracking/event endpoint.
+ *
+ * Events are counted per (hour received, event, page, device) in memory and flushed
+ * as one upsert into tracking_event_hourly, adding to the stored count. Needs
+ * DATABASE_URL and the pg driver; without them the hourly counts are logged
+ * at each flush instead.
+ */
+
+const {
+  IngestionBuffer,
+  buildMultiRowInsert,
+  hourBucket
+} = require('./ingestion-buffer');
+
+const COLUMNS = ['bucket_start', 'event', 'page', 'device_type', 'event_count', 'first_seen_at', 'last_seen_at'];
+
+const UPSERT = `
+  ON CONFLICT (bucket_start, event, page, device_type) DO UPDATE SET
+    event_count = tracking_event_hourly.event_count + EXCLUDED.event_count,
+    first_seen_at = LEAST(tracking_event_hourly.first_seen_at, EXCLUDED.first_seen_at),
+    last_seen_at = GREATEST(tracking_event_hourly.last_seen_at, EXCLUDED.last_seen_at)
+`;
+
+function createPool() {
+  if (!process.env.DATABASE_URL) {
+    return null;
+  }
+
+  try {
+    const { Pool } = require('pg');
+    return new Pool({
+      connectionString: process.env.DATABASE_URL,
+      ssl: { rejectUnauthorized: false },
+      max: 2
+    });
+  } catch (error) {
+    console.warn('pg not available, tracking events will be logged only:', error.message);
+    return null;
+  }
+}
+
+/**
+ * Counter for one event, bucketed by when the server received it. The
+ * client-supplied timestamp is not trusted: clock skew or a replayed event
+ * would otherwise land in (and inflate) an arbitrary hour.
+ */
+function toCounter(event, receivedAt = new Date()) {
+  const at = receivedAt.toISOString();
+
+  return {
+    bucketStart: hourBucket(receivedAt),
+    event: event.event,
+    page: event.page || '',
+    deviceType: event.deviceType || 'unknown',
+    count: 1,
+    firstSeenAt: at,
+    lastSeenAt: at
+  };
+}
+
+const aggregate = {
+  key: counter => `${counter.bucketStart}|${counter.event}|${counter.deviceType}|${counter.page}`,
+  merge: (existing, counter) => ({
+    ...existing,
+    count: existing.count + counter.count,
+    firstSeenAt: existing.firstSeenAt < counter.firstSeenAt ? existing.firstSeenAt : counter.firstSeenAt,
+    lastSeenAt: existing.lastSeenAt > counter.lastSeenAt ? existing.lastSeenAt : counter.lastSeenAt
+  })
+};
+
+/**
+ * Buffer for sanitised tracking events ({ event, page, timestamp, deviceType }).
+ * Push with `buffer.push(toCounter(event))` or use `trackEvent()`.
+ */
+function createTrackingEventBuffer(options = {}) {
+  // A pool passed in belongs to the caller; one created here is ended on close
+  const ownsPool = options.pool === undefined;
+  const pool = ownsPool ? createPool() : options.pool;
+
+  const write = pool
+    ? batch => pool.query(buildMultiRowInsert(
+      'tracking_event_hourly',
+      COLUMNS,
+      batch.map(c => [c.bucketStart, c.event, c.page, c.deviceType, c.count, c.firstSeenAt, c.lastSeenAt]),
+      UPSERT
+    ))
+    : async batch => {
+      console.log('📊 Tracking events:', batch.map(c => `${c.bucketStart} ${c.event} ${c.page || '-'} ${c.deviceType}: ${c.count}`));
+    };
+
+  return new IngestionBuffer({
+    name: 'tracking-events',
+    write,
+    aggregate,
+    maxBatchSize: parseInt(process.env.TRACKING_BATCH_SIZE || '500'),
+    flushIntervalMs: parseInt(process.env.TRACKING_FLUSH_INTERVAL_MS || '5000'),
+    maxBuffered: parseInt(process.env.TRACKING_MAX_BUFFERED || '20000'),
+    // Under sustained overload keep the most recent hour's counts
+    dropPolicy: 'drop-oldest',
+    onClose: pool && ownsPool ? () => pool.end() : undefined,
+    ...options.buffer
+  });
+}
+
+let defaultBuffer = null;
+
+/**
+ * Queue one tracking event on the process-wide buffer
+ */
+function trackEvent(event) {
+  if (!defaultBuffer) {
+    defaultBuffer = createTrackingEventBuffer();
+  }
+  return defaultBuffer.push(toCounter(event));
+}
+
+module.exports = {
+  createTrackingEventBuffer,
+  toCounter,
+  trackEvent
+};
@@ -9,10 +9,15 @@ import {
   Invoice,
   NewInvoice,
 } from '../db/schema';
-import { eq, desc, sql } from 'drizzle-orm';
+import { eq, desc, sql, and, lt, gte, lte } from 'drizzle-orm';
 import { EmailService } from './email.service';
 import { StorageService } from './storage.service';
 import { InvoicePDFGenerator } from './pdf/invoice-generator';
+import { documentRenderPool } from './pdf/render-pool';
+import { runDocumentBatch, DocumentBatchResult } from './pdf/render-batch';
+import { afterCreatedAtCursor, cursorTimestamp, paginateByKeyset } from './export/streaming-export';
+import * as fs from 'fs';
+import * as path from 'path';
 
 interface InvoiceWithDetails extends Invoice {
   booking: any;
@@ -75,22 +80,7 @@ export class InvoiceService {
 
     // Generate PDF
     try {
-      const pdfBuffer = await this.generateInvoicePDF(invoice.id);
-      
-      // Store PDF
-      const pdfPath = await StorageService.saveInvoicePDF(
-        invoice.invoiceNumber,
-        pdfBuffer
-      );
-
-      // Update invoice with PDF URL
-      await db
-        .update(invoices)
-        .set({
-          pdfUrl: pdfPath,
-          pdfGeneratedAt: new Date(),
-        })
-        .where(eq(invoices.id, invoice.id));
+      await this.storeInvoicePDF(invoice.id);
 
       // Send invoice email
       await this.sendInvoice(invoice.id);
@@ -116,6 +106,79 @@ export class InvoiceService {
     return InvoicePDFGenerator.generate(invoiceData);
   }
 
+  /**
+   * Generate an invoice PDF, save it to storage and record its path
+   */
+  static async storeInvoicePDF(invoiceId: string): Promise<string> {
+    const invoiceData = await this.getInvoiceWithDetails(invoiceId);
+
+    if (!invoiceData) {
+      throw new Error('Invoice not found');
+    }
+
+    const pdfBuffer = await InvoicePDFGenerator.generate(invoiceData);
+    const pdfPath = await StorageService.saveInvoicePDF(invoiceData.invoiceNumber, pdfBuffer);
+
+    await db
+      .update(invoices)
+      .set({
+        pdfUrl: pdfPath,
+        pdfGeneratedAt: new Date(),
+      })
+      .where(eq(invoices.id, invoiceId));
+
+    return pdfPath;
+  }
+
+  /**
+   * Path of the stored PDF for an invoice, generating it first when it has
+   * never been stored or the file has gone missing
+   */
+  static async getInvoicePDFPath(invoice: Invoice): Promise<string> {
+    if (invoice.pdfUrl) {
+      try {
+        await fs.promises.access(path.resolve(invoice.pdfUrl));
+        return invoice.pdfUrl;
+      } catch (error) {
+        // Fall through and regenerate
+      }
+    }
+
+    return this.storeInvoicePDF(invoice.id);
+  }
+
+  /**
+   * Generate and store PDFs for every invoice issued in a month (month-end
+   * run). Invoices render in parallel on the document render pool.
+   */
+  static async generateMonthEndInvoicePDFs(
+    year: number,
+    month: number,
+    onProgress?: (progress: { total: number; completed: number; failed: number }) => void
+  ): Promise<DocumentBatchResult> {
+    const from = `${year}-${month.toString().padStart(2, '0')}-01`;
+    const nextMonth = month === 12 ? `${year + 1}-01-01` : `${year}-${(month + 1).toString().padStart(2, '0')}-01`;
+
+    const rows = await db
+      .select({ id: invoices.id })
+      .from(invoices)
+      .where(and(gte(invoices.issueDate, from), lt(invoices.issueDate, nextMonth)));
+
+    const progress = { total: rows.length, completed: 0, failed: 0 };
+    return runDocumentBatch(rows, row => this.storeInvoicePDF(row.id), {
+      concurrency: Math.max(2, documentRenderPool.poolSize * 2),
+      onResult: (row, _path, error) => {
+        if (error) {
+          progress.failed++;
+          console.error(`Failed to generate PDF for invoice ${row.id}:`, error);
+        } else {
+          progress.completed++;
+        }
+        onProgress?.({ ...progress });
+      },
+    });
+  }
+
   /**
    * Send invoice via email
    */
@@ -170,8 +233,10 @@ export class InvoiceService {
     }
 
     // Get course details and attendees
-    const courseDetails = await this.getCourseDetails(result.booking.sessionId);
-    const attendees = await this.getBookingAttendees(result.booking.id);
+    const [courseDetails, attendees] = await Promise.all([
+      this.getCourseDetails(result.booking.sessionId),
+      this.getBookingAttendees(result.booking.id),
+    ]);
 
     return {
       ...result.invoice,
@@ -250,6 +315,54 @@ export class InvoiceService {
     }));
   }
 
+  /**
+   * Iterate every invoice matching the filters, newest first, one keyset
+   * page at a time (admin export)
+   */
+  static iterateInvoicesForExport(filters?: {
+    status?: string;
+    startDate?: Date;
+    endDate?: Date;
+  }): AsyncGenerator<InvoiceWithDetails> {
+    const conditions = [];
+
+    if (filters?.status) {
+      conditions.push(eq(invoices.status, filters.status));
+    }
+    if (filters?.startDate) {
+      conditions.push(gte(invoices.createdAt, filters.startDate));
+    }
+    if (filters?.endDate) {
+      conditions.push(lte(invoices.createdAt, filters.endDate));
+    }
+
+    return paginateByKeyset<InvoiceWithDetails>(async (after, limit) => {
+      const pageConditions = [...conditions];
+      if (after) {
+        pageConditions.push(afterCreatedAtCursor(invoices.createdAt, invoices.id, after));
+      }
+
+      const results = await db
+        .select({
+          invoice: invoices,
+          booking: bookings,
+          user: users,
+          cursorCreatedAt: cursorTimestamp(invoices.createdAt),
+        })
+        .from(invoices)
+        .innerJoin(bookings, eq(invoices.bookingId, bookings.id))
+        .innerJoin(users, eq(invoices.userId, users.id))
+        .where(pageConditions.length > 0 ? and(...pageConditions) : undefined)
+        .orderBy(desc(invoices.createdAt), desc(invoices.id))
+        .limit(limit);
+
+      return results.map(r => ({
+        row: { ...r.invoice, booking: r.booking, user: r.user },
+        cursor: { createdAt: r.cursorCreatedAt, id: r.invoice.id },
+      }));
+    });
+  }
+
   /**
    * Void an invoice (admin only)
    */
@@ -259,6 +372,9 @@ export class InvoiceService {
       .set({
         status: 'void',
         metadata: sql`metadata || jsonb_build_object('voidReason', ${reason}, 'voidedAt', ${new Date().toISOString()})`,
+        // The stored PDF shows the old status; render a fresh one on next download
+        pdfUrl: null,
+        pdfGeneratedAt: null,
         updatedAt: new Date(),
       })
       .where(eq(invoices.id, invoiceId));
@@ -15,6 +15,8 @@ import Stripe from 'stripe';
 import { UserManagementService } from './user-management.service';
 import { EmailService } from './email.service';
 import { ActivityLogService } from './activity-log.service';
+import { afterCreatedAtCursor, cursorTimestamp, paginateByKeyset } from './export/streaming-export';
+import { CacheManager } from './cache-manager.service';
 
 export interface CreatePaymentData {
   bookingId: number;
@@ -122,6 +124,7 @@ export class PaymentManagementService {
           updatedAt: new Date(),
         })
         .where(eq(bookings.id, data.bookingId));
+      await CacheManager.invalidatePayment(payment.id, data.bookingId);
 
       return payment;
     } catch (error) {
@@ -154,6 +157,10 @@ export class PaymentManagementService {
         .where(eq(payments.id, paymentId))
         .returning();
 
+      if (updatedPayment) {
+        await CacheManager.invalidatePayment(paymentId, updatedPayment.bookingId);
+      }
+
       // Log status update
       await this.logPaymentEvent({
         paymentId,
@@ -354,35 +361,7 @@ export class PaymentManagementService {
       const offset = (page - 1) * limit;
 
       // Build where conditions
-      const conditions = [];
-
-      if (params.reference) {
-        conditions.push(like(payments.paymentReference, `%${params.reference}%`));
-      }
-
-      if (params.status) {
-        conditions.push(eq(payments.status, params.status));
-      }
-
-      if (params.paymentMethod) {
-        conditions.push(eq(payments.paymentMethod, params.paymentMethod));
-      }
-
-      if (params.fromDate) {
-        conditions.push(gte(payments.paymentDate, params.fromDate));
-      }
-
-      if (params.toDate) {
-        conditions.push(lte(payments.paymentDate, params.toDate));
-      }
-
-      if (params.minAmount) {
-        conditions.push(gte(payments.amount, params.minAmount.toString()));
-      }
-
-      if (params.maxAmount) {
-        conditions.push(lte(payments.amount, params.maxAmount.toString()));
-      }
+      const conditions = this.buildPaymentSearchConditions(params);
 
       // Build query
       const query = db
@@ -395,10 +374,6 @@ export class PaymentManagementService {
         .leftJoin(bookings, eq(payments.bookingId, bookings.id))
         .leftJoin(users, eq(payments.userId, users.id));
 
-      if (params.customerEmail) {
-        conditions.push(like(users.email, `%${params.customerEmail}%`));
-      }
-
       // Apply conditions
       if (conditions.length > 0) {
         query.where(and(...conditions));
@@ -421,16 +396,7 @@ export class PaymentManagementService {
         .offset(offset);
 
       return {
-        payments: results.map(r => ({
-          ...r.payment,
-          booking: r.booking,
-          customer: r.user ? {
-            id: r.user.id,
-            email: r.user.email,
-            name: `${r.user.firstName} ${r.user.lastName}`.trim(),
-            phone: r.user.phone,
-          } : null,
-        })),
+        payments: results.map(r => this.mapPaymentSearchRow(r)),
         total,
         page,
         limit,
@@ -441,6 +407,91 @@ export class PaymentManagementService {
     }
   }
 
+  /**
+   * Iterate every payment matching the search filters, newest first, one
+   * keyset page at a time. Pagination parameters are ignored.
+   */
+  iteratePaymentsForExport(params: PaymentSearchParams): AsyncGenerator<any> {
+    const conditions = this.buildPaymentSearchConditions(params);
+
+    return paginateByKeyset<any>(async (after, limit) => {
+      const pageConditions = [...conditions];
+      if (after) {
+        pageConditions.push(afterCreatedAtCursor(payments.createdAt, payments.id, after));
+      }
+
+      const results = await db
+        .select({
+          payment: payments,
+          booking: bookings,
+          user: users,
+          cursorCreatedAt: cursorTimestamp(payments.createdAt),
+        })
+        .from(payments)
+        .leftJoin(bookings, eq(payments.bookingId, bookings.id))
+        .leftJoin(users, eq(payments.userId, users.id))
+        .where(pageConditions.length > 0 ? and(...pageConditions) : undefined)
+        .orderBy(desc(payments.createdAt), desc(payments.id))
+        .limit(limit);
+
+      return results.map(r => ({
+        row: this.mapPaymentSearchRow(r),
+        cursor: { createdAt: r.cursorCreatedAt, id: r.payment.id },
+      }));
+    });
+  }
+
+  private buildPaymentSearchConditions(params: PaymentSearchParams) {
+    const conditions = [];
+
+    if (params.reference) {
+      conditions.push(like(payments.paymentReference, `%${params.reference}%`));
+    }
+
+    if (params.status) {
+      conditions.push(eq(payments.status, params.status));
+    }
+
+    if (params.paymentMethod) {
+      conditions.push(eq(payments.paymentMethod, params.paymentMethod));
+    }
+
+    if (params.fromDate) {
+      conditions.push(gte(payments.paymentDate, params.fromDate));
+    }
+
+    if (params.toDate) {
+      conditions.push(lte(payments.paymentDate, params.toDate));
+    }
+
+    if (params.minAmount) {
+      conditions.push(gte(payments.amount, params.minAmount.toString()));
+    }
+
+    if (params.maxAmount) {
+      conditions.push(lte(payments.amount, params.maxAmount.toString()));
+    }
+
+    if (params.customerEmail) {
+      conditions.push(like(users.email, `%${params.customerEmail}%`));
+    }
+
+    return conditions;
+  }
+
+  private mapPaymentSearchRow(r: { payment: any; booking: any; user: any }) {
+    return {
+      ...r.payment,
+      booking: r.booking,
+      customer: r.user ? {
+        id: r.user.id,
+        email: r.user.email,
+        name: `${r.user.firstName} ${r.user.lastName}`.trim(),
+        phone: r.user.phone,
+      } : null,
+    };
+  }
+
   /**
    * Get payment summary for a date range
    */
@@ -1,14 +1,12 @@
 import { Pool, PoolConfig } from 'pg';
-import Redis from 'ioredis';
-import { LRUCache } from 'lru-cache';
 import { db } from '../../config/database.config';
 import { sql } from 'drizzle-orm';
 import { PaymentMonitoringService } from './payment-monitoring.service';
+import { cache, CacheManager } from '../cache-manager.service';
 
 interface CacheConfig {
   ttl: number; // seconds
-  maxSize: number;
-  updateAgeOnGet: boolean;
+  staleTtl: number; // seconds a stale value is served while reloading
 }
 
 interface QueryOptimization {
@@ -21,24 +19,14 @@ export class PaymentOptimizationService {
   // Database connection pool
   private static dbPool: Pool;
   
-  // Redis client for distributed caching
-  private static redis: Redis | null = null;
-  
-  // Local LRU cache for hot data
-  private static localCache = new LRUCache<string, any>({
-    max: 1000,
-    ttl: 1000 * 60 * 5, // 5 minutes
-    updateAgeOnGet: true,
-    updateAgeOnHas: true,
-  });
-
-  // Cache configurations
+  // Cache configurations. Entries live in the shared CacheManager (L1 LRU,
+  // optional Redis L2); status-like data gets no stale window.
   private static cacheConfigs: Record<string, CacheConfig> = {
-    paymentIntent: { ttl: 300, maxSize: 1000, updateAgeOnGet: true },
-    userPayments: { ttl: 120, maxSize: 500, updateAgeOnGet: false },
-    paymentStatus: { ttl: 60, maxSize: 2000, updateAgeOnGet: true },
-    invoiceData: { ttl: 600, maxSize: 500, updateAgeOnGet: true },
-    refundStatus: { ttl: 300, maxSize: 200, updateAgeOnGet: false },
+    paymentIntent: { ttl: 300, staleTtl: 0 },
+    userPayments: { ttl: 120, staleTtl: 60 },
+    paymentStatus: { ttl: 60, staleTtl: 0 },
+    invoiceData: { ttl: 600, staleTtl: 300 },
+    refundStatus: { ttl: 300, staleTtl: 0 },
   };
 
   // Query cache
@@ -51,9 +39,6 @@ export class PaymentOptimizationService {
     // Initialize database connection pool
     this.initializeDBPool();
     
-    // Initialize Redis if configured
-    this.initializeRedis();
-    
     // Start cache warming
     this.startCacheWarming();
     
@@ -110,94 +95,21 @@ export class PaymentOptimizationService {
   }
 
   /**
-   * Initialize Redis for distributed caching
-   */
-  private static initializeRedis(): void {
-    if (!process.env.REDIS_URL) {
-      console.log('Redis URL not configured, using local cache only');
-      return;
-    }
-
-    this.redis = new Redis(process.env.REDIS_URL, {
-      maxRetriesPerRequest: 3,
-      enableReadyCheck: true,
-      enableOfflineQueue: true,
-      connectTimeout: 10000,
-      disconnectTimeout: 2000,
-      commandTimeout: 5000,
-      
-      // Retry strategy
-      retryStrategy: (times) => {
-        const delay = Math.min(times * 50, 2000);
-        return delay;
-      },
-    });
-
-    this.redis.on('error', (err) => {
-      PaymentMonitoringService.logPaymentEvent(
-        'redis_error',
-        { error: err.message },
-        'error'
-      );
-    });
-
-    this.redis.on('connect', () => {
-      PaymentMonitoringService.logPaymentEvent(
-        'redis_connected',
-        { timestamp: new Date().toISOString() },
-        'info'
-      );
-    });
-  }
-
-  /**
-   * Get from cache with fallback
+   * Get from cache, loading with the fallback on a miss. Concurrent misses
+   * for a key share one fallback call.
    */
   static async getFromCache<T>(
     key: string,
     fallback: () => Promise<T>,
-    cacheType: keyof typeof PaymentOptimizationService.cacheConfigs = 'paymentIntent'
+    cacheType: keyof typeof PaymentOptimizationService.cacheConfigs = 'paymentIntent',
+    tags: string[] = []
   ): Promise<T> {
     const operationId = `cache_${Date.now()}`;
     PaymentMonitoringService.startOperation(operationId);
 
     try {
-      // Check local cache first
-      const localValue = this.localCache.get(key);
-      if (localValue !== undefined) {
-        PaymentMonitoringService.recordMetric('cache_hit', 1, { type: 'local' });
-        PaymentMonitoringService.endOperation(operationId, 'cache_get', true, { source: 'local' });
-        return localValue;
-      }
-
-      // Check Redis if available
-      if (this.redis) {
-        try {
-          const redisValue = await this.redis.get(key);
-          if (redisValue) {
-            const parsed = JSON.parse(redisValue);
-            
-            // Store in local cache
-            this.localCache.set(key, parsed);
-            
-            PaymentMonitoringService.recordMetric('cache_hit', 1, { type: 'redis' });
-            PaymentMonitoringService.endOperation(operationId, 'cache_get', true, { source: 'redis' });
-            return parsed;
-          }
-        } catch (error) {
-          // Redis error, continue to fallback
-          console.error('Redis get error:', error);
-        }
-      }
-
-      // Cache miss - execute fallback
-      PaymentMonitoringService.recordMetric('cache_miss', 1);
-      const value = await fallback();
-
-      // Store in caches
-      await this.setInCache(key, value, cacheType);
-
-      PaymentMonitoringService.endOperation(operationId, 'cache_get', true, { source: 'fallback' });
+      const value = await cache.getOrSet(key, fallback, this.cacheOptions(cacheType, tags));
+      PaymentMonitoringService.endOperation(operationId, 'cache_get', true);
       return value;
     } catch (error) {
       PaymentMonitoringService.endOperation(operationId, 'cache_get', false, { error });
@@ -211,51 +123,26 @@ export class PaymentOptimizationService {
   static async setInCache(
     key: string,
     value: any,
-    cacheType: keyof typeof PaymentOptimizationService.cacheConfigs = 'paymentIntent'
+    cacheType: keyof typeof PaymentOptimizationService.cacheConfigs = 'paymentIntent',
+    tags: string[] = []
   ): Promise<void> {
-    const config = this.cacheConfigs[cacheType];
-    
-    // Set in local cache
-    this.localCache.set(key, value);
-
-    // Set in Redis if available
-    if (this.redis) {
-      try {
-        await this.redis.setex(
-          key,
-          config.ttl,
-          JSON.stringify(value)
-        );
-      } catch (error) {
-        console.error('Redis set error:', error);
-      }
-    }
+    await cache.set(key, value, this.cacheOptions(cacheType, tags));
   }
 
   /**
-   * Invalidate cache
+   * Invalidate cached payment data by tag, e.g. CacheManager.tags.booking(id)
    */
-  static async invalidateCache(pattern: string): Promise<void> {
-    // Clear from local cache
-    for (const key of this.localCache.keys()) {
-      if (key.includes(pattern)) {
-        this.localCache.delete(key);
-      }
-    }
-
-    // Clear from Redis if available
-    if (this.redis) {
-      try {
-        const keys = await this.redis.keys(`*${pattern}*`);
-        if (keys.length > 0) {
-          await this.redis.del(...keys);
-        }
-      } catch (error) {
-        console.error('Redis invalidate error:', error);
-      }
-    }
+  static async invalidateCache(...tags: string[]): Promise<void> {
+    await cache.invalidateTags(tags);
+    PaymentMonitoringService.recordMetric('cache_invalidate', tags.length);
+  }
 
-    PaymentMonitoringService.recordMetric('cache_invalidate', 1, { pattern });
+  private static cacheOptions(
+    cacheType: keyof typeof PaymentOptimizationService.cacheConfigs,
+    tags: string[]
+  ) {
+    const config = this.cacheConfigs[cacheType];
+    return { ttl: config.ttl, staleTtl: config.staleTtl, tags };
   }
 
   /**
@@ -381,10 +268,16 @@ export class PaymentOptimizationService {
         LIMIT 100
       `);
 
-      for (const payment of recentPayments.rows) {
-        const key = `payment:${payment.id}`;
-        await this.setInCache(key, payment, 'paymentStatus');
-      }
+      await cache.setMany(
+        recentPayments.rows.map((payment: any) => ({
+          key: CacheManager.keys.payment(payment.id),
+          value: payment,
+          options: this.cacheOptions('paymentStatus', [
+            CacheManager.tags.payment(payment.id),
+            CacheManager.tags.booking(payment.booking_id),
+          ]),
+        }))
+      );
 
       // Warm up active payment intents
       const activeIntents = await db.execute(sql`
@@ -395,10 +288,16 @@ export class PaymentOptimizationService {
         LIMIT 50
       `);
 
-      for (const intent of activeIntents.rows) {
-        const key = `intent:${intent.stripe_payment_intent_id}`;
-        await this.setInCache(key, intent, 'paymentIntent');
-      }
+      await cache.setMany(
+        activeIntents.rows.map((intent: any) => ({
+          key: CacheManager.keys.paymentByIntent(intent.stripe_payment_intent_id),
+          value: intent,
+          options: this.cacheOptions('paymentIntent', [
+            CacheManager.tags.payment(intent.id),
+            CacheManager.tags.booking(intent.booking_id),
+          ]),
+        }))
+      );
 
       PaymentMonitoringService.logPaymentEvent(
         'cache_warmed',
@@ -489,10 +388,11 @@ export class PaymentOptimizationService {
     };
   }> {
     // Calculate cache statistics
+    const paymentStats = cache.getStats().namespaces.payment;
     const cacheStats = {
-      localSize: this.localCache.size,
-      hitRate: 0, // Would need to track this
-      missRate: 0, // Would need to track this
+      localSize: cache.getStats().l1.size,
+      hitRate: paymentStats?.hitRate ?? 0,
+      missRate: paymentStats ? 100 - paymentStats.hitRate : 0,
     };
 
     // Database pool statistics
@@ -523,14 +423,6 @@ export class PaymentOptimizationService {
     if (this.dbPool) {
       await this.dbPool.end();
     }
-
-    // Close Redis connection
-    if (this.redis) {
-      this.redis.disconnect();
-    }
-
-    // Clear local cache
-    this.localCache.clear();
   }
 }
 
@@ -1,5 +1,6 @@
 import PDFDocument from 'pdfkit';
 import { format } from 'date-fns';
+import { documentRenderPool } from './pdf/render-pool';
 
 interface BookingDetails {
   bookingReference: string;
@@ -18,8 +19,33 @@ interface BookingDetails {
   specialRequirements?: string;
 }
 
+export interface CertificateDocument {
+  certificateName: string;
+  courseName: string;
+  courseDate: Date | string;
+  location: string;
+  certificateNumber: string;
+  issueDate: Date | string;
+  expiryDate: Date | string;
+  trainerName: string;
+}
+
 export class PDFService {
+  /**
+   * Render a booking confirmation on the document render pool
+   */
   static async generateBookingConfirmation(booking: BookingDetails): Promise<Buffer> {
+    return documentRenderPool.render('booking-confirmation', booking);
+  }
+
+  /**
+   * Render a certificate of completion on the document render pool
+   */
+  static async generateCertificate(certificateData: CertificateDocument): Promise<Buffer> {
+    return documentRenderPool.render('certificate', certificateData);
+  }
+
+  static async renderBookingConfirmation(booking: BookingDetails): Promise<Buffer> {
     return new Promise((resolve, reject) => {
       const doc = new PDFDocument({
         size: 'A4',
@@ -180,9 +206,118 @@ export class PDFService {
     });
   }
 
-  static async generateCertificate(certificateData: any): Promise<Buffer> {
-    // TODO: Implement certificate generation
-    return Buffer.from('Certificate generation not yet implemented');
+  static async renderCertificate(data: CertificateDocument): Promise<Buffer> {
+    return new Promise((resolve, reject) => {
+      const doc = new PDFDocument({
+        size: 'A4',
+        layout: 'landscape',
+        margin: 0,
+        info: {
+          Title: `Certificate ${data.certificateNumber}`,
+          Author: 'React Fast Training',
+          Subject: `${data.courseName} Certificate of Completion`,
+        },
+      });
+
+      const chunks: Buffer[] = [];
+      doc.on('data', (chunk) => chunks.push(chunk));
+      doc.on('end', () => resolve(Buffer.concat(chunks)));
+      doc.on('error', reject);
+
+      const width = doc.page.width;
+      const height = doc.page.height;
+      const longDate = (value: Date | string) => format(new Date(value), 'd MMMM yyyy');
+      const shortDate = (value: Date | string) => format(new Date(value), 'dd/MM/yyyy');
+
+      // Background and borders
+      doc.rect(0, 0, width, height).fill('#F8FAFC');
+      doc.roundedRect(57, 57, width - 114, height - 114, 10)
+         .lineWidth(3)
+         .stroke('#0EA5E9');
+      doc.roundedRect(71, 71, width - 142, height - 142, 8)
+         .lineWidth(1)
+         .stroke('#0EA5E9');
+
+      // Watermark
+      doc.save()
+         .rotate(-30, { origin: [width / 2, height / 2] })
+         .fontSize(110)
+         .font('Helvetica-Bold')
+         .fillColor('#0EA5E9', 0.05)
+         .text('CERTIFIED', 0, height / 2 - 60, { width, align: 'center' })
+         .restore();
+      doc.fillOpacity(1);
+
+      // Logo
+      doc.font('Helvetica-Bold')
+         .fontSize(24)
+         .fillColor('#0EA5E9')
+         .text('React Fast Training', 0, 95, { width, align: 'center' });
+      doc.font('Helvetica')
+         .fontSize(10)
+         .fillColor('#666666')
+         .text('Yorkshire\'s Premier First Aid Training Provider', 0, 125, { width, align: 'center' });
+
+      // Title and recipient
+      doc.font('Helvetica-Bold')
+         .fontSize(32)
+         .fillColor('#0369A1')
+         .text('CERTIFICATE OF COMPLETION', 0, 165, { width, align: 'center', characterSpacing: 2 });
+      doc.font('Helvetica')
+         .fontSize(14)
+         .fillColor('#666666')
+         .text('This is to certify that', 0, 215, { width, align: 'center' });
+      doc.font('Helvetica-Bold')
+         .fontSize(28)
+         .fillColor('#0EA5E9')
+         .text(data.certificateName, 0, 245, { width, align: 'center', underline: true });
+
+      // Course
+      doc.font('Helvetica')
+         .fontSize(15)
+         .fillColor('#333333')
+         .text('has successfully completed the', 0, 300, { width, align: 'center' })
+         .font('Helvetica-Bold')
+         .text(data.courseName, { width, align: 'center' })
+         .font('Helvetica')
+         .text(`course on ${longDate(data.courseDate)}`, { width, align: 'center' })
+         .text(`at ${data.location}`, { width, align: 'center' });
+
+      // Details
+      const details = [
+        ['Certificate Number', data.certificateNumber],
+        ['Issue Date', shortDate(data.issueDate)],
+        ['Expiry Date', shortDate(data.expiryDate)],
+      ];
+      const columnWidth = (width - 200) / details.length;
+      details.forEach(([label, value], index) => {
+        const x = 100 + index * columnWidth;
+        doc.font('Helvetica')
+           .fontSize(10)
+           .fillColor('#666666')
+           .text(label, x, 410, { width: columnWidth, align: 'center' });
+        doc.font('Helvetica-Bold')
+           .fontSize(12)
+           .fillColor('#333333')
+           .text(value, x, 425, { width: columnWidth, align: 'center' });
+      });
+
+      // Signatures
+      const signatures = [
+        [data.trainerName, 'Senior First Aid Trainer', 110],
+        ['Lex', 'Training Director', width - 280],
+      ] as const;
+      signatures.forEach(([name, role, x]) => {
+        doc.moveTo(x, 495).lineTo(x + 170, 495).lineWidth(1).stroke('#333333');
+        doc.font('Helvetica')
+           .fontSize(10)
+           .fillColor('#333333')
+           .text(name, x, 502, { width: 170, align: 'center' })
+           .text(role, x, 515, { width: 170, align: 'center' });
+      });
+
+      doc.end();
+    });
   }
 
   private static addRow(doc: any, label: string, value: string, x: number, y: number) {
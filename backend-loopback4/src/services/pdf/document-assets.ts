@@ -0,0 +1,22 @@
+import * as fs from 'fs';
+
+let logo: Buffer | null | undefined;
+
+/**
+ * Company logo, read from LOGO_PATH once per thread instead of once per
+ * document. Null when no logo is configured or it cannot be read.
+ */
+export function getLogo(): Buffer | null {
+  if (logo === undefined) {
+    logo = null;
+    const logoPath = process.env.LOGO_PATH;
+    if (logoPath) {
+      try {
+        logo = fs.readFileSync(logoPath);
+      } catch (error) {
+        console.error('Failed to load logo:', error);
+      }
+    }
+  }
+  return logo;
+}
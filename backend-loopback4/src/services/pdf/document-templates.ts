@@ -0,0 +1,21 @@
+import { PDFService } from '../pdf.service';
+import { InvoicePDFGenerator } from './invoice-generator';
+
+export type DocumentTemplate = 'booking-confirmation' | 'invoice' | 'certificate';
+
+/**
+ * Render a document on the current thread. Called by the render workers, and
+ * directly when the pool is disabled.
+ */
+export function renderTemplate(template: DocumentTemplate, data: any): Promise<Buffer> {
+  switch (template) {
+    case 'booking-confirmation':
+      return PDFService.renderBookingConfirmation(data);
+    case 'invoice':
+      return InvoicePDFGenerator.render(data);
+    case 'certificate':
+      return PDFService.renderCertificate(data);
+    default:
+      return Promise.reject(new Error(`Unknown document template: ${template}`));
+  }
+}
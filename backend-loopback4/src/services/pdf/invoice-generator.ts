@@ -1,7 +1,7 @@
 import PDFDocument from 'pdfkit';
 import { format } from 'date-fns';
-import * as path from 'path';
-import * as fs from 'fs';
+import { documentRenderPool } from './render-pool';
+import { getLogo } from './document-assets';
 
 interface InvoiceData {
   invoiceNumber: string;
@@ -37,7 +37,14 @@ interface InvoiceData {
 }
 
 export class InvoicePDFGenerator {
+  /**
+   * Render an invoice on the document render pool
+   */
   static async generate(invoice: InvoiceData): Promise<Buffer> {
+    return documentRenderPool.render('invoice', invoice);
+  }
+
+  static async render(invoice: InvoiceData): Promise<Buffer> {
     return new Promise((resolve, reject) => {
       const doc = new PDFDocument({
         size: 'A4',
@@ -81,10 +88,10 @@ export class InvoicePDFGenerator {
 
   private static drawHeader(doc: PDFKit.PDFDocument): void {
     // Company Logo area (if logo exists)
-    const logoPath = process.env.LOGO_PATH;
-    if (logoPath && fs.existsSync(logoPath)) {
+    const logo = getLogo();
+    if (logo) {
       try {
-        doc.image(logoPath, 50, 45, { width: 150 });
+        doc.image(logo, 50, 45, { width: 150 });
       } catch (error) {
         console.error('Failed to load logo:', error);
       }
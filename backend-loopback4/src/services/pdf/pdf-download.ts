@@ -0,0 +1,39 @@
+import { HttpErrors, Response } from '@loopback/rest';
+import * as path from 'path';
+
+/**
+ * Stream a stored PDF to the client. Express `sendFile` reads the file in
+ * chunks instead of buffering it, sets a size/mtime ETag and Last-Modified,
+ * answers conditional requests with 304 and serves byte ranges with 206, so
+ * download managers and mobile browsers can resume.
+ */
+export function sendPdfFile(response: Response, filePath: string, downloadName: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    response.sendFile(
+      path.resolve(filePath),
+      {
+        acceptRanges: true,
+        lastModified: true,
+        cacheControl: false,
+        headers: {
+          'Content-Type': 'application/pdf',
+          'Content-Disposition': `attachment; filename="${downloadName}"`,
+          // Documents are per-user; let the browser keep them but always revalidate
+          'Cache-Control': 'private, no-cache',
+        },
+      },
+      (error?: any) => {
+        if (!error) {
+          resolve();
+        } else if (response.headersSent) {
+          // Client went away mid-download; nothing left to report
+          resolve();
+        } else if (error.code === 'ENOENT' || error.status === 404) {
+          reject(new HttpErrors.NotFound('Document file not found'));
+        } else {
+          reject(error);
+        }
+      }
+    );
+  });
+}
@@ -0,0 +1,46 @@
+export interface DocumentBatchOptions<T, R> {
+  concurrency: number;
+  /** Called as each item settles, in completion order */
+  onResult?: (item: T, result: R | undefined, error: Error | undefined) => void;
+}
+
+export interface DocumentBatchResult {
+  total: number;
+  succeeded: number;
+  failed: number;
+  durationMs: number;
+}
+
+/**
+ * Run a document job for every item with at most `concurrency` in flight.
+ * One failed item never stops the rest of the batch.
+ */
+export async function runDocumentBatch<T, R>(
+  items: T[],
+  handler: (item: T) => Promise<R>,
+  options: DocumentBatchOptions<T, R>
+): Promise<DocumentBatchResult> {
+  const startTime = Date.now();
+  let next = 0;
+  let succeeded = 0;
+  let failed = 0;
+
+  const runNext = async (): Promise<void> => {
+    while (next < items.length) {
+      const item = items[next++];
+      try {
+        const result = await handler(item);
+        succeeded++;
+        options.onResult?.(item, result, undefined);
+      } catch (error) {
+        failed++;
+        options.onResult?.(item, undefined, error as Error);
+      }
+    }
+  };
+
+  const lanes = Math.max(1, Math.min(options.concurrency, items.length));
+  await Promise.all(Array.from({ length: lanes }, runNext));
+
+  return { total: items.length, succeeded, failed, durationMs: Date.now() - startTime };
+}
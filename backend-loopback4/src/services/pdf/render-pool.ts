@@ -0,0 +1,178 @@
+import { Worker } from 'worker_threads';
+import * as os from 'os';
+import * as path from 'path';
+import { DocumentTemplate, renderTemplate } from './document-templates';
+
+interface RenderTask {
+  id: number;
+  template: DocumentTemplate;
+  data: unknown;
+  resolve: (buffer: Buffer) => void;
+  reject: (error: Error) => void;
+}
+
+interface PoolWorker {
+  worker: Worker;
+  task: RenderTask | null;
+}
+
+export interface RenderPoolStats {
+  workers: number;
+  busy: number;
+  queued: number;
+  rendered: number;
+  failed: number;
+}
+
+const DEFAULT_POOL_SIZE = Math.max(1, Math.min(4, os.cpus().length - 1));
+
+/**
+ * Renders PDFs on a fixed pool of worker threads so PDFKit layout and
+ * compression never block the event loop. Workers start on first use, keep
+ * their template assets loaded between documents and are replaced if they
+ * crash. A pool size of 0 (PDF_RENDER_WORKERS=0) renders on the calling
+ * thread instead.
+ */
+export class DocumentRenderPool {
+  private workers: PoolWorker[] = [];
+  private queue: RenderTask[] = [];
+  private nextTaskId = 1;
+  private rendered = 0;
+  private failed = 0;
+  private closed = false;
+
+  constructor(private readonly size = DEFAULT_POOL_SIZE) {}
+
+  get poolSize(): number {
+    return this.size;
+  }
+
+  async render(template: DocumentTemplate, data: unknown): Promise<Buffer> {
+    if (this.size === 0) {
+      return renderTemplate(template, data);
+    }
+
+    if (this.closed) {
+      throw new Error('Document render pool is closed');
+    }
+
+    this.ensureWorkers();
+
+    return new Promise<Buffer>((resolve, reject) => {
+      this.queue.push({ id: this.nextTaskId++, template, data, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  getStats(): RenderPoolStats {
+    return {
+      workers: this.workers.length,
+      busy: this.workers.filter(entry => entry.task).length,
+      queued: this.queue.length,
+      rendered: this.rendered,
+      failed: this.failed,
+    };
+  }
+
+  async close(): Promise<void> {
+    this.closed = true;
+    for (const task of this.queue.splice(0)) {
+      task.reject(new Error('Document render pool is closed'));
+    }
+    await Promise.all(this.workers.map(entry => entry.worker.terminate()));
+    this.workers = [];
+  }
+
+  private ensureWorkers(): void {
+    while (this.workers.length < this.size) {
+      this.workers.push(this.spawnWorker());
+    }
+  }
+
+  private spawnWorker(): PoolWorker {
+    // Under ts-node the worker has to register the TypeScript loader itself
+    const isTypeScript = path.extname(__filename) === '.ts';
+    const worker = new Worker(path.join(__dirname, `render-worker${isTypeScript ? '.ts' : '.js'}`), {
+      execArgv: isTypeScript ? ['--require', 'ts-node/register'] : undefined,
+    });
+    const entry: PoolWorker = { worker, task: null };
+
+    worker.on('message', (message: { id: number; pdf?: Uint8Array; error?: string }) => {
+      const task = entry.task;
+      if (!task || task.id !== message.id) {
+        return;
+      }
+
+      entry.task = null;
+      if (message.error) {
+        this.failed++;
+        task.reject(new Error(message.error));
+      } else {
+        this.rendered++;
+        task.resolve(Buffer.from(message.pdf!.buffer, message.pdf!.byteOffset, message.pdf!.byteLength));
+      }
+      this.dispatch();
+    });
+
+    worker.on('error', error => {
+      console.error('PDF render worker failed:', error);
+      this.replaceWorker(entry, error);
+    });
+
+    worker.on('exit', code => {
+      if (!this.closed && this.workers.includes(entry)) {
+        this.replaceWorker(entry, new Error(`PDF render worker exited with code ${code}`));
+      }
+    });
+
+    // Idle workers must not keep scripts and the test runner alive
+    worker.unref();
+    return entry;
+  }
+
+  private replaceWorker(entry: PoolWorker, error: Error): void {
+    const index = this.workers.indexOf(entry);
+    if (index === -1) {
+      return;
+    }
+
+    if (entry.task) {
+      this.failed++;
+      entry.task.reject(error);
+      entry.task = null;
+    }
+
+    this.workers.splice(index, 1);
+    if (!this.closed) {
+      this.workers.push(this.spawnWorker());
+      this.dispatch();
+    }
+  }
+
+  private dispatch(): void {
+    for (const entry of this.workers) {
+      if (this.queue.length === 0) {
+        return;
+      }
+      if (entry.task) {
+        continue;
+      }
+
+      const task = this.queue.shift()!;
+      try {
+        entry.worker.postMessage({ id: task.id, template: task.template, data: task.data });
+        entry.task = task;
+      } catch (error) {
+        // Data that cannot be structured-cloned (functions, sockets, ...)
+        this.failed++;
+        task.reject(error as Error);
+      }
+    }
+  }
+}
+
+export const documentRenderPool = new DocumentRenderPool(
+  process.env.PDF_RENDER_WORKERS !== undefined
+    ? parseInt(process.env.PDF_RENDER_WORKERS, 10)
+    : DEFAULT_POOL_SIZE
+);
@@ -0,0 +1,20 @@
+import { parentPort } from 'worker_threads';
+import { DocumentTemplate, renderTemplate } from './document-templates';
+
+/**
+ * Worker thread entry for DocumentRenderPool. Renders one document per
+ * message and transfers the PDF bytes back without copying.
+ */
+parentPort!.on('message', async (message: { id: number; template: DocumentTemplate; data: unknown }) => {
+  try {
+    const buffer = await renderTemplate(message.template, message.data);
+    // Small buffers can be slices of Node's shared allocation pool, which
+    // cannot be transferred; copy those into their own ArrayBuffer
+    const pdf = buffer.byteOffset === 0 && buffer.byteLength === buffer.buffer.byteLength
+      ? buffer
+      : new Uint8Array(buffer);
+    parentPort!.postMessage({ id: message.id, pdf }, [pdf.buffer as ArrayBuffer]);
+  } catch (error) {
+    parentPort!.postMessage({ id: message.id, error: (error as Error).message || String(error) });
+  }
+});
@@ -1,70 +1,61 @@
 import {injectable, BindingScope} from '@loopback/core';
+import {
+  RateLimiter,
+  RateLimitResult,
+  getRateLimiter,
+} from './rate-limit/rate-limiter';
 
-interface RateLimitEntry {
-  count: number;
-  resetAt: number;
-}
-
+/**
+ * Keyed attempt limits for controllers, e.g. failed logins per email.
+ *
+ * Backed by the process-wide sliding-window limiter used by the middleware
+ * and interceptors, which keeps its counts in Redis when REDIS_URL is set so
+ * limits hold across instances.
+ */
 @injectable({scope: BindingScope.SINGLETON})
 export class RateLimitService {
-  private store: Map<string, RateLimitEntry> = new Map();
+  private limiter: RateLimiter = getRateLimiter();
 
-  constructor() {
-    // Clean up expired entries every minute
-    setInterval(() => this.cleanup(), 60000);
+  /**
+   * Record an attempt if the limit allows it
+   * @param key - Unique identifier for the rate limit
+   * @param limit - Maximum number of attempts allowed
+   * @param windowMs - Time window in milliseconds
+   */
+  async consume(key: string, limit: number, windowMs: number): Promise<RateLimitResult> {
+    return this.limiter.consume(key, {limit, windowMs});
   }
 
   /**
-   * Check if rate limit has been exceeded
+   * Check if rate limit has been exceeded, recording this attempt if not
    * @param key - Unique identifier for the rate limit
    * @param limit - Maximum number of attempts allowed
    * @param windowMs - Time window in milliseconds
    * @returns Current attempt count
    */
   async checkLimit(key: string, limit: number, windowMs: number): Promise<number> {
-    const now = Date.now();
-    const entry = this.store.get(key);
-
-    if (!entry || entry.resetAt <= now) {
-      // Create new entry or reset expired one
-      this.store.set(key, {
-        count: 1,
-        resetAt: now + windowMs
-      });
-      return 1;
-    }
-
-    if (entry.count >= limit) {
-      return entry.count;
-    }
-
-    // Increment count
-    entry.count++;
-    return entry.count;
+    const result = await this.limiter.consume(key, {limit, windowMs});
+    return result.allowed ? Math.ceil(result.count) : limit;
   }
 
   /**
-   * Increment the counter for a key
+   * Record an attempt even when over the limit, e.g. a failed login
    * @param key - Unique identifier
+   * @param windowMs - Time window in milliseconds
    */
-  async increment(key: string): Promise<void> {
-    const entry = this.store.get(key);
-    if (entry && entry.resetAt > Date.now()) {
-      entry.count++;
-    }
+  async increment(key: string, windowMs: number): Promise<void> {
+    await this.limiter.consume(key, {limit: Number.MAX_SAFE_INTEGER, windowMs, force: true});
   }
 
   /**
-   * Get current count for a key
+   * Get current count for a key without recording an attempt
    * @param key - Unique identifier
-   * @returns Current count or 0 if not found
+   * @param windowMs - Time window in milliseconds
+   * @returns Estimated attempts in the window
    */
-  async getCount(key: string): Promise<number> {
-    const entry = this.store.get(key);
-    if (!entry || entry.resetAt <= Date.now()) {
-      return 0;
-    }
-    return entry.count;
+  async getCount(key: string, windowMs: number): Promise<number> {
+    const result = await this.limiter.peek(key, {limit: Number.MAX_SAFE_INTEGER, windowMs});
+    return Math.ceil(result.count);
   }
 
   /**
@@ -72,18 +63,6 @@ export class RateLimitService {
    * @param key - Unique identifier
    */
   async reset(key: string): Promise<void> {
-    this.store.delete(key);
-  }
-
-  /**
-   * Clean up expired entries
-   */
-  private cleanup(): void {
-    const now = Date.now();
-    for (const [key, entry] of this.store.entries()) {
-      if (entry.resetAt <= now) {
-        this.store.delete(key);
-      }
-    }
+    await this.limiter.reset(key);
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,91 @@
+import type {Redis} from 'ioredis';
+
+export interface RateLimitResult {
+  allowed: boolean;
+  /** Estimated hits in the sliding window, including this one if recorded */
+  count: number;
+  limit: number;
+  remaining: number;
+  /** Milliseconds until the current fixed window rolls over */
+  resetMs: number;
+  /** Milliseconds until the check would pass, 0 when allowed */
+  retryAfterMs: number;
+}
+
+export interface RateLimitCheck {
+  limit: number;
+  windowMs: number;
+  cost?: number;
+  force?: boolean;
+}
+
+export interface WindowState {
+  windowStart: number;
+  current: number;
+  previous: number;
+}
+
+export interface RateLimitStore {
+  consume(
+    key: string,
+    limit: number,
+    windowMs: number,
+    cost?: number,
+    force?: boolean,
+  ): RateLimitResult | Promise<RateLimitResult>;
+  reset(key: string): void | Promise<void>;
+}
+
+export function applySlidingWindow(
+  state: WindowState,
+  limit: number,
+  windowMs: number,
+  cost: number,
+  force: boolean,
+  now: number,
+): RateLimitResult;
+
+export class MemoryRateLimitStore implements RateLimitStore {
+  readonly maxKeys: number;
+  readonly evictions: number;
+  readonly size: number;
+  constructor(options?: {maxKeys?: number});
+  consume(
+    key: string,
+    limit: number,
+    windowMs: number,
+    cost?: number,
+    force?: boolean,
+    now?: number,
+  ): RateLimitResult;
+  reset(key: string): void;
+}
+
+export class RedisRateLimitStore implements RateLimitStore {
+  constructor(redis: Redis, options?: {prefix?: string});
+  consume(
+    key: string,
+    limit: number,
+    windowMs: number,
+    cost?: number,
+    force?: boolean,
+  ): Promise<RateLimitResult>;
+  reset(key: string): Promise<void>;
+}
+
+export class RateLimiter {
+  readonly store: RateLimitStore;
+  constructor(options?: {store?: RateLimitStore; fallbackStore?: MemoryRateLimitStore});
+  consume(key: string, check: RateLimitCheck): Promise<RateLimitResult>;
+  peek(key: string, check: {limit: number; windowMs: number}): Promise<RateLimitResult>;
+  reset(key: string): Promise<void>;
+}
+
+export function getRateLimiter(): RateLimiter;
+
+export function getRedisClient(): Redis | null;
+
+export function setRateLimitHeaders(
+  res: {setHeader(name: string, value: string): unknown},
+  result: RateLimitResult,
+): void;
@@ -0,0 +1,403 @@
+/**
+ * Sliding-window rate limiter shared by the rate limit middleware, the
+ * interceptor, RateLimitService and the root Express server's middleware.
+ * They all use one process-wide store, so each namespaces its keys
+ * (`mw:`, `ic:`, `srv:` plus the rule name).
+ *
+ * Each key keeps the hit count of the current and previous fixed window; the
+ * estimate is `previous * (share of the previous window still in range) +
+ * current`. That smooths the burst a fixed window allows at its boundary while
+ * keeping three numbers per key.
+ *
+ * Two stores implement the same algorithm:
+ *  - MemoryRateLimitStore: per process, bounded to `maxKeys` with LRU eviction
+ *  - RedisRateLimitStore: shared by every instance, one Lua call per check
+ *
+ * Plain CommonJS so scripts can require it without a build step.
+ */
+
+const DEFAULT_MAX_KEYS = parseInt(process.env.RATE_LIMIT_MAX_KEYS || '100000');
+const INITIAL_CAPACITY = 1024;
+const STORE_ERROR_LOG_INTERVAL = 60000;
+
+/**
+ * Apply one check to a key's window state. Mutates `state` and returns the
+ * outcome. `cost` 0 only asks whether one more hit would be allowed; `force`
+ * records the hits even when over the limit.
+ */
+function applySlidingWindow(state, limit, windowMs, cost, force, now) {
+  const windowStart = now - (now % windowMs);
+
+  if (state.windowStart !== windowStart) {
+    state.previous = state.windowStart === windowStart - windowMs ? state.current : 0;
+    state.current = 0;
+    state.windowStart = windowStart;
+  }
+
+  const weight = (windowMs - (now - windowStart)) / windowMs;
+  const needed = Math.max(cost, 1);
+  let count = state.previous * weight + state.current;
+  const allowed = force || count + needed <= limit;
+
+  if (allowed && cost > 0) {
+    state.current += cost;
+    count += cost;
+  }
+
+  let retryAfterMs = 0;
+  if (!allowed) {
+    const room = limit - state.current - needed;
+    retryAfterMs = room >= 0 && state.previous > 0
+      // Wait for enough of the previous window to slide out of range
+      ? windowStart + windowMs * (1 - room / state.previous) - now
+      : windowStart + windowMs - now;
+  }
+
+  return {
+    allowed,
+    count,
+    limit,
+    remaining: Math.max(0, Math.floor(limit - count)),
+    resetMs: windowStart + windowMs - now,
+    retryAfterMs: Math.max(0, Math.ceil(retryAfterMs))
+  };
+}
+
+/**
+ * In-process store. Window state lives in typed arrays indexed by a slot per
+ * key, so a key costs its Map entry plus a few dozen bytes. Slots are linked
+ * in least-recently-used order; once `maxKeys` is reached the least recently
+ * checked key is evicted and its slot reused.
+ */
+class MemoryRateLimitStore {
+  constructor(options = {}) {
+    this.maxKeys = options.maxKeys || DEFAULT_MAX_KEYS;
+    this.slots = new Map();
+    this.slotKeys = [];
+    this.freeSlots = [];
+    this.nextSlot = 0;
+    this.head = -1; // least recently used
+    this.tail = -1; // most recently used
+    this.evictions = 0;
+    this.capacity = 0;
+    this.allocate(Math.min(INITIAL_CAPACITY, this.maxKeys));
+  }
+
+  get size() {
+    return this.slots.size;
+  }
+
+  consume(key, limit, windowMs, cost = 1, force = false, now = Date.now()) {
+    const slot = this.getSlot(key);
+    const state = {
+      windowStart: this.windowStarts[slot],
+      current: this.currentCounts[slot],
+      previous: this.previousCounts[slot]
+    };
+
+    const result = applySlidingWindow(state, limit, windowMs, cost, force, now);
+
+    this.windowStarts[slot] = state.windowStart;
+    this.currentCounts[slot] = state.current;
+    this.previousCounts[slot] = state.previous;
+    return result;
+  }
+
+  reset(key) {
+    const slot = this.slots.get(key);
+    if (slot !== undefined) {
+      this.unlink(slot);
+      this.slots.delete(key);
+      this.slotKeys[slot] = undefined;
+      this.freeSlots.push(slot);
+    }
+  }
+
+  getSlot(key) {
+    let slot = this.slots.get(key);
+    if (slot !== undefined) {
+      if (slot !== this.tail) {
+        this.unlink(slot);
+        this.append(slot);
+      }
+      return slot;
+    }
+
+    if (this.freeSlots.length > 0) {
+      slot = this.freeSlots.pop();
+    } else if (this.nextSlot < this.maxKeys) {
+      if (this.nextSlot === this.capacity) {
+        this.allocate(Math.min(this.capacity * 2, this.maxKeys));
+      }
+      slot = this.nextSlot++;
+    } else {
+      slot = this.head;
+      this.unlink(slot);
+      this.slots.delete(this.slotKeys[slot]);
+      this.evictions++;
+    }
+
+    this.windowStarts[slot] = 0;
+    this.currentCounts[slot] = 0;
+    this.previousCounts[slot] = 0;
+    this.slotKeys[slot] = key;
+    this.slots.set(key, slot);
+    this.append(slot);
+    return slot;
+  }
+
+  append(slot) {
+    this.prevSlots[slot] = this.tail;
+    this.nextSlots[slot] = -1;
+    if (this.tail === -1) {
+      this.head = slot;
+    } else {
+      this.nextSlots[this.tail] = slot;
+    }
+    this.tail = slot;
+  }
+
+  unlink(slot) {
+    const prev = this.prevSlots[slot];
+    const next = this.nextSlots[slot];
+    if (prev === -1) {
+      this.head = next;
+    } else {
+      this.nextSlots[prev] = next;
+    }
+    if (next === -1) {
+      this.tail = prev;
+    } else {
+      this.prevSlots[next] = prev;
+    }
+  }
+
+  allocate(capacity) {
+    const grow = (Type, previous) => {
+      const next = new Type(capacity);
+      if (previous) {
+        next.set(previous);
+      }
+      return next;
+    };
+
+    this.windowStarts = grow(Float64Array, this.windowStarts);
+    this.currentCounts = grow(Uint32Array, this.currentCounts);
+    this.previousCounts = grow(Uint32Array, this.previousCounts);
+    this.prevSlots = grow(Int32Array, this.prevSlots);
+    this.nextSlots = grow(Int32Array, this.nextSlots);
+    this.capacity = capacity;
+  }
+}
+
+// Same algorithm as applySlidingWindow, using the Redis clock so every
+// instance agrees on window boundaries
+const SLIDING_WINDOW_LUA = `
+if redis.replicate_commands then redis.replicate_commands() end
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local force = ARGV[4] == '1'
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local windowStart = now - (now % window)
+
+local state = redis.call('HMGET', KEYS[1], 'w', 'c', 'p')
+local storedStart = tonumber(state[1]) or 0
+local current = tonumber(state[2]) or 0
+local previous = tonumber(state[3]) or 0
+local changed = false
+
+if storedStart ~= windowStart then
+  if storedStart == windowStart - window then previous = current else previous = 0 end
+  current = 0
+  changed = true
+end
+
+local weight = (window - (now - windowStart)) / window
+local needed = math.max(cost, 1)
+local count = previous * weight + current
+local allowed = force or count + needed <= limit
+
+if allowed and cost > 0 then
+  current = current + cost
+  count = count + cost
+  changed = true
+end
+
+if changed then
+  redis.call('HSET', KEYS[1], 'w', windowStart, 'c', current, 'p', previous)
+  redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+
+local retryAfter = 0
+if not allowed then
+  local room = limit - current - needed
+  if room >= 0 and previous > 0 then
+    retryAfter = windowStart + window * (1 - room / previous) - now
+  else
+    retryAfter = windowStart + window - now
+  end
+end
+
+return { allowed and 1 or 0, tostring(count), windowStart + window - now, math.ceil(retryAfter) }
+`;
+
+/**
+ * Redis store: one EVALSHA per check through an ioredis client
+ */
+class RedisRateLimitStore {
+  constructor(redis, options = {}) {
+    this.redis = redis;
+    this.prefix = options.prefix || 'ratelimit:';
+
+    if (typeof redis.rateLimitSlidingWindow !== 'function') {
+      redis.defineCommand('rateLimitSlidingWindow', {
+        numberOfKeys: 1,
+        lua: SLIDING_WINDOW_LUA
+      });
+    }
+  }
+
+  async consume(key, limit, windowMs, cost = 1, force = false) {
+    const [allowed, count, resetMs, retryAfterMs] = await this.redis.rateLimitSlidingWindow(
+      this.prefix + key,
+      limit,
+      windowMs,
+      cost,
+      force ? '1' : '0'
+    );
+    const estimate = parseFloat(count);
+
+    return {
+      allowed: allowed === 1,
+      count: estimate,
+      limit,
+      remaining: Math.max(0, Math.floor(limit - estimate)),
+      resetMs: Number(resetMs),
+      retryAfterMs: Math.max(0, Number(retryAfterMs))
+    };
+  }
+
+  async reset(key) {
+    await this.redis.del(this.prefix + key);
+  }
+}
+
+/**
+ * Rate limiter over a store. If the primary store fails (Redis unreachable)
+ * checks fall back to a per-process memory store rather than failing open
+ * or rejecting traffic.
+ */
+class RateLimiter {
+  constructor(options = {}) {
+    this.store = options.store || new MemoryRateLimitStore();
+    this.fallbackStore = this.store instanceof MemoryRateLimitStore
+      ? null
+      : options.fallbackStore || new MemoryRateLimitStore();
+    this.lastStoreErrorLog = 0;
+  }
+
+  /**
+   * Record `cost` hits for a key if the limit allows them
+   */
+  consume(key, { limit, windowMs, cost = 1, force = false }) {
+    return this.run(store => store.consume(key, limit, windowMs, cost, force));
+  }
+
+  /**
+   * Check whether one more hit would be allowed without recording it
+   */
+  peek(key, { limit, windowMs }) {
+    return this.run(store => store.consume(key, limit, windowMs, 0, false));
+  }
+
+  async reset(key) {
+    await this.run(store => store.reset(key));
+    if (this.fallbackStore) {
+      this.fallbackStore.reset(key);
+    }
+  }
+
+  async run(operation) {
+    if (!this.fallbackStore) {
+      return operation(this.store);
+    }
+
+    try {
+      return await operation(this.store);
+    } catch (error) {
+      const now = Date.now();
+      if (now - this.lastStoreErrorLog > STORE_ERROR_LOG_INTERVAL) {
+        this.lastStoreErrorLog = now;
+        console.error('Rate limit store unavailable, using in-process limits:', error.message);
+      }
+      return operation(this.fallbackStore);
+    }
+  }
+}
+
+let defaultLimiter = null;
+let redisClient;
+
+/**
+ * Process-wide ioredis client for REDIS_URL, or null when REDIS_URL is not
+ * set or ioredis is not installed. Created on first use.
+ */
+function getRedisClient() {
+  if (redisClient === undefined) {
+    redisClient = null;
+
+    if (process.env.REDIS_URL) {
+      try {
+        const Redis = require('ioredis');
+        redisClient = new Redis(process.env.REDIS_URL, {
+          // Fail fast to the memory fallback instead of queueing checks
+          enableOfflineQueue: false,
+          maxRetriesPerRequest: 1
+        });
+        redisClient.on('error', () => {});
+      } catch (error) {
+        console.warn('ioredis not available, using in-process rate limits:', error.message);
+      }
+    }
+  }
+
+  return redisClient;
+}
+
+/**
+ * Process-wide limiter: Redis when the shared client is available, otherwise
+ * the memory store
+ */
+function getRateLimiter() {
+  if (!defaultLimiter) {
+    const redis = getRedisClient();
+    defaultLimiter = new RateLimiter({ store: redis ? new RedisRateLimitStore(redis) : undefined });
+  }
+
+  return defaultLimiter;
+}
+
+/**
+ * Standard X-RateLimit-* headers, plus Retry-After when the check failed
+ */
+function setRateLimitHeaders(res, result) {
+  res.setHeader('X-RateLimit-Limit', String(result.limit));
+  res.setHeader('X-RateLimit-Remaining', String(result.remaining));
+  res.setHeader('X-RateLimit-Reset', new Date(Date.now() + result.resetMs).toISOString());
+
+  if (!result.allowed) {
+    res.setHeader('Retry-After', String(Math.max(1, Math.ceil(result.retryAfterMs / 1000))));
+  }
+}
+
+module.exports = {
+  applySlidingWindow,
+  MemoryRateLimitStore,
+  RedisRateLimitStore,
+  RateLimiter,
+  getRateLimiter,
+  getRedisClient,
+  setRateLimitHeaders
+};
@@ -14,6 +14,7 @@ import { eq, desc, and, inArray } from 'drizzle-orm';
 import { StripeService } from './stripe.service';
 import { EmailService } from './email.service';
 import { BookingService } from './booking/booking.service';
+import { CacheManager } from './cache-manager.service';
 
 interface RefundRequest {
   bookingId: string;
@@ -101,6 +102,7 @@ export class RefundService {
         requestedAt: new Date(),
       })
       .returning();
+    await CacheManager.invalidatePayment(payment.id, data.bookingId);
 
     // Cancel the booking
     await BookingService.cancelBooking(data.bookingId);
@@ -188,6 +190,8 @@ export class RefundService {
         updatedAt: new Date(),
       })
       .where(eq(bookings.id, refund.bookingId));
+    await CacheManager.invalidatePayment(refund.paymentId);
+    await CacheManager.invalidateBooking(refund.bookingId, refund.booking.sessionId);
 
     // Notify customer
     await EmailService.sendRefundRejectedEmail(
@@ -252,6 +256,8 @@ export class RefundService {
           updatedAt: new Date(),
         })
         .where(eq(bookings.id, refund.bookingId));
+      await CacheManager.invalidatePayment(refund.paymentId);
+      await CacheManager.invalidateBooking(refund.bookingId, refund.booking.sessionId);
 
       // Send confirmation emails
       await this.sendRefundConfirmations(refund);
@@ -278,6 +284,7 @@ export class RefundService {
           updatedAt: new Date(),
         })
         .where(eq(refunds.id, refundId));
+      await CacheManager.invalidatePayment(refund.paymentId, refund.bookingId);
 
       // Log the failure
       await db.insert(paymentLogs).values({
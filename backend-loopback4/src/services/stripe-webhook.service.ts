@@ -11,10 +11,18 @@ import {
   bookings,
   users
 } from '../db/schema';
-import { eq, and, sql } from 'drizzle-orm';
+import { eq, and, sql, inArray } from 'drizzle-orm';
+import os from 'os';
 import { UserManagementService } from './user-management.service';
 import { EmailService } from './email.service';
 import { ActivityLogService } from './activity-log.service';
+import { CacheManager } from './cache-manager.service';
+import {
+  DispatcherMetrics,
+  KeyedDispatcher,
+  nextRetry,
+  orderingKeyFor,
+} from './webhooks/webhook-dispatcher';
 
 export interface StripeWebhookEvent {
   id: string;
@@ -25,6 +33,47 @@ export interface StripeWebhookEvent {
   created: number;
 }
 
+export interface WebhookReceipt {
+  eventId: string;
+  type: string;
+  /** Event id already received; nothing was done */
+  duplicate: boolean;
+  /** Queued for processing in this process (otherwise left for the retry scheduler) */
+  queued: boolean;
+}
+
+const WEBHOOK_CONCURRENCY = parseInt(process.env.WEBHOOK_CONCURRENCY || '8');
+const WEBHOOK_MAX_QUEUED = parseInt(process.env.WEBHOOK_MAX_QUEUED || '1000');
+const WEBHOOK_MAX_ATTEMPTS = parseInt(process.env.WEBHOOK_MAX_ATTEMPTS || '8');
+const WEBHOOK_RETRY_BASE_MS = parseInt(process.env.WEBHOOK_RETRY_BASE_MS || '30000');
+const WEBHOOK_RETRY_POLL_MS = parseInt(process.env.WEBHOOK_RETRY_POLL_MS || '15000');
+const WEBHOOK_RETRY_BATCH_SIZE = 50;
+const WEBHOOK_ORDER_DEFER_MS = 5000;
+const WEBHOOK_STALE_CLAIM_MS = 10 * 60 * 1000;
+const WORKER_ID = `${os.hostname()}-${process.pid}`;
+
+/**
+ * One dispatcher per process, shared by every service instance: events run
+ * with bounded concurrency, one at a time per PaymentIntent / charge
+ */
+export const webhookDispatcher = new KeyedDispatcher({
+  concurrency: WEBHOOK_CONCURRENCY,
+  maxQueued: WEBHOOK_MAX_QUEUED,
+  // Failures are recorded and logged by processEvent
+  onError: () => {},
+});
+
+const pipelineStats = {
+  received: 0,
+  duplicates: 0,
+  deferred: 0,
+  processed: 0,
+  failed: 0,
+  deadLettered: 0,
+};
+
+let retryTimer: NodeJS.Timeout | null = null;
+
 @injectable()
 export class StripeWebhookService {
   private stripe: Stripe;
@@ -44,8 +93,12 @@ export class StripeWebhookService {
 
   /**
    * Main webhook handler entry point
+   *
+   * Verifies and stores the event, then hands it to the dispatcher and
+   * returns so Stripe gets its 2xx straight away. A redelivered event id is
+   * dropped by the unique index on stripe_event_id.
    */
-  async handleWebhook(body: string, signature: string): Promise<void> {
+  async handleWebhook(body: string, signature: string): Promise<WebhookReceipt> {
     let event: Stripe.Event;
 
     try {
@@ -60,98 +113,217 @@ export class StripeWebhookService {
       throw new Error(`Webhook signature verification failed: ${err.message}`);
     }
 
-    console.log(`Processing webhook event: ${event.type} (${event.id})`);
+    const orderingKey = orderingKeyFor(event);
 
-    // Check if we've already processed this event (idempotency)
-    const existingEvent = await db
-      .select()
-      .from(stripeWebhookEvents)
-      .where(eq(stripeWebhookEvents.stripeEventId, event.id))
-      .limit(1);
+    // Store the webhook event, claimed by this process for dispatch
+    const [stored] = await db
+      .insert(stripeWebhookEvents)
+      .values({
+        stripeEventId: event.id,
+        eventType: event.type,
+        eventData: event as any,
+        processed: false,
+        status: 'processing',
+        orderingKey,
+        stripeCreatedAt: new Date(event.created * 1000),
+        lockedBy: WORKER_ID,
+        lockedAt: new Date(),
+      })
+      .onConflictDoNothing({ target: stripeWebhookEvents.stripeEventId })
+      .returning({ id: stripeWebhookEvents.id });
 
-    if (existingEvent.length > 0) {
-      console.log(`Event ${event.id} already processed, skipping`);
-      return;
+    if (!stored) {
+      pipelineStats.duplicates++;
+      console.log(`Event ${event.id} already received, skipping`);
+      return { eventId: event.id, type: event.type, duplicate: true, queued: false };
     }
 
-    // Store the webhook event
-    await db.insert(stripeWebhookEvents).values({
-      stripeEventId: event.id,
-      eventType: event.type,
-      eventData: event as any,
-      processed: false,
-    });
+    pipelineStats.received++;
+    const queued = this.enqueue(event, orderingKey, false);
 
-    try {
-      // Process the event based on type
-      switch (event.type) {
-        case 'payment_intent.succeeded':
-          await this.handlePaymentIntentSucceeded(event);
-          break;
-        
-        case 'payment_intent.payment_failed':
-          await this.handlePaymentIntentFailed(event);
-          break;
-        
-        case 'charge.succeeded':
-          await this.handleChargeSucceeded(event);
-          break;
-        
-        case 'charge.failed':
-          await this.handleChargeFailed(event);
-          break;
-        
-        case 'charge.refunded':
-          await this.handleChargeRefunded(event);
-          break;
-        
-        case 'refund.created':
-          await this.handleRefundCreated(event);
-          break;
-        
-        case 'refund.updated':
-          await this.handleRefundUpdated(event);
-          break;
-        
-        case 'customer.created':
-          await this.handleCustomerCreated(event);
-          break;
-        
-        case 'customer.updated':
-          await this.handleCustomerUpdated(event);
-          break;
-        
-        case 'charge.dispute.created':
-          await this.handleDisputeCreated(event);
-          break;
-        
-        default:
-          console.log(`Unhandled event type: ${event.type}`);
-      }
+    if (!queued) {
+      // Dispatcher full or shutting down: leave it for the retry scheduler
+      await this.releaseClaims([event.id]);
+    }
+
+    return { eventId: event.id, type: event.type, duplicate: false, queued };
+  }
+
+  /**
+   * Queue a stored event on the dispatcher. Events for the same payment run
+   * one at a time in Stripe's order. `gated` is true when the claim query has
+   * already checked that no earlier event for the key is outstanding.
+   */
+  private enqueue(event: Stripe.Event, orderingKey: string, gated: boolean): boolean {
+    return webhookDispatcher.dispatch({
+      id: event.id,
+      key: orderingKey,
+      sequence: event.created,
+      run: () => this.processEvent(event, orderingKey, gated),
+    });
+  }
 
-      // Mark event as processed
+  /**
+   * Run the handler for a claimed event and record the outcome: processed,
+   * failed with a retry scheduled, or dead-lettered after the last attempt
+   */
+  private async processEvent(event: Stripe.Event, orderingKey: string, gated: boolean): Promise<void> {
+    if (!gated && await this.hasOutstandingEarlierEvent(event.id, orderingKey)) {
+      // An earlier event for this payment is waiting on a retry; this one
+      // goes after it
+      pipelineStats.deferred++;
       await db
         .update(stripeWebhookEvents)
-        .set({ 
-          processed: true, 
-          processedAt: new Date() 
+        .set({
+          status: 'pending',
+          lockedBy: null,
+          lockedAt: null,
+          nextAttemptAt: new Date(Date.now() + WEBHOOK_ORDER_DEFER_MS),
         })
         .where(eq(stripeWebhookEvents.stripeEventId, event.id));
+      return;
+    }
+
+    console.log(`Processing webhook event: ${event.type} (${event.id})`);
 
+    try {
+      await this.dispatchEvent(event);
     } catch (error: any) {
-      console.error(`Error processing webhook event ${event.id}:`, error);
-      
-      // Update event with error
+      await this.recordFailure(event, error);
+      throw error;
+    }
+
+    // Mark event as processed
+    await db
+      .update(stripeWebhookEvents)
+      .set({
+        processed: true,
+        processedAt: new Date(),
+        status: 'processed',
+        errorMessage: null,
+        lockedBy: null,
+        lockedAt: null,
+      })
+      .where(eq(stripeWebhookEvents.stripeEventId, event.id));
+    pipelineStats.processed++;
+
+    if (gated) {
+      // Came off the backlog: later events for the same payment may be
+      // waiting behind it
+      await this.claimAndDispatch(1, orderingKey);
+    }
+  }
+
+  /**
+   * Process the event based on type
+   */
+  private async dispatchEvent(event: Stripe.Event): Promise<void> {
+    switch (event.type) {
+      case 'payment_intent.succeeded':
+        await this.handlePaymentIntentSucceeded(event);
+        break;
+
+      case 'payment_intent.payment_failed':
+        await this.handlePaymentIntentFailed(event);
+        break;
+
+      case 'charge.succeeded':
+        await this.handleChargeSucceeded(event);
+        break;
+
+      case 'charge.failed':
+        await this.handleChargeFailed(event);
+        break;
+
+      case 'charge.refunded':
+        await this.handleChargeRefunded(event);
+        break;
+
+      case 'refund.created':
+        await this.handleRefundCreated(event);
+        break;
+
+      case 'refund.updated':
+        await this.handleRefundUpdated(event);
+        break;
+
+      case 'customer.created':
+        await this.handleCustomerCreated(event);
+        break;
+
+      case 'customer.updated':
+        await this.handleCustomerUpdated(event);
+        break;
+
+      case 'charge.dispute.created':
+        await this.handleDisputeCreated(event);
+        break;
+
+      default:
+        console.log(`Unhandled event type: ${event.type}`);
+    }
+  }
+
+  /**
+   * Schedule a retry with exponential backoff, or dead-letter the event once
+   * it has used all its attempts
+   */
+  private async recordFailure(event: Stripe.Event, error: Error): Promise<void> {
+    const [row] = await db
+      .update(stripeWebhookEvents)
+      .set({
+        errorMessage: error.message,
+        retryCount: sql`retry_count + 1`,
+        lockedBy: null,
+        lockedAt: null,
+      })
+      .where(eq(stripeWebhookEvents.stripeEventId, event.id))
+      .returning({ retryCount: stripeWebhookEvents.retryCount });
+
+    const attempts = row?.retryCount ?? WEBHOOK_MAX_ATTEMPTS;
+    const retry = nextRetry(attempts, WEBHOOK_MAX_ATTEMPTS, WEBHOOK_RETRY_BASE_MS);
+
+    if (retry.deadLetter) {
+      pipelineStats.deadLettered++;
+      console.error(`Webhook event ${event.id} dead-lettered after ${attempts} attempts:`, error.message);
       await db
         .update(stripeWebhookEvents)
-        .set({ 
-          errorMessage: error.message,
-          retryCount: sql`retry_count + 1`
-        })
+        .set({ status: 'dead_letter', deadLetteredAt: new Date() })
         .where(eq(stripeWebhookEvents.stripeEventId, event.id));
-      
-      throw error;
+      return;
+    }
+
+    pipelineStats.failed++;
+    console.error(`Error processing webhook event ${event.id} (attempt ${attempts}), retrying in ${Math.round(retry.delayMs / 1000)}s:`, error.message);
+    await db
+      .update(stripeWebhookEvents)
+      .set({ status: 'failed', nextAttemptAt: new Date(Date.now() + retry.delayMs) })
+      .where(eq(stripeWebhookEvents.stripeEventId, event.id));
+  }
+
+  /**
+   * Whether an earlier event for the same key is still waiting to be handled
+   * (pending, failed, or claimed by another instance)
+   */
+  private async hasOutstandingEarlierEvent(eventId: string, orderingKey: string): Promise<boolean> {
+    if (orderingKey.startsWith('evt:')) {
+      return false;
     }
+
+    const result = await db.execute(sql`
+      SELECT 1
+      FROM stripe_webhook_events earlier, stripe_webhook_events current
+      WHERE current.stripe_event_id = ${eventId}
+        AND earlier.ordering_key = ${orderingKey}
+        AND earlier.stripe_event_id <> ${eventId}
+        AND (
+          earlier.status IN ('pending', 'failed')
+          OR (earlier.status = 'processing' AND earlier.locked_by IS DISTINCT FROM ${WORKER_ID})
+        )
+        AND (earlier.stripe_created_at, earlier.received_at) < (current.stripe_created_at, current.received_at)
+      LIMIT 1
+    `);
+    return result.rows.length > 0;
   }
 
   /**
@@ -176,7 +348,7 @@ export class StripeWebhookService {
     // Create or update payment record
     const paymentReference = await this.generatePaymentReference();
     
-    await db.insert(payments).values({
+    const [payment] = await db.insert(payments).values({
       bookingId: booking.id,
       userId: booking.userId,
       paymentReference,
@@ -195,7 +367,7 @@ export class StripeWebhookService {
         paymentDate: new Date(),
         updatedAt: new Date(),
       }
-    });
+    }).returning({ id: payments.id });
 
     // Update booking status
     await db
@@ -206,6 +378,8 @@ export class StripeWebhookService {
         updatedAt: new Date(),
       })
       .where(eq(bookings.id, booking.id));
+    await CacheManager.invalidatePayment(payment.id);
+    await CacheManager.invalidateBooking(booking.id, booking.sessionId);
 
     // Update user statistics
     if (booking.userId) {
@@ -267,7 +441,7 @@ export class StripeWebhookService {
     // Create or update payment record
     const paymentReference = await this.generatePaymentReference();
     
-    await db.insert(payments).values({
+    const [payment] = await db.insert(payments).values({
       bookingId: booking.id,
       userId: booking.userId,
       paymentReference,
@@ -287,7 +461,7 @@ export class StripeWebhookService {
         failureReason: paymentIntent.last_payment_error?.message || 'Unknown error',
         updatedAt: new Date(),
       }
-    });
+    }).returning({ id: payments.id });
 
     // Update booking status
     await db
@@ -298,6 +472,8 @@ export class StripeWebhookService {
         updatedAt: new Date(),
       })
       .where(eq(bookings.id, booking.id));
+    await CacheManager.invalidatePayment(payment.id);
+    await CacheManager.invalidateBooking(booking.id, booking.sessionId);
 
     // Log payment event
     await this.logPaymentEvent({
@@ -331,7 +507,7 @@ export class StripeWebhookService {
 
     // Update payment record with charge details
     if (charge.payment_intent) {
-      await db
+      const [payment] = await db
         .update(payments)
         .set({
           stripeChargeId: charge.id,
@@ -343,7 +519,12 @@ export class StripeWebhookService {
             ((charge.balance_transaction as any).net / 100).toFixed(2) : null,
           updatedAt: new Date(),
         })
-        .where(eq(payments.stripePaymentIntentId, charge.payment_intent as string));
+        .where(eq(payments.stripePaymentIntentId, charge.payment_intent as string))
+        .returning({ id: payments.id, bookingId: payments.bookingId });
+
+      if (payment) {
+        await CacheManager.invalidatePayment(payment.id, payment.bookingId);
+      }
     }
 
     // Log charge event
@@ -414,6 +595,7 @@ export class StripeWebhookService {
         updatedAt: new Date(),
       })
       .where(eq(payments.id, payment.id));
+    await CacheManager.invalidatePayment(payment.id, payment.bookingId);
 
     // Log refund event
     await this.logPaymentEvent({
@@ -462,6 +644,7 @@ export class StripeWebhookService {
         eq(refunds.paymentId, payment.id),
         eq(refunds.status, 'approved')
       ));
+    await CacheManager.invalidatePayment(payment.id, payment.bookingId);
 
     // Log refund event
     await this.logPaymentEvent({
@@ -510,16 +693,19 @@ export class StripeWebhookService {
         updatedAt: new Date(),
       })
       .where(eq(refunds.id, refundRecord.id));
+    await CacheManager.invalidatePayment(refundRecord.paymentId, refundRecord.bookingId);
 
     // If refund succeeded, update booking status
     if (refund.status === 'succeeded') {
-      await db
+      const [refunded] = await db
         .update(bookings)
         .set({
           status: 'refunded',
           updatedAt: new Date(),
         })
-        .where(eq(bookings.id, refundRecord.bookingId));
+        .where(eq(bookings.id, refundRecord.bookingId))
+        .returning({ sessionId: bookings.sessionId });
+      await CacheManager.invalidateBooking(refundRecord.bookingId, refunded?.sessionId);
 
       // Update user statistics
       if (refundRecord.userId) {
@@ -680,31 +866,180 @@ export class StripeWebhookService {
 
   /**
    * Retry failed webhook events
+   *
+   * Returns stale claims to the queue, then claims events whose retry is
+   * due (and that have no earlier event for the same payment outstanding)
+   * and dispatches them. Returns the number dispatched.
    */
-  async retryFailedWebhooks(): Promise<void> {
-    const failedEvents = await db
-      .select()
-      .from(stripeWebhookEvents)
+  async retryFailedWebhooks(): Promise<number> {
+    await this.releaseStaleClaims();
+
+    const capacity = webhookDispatcher.maxQueued - webhookDispatcher.getMetrics().queued;
+    return this.claimAndDispatch(Math.min(capacity, WEBHOOK_RETRY_BATCH_SIZE));
+  }
+
+  /**
+   * Claim due events with FOR UPDATE SKIP LOCKED, so several instances can
+   * share the backlog, and queue them on the dispatcher
+   */
+  private async claimAndDispatch(limit: number, orderingKey?: string): Promise<number> {
+    if (limit <= 0) {
+      return 0;
+    }
+
+    const result = await db.execute(sql`
+      UPDATE stripe_webhook_events
+      SET status = 'processing', locked_by = ${WORKER_ID}, locked_at = CURRENT_TIMESTAMP
+      WHERE id IN (
+        SELECT e.id FROM stripe_webhook_events e
+        WHERE e.status IN ('pending', 'failed')
+          AND e.next_attempt_at <= CURRENT_TIMESTAMP
+          ${orderingKey ? sql`AND e.ordering_key = ${orderingKey}` : sql``}
+          AND NOT EXISTS (
+            SELECT 1 FROM stripe_webhook_events earlier
+            WHERE earlier.ordering_key = e.ordering_key
+              AND earlier.id <> e.id
+              AND earlier.status IN ('pending', 'processing', 'failed')
+              AND (earlier.stripe_created_at, earlier.received_at) < (e.stripe_created_at, e.received_at)
+          )
+        ORDER BY e.stripe_created_at, e.received_at
+        LIMIT ${limit}
+        FOR UPDATE SKIP LOCKED
+      )
+      RETURNING stripe_event_id, event_data, ordering_key
+    `);
+
+    const rejected: string[] = [];
+    for (const row of result.rows as any[]) {
+      const event = row.event_data as Stripe.Event;
+      console.log(`Retrying webhook event: ${row.stripe_event_id}`);
+      if (!this.enqueue(event, row.ordering_key || orderingKeyFor(event), true)) {
+        rejected.push(row.stripe_event_id);
+      }
+    }
+    await this.releaseClaims(rejected);
+
+    return result.rows.length - rejected.length;
+  }
+
+  /**
+   * Return events this process claimed but will not run to the queue
+   */
+  private async releaseClaims(eventIds: string[]): Promise<void> {
+    if (eventIds.length === 0) {
+      return;
+    }
+
+    await db
+      .update(stripeWebhookEvents)
+      .set({ status: 'pending', lockedBy: null, lockedAt: null })
       .where(and(
-        eq(stripeWebhookEvents.processed, false),
-        sql`retry_count < 3`
+        inArray(stripeWebhookEvents.stripeEventId, eventIds),
+        eq(stripeWebhookEvents.status, 'processing'),
+      ));
+  }
+
+  /**
+   * Return events left in 'processing' by an instance that died
+   */
+  private async releaseStaleClaims(): Promise<void> {
+    await db.execute(sql`
+      UPDATE stripe_webhook_events
+      SET status = 'pending', locked_by = NULL, locked_at = NULL
+      WHERE status = 'processing'
+        AND locked_at < CURRENT_TIMESTAMP - (${WEBHOOK_STALE_CLAIM_MS}::text || ' milliseconds')::interval
+    `);
+  }
+
+  /**
+   * Put a dead-lettered event back on the queue with a fresh set of attempts
+   */
+  async replayDeadLetter(eventId: string): Promise<boolean> {
+    const replayed = await db
+      .update(stripeWebhookEvents)
+      .set({
+        status: 'pending',
+        retryCount: 0,
+        nextAttemptAt: new Date(),
+        deadLetteredAt: null,
+      })
+      .where(and(
+        eq(stripeWebhookEvents.stripeEventId, eventId),
+        eq(stripeWebhookEvents.status, 'dead_letter'),
       ))
-      .orderBy(stripeWebhookEvents.createdAt)
-      .limit(10);
+      .returning({ id: stripeWebhookEvents.id });
+
+    if (replayed.length === 0) {
+      return false;
+    }
+
+    await this.claimAndDispatch(1);
+    return true;
+  }
 
-    for (const event of failedEvents) {
+  /**
+   * Queue depth by status plus dispatcher and intake counters
+   */
+  async getPipelineStatus(): Promise<{
+    events: Record<string, number>;
+    dispatcher: DispatcherMetrics;
+    intake: typeof pipelineStats;
+  }> {
+    const result = await db.execute(sql`
+      SELECT status, COUNT(*)::int AS count
+      FROM stripe_webhook_events
+      WHERE status <> 'processed'
+      GROUP BY status
+    `);
+
+    const events: Record<string, number> = {};
+    for (const row of result.rows as any[]) {
+      events[row.status] = row.count;
+    }
+
+    return {
+      events,
+      dispatcher: webhookDispatcher.getMetrics(),
+      intake: { ...pipelineStats },
+    };
+  }
+
+  /**
+   * Poll for due retries every WEBHOOK_RETRY_POLL_MS. Called once on start.
+   */
+  startRetryScheduler(): void {
+    if (retryTimer) {
+      return;
+    }
+
+    let running = false;
+    retryTimer = setInterval(async () => {
+      if (running) {
+        return;
+      }
+      running = true;
       try {
-        console.log(`Retrying webhook event: ${event.stripeEventId}`);
-        
-        // Reconstruct the event and process it
-        const stripeEvent = event.eventData as StripeWebhookEvent;
-        await this.handleWebhook(
-          JSON.stringify(stripeEvent),
-          'retry' // Use dummy signature for retry
-        );
+        await this.retryFailedWebhooks();
       } catch (error) {
-        console.error(`Failed to retry webhook event ${event.stripeEventId}:`, error);
+        console.error('Webhook retry scheduler error:', error);
+      } finally {
+        running = false;
       }
+    }, WEBHOOK_RETRY_POLL_MS);
+    retryTimer.unref();
+  }
+
+  /**
+   * Stop polling, let running handlers finish and return queued events to
+   * the table for the next instance
+   */
+  async stopRetryScheduler(): Promise<void> {
+    if (retryTimer) {
+      clearInterval(retryTimer);
+      retryTimer = null;
     }
+
+    const dropped = await webhookDispatcher.close();
+    await this.releaseClaims(dropped);
   }
-}
\ No newline at end of file
+}
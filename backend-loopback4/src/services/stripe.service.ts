@@ -12,6 +12,7 @@ import {
 } from '../db/schema';
 import { eq, and } from 'drizzle-orm';
 import { v4 as uuidv4 } from 'uuid';
+import { CacheManager } from './cache-manager.service';
 
 interface CreatePaymentIntentData {
   amount: number; // in pounds
@@ -111,6 +112,7 @@ export class StripeService {
           ...data.metadata,
         },
       }).returning();
+      await CacheManager.invalidatePayment(paymentRecord.id, paymentRecord.bookingId);
 
       // Log payment creation
       await this.logPaymentEvent(paymentRecord.id, PaymentEventType.CREATED, {
@@ -194,6 +196,7 @@ export class StripeService {
             updatedAt: new Date(),
           })
           .where(eq(bookings.id, paymentRecord.bookingId));
+        await CacheManager.invalidatePayment(paymentRecord.id, paymentRecord.bookingId);
 
         // Log success
         await this.logPaymentEvent(paymentRecord.id, PaymentEventType.SUCCEEDED, {
@@ -217,6 +220,7 @@ export class StripeService {
             updatedAt: new Date(),
           })
           .where(eq(payments.id, paymentRecord.id));
+        await CacheManager.invalidatePayment(paymentRecord.id, paymentRecord.bookingId);
 
         // Log status update
         await this.logPaymentEvent(paymentRecord.id, PaymentEventType.UPDATED, {
@@ -363,6 +367,7 @@ export class StripeService {
           updatedAt: new Date(),
         })
         .where(eq(payments.id, paymentRecord.id));
+      await CacheManager.invalidatePayment(paymentRecord.id, paymentRecord.bookingId);
 
       await this.logPaymentEvent(paymentRecord.id, PaymentEventType.FAILED, {
         error: paymentIntent.last_payment_error?.message,
@@ -387,6 +392,7 @@ export class StripeService {
           updatedAt: new Date(),
         })
         .where(eq(payments.id, paymentRecord.id));
+      await CacheManager.invalidatePayment(paymentRecord.id, paymentRecord.bookingId);
     }
   }
 
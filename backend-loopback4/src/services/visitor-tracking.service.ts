@@ -1,7 +1,6 @@
 import {injectable, BindingScope} from '@loopback/core';
-import {repository} from '@loopback/repository';
-import {CourseRepository} from '../repositories';
 import {v4 as uuidv4} from 'uuid';
+import {visitorAnalyticsIngestion} from './ingestion/analytics-ingestion';
 
 export interface VisitorSession {
   sessionId: string;
@@ -23,10 +22,7 @@ export class VisitorTrackingService {
   private sessionId: string;
   private session: VisitorSession;
 
-  constructor(
-    @repository(CourseRepository)
-    private courseRepository: CourseRepository,
-  ) {
+  constructor() {
     // Initialize session
     this.sessionId = this.generateSessionId();
     this.session = this.createNewSession();
@@ -111,50 +107,24 @@ export class VisitorTrackingService {
 
   private async saveVisitorData(): Promise<void> {
     const now = new Date();
-    const deviceType = this.detectDeviceType();
-    
-    const query = `
-      INSERT INTO visitor_analytics (
-        session_id, date, hour,
-        visited_homepage, visited_courses_page, visited_booking_page,
-        started_booking, completed_booking, cancelled_booking,
-        pages_viewed, time_on_site_seconds, device_type
-      ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-      ON CONFLICT (session_id, date, hour) 
-      DO UPDATE SET
-        visited_homepage = EXCLUDED.visited_homepage,
-        visited_courses_page = EXCLUDED.visited_courses_page,
-        visited_booking_page = EXCLUDED.visited_booking_page,
-        started_booking = EXCLUDED.started_booking,
-        completed_booking = EXCLUDED.completed_booking,
-        cancelled_booking = EXCLUDED.cancelled_booking,
-        pages_viewed = EXCLUDED.pages_viewed,
-        time_on_site_seconds = EXCLUDED.time_on_site_seconds
-    `;
-
     const timeOnSite = Math.floor((now.getTime() - this.session.startTime.getTime()) / 1000);
 
-    const params = [
-      this.sessionId,
-      now.toISOString().split('T')[0], // date only
-      now.getHours(),
-      this.session.journeyStages.visitedHomepage,
-      this.session.journeyStages.visitedCoursesPage,
-      this.session.journeyStages.visitedBookingPage,
-      this.session.journeyStages.startedBooking,
-      this.session.journeyStages.completedBooking,
-      this.session.journeyStages.cancelledBooking,
-      this.session.pagesViewed.length,
-      timeOnSite,
-      deviceType
-    ];
-
-    try {
-      await this.courseRepository.dataSource.execute(query, params);
-    } catch (error) {
-      // Log error but don't throw - tracking should not break the application
-      console.error('Visitor tracking error:', error);
-    }
+    // Queued and written in batches (anonymized); tracking must never slow
+    // down or fail the request
+    visitorAnalyticsIngestion.push({
+      sessionId: this.sessionId,
+      date: now.toISOString().split('T')[0], // date only
+      hour: now.getHours(),
+      visitedHomepage: this.session.journeyStages.visitedHomepage,
+      visitedCoursesPage: this.session.journeyStages.visitedCoursesPage,
+      visitedBookingPage: this.session.journeyStages.visitedBookingPage,
+      startedBooking: this.session.journeyStages.startedBooking,
+      completedBooking: this.session.journeyStages.completedBooking,
+      cancelledBooking: this.session.journeyStages.cancelledBooking,
+      pagesViewed: this.session.pagesViewed.length,
+      timeOnSiteSeconds: timeOnSite,
+      deviceType: this.detectDeviceType(),
+    });
   }
 
   private detectDeviceType(): string {
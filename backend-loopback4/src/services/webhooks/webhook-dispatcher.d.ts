@@ -0,0 +1,50 @@
+export interface DispatchJob {
+  /** Event id; a job with an id already queued or running is ignored */
+  id: string;
+  /** Jobs sharing a key run one at a time, in sequence order */
+  key?: string;
+  sequence?: number;
+  run(): Promise<unknown>;
+}
+
+export interface DispatcherMetrics {
+  dispatched: number;
+  duplicates: number;
+  rejected: number;
+  completed: number;
+  failed: number;
+  queued: number;
+  active: number;
+  lanes: number;
+  concurrency: number;
+  maxQueued: number;
+  latencyMs: {p50: number; p95: number; p99: number};
+}
+
+export class KeyedDispatcher {
+  readonly concurrency: number;
+  readonly maxQueued: number;
+  constructor(options?: {
+    concurrency?: number;
+    maxQueued?: number;
+    onError?(error: Error, job: DispatchJob): void;
+  });
+  dispatch(job: DispatchJob): boolean;
+  close(): Promise<string[]>;
+  onIdle(): Promise<void>;
+  getMetrics(): DispatcherMetrics;
+}
+
+export function orderingKeyFor(event: {
+  id: string;
+  type: string;
+  data: {object: any};
+}): string;
+
+export function retryDelayMs(attempt: number, baseDelayMs?: number, maxDelayMs?: number): number;
+
+export function nextRetry(
+  attempts: number,
+  maxAttempts: number,
+  baseDelayMs?: number,
+): {deadLetter: boolean; delayMs: number};
@@ -0,0 +1,251 @@
+/**
+ * Bounded-concurrency dispatcher for webhook events, ordered per key.
+ *
+ * Up to `concurrency` events run at once, but never two with the same key:
+ * each key has its own lane, run one event at a time in `sequence` order
+ * (Stripe's `created`, ties in arrival order). Lanes take turns, so a burst
+ * of refunds for one payment cannot starve the others.
+ *
+ * An event ID already queued or running is ignored, and at most `maxQueued`
+ * events wait; `dispatch()` returns false when an event is not taken, so the
+ * caller can leave it for the retry scheduler.
+ *
+ * Also holds the Stripe-specific helpers shared by StripeWebhookService and
+ * the load harness: which key orders an event, the retry backoff, and when
+ * to give up.
+ *
+ * Plain CommonJS so the harness can run without a build step.
+ */
+
+const DEFAULT_CONCURRENCY = 8;
+const DEFAULT_MAX_QUEUED = 1000;
+const LATENCY_SAMPLES = 1024;
+
+class KeyedDispatcher {
+  constructor(options = {}) {
+    this.concurrency = options.concurrency || DEFAULT_CONCURRENCY;
+    this.maxQueued = options.maxQueued || DEFAULT_MAX_QUEUED;
+    this.onError = options.onError || ((error, job) => {
+      console.error(`Webhook dispatch failed for ${job.id}:`, error.message);
+    });
+
+    this.lanes = new Map(); // key -> jobs waiting, in sequence order
+    this.ready = []; // keys with a waiting job and nothing running
+    this.running = new Set(); // keys with a job running
+    this.ids = new Set(); // job ids queued or running
+    this.queued = 0;
+    this.active = 0;
+    this.closed = false;
+    this.idleWaiters = [];
+
+    this.counters = {
+      dispatched: 0,
+      duplicates: 0,
+      rejected: 0,
+      completed: 0,
+      failed: 0
+    };
+    this.latencies = new Float64Array(LATENCY_SAMPLES);
+    this.latencyCount = 0;
+  }
+
+  /**
+   * Queue `run` under `key`. Returns false if the id is already queued or
+   * running, or the dispatcher is full or closed.
+   */
+  dispatch(job) {
+    if (this.ids.has(job.id)) {
+      this.counters.duplicates++;
+      return false;
+    }
+    if (this.closed || this.queued >= this.maxQueued) {
+      this.counters.rejected++;
+      return false;
+    }
+
+    const entry = {
+      id: job.id,
+      key: job.key || job.id,
+      sequence: job.sequence || 0,
+      run: job.run,
+      queuedAt: Date.now()
+    };
+
+    let lane = this.lanes.get(entry.key);
+    if (!lane) {
+      lane = [];
+      this.lanes.set(entry.key, lane);
+      if (!this.running.has(entry.key)) {
+        this.ready.push(entry.key);
+      }
+    }
+
+    // Insert after every job with a sequence <= this one
+    let index = lane.length;
+    while (index > 0 && lane[index - 1].sequence > entry.sequence) {
+      index--;
+    }
+    lane.splice(index, 0, entry);
+
+    this.ids.add(entry.id);
+    this.queued++;
+    this.counters.dispatched++;
+    this.pump();
+    return true;
+  }
+
+  /**
+   * Stop taking jobs and drop those not yet started. Resolves with the
+   * dropped job ids once running jobs have finished.
+   */
+  async close() {
+    this.closed = true;
+
+    const dropped = [];
+    for (const lane of this.lanes.values()) {
+      for (const entry of lane) {
+        dropped.push(entry.id);
+        this.ids.delete(entry.id);
+      }
+    }
+    this.lanes.clear();
+    this.ready = [];
+    this.queued = 0;
+
+    await this.onIdle();
+    return dropped;
+  }
+
+  /**
+   * Resolves when nothing is queued or running
+   */
+  onIdle() {
+    if (this.active === 0 && this.queued === 0) {
+      return Promise.resolve();
+    }
+    return new Promise(resolve => this.idleWaiters.push(resolve));
+  }
+
+  getMetrics() {
+    const samples = Array.from(this.latencies.subarray(0, Math.min(this.latencyCount, LATENCY_SAMPLES)))
+      .sort((a, b) => a - b);
+    const percentile = p => (samples.length > 0
+      ? samples[Math.min(samples.length - 1, Math.floor(samples.length * p))]
+      : 0);
+
+    return {
+      ...this.counters,
+      queued: this.queued,
+      active: this.active,
+      lanes: this.lanes.size + this.running.size,
+      concurrency: this.concurrency,
+      maxQueued: this.maxQueued,
+      // Queue wait plus handling time, over the most recent jobs
+      latencyMs: {
+        p50: percentile(0.5),
+        p95: percentile(0.95),
+        p99: percentile(0.99)
+      }
+    };
+  }
+
+  pump() {
+    while (this.active < this.concurrency && this.ready.length > 0) {
+      const key = this.ready.shift();
+      const lane = this.lanes.get(key);
+      const entry = lane.shift();
+
+      if (lane.length === 0) {
+        this.lanes.delete(key);
+      }
+      this.queued--;
+      this.active++;
+      this.running.add(key);
+
+      this.execute(entry);
+    }
+  }
+
+  async execute(entry) {
+    try {
+      await entry.run();
+      this.counters.completed++;
+    } catch (error) {
+      this.counters.failed++;
+      this.onError(error, entry);
+    }
+
+    this.latencies[this.latencyCount++ % LATENCY_SAMPLES] = Date.now() - entry.queuedAt;
+    this.ids.delete(entry.id);
+    this.running.delete(entry.key);
+    this.active--;
+
+    // Back of the line, so other keys get a turn
+    if (this.lanes.has(entry.key)) {
+      this.ready.push(entry.key);
+    }
+    this.pump();
+
+    if (this.active === 0 && this.queued === 0) {
+      const waiters = this.idleWaiters;
+      this.idleWaiters = [];
+      waiters.forEach(resolve => resolve());
+    }
+  }
+}
+
+/**
+ * Events that touch the same payment share a key so they are applied in
+ * order: charges, refunds and disputes key on their PaymentIntent when they
+ * have one, otherwise on the charge.
+ */
+function orderingKeyFor(event) {
+  const object = (event.data && event.data.object) || {};
+  const type = event.type || '';
+  const id = ref => (ref && typeof ref === 'object' ? ref.id : ref);
+
+  if (type.startsWith('payment_intent.')) {
+    return `pi:${object.id}`;
+  }
+  if (type.startsWith('charge.') || type.startsWith('refund.')) {
+    const paymentIntent = id(object.payment_intent);
+    if (paymentIntent) {
+      return `pi:${paymentIntent}`;
+    }
+    const charge = object.object === 'charge' ? object.id : id(object.charge);
+    if (charge) {
+      return `ch:${charge}`;
+    }
+  }
+  if (type.startsWith('customer.') && !type.startsWith('customer.subscription')) {
+    return `cus:${object.id}`;
+  }
+  return object.id ? `${object.object || 'object'}:${object.id}` : `evt:${event.id}`;
+}
+
+/**
+ * Delay before retry `attempt` (1-based): exponential with jitter, capped
+ */
+function retryDelayMs(attempt, baseDelayMs = 30000, maxDelayMs = 6 * 60 * 60 * 1000) {
+  const exponential = baseDelayMs * 2 ** Math.max(attempt - 1, 0);
+  const jitter = Math.random() * baseDelayMs;
+  return Math.min(maxDelayMs, Math.round(exponential + jitter));
+}
+
+/**
+ * What follows failed attempt `attempts` (1-based): another try after a
+ * backoff delay, or the dead-letter queue once `maxAttempts` are used up
+ */
+function nextRetry(attempts, maxAttempts, baseDelayMs) {
+  if (attempts >= maxAttempts) {
+    return { deadLetter: true, delayMs: 0 };
+  }
+  return { deadLetter: false, delayMs: retryDelayMs(attempts, baseDelayMs) };
+}
+
+module.exports = {
+  KeyedDispatcher,
+  orderingKeyFor,
+  retryDelayMs,
+  nextRetry
+};
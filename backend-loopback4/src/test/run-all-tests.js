@@ -29,6 +29,11 @@ const tests = [
     name: 'Cancellation Workflow Test',
     script: 'test-cancellation-workflow.js',
     description: 'Tests full cancellation with emails and refunds'
+  },
+  {
+    name: 'Dashboard Rollups Test',
+    script: 'test-dashboard-rollups.js',
+    description: 'Tests rollup triggers follow booking status changes'
   }
 ];
 
@@ -0,0 +1,160 @@
+#!/usr/bin/env node
+
+/**
+ * Checks the booking_daily_rollups triggers against a real database.
+ *
+ * Creates a booking on an existing session, walks it through status changes
+ * and checks the rollup row after each one, then rebuilds the rollups and
+ * checks nothing moved. Rescheduling the session must move its bookings to
+ * the new session date. Everything runs in one transaction that is rolled
+ * back at the end.
+ *
+ * Requires migration 019 and at least one user and course session
+ * (run setup-test-data.js first).
+ */
+
+require('dotenv').config({ path: __dirname + '/../../.env' });
+const { Pool } = require('pg');
+
+const pool = new Pool({
+  connectionString: process.env.DATABASE_URL,
+  ssl: {
+    rejectUnauthorized: false
+  }
+});
+
+let failures = 0;
+
+function check(label, actual, expected) {
+  if (actual === expected) {
+    console.log(`  ✅ ${label}: ${actual}`);
+  } else {
+    failures++;
+    console.log(`  ❌ ${label}: expected ${expected}, got ${actual}`);
+  }
+}
+
+async function readRollup(client, session) {
+  const result = await client.query(`
+    SELECT booked_count, cancelled_count, attendees, revenue
+    FROM booking_daily_rollups
+    WHERE booking_date = booking_rollup_date(NOW()::timestamp)
+      AND session_date = $1
+      AND course_id = $2
+  `, [session.session_date, session.course_id]);
+
+  const row = result.rows[0] || {};
+  return {
+    booked: Number(row.booked_count || 0),
+    cancelled: Number(row.cancelled_count || 0),
+    attendees: Number(row.attendees || 0),
+    revenue: Math.round(Number(row.revenue || 0) * 100) // pence
+  };
+}
+
+async function testDashboardRollups() {
+  console.log('📊 Testing dashboard rollup triggers...\n');
+
+  const client = await pool.connect();
+  try {
+    await client.query('BEGIN');
+
+    const sessions = await client.query(`
+      SELECT cs.id, cs.session_date, cs.course_id
+      FROM course_sessions cs
+      JOIN courses c ON c.id = cs.course_id
+      LIMIT 1
+    `);
+    const users = await client.query('SELECT id FROM users LIMIT 1');
+    if (!sessions.rows[0] || !users.rows[0]) {
+      throw new Error('No course session or user found - run setup-test-data.js first');
+    }
+    const session = sessions.rows[0];
+    const baseline = await readRollup(client, session);
+
+    console.log('1️⃣  New pending booking');
+    const booking = await client.query(`
+      INSERT INTO bookings (user_id, session_id, booking_reference, number_of_attendees, total_amount, status)
+      VALUES ($1, $2, $3, 2, 150.00, 'pending')
+      RETURNING id
+    `, [users.rows[0].id, session.id, `RT${Date.now().toString().slice(-8)}`]);
+    const bookingId = booking.rows[0].id;
+    let rollup = await readRollup(client, session);
+    check('booked', rollup.booked, baseline.booked);
+
+    console.log('\n2️⃣  Confirmed');
+    await client.query(`UPDATE bookings SET status = 'confirmed' WHERE id = $1`, [bookingId]);
+    rollup = await readRollup(client, session);
+    check('booked', rollup.booked, baseline.booked + 1);
+    check('attendees', rollup.attendees, baseline.attendees + 2);
+    check('revenue', rollup.revenue, baseline.revenue + 15000);
+
+    console.log('\n3️⃣  Same status written again');
+    await client.query(`UPDATE bookings SET status = 'confirmed', updated_at = NOW() WHERE id = $1`, [bookingId]);
+    rollup = await readRollup(client, session);
+    check('booked', rollup.booked, baseline.booked + 1);
+
+    console.log('\n4️⃣  Cancelled');
+    await client.query(`UPDATE bookings SET status = 'cancelled' WHERE id = $1`, [bookingId]);
+    rollup = await readRollup(client, session);
+    check('booked', rollup.booked, baseline.booked);
+    check('cancelled', rollup.cancelled, baseline.cancelled + 1);
+    check('revenue', rollup.revenue, baseline.revenue);
+
+    console.log('\n5️⃣  Confirmed again, then rebuilt from history');
+    await client.query(`UPDATE bookings SET status = 'confirmed' WHERE id = $1`, [bookingId]);
+    const incremental = await readRollup(client, session);
+    await client.query('SELECT rebuild_booking_daily_rollups()');
+    rollup = await readRollup(client, session);
+    check('booked', rollup.booked, incremental.booked);
+    check('cancelled', rollup.cancelled, incremental.cancelled);
+    check('attendees', rollup.attendees, incremental.attendees);
+    check('revenue', rollup.revenue, incremental.revenue);
+
+    console.log('\n6️⃣  Session rescheduled a week later');
+    const moved = await client.query(`
+      SELECT id, session_date + 7 AS session_date, course_id
+      FROM course_sessions
+      WHERE id = $1
+    `, [session.id]);
+    const movedSession = moved.rows[0];
+    const movedBaseline = await readRollup(client, movedSession);
+    await client.query('UPDATE course_sessions SET session_date = session_date + 7 WHERE id = $1', [session.id]);
+    const oldBucket = await readRollup(client, session);
+    rollup = await readRollup(client, movedSession);
+    // Other sessions of the course on either date share those rows, so
+    // compare what left the old date with what arrived on the new one
+    check('booking left the old date', incremental.booked - oldBucket.booked >= 1, true);
+    check('booked moved', rollup.booked - movedBaseline.booked, incremental.booked - oldBucket.booked);
+    check('attendees moved', rollup.attendees - movedBaseline.attendees, incremental.attendees - oldBucket.attendees);
+    check('revenue moved', rollup.revenue - movedBaseline.revenue, incremental.revenue - oldBucket.revenue);
+    const rescheduled = rollup;
+    await client.query('SELECT rebuild_booking_daily_rollups()');
+    rollup = await readRollup(client, movedSession);
+    check('booked after rebuild', rollup.booked, rescheduled.booked);
+    check('revenue after rebuild', rollup.revenue, rescheduled.revenue);
+
+    console.log('\n7️⃣  Deleted');
+    await client.query('DELETE FROM bookings WHERE id = $1', [bookingId]);
+    rollup = await readRollup(client, movedSession);
+    check('booked', rollup.booked, rescheduled.booked - 1);
+  } finally {
+    await client.query('ROLLBACK');
+    client.release();
+  }
+
+  if (failures > 0) {
+    console.log(`\n❌ ${failures} rollup check(s) failed`);
+    process.exitCode = 1;
+    return;
+  }
+  console.log('\n✅ Dashboard rollup test complete!');
+}
+
+// Run the test
+testDashboardRollups()
+  .catch(error => {
+    console.error('❌ Dashboard rollup test failed:', error.message);
+    process.exitCode = 1;
+  })
+  .finally(() => pool.end());
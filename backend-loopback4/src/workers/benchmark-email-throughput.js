@@ -0,0 +1,197 @@
+#!/usr/bin/env node
+
+/**
+ * Email queue throughput benchmark against a local fake SMTP server
+ *
+ * Compares the old one-at-a-time send loop over fresh SMTP connections with
+ * processEmailQueue's pooled, concurrent sending. The queue lives in memory so
+ * no database is needed; the fake server adds a fixed delay per message to
+ * stand in for a real relay.
+ *
+ * Usage: node src/workers/benchmark-email-throughput.js
+ *   BENCH_EMAILS (default 200), BENCH_SMTP_DELAY_MS (default 40),
+ *   EMAIL_WORKER_CONCURRENCY (default 5), EMAIL_POOL_SIZE (default 5)
+ */
+
+const net = require('net');
+const EmailService = require('../services/email.service');
+
+const EMAIL_COUNT = parseInt(process.env.BENCH_EMAILS || '200');
+const SMTP_DELAY_MS = parseInt(process.env.BENCH_SMTP_DELAY_MS || '40');
+const CONCURRENCY = parseInt(process.env.EMAIL_WORKER_CONCURRENCY || '5');
+const POOL_SIZE = parseInt(process.env.EMAIL_POOL_SIZE || '5');
+
+/**
+ * Minimal SMTP server: accepts every message after SMTP_DELAY_MS
+ */
+function startFakeSmtpServer() {
+  const stats = { connections: 0, messages: 0 };
+
+  const server = net.createServer(socket => {
+    stats.connections++;
+    let inData = false;
+    let buffer = '';
+
+    socket.write('220 localhost fake ESMTP\r\n');
+
+    socket.on('data', chunk => {
+      buffer += chunk.toString();
+
+      while (true) {
+        if (inData) {
+          const end = buffer.indexOf('\r\n.\r\n');
+          if (end === -1) return;
+          buffer = buffer.slice(end + 5);
+          inData = false;
+          stats.messages++;
+          setTimeout(() => socket.write('250 OK queued\r\n'), SMTP_DELAY_MS);
+          continue;
+        }
+
+        const lineEnd = buffer.indexOf('\r\n');
+        if (lineEnd === -1) return;
+        const line = buffer.slice(0, lineEnd);
+        buffer = buffer.slice(lineEnd + 2);
+        const command = line.slice(0, 4).toUpperCase();
+
+        if (command === 'EHLO' || command === 'HELO') {
+          socket.write('250-localhost\r\n250 8BITMIME\r\n');
+        } else if (command === 'DATA') {
+          inData = true;
+          socket.write('354 End data with <CR><LF>.<CR><LF>\r\n');
+        } else if (command === 'QUIT') {
+          socket.end('221 Bye\r\n');
+        } else {
+          socket.write('250 OK\r\n');
+        }
+      }
+    });
+
+    socket.on('error', () => {});
+  });
+
+  return new Promise(resolve => {
+    server.listen(0, '127.0.0.1', () => resolve({ server, port: server.address().port, stats }));
+  });
+}
+
+function buildEmails() {
+  return Array.from({ length: EMAIL_COUNT }, (_, i) => ({
+    id: i + 1,
+    to_email: `attendee${i}@example.com`,
+    from_name: 'React Fast Training',
+    from_email: 'info@reactfasttraining.co.uk',
+    subject: `Booking Confirmation ${i}`,
+    body_html: `<p>Booking ${i} confirmed</p>`,
+    body_text: `Booking ${i} confirmed`,
+    template_id: null,
+    status: 'pending',
+    priority: 5 + (i % 4),
+    scheduled_for: new Date(),
+    attempts: 0
+  }));
+}
+
+/**
+ * In-memory stand-in for the email_queue statements processEmailQueue issues
+ */
+function createQueueDb(emails) {
+  return {
+    async query(sql, params = []) {
+      if (sql.includes('FOR UPDATE SKIP LOCKED')) {
+        const [batchSize, workerId] = params;
+        const claimed = emails
+          .filter(e => e.status === 'pending')
+          .sort((a, b) => b.priority - a.priority)
+          .slice(0, batchSize);
+        claimed.forEach(e => {
+          e.status = 'sending';
+          e.attempts++;
+          e.locked_by = workerId;
+        });
+        return { rows: claimed.map(e => ({ ...e })) };
+      }
+
+      const id = params[params.length - 1];
+      const email = emails.find(e => e.id === id);
+      if (email && sql.includes('UPDATE email_queue')) {
+        email.status = params[0] === 'sent' ? 'sent' : sql.includes("'pending'") ? 'pending' : 'failed';
+      }
+      return { rows: [], rowCount: email ? 1 : 0 };
+    }
+  };
+}
+
+async function runLegacy(port) {
+  const service = new EmailService({ host: '127.0.0.1', port, pool: false, ignoreTLS: true });
+  const emails = buildEmails();
+
+  const start = Date.now();
+  for (const email of emails) {
+    await service.transporter.sendMail({
+      from: `"${email.from_name}" <${email.from_email}>`,
+      to: email.to_email,
+      subject: email.subject,
+      text: email.body_text,
+      html: email.body_html
+    });
+  }
+  return Date.now() - start;
+}
+
+async function runConcurrent(port) {
+  const service = new EmailService({
+    host: '127.0.0.1',
+    port,
+    maxConnections: POOL_SIZE,
+    ignoreTLS: true
+  });
+  const emails = buildEmails();
+  const db = createQueueDb(emails);
+
+  // Silence per-message success logging while measuring
+  const log = console.log;
+  console.log = () => {};
+
+  const start = Date.now();
+  try {
+    let result;
+    do {
+      result = await service.processEmailQueue(db, { batchSize: 50, concurrency: CONCURRENCY });
+    } while (result.processed > 0);
+  } finally {
+    console.log = log;
+  }
+  const elapsed = Date.now() - start;
+
+  const metrics = service.getMetrics();
+  service.close();
+  return { elapsed, metrics, sent: emails.filter(e => e.status === 'sent').length };
+}
+
+function report(label, elapsedMs, connections) {
+  const perMinute = Math.round((EMAIL_COUNT / elapsedMs) * 60000);
+  console.log(`  ${label.padEnd(28)} ${String(elapsedMs).padStart(7)} ms  ${String(perMinute).padStart(7)} emails/min  ${connections} SMTP connections`);
+}
+
+async function benchmarkEmailThroughput() {
+  console.log('📧 Email queue throughput benchmark');
+  console.log(`   ${EMAIL_COUNT} emails, ${SMTP_DELAY_MS} ms SMTP delay, concurrency ${CONCURRENCY}, pool ${POOL_SIZE}\n`);
+
+  const legacySmtp = await startFakeSmtpServer();
+  const legacyElapsed = await runLegacy(legacySmtp.port);
+  report('sequential, no pooling', legacyElapsed, legacySmtp.stats.connections);
+  legacySmtp.server.close();
+
+  const pooledSmtp = await startFakeSmtpServer();
+  const { elapsed, metrics, sent } = await runConcurrent(pooledSmtp.port);
+  report('claimed batches, pooled', elapsed, pooledSmtp.stats.connections);
+  pooledSmtp.server.close();
+
+  console.log(`\n   sent ${sent}/${EMAIL_COUNT}, send latency p50 ${metrics.latencyMs.p50} ms, p95 ${metrics.latencyMs.p95} ms`);
+}
+
+benchmarkEmailThroughput().catch(error => {
+  console.error('Benchmark failed:', error);
+  process.exit(1);
+});
@@ -1,6 +1,8 @@
 #!/usr/bin/env node
 
 require('dotenv').config({ path: __dirname + '/../../.env' });
+const http = require('http');
+const os = require('os');
 const { Pool } = require('pg');
 const EmailService = require('../services/email.service');
 
@@ -14,25 +16,201 @@ const pool = new Pool({
 
 const emailService = new EmailService();
 
-// Process interval (in milliseconds)
-const PROCESS_INTERVAL = 30000; // 30 seconds
-const BATCH_SIZE = 10;
+// Worker configuration
+const BATCH_SIZE = parseInt(process.env.EMAIL_WORKER_BATCH_SIZE || '50');
+const CONCURRENCY = parseInt(process.env.EMAIL_WORKER_CONCURRENCY || '5');
+const FALLBACK_POLL_INTERVAL = 60000; // Safety net if a notification is missed
+const STALE_CLAIM_MS = 10 * 60 * 1000;
+const METRICS_LOG_INTERVAL = 60000; // Also how often stale claims are released
+const METRICS_PORT = process.env.EMAIL_WORKER_METRICS_PORT;
+const LISTEN_RETRY_BASE_MS = 1000;
+const LISTEN_RETRY_MAX_MS = 60000;
+const WORKER_ID = `${os.hostname()}-${process.pid}`;
 
 console.log('Email Worker Started');
-console.log('Processing interval:', PROCESS_INTERVAL / 1000, 'seconds');
+console.log('Worker ID:', WORKER_ID);
 console.log('Batch size:', BATCH_SIZE);
+console.log('Concurrency:', CONCURRENCY);
+
+let listenClient = null;
+let listenRetryTimer = null;
+let listenAttempts = 0;
+let wakeTimer = null;
+let metricsTimer = null;
+let metricsServer = null;
+let draining = null;
+let drainRequested = false;
+let shuttingDown = false;
+
+/**
+ * Claim and send batches until the queue has nothing due, then sleep until
+ * the next scheduled email (or the fallback poll) unless notified sooner.
+ */
+async function drainQueue() {
+  if (draining) {
+    // Let the running drain pick up the new work once it finishes
+    drainRequested = true;
+    return draining;
+  }
+
+  draining = (async () => {
+    do {
+      drainRequested = false;
+      try {
+        let result;
+        do {
+          result = await emailService.processEmailQueue(pool, {
+            batchSize: BATCH_SIZE,
+            concurrency: CONCURRENCY,
+            workerId: WORKER_ID
+          });
+
+          if (result.processed > 0) {
+            console.log(`[${new Date().toISOString()}] Processed ${result.processed} emails, ${result.success} successful`);
+          }
+        } while (result.processed === BATCH_SIZE && !shuttingDown);
+      } catch (error) {
+        console.error('[' + new Date().toISOString() + '] Error processing emails:', error);
+      }
+    } while (drainRequested && !shuttingDown);
+  })();
+
+  try {
+    await draining;
+  } finally {
+    draining = null;
+  }
+
+  if (!shuttingDown) {
+    await scheduleNextWake();
+  }
+}
+
+async function scheduleNextWake() {
+  clearTimeout(wakeTimer);
+  let delay = FALLBACK_POLL_INTERVAL;
 
-async function processEmails() {
-  console.log('[' + new Date().toISOString() + '] Checking email queue...');
-  
   try {
-    const result = await emailService.processEmailQueue(pool);
-    
-    if (result.processed > 0) {
-      console.log(`[${new Date().toISOString()}] Processed ${result.processed} emails, ${result.success} successful`);
+    const depth = await emailService.getQueueDepth(pool);
+    if (depth.due > 0) {
+      delay = 0;
+    } else if (depth.nextScheduledFor) {
+      const untilNext = new Date(depth.nextScheduledFor).getTime() - Date.now();
+      delay = Math.max(0, Math.min(delay, untilNext));
     }
   } catch (error) {
-    console.error('[' + new Date().toISOString() + '] Error processing emails:', error);
+    console.error('Failed to read queue depth:', error.message);
+  }
+
+  wakeTimer = setTimeout(drainQueue, delay);
+}
+
+/**
+ * Wake the worker as soon as rows are inserted into email_queue
+ */
+async function listenForNewEmail() {
+  const client = await pool.connect();
+  let released = false;
+
+  // Destroy the broken connection rather than return it to the pool
+  const discard = error => {
+    if (!released) {
+      released = true;
+      client.release(error);
+    }
+  };
+
+  client.on('notification', () => {
+    if (!shuttingDown) {
+      drainQueue();
+    }
+  });
+
+  client.on('error', error => {
+    console.error('LISTEN connection error, polling until reconnected:', error.message);
+    if (listenClient === client) {
+      listenClient = null;
+    }
+    discard(error);
+    scheduleListenReconnect();
+  });
+
+  try {
+    await client.query('LISTEN email_queue');
+  } catch (error) {
+    discard(error);
+    throw error;
+  }
+
+  listenClient = client;
+  listenAttempts = 0;
+  console.log('Listening for email_queue notifications');
+}
+
+/**
+ * Re-open the LISTEN connection with exponential backoff. The fallback poll
+ * keeps mail moving meanwhile.
+ */
+function scheduleListenReconnect() {
+  if (shuttingDown || listenRetryTimer) {
+    return;
+  }
+
+  const delay = Math.min(LISTEN_RETRY_MAX_MS, LISTEN_RETRY_BASE_MS * Math.pow(2, listenAttempts));
+  listenAttempts++;
+
+  listenRetryTimer = setTimeout(async () => {
+    listenRetryTimer = null;
+    try {
+      await listenForNewEmail();
+      // Notifications sent while disconnected were lost
+      drainQueue();
+    } catch (error) {
+      console.error(`LISTEN reconnect attempt ${listenAttempts} failed:`, error.message);
+      scheduleListenReconnect();
+    }
+  }, delay);
+}
+
+async function collectMetrics() {
+  return {
+    workerId: WORKER_ID,
+    queue: await emailService.getQueueDepth(pool),
+    ...emailService.getMetrics()
+  };
+}
+
+function startMetrics() {
+  metricsTimer = setInterval(async () => {
+    try {
+      // Recover rows claimed by a worker that died mid-batch
+      const released = await emailService.releaseStaleClaims(pool, STALE_CLAIM_MS);
+      if (released > 0) {
+        console.log(`Released ${released} stale email claims`);
+        drainQueue();
+      }
+
+      const metrics = await collectMetrics();
+      console.log('[' + new Date().toISOString() + '] Email metrics:', JSON.stringify(metrics));
+    } catch (error) {
+      console.error('Failed to collect email metrics:', error.message);
+    }
+  }, METRICS_LOG_INTERVAL);
+
+  if (METRICS_PORT) {
+    metricsServer = http.createServer(async (req, res) => {
+      try {
+        const metrics = await collectMetrics();
+        res.writeHead(200, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify(metrics));
+      } catch (error) {
+        res.writeHead(500, { 'Content-Type': 'application/json' });
+        res.end(JSON.stringify({ error: error.message }));
+      }
+    });
+    metricsServer.listen(METRICS_PORT, () => {
+      console.log('Metrics available on port', METRICS_PORT);
+    });
   }
 }
 
@@ -40,7 +218,7 @@ async function processEmails() {
 async function testConfiguration() {
   console.log('Testing email configuration...');
   const testResult = await emailService.testEmailConfiguration();
-  
+
   if (testResult.success) {
     console.log('✓ Email configuration is valid');
     console.log('  Host:', process.env.SMTP_HOST || process.env.EMAIL_HOST);
@@ -54,32 +232,56 @@ async function testConfiguration() {
 }
 
 // Graceful shutdown
-process.on('SIGTERM', async () => {
-  console.log('SIGTERM received, shutting down gracefully...');
-  clearInterval(processInterval);
-  await pool.end();
-  process.exit(0);
-});
+async function shutdown(signal) {
+  console.log(`${signal} received, shutting down gracefully...`);
+  shuttingDown = true;
+  clearTimeout(wakeTimer);
+  clearTimeout(listenRetryTimer);
+  clearInterval(metricsTimer);
+
+  if (metricsServer) {
+    metricsServer.close();
+  }
 
-process.on('SIGINT', async () => {
-  console.log('SIGINT received, shutting down gracefully...');
-  clearInterval(processInterval);
+  // Finish the batch in flight so no claimed row is left in 'sending'
+  if (draining) {
+    await draining;
+  }
+
+  if (listenClient) {
+    listenClient.release();
+  }
+  emailService.close();
   await pool.end();
   process.exit(0);
-});
+}
+
+process.on('SIGTERM', () => shutdown('SIGTERM'));
+process.on('SIGINT', () => shutdown('SIGINT'));
 
 // Start the worker
 async function start() {
   await testConfiguration();
-  
+
+  const released = await emailService.releaseStaleClaims(pool, STALE_CLAIM_MS);
+  if (released > 0) {
+    console.log(`Released ${released} stale email claims`);
+  }
+
+  try {
+    await listenForNewEmail();
+  } catch (error) {
+    console.error('Could not LISTEN for new email, polling until connected:', error.message);
+    scheduleListenReconnect();
+  }
+
+  startMetrics();
+
   // Process immediately on startup
-  await processEmails();
-  
-  // Then process on interval
-  const processInterval = setInterval(processEmails, PROCESS_INTERVAL);
+  await drainQueue();
 }
 
 start().catch(error => {
   console.error('Failed to start email worker:', error);
   process.exit(1);
-});
\ No newline at end of file
+});
@@ -1,7 +1,13 @@
-// Simple in-memory rate limiter
-// In production, use Redis-based rate limiting
+// Rate limiting for the Express server, on the same sliding-window limiter
+// as the LoopBack middleware, interceptors and RateLimitService
+// (backend-loopback4/src/services/rate-limit/rate-limiter.js). Counts live in
+// Redis when REDIS_URL is set, otherwise per process with LRU eviction.
+
+const {
+  getRateLimiter,
+  setRateLimitHeaders
+} = require('../backend-loopback4/src/services/rate-limit/rate-limiter');
 
-const requestCounts = new Map();
 const WINDOW_MS = 60 * 1000; // 1 minute
 const MAX_REQUESTS = {
   api: 100,          // General API requests
@@ -10,61 +16,36 @@ const MAX_REQUESTS = {
   booking: 10        // Booking attempts
 };
 
-// Cleanup old entries every minute
-setInterval(() => {
-  const now = Date.now();
-  for (const [key, data] of requestCounts.entries()) {
-    if (now - data.windowStart > WINDOW_MS) {
-      requestCounts.delete(key);
-    }
-  }
-}, WINDOW_MS);
-
 function createRateLimiter(type = 'api') {
   const limit = MAX_REQUESTS[type] || MAX_REQUESTS.api;
-  
-  return (req, res, next) => {
+  const check = { limit, windowMs: WINDOW_MS };
+
+  return async (req, res, next) => {
     // Get client identifier (IP address or user ID)
     const clientId = req.ip || req.connection.remoteAddress;
-    const key = `${type}:${clientId}`;
-    const now = Date.now();
-    
-    let clientData = requestCounts.get(key);
-    
-    if (!clientData || now - clientData.windowStart > WINDOW_MS) {
-      // New window
-      clientData = {
-        count: 1,
-        windowStart: now
-      };
-      requestCounts.set(key, clientData);
-      return next();
+    // Namespaced so these counts never share a window with the LoopBack limiters
+    const key = `srv:${type}:${clientId}`;
+
+    let result;
+    try {
+      result = await getRateLimiter().consume(key, check);
+    } catch (error) {
+      return next(error);
     }
-    
-    clientData.count++;
-    
-    if (clientData.count > limit) {
+
+    setRateLimitHeaders(res, result);
+    if (!result.allowed) {
       // Rate limit exceeded
-      const retryAfter = Math.ceil((clientData.windowStart + WINDOW_MS - now) / 1000);
-      res.setHeader('Retry-After', retryAfter);
-      res.setHeader('X-RateLimit-Limit', limit);
-      res.setHeader('X-RateLimit-Remaining', 0);
-      res.setHeader('X-RateLimit-Reset', new Date(clientData.windowStart + WINDOW_MS).toISOString());
-      
+      const retryAfter = Math.max(1, Math.ceil(result.retryAfterMs / 1000));
       return res.status(429).json({
         error: 'Too many requests',
         message: `Rate limit exceeded. Try again in ${retryAfter} seconds.`,
         retryAfter
       });
     }
-    
-    // Add rate limit headers
-    res.setHeader('X-RateLimit-Limit', limit);
-    res.setHeader('X-RateLimit-Remaining', limit - clientData.count);
-    res.setHeader('X-RateLimit-Reset', new Date(clientData.windowStart + WINDOW_MS).toISOString());
-    
+
     next();
   };
 }
 
-module.exports = { createRateLimiter };
\ No newline at end of file
+module.exports = { createRateLimiter };
@@ -5,6 +5,11 @@ const cors = require('cors');
 const crypto = require('crypto');
 const bcrypt = require('bcryptjs');
 const { createRateLimiter } = require('./middleware/rateLimiter');
+const { trackEvent } = require('./backend-loopback4/src/services/ingestion/tracking-events');
+const {
+  closeAllIngestionBuffers,
+  getIngestionMetrics
+} = require('./backend-loopback4/src/services/ingestion/ingestion-buffer');
 
 const app = express();
 const PORT = process.env.PORT || 3002;
@@ -583,19 +588,19 @@ app.post('/api/tracking/event', createRateLimiter('tracking'), (req, res) => {
     metadata: metadata || {}
   };
   
-  // Log tracking event (in production, this would go to database)
-  console.log('📊 Tracking event:', {
-    sessionId: sanitizedData.sessionId.substring(0, 10) + '...', // Truncate for privacy
-    event: sanitizedData.event,
-    page: sanitizedData.page,
-    timestamp: sanitizedData.timestamp,
-    deviceType: sanitizedData.deviceType
-  });
+  // Counted per hour in memory and written in batches; never waits on the
+  // database. Session IDs are not stored.
+  trackEvent(sanitizedData);
   
-  // Always return success
+  // Always return success, even if the event was shed under load
   res.json({ success: true });
 });
 
+// Tracking ingestion throughput and loss
+app.get('/api/admin/tracking/metrics', verifyAdminToken, (req, res) => {
+  res.json({ buffers: getIngestionMetrics() });
+});
+
 // Analytics endpoints
 app.get('/api/admin/analytics/comprehensive', verifyAdminToken, (req, res) => {
   const range = req.query.range || '30days';
@@ -733,13 +738,24 @@ app.get('*', (req, res) => {
   res.sendFile(path.join(__dirname, 'dist', 'index.html'));
 });
 
-// Graceful shutdown
-process.on('SIGTERM', () => {
-  console.log('SIGTERM signal received: closing HTTP server');
-  server.close(() => {
+// Graceful shutdown: stop accepting requests, then write out buffered
+// tracking events before exiting
+function shutdown(signal) {
+  console.log(`${signal} signal received: closing HTTP server`);
+  server.close(async () => {
     console.log('HTTP server closed');
+    try {
+      await closeAllIngestionBuffers();
+      console.log('Tracking buffers flushed');
+    } catch (error) {
+      console.error('Failed to flush tracking buffers:', error);
+    }
+    process.exit(0);
   });
-});
+}
+
+process.on('SIGTERM', () => shutdown('SIGTERM'));
+process.on('SIGINT', () => shutdown('SIGINT'));
 
 const server = app.listen(PORT, () => {
   console.log(`